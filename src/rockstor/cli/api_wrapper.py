@@ -17,26 +17,154 @@ along with this program. If not, see <http://www.gnu.org/licenses/>.
 """
 
 import requests
+import socket
+import threading
 import time
 import json
 import base64
+from requests.adapters import HTTPAdapter
+from urllib3.connection import HTTPConnection
+from urllib3.connectionpool import HTTPConnectionPool
 from storageadmin.exceptions import RockStorAPIException
 from storageadmin.models import OauthApp
 from django.conf import settings
 
+# Scheme used to address the local gunicorn instance over a unix domain socket.
+UNIX_SOCKET_URL = "http+unix://rockstor"
+
+# Per process caches shared by all APIWrapper instances. Sessions are keyed by
+# base url, tokens by (base url, client_id). Guarded by _cache_lock as
+# data_collector and the replication services call us from multiple greenlets.
+_sessions = {}
+_tokens = {}
+_cache_lock = threading.Lock()
+
+
+class UnixHTTPConnection(HTTPConnection):
+    def __init__(self, socket_path, *args, **kwargs):
+        self.socket_path = socket_path
+        super(UnixHTTPConnection, self).__init__("localhost", *args, **kwargs)
+
+    def connect(self):
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        if self.timeout is not socket._GLOBAL_DEFAULT_TIMEOUT:
+            sock.settimeout(self.timeout)
+        sock.connect(self.socket_path)
+        self.sock = sock
+
+
+class UnixHTTPConnectionPool(HTTPConnectionPool):
+    def __init__(self, socket_path, **kwargs):
+        super(UnixHTTPConnectionPool, self).__init__("localhost", **kwargs)
+        self.socket_path = socket_path
+
+    def _new_conn(self):
+        self.num_connections += 1
+        return UnixHTTPConnection(
+            self.socket_path, timeout=self.timeout.connect_timeout
+        )
+
+
+class UnixSocketAdapter(HTTPAdapter):
+    """
+    Transport adapter routing every request to a single keep-alive connection
+    pool on a unix domain socket, ie gunicorn's --bind=unix:<path>. The host
+    part of the url is ignored.
+    """
+
+    def __init__(self, socket_path, pool_maxsize=10, **kwargs):
+        self.socket_path = socket_path
+        self.unix_pool = UnixHTTPConnectionPool(socket_path, maxsize=pool_maxsize)
+        super(UnixSocketAdapter, self).__init__(
+            pool_connections=1, pool_maxsize=pool_maxsize, **kwargs
+        )
+
+    def get_connection(self, url, proxies=None):
+        return self.unix_pool
+
+    def request_url(self, request, proxies):
+        return request.path_url
+
+    def close(self):
+        self.unix_pool.close()
+        super(UnixSocketAdapter, self).close()
+
+
+def get_session(url, pool_size=None, unix_socket=None):
+    """
+    Return this process's keep-alive requests.Session for the given base url,
+    creating it on first use. Connection pool size defaults to
+    settings.API_WRAPPER['pool_size'].
+    :param url: base url, ie "http://127.0.0.1:8000" or UNIX_SOCKET_URL.
+    :param pool_size: max number of pooled connections.
+    :param unix_socket: path of unix domain socket to use for UNIX_SOCKET_URL.
+    :return: requests.Session
+    """
+    with _cache_lock:
+        session = _sessions.get(url)
+        if session is not None:
+            return session
+        if pool_size is None:
+            pool_size = settings.API_WRAPPER["pool_size"]
+        session = requests.Session()
+        session.verify = False
+        if unix_socket is not None:
+            session.mount(
+                "http+unix://",
+                UnixSocketAdapter(unix_socket, pool_maxsize=pool_size),
+            )
+        else:
+            adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+            session.mount("http://", adapter)
+            session.mount("https://", adapter)
+        _sessions[url] = session
+        return session
+
 
 class APIWrapper(object):
-    def __init__(self, client_id=None, client_secret=None, url=None):
-        self.access_token = None
-        self.expiration = time.time()
+    def __init__(
+        self, client_id=None, client_secret=None, url=None, pool_size=None,
+        unix_socket=None,
+    ):
         self.client_id = client_id
         self.client_secret = client_secret
         # directly connect to gunicorn, bypassing nginx as we are on the same
-        # host.
+        # host. Preferably via its unix socket, if one has been configured.
+        if unix_socket is None:
+            unix_socket = settings.API_WRAPPER["unix_socket"]
         self.url = "http://127.0.0.1:8000"
         if url is not None:
             # for remote urls.
             self.url = url
+            unix_socket = None
+        elif unix_socket is not None:
+            self.url = UNIX_SOCKET_URL
+        self.session = get_session(
+            self.url, pool_size=pool_size, unix_socket=unix_socket
+        )
+        # Wrappers for our internal OauthApp (no client_id) share one cache
+        # entry, avoiding a db lookup of its credentials per instance.
+        self.token_key = (self.url, client_id)
+
+    @property
+    def access_token(self):
+        token = _tokens.get(self.token_key)
+        if token is None:
+            return None
+        return token[0]
+
+    @property
+    def expiration(self):
+        token = _tokens.get(self.token_key)
+        if token is None:
+            return time.time()
+        return token[1]
+
+    def _token_valid(self):
+        margin = settings.API_WRAPPER["token_refresh_margin"]
+        return (
+            self.access_token is not None and time.time() < self.expiration - margin
+        )
 
     def set_token(self):
         if self.client_id is None or self.client_secret is None:
@@ -57,15 +185,19 @@ class APIWrapper(object):
         }
         content = None
         try:
-            response = requests.post(
+            response = self.session.post(
                 "%s/o/token/" % self.url,
                 data=token_request_data,
                 headers=auth_headers,
                 verify=False,
             )
             content = json.loads(response.content.decode("utf-8"))
-            self.access_token = content["access_token"]
-            self.expiration = int(time.time()) + content["expires_in"] - 600
+            # Record true expiry: _token_valid() refreshes ahead of it.
+            with _cache_lock:
+                _tokens[self.token_key] = (
+                    content["access_token"],
+                    int(time.time()) + content["expires_in"],
+                )
         except Exception as e:
             msg = (
                 "Exception while setting access_token for url(%s): %s. "
@@ -74,29 +206,31 @@ class APIWrapper(object):
             raise Exception(msg)
 
     def api_call(self, url, data=None, calltype="get", headers=None, save_error=True):
-        if self.access_token is None or time.time() > self.expiration:
+        if not self._token_valid():
             self.set_token()
 
         api_auth_header = {
             "Authorization": "Bearer " + self.access_token,
         }
-        call = getattr(requests, calltype)
-        url = "%s/api/%s" % (self.url, url)
+        call = getattr(self.session, calltype)
+        full_url = "%s/api/%s" % (self.url, url)
         try:
             if headers is not None:
                 headers.update(api_auth_header)
                 if headers["content-type"] == "application/json":
-                    r = call(url, verify=False, data=json.dumps(data), headers=headers)
+                    r = call(
+                        full_url, verify=False, data=json.dumps(data), headers=headers
+                    )
                 else:
-                    r = call(url, verify=False, data=data, headers=headers)
+                    r = call(full_url, verify=False, data=data, headers=headers)
             else:
-                r = call(url, verify=False, headers=api_auth_header, data=data)
+                r = call(full_url, verify=False, headers=api_auth_header, data=data)
         except requests.exceptions.ConnectionError:
             print("Error connecting to Rockstor. Is it running?")
             raise
 
         if r.status_code == 404:
-            msg = "Invalid api end point: %s" % url
+            msg = "Invalid api end point: %s" % full_url
             raise RockStorAPIException(detail=msg)
 
         if r.status_code != 200:
@@ -134,3 +268,28 @@ class APIWrapper(object):
         except ValueError:
             ret_val = {}
         return ret_val
+
+    def batch(self, calls, save_error=True):
+        """
+        Submit several api calls in one round trip via the api/batch end point.
+        Sub-requests are executed in order, server side, and each reports its
+        own status; a failing sub-request does not abort those that follow.
+        :param calls: list of dicts with keys "url" (relative to api/ as per
+        api_call), and optionally "calltype" (default "get") and "data".
+        :return: list of {"url", "status_code", "data"} dicts in call order.
+        """
+        sub_requests = [
+            {
+                "url": c["url"],
+                "method": c.get("calltype", "get"),
+                "data": c.get("data"),
+            }
+            for c in calls
+        ]
+        return self.api_call(
+            "batch",
+            data={"requests": sub_requests},
+            calltype="post",
+            headers={"content-type": "application/json"},
+            save_error=save_error,
+        )
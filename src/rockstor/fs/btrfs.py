@@ -16,8 +16,11 @@ You should have received a copy of the GNU General Public License
 along with this program. If not, see <http://www.gnu.org/licenses/>.
 """
 import collections
+import errno
+import fcntl
 import json
 import re
+import struct
 import time
 import os
 from system.osi import (
@@ -33,6 +36,7 @@ from system.osi import (
 )
 from system.exceptions import CommandException
 from system.constants import MOUNT, UMOUNT, RMDIR, DEFAULT_MNT_DIR
+from system.memoize import memoize
 from pool_scrub import PoolScrub
 from huey.contrib.djhuey import task
 from django.conf import settings
@@ -50,6 +54,13 @@ BTRFS = "/usr/sbin/btrfs"
 QID = "2015"
 # The following model/db default setting is also used when quotas are disabled.
 PQGROUP_DEFAULT = settings.MODEL_DEFS["pqgroup"]
+# btrfs qgroup ioctls as per linux/btrfs.h, ie _IOW(0x94, 42, 2 x __u64) for
+# qgroup create/destroy and _IOR(0x94, 43, 6 x __u64) for qgroup limit.
+BTRFS_IOC_QGROUP_CREATE = (1 << 30) | (16 << 16) | (0x94 << 8) | 42
+BTRFS_IOC_QGROUP_LIMIT = (2 << 30) | (48 << 16) | (0x94 << 8) | 43
+BTRFS_QGROUP_LIMIT_MAX_RFER = 1
+# A limit of (u64)-1 clears the given limit, as per "btrfs qgroup limit none".
+QGROUP_LIMIT_NONE = 2 ** 64 - 1
 # Potential candidate for settings.conf.in but currently only used here and
 # facilitates easier user modification, ie without buildout re-config step.
 # N.B. 'root/var/lib/machines' is auto created by systemd:
@@ -93,6 +104,8 @@ DevUsageInfo = collections.namedtuple("DevUsageInfo", "temp_name size allocated"
 DefaultSubvol = collections.namedtuple("DefaultSubvol", "id path boot_to_snap")
 # Named Tuple for balance status: active (boolean) internal (boolean) status (dict)
 BalanceStatusAll = collections.namedtuple("BalanceStatusAll", "active internal status")
+# Named Tuple for qgroup maintenance: orphans (list) limits (list) of qgroup ids
+QgroupPlan = collections.namedtuple("QgroupPlan", "orphans limits")
 # Named Tuple to define raid profile limits and data/metadata
 btrfs_profile = collections.namedtuple(
     "btrfs_profile",
@@ -904,6 +917,7 @@ def mount_snap(share, snap_name, snap_qgroup, snap_mnt=None):
         return run_command([MOUNT, "-o", subvol_str, pool_device, snap_mnt], log=True)
 
 
+@memoize("default_subvol")
 def default_subvol():
     """
     Returns the default vol/subvol id, path, and boot_to_snap boolean for /, used by
@@ -1209,6 +1223,40 @@ def remove_snap(pool, share_name, snap_name, snap_qgroup):
                 return run_command([BTRFS, "subvolume", "delete", snap], log=True)
 
 
+def remove_snaps(pool, snaps):
+    """
+    Bulk variant of remove_snap(). All given snapshots are deleted by a single
+    "btrfs subvolume delete" (which accepts multiple paths). Their qgroups are
+    then cleaned up in one pass, see qgroups_destroy(). Existence is checked
+    against one "btrfs subvolume list -s" rather than a subvol show per snap.
+    :param pool: pool object
+    :param snaps: list of (share_name, snap_name, snap_qgroup) tuples.
+    :return: list of destroyed qgroup ids.
+    """
+    root_mnt = mount_root(pool)
+    snap_paths = snapshot_idmap(root_mnt).values()
+    known_paths = set(snap_paths)
+    del_paths = []
+    qgroups = []
+    for share_name, snap_name, snap_qgroup in snaps:
+        rel_path = ".snapshots/{}/{}".format(share_name, snap_name)
+        snap_path = "{}/{}".format(root_mnt, rel_path)
+        if is_mounted(snap_path):
+            umount_root(snap_path)
+        if rel_path in known_paths:
+            del_paths.append(snap_path)
+            qgroups.append(snap_qgroup)
+            continue
+        # As per remove_snap(): just give the first match.
+        for path in snap_paths:
+            if path.endswith(snap_name):
+                del_paths.append("{}/{}".format(root_mnt, path))
+                break
+    if len(del_paths) > 0:
+        run_command([BTRFS, "subvolume", "delete"] + del_paths, log=True)
+    return qgroups_destroy(qgroups, root_mnt)
+
+
 def add_snap_helper(orig, snap, writable):
     cmd = [BTRFS, "subvolume", "snapshot", orig, snap]
     if not writable:
@@ -1463,39 +1511,241 @@ def qgroup_create(pool, qgroup=PQGROUP_DEFAULT):
     return qid
 
 
-def qgroup_destroy(qid, mnt_pt):
+def qgroup_ids(mnt_pt):
+    """
+    Parses "btrfs qgroup show mnt_pt" for the set of existing qgroup ids.
+    :param mnt_pt: Pool (vol) mount point.
+    :return: set of qgroup ids, ie {"0/5", "0/257", "2015/1"}, or None if quotas
+    are disabled or in an indeterminate state.
+    """
     cmd = [BTRFS, "qgroup", "show", mnt_pt]
     try:
         o, e, rc = run_command(cmd, log=False)
     except CommandException as e:
-        # we may have quotas disabled so catch and deal.
-        emsg = "ERROR: can't list qgroups: quotas not enabled"
-        if e.err[0] == emsg:
+        if qgroups_unavailable(e, mnt_pt):
             # we have quotas disabled so can't destroy any anyway so skip
-            # and deal by returning False so our caller moves on.
-            return False
-        # Also catch missing qgroup and log suggestion as per in qgroup_max()
-        # confused/indeterminate quota state:
-        emsg2 = "ERROR: cannot find the qgroup"
-        # this is non fatal so treat as disabled and advise. Avoids blocking imports.
-        # Also check second line for same, as first line can be taken by the following:
-        # "WARNING: qgroup data inconsistent, rescan recommended"
-        if (re.match(emsg2, e.err[0]) is not None) or (
-            len(e.err) > 1 and re.match(emsg2, e.err[1]) is not None
-        ):
-            logger.info(
-                "Mount Point: {} has indeterminate quota status, skipping "
-                "qgroup show.\nTry 'btrfs quota disable {}'.".format(mnt_pt, mnt_pt)
-            )
-            return False
+            # and deal by returning None so our caller moves on.
+            return None
         # otherwise we raise an exception as normal
         raise e
-    for l in o:
-        if re.match(qid, l) is not None and l.split()[0] == qid:
-            return run_command([BTRFS, "qgroup", "destroy", qid, mnt_pt], log=True)
+    return set(l.split()[0] for l in o if len(l.split()) > 0)
+
+
+def qgroups_unavailable(e, mnt_pt):
+    """
+    Establish if a "btrfs qgroup show" CommandException is due to quotas being
+    disabled, or in an indeterminate state, rather than a genuine failure.
+    :param e: CommandException raised by run_command().
+    :param mnt_pt: Pool (vol) mount point, for logging.
+    :return: True if the caller should treat quotas as disabled.
+    """
+    # we may have quotas disabled so catch and deal.
+    emsg = "ERROR: can't list qgroups: quotas not enabled"
+    if e.err[0] == emsg:
+        return True
+    # Also catch missing qgroup and log suggestion as per in qgroup_max()
+    # confused/indeterminate quota state:
+    emsg2 = "ERROR: cannot find the qgroup"
+    # this is non fatal so treat as disabled and advise. Avoids blocking imports.
+    # Also check second line for same, as first line can be taken by the following:
+    # "WARNING: qgroup data inconsistent, rescan recommended"
+    if (re.match(emsg2, e.err[0]) is not None) or (
+        len(e.err) > 1 and re.match(emsg2, e.err[1]) is not None
+    ):
+        logger.info(
+            "Mount Point: {} has indeterminate quota status, skipping "
+            "qgroup show.\nTry 'btrfs quota disable {}'.".format(mnt_pt, mnt_pt)
+        )
+        return True
+    return False
+
+
+def qgroup_destroy(qid, mnt_pt):
+    existing_qgroups = qgroup_ids(mnt_pt)
+    if existing_qgroups is not None and qid in existing_qgroups:
+        return run_command([BTRFS, "qgroup", "destroy", qid, mnt_pt], log=True)
     return False
 
 
+def qgroups_destroy(qids, mnt_pt):
+    """
+    Bulk variant of qgroup_destroy(): a single "btrfs qgroup show" establishes
+    which of the given qgroups exist, each of which is then destroyed.
+    :param qids: list of qgroup ids, ie ["0/257", "0/258"].
+    :param mnt_pt: Pool (vol) mount point.
+    :return: list of destroyed qgroup ids.
+    """
+    destroyed = []
+    if len(qids) == 0:
+        return destroyed
+    existing_qgroups = qgroup_ids(mnt_pt)
+    if existing_qgroups is None:
+        return destroyed
+    for qid in qids:
+        if qid in existing_qgroups:
+            run_command([BTRFS, "qgroup", "destroy", qid, mnt_pt], log=True)
+            destroyed.append(qid)
+    return destroyed
+
+
+def qgroup_show(mnt_pt):
+    """
+    Parses "btrfs qgroup show -pre --raw mnt_pt" for the referenced limit and
+    parent qgroups of every qgroup. Columns are located by header name as
+    newer btrfs-progs append a path column.
+    :param mnt_pt: Pool (vol) mount point.
+    :return: dict indexed by qgroup id of {"max_rfer": "none" or bytes string,
+    "parents": set of qgroup ids}, or None if quotas are disabled or in an
+    indeterminate state.
+    """
+    cmd = [BTRFS, "qgroup", "show", "-pre", "--raw", mnt_pt]
+    try:
+        o, e, rc = run_command(cmd, log=False)
+    except CommandException as e:
+        if qgroups_unavailable(e, mnt_pt):
+            return None
+        raise e
+    if e[0] == "WARNING: quota disabled, qgroup data may be out of date":
+        return None
+    qgroups = {}
+    columns = None
+    for l in o:
+        fields = l.split()
+        if len(fields) == 0 or fields[0].startswith("---"):
+            continue
+        if fields[0] == "qgroupid":
+            columns = fields
+            continue
+        if columns is None:
+            continue
+        row = dict(zip(columns, fields))
+        qgroups[fields[0]] = {
+            "max_rfer": row.get("max_rfer", "none"),
+            "parents": set(
+                q for q in row.get("parent", "---").split(",") if q != "---"
+            ),
+        }
+    return qgroups
+
+
+def subvol_qgroups(mnt_pt):
+    """
+    Parses "btrfs subvolume list mnt_pt" for the level 0 qgroup ids of all
+    subvolumes in a pool.
+    :param mnt_pt: Pool (vol) mount point.
+    :return: set of qgroup ids, ie {"0/257", "0/258"}.
+    """
+    o, e, rc = run_command([BTRFS, "subvolume", "list", mnt_pt], log=False)
+    return set(
+        "0/{}".format(l.split()[1]) for l in o if re.match("ID ", l) is not None
+    )
+
+
+def qgroup_maintenance_plan(mnt_pt):
+    """
+    Establish the qgroup maintenance due on a pool from a single qgroup show
+    and a single subvolume list: level 0 qgroups with no subvolume (orphans),
+    and parent qgroups still carrying a referenced limit, as we currently
+    maintain no limits (see update_quota()).
+    :param mnt_pt: Pool (vol) mount point.
+    :return: QgroupPlan or None if quotas are disabled.
+    """
+    qgroups = qgroup_show(mnt_pt)
+    if qgroups is None:
+        return None
+    level0 = set(q for q in qgroups if q.startswith("0/")) - {"0/5"}
+    orphans = level0 - subvol_qgroups(mnt_pt)
+    parents = set()
+    for q in qgroups.values():
+        parents |= q["parents"]
+    limits = set(
+        q for q in parents if q in qgroups and qgroups[q]["max_rfer"] != "none"
+    )
+    return QgroupPlan(
+        sorted(orphans, key=qgroup_sort_key), sorted(limits, key=qgroup_sort_key)
+    )
+
+
+def qgroup_sort_key(qid):
+    return tuple(int(i) for i in qid.split("/"))
+
+
+def qgroupid(qid):
+    """
+    Convert a qgroup id string to the kernel's u64 form: level << 48 | id.
+    :param qid: qgroup id, ie "2015/3".
+    """
+    level, sid = qid.split("/")
+    return (int(level) << 48) | int(sid)
+
+
+def qgroup_ioctl_destroy(fd, qid):
+    fcntl.ioctl(fd, BTRFS_IOC_QGROUP_CREATE, struct.pack("=QQ", 0, qgroupid(qid)))
+
+
+def qgroup_ioctl_limit_none(fd, qid):
+    args = struct.pack(
+        "=QQQQQQ",
+        qgroupid(qid),
+        BTRFS_QGROUP_LIMIT_MAX_RFER,
+        QGROUP_LIMIT_NONE,
+        0,
+        0,
+        0,
+    )
+    fcntl.ioctl(fd, BTRFS_IOC_QGROUP_LIMIT, args)
+
+
+def qgroup_maintenance(mnt_pt, orphans=True, limits=True, dry_run=False):
+    """
+    Destroy orphaned qgroups and/or clear parent qgroup limits as per
+    qgroup_maintenance_plan(). All changes are applied via ioctl on a single
+    open of the pool mount point, avoiding a btrfs command per qgroup; the
+    btrfs command is only used for a qgroup whose ioctl fails. Failures are
+    logged and do not block the remaining changes.
+    :param mnt_pt: Pool (vol) mount point.
+    :param orphans: destroy orphaned qgroups.
+    :param limits: clear parent qgroup limits.
+    :param dry_run: establish, but do not apply, the changes.
+    :return: QgroupPlan of the requested changes or None if quotas are disabled.
+    """
+    plan = qgroup_maintenance_plan(mnt_pt)
+    if plan is None:
+        return None
+    plan = QgroupPlan(plan.orphans if orphans else [], plan.limits if limits else [])
+    if dry_run or (len(plan.orphans) == 0 and len(plan.limits) == 0):
+        return plan
+    ops = [(qid, qgroup_ioctl_destroy, ["destroy", qid]) for qid in plan.orphans]
+    ops.extend(
+        [(qid, qgroup_ioctl_limit_none, ["limit", "none", qid]) for qid in plan.limits]
+    )
+    fd = os.open(mnt_pt, os.O_RDONLY)
+    try:
+        for qid, op, args in ops:
+            try:
+                op(fd, qid)
+                continue
+            except (IOError, OSError) as e:
+                if e.errno == errno.ENOENT and op is qgroup_ioctl_destroy:
+                    # Already gone, ie via a concurrent subvolume delete.
+                    continue
+                logger.debug(
+                    "qgroup ioctl failed for ({}) on ({}): {}. Falling back "
+                    "to btrfs command.".format(qid, mnt_pt, e.__str__())
+                )
+            try:
+                run_command([BTRFS, "qgroup"] + args + [mnt_pt], log=False)
+            except CommandException as e:
+                logger.error(
+                    "Failed qgroup maintenance of ({}) on ({}): {}".format(
+                        qid, mnt_pt, e.err
+                    )
+                )
+    finally:
+        os.close(fd)
+    return plan
+
+
 def qgroup_is_assigned(qid, pqid, mnt_pt):
     # Returns true if the given qgroup qid is already assigned to pqid for the
     # path(mnt_pt)
@@ -13,8 +13,10 @@ You should have received a copy of the GNU General Public License
 along with this program. If not, see <http://www.gnu.org/licenses/>.
 """
 import json
+import os
 import unittest
 from datetime import datetime
+from system.memoize import invalidate
 from fs.btrfs import (
     get_pool_raid_levels,
     is_subvol,
@@ -40,8 +42,12 @@ from fs.btrfs import (
     scrub_status_raw,
     scrub_status_extra,
     get_pool_raid_profile,
+    remove_snaps,
+    qgroup_maintenance,
+    qgroupid,
+    QgroupPlan,
 )
-from mock import patch
+from mock import patch, call
 
 
 class Pool(object):
@@ -60,6 +66,8 @@ class BTRFSTests(unittest.TestCase):
     """
 
     def setUp(self):
+        # No memoized results from prior tests, or the system running us.
+        invalidate()
         self.patch_run_command = patch("fs.btrfs.run_command")
         self.mock_run_command = self.patch_run_command.start()
         # # setup mock patch for is_mounted() in fs.btrfs
@@ -3450,6 +3458,7 @@ class BTRFSTests(unittest.TestCase):
             # print('each out = {}'.format(o))
             # print('each expected = {}'.format(expected))
             self.mock_run_command.return_value = (o, e, r)
+            invalidate()
             returned = default_subvol()
             self.assertEqual(
                 returned,
@@ -3458,3 +3467,117 @@ class BTRFSTests(unittest.TestCase):
                 "returned = ({}).\n "
                 "expected = ({}).".format(returned, expected),
             )
+
+    def test_remove_snaps(self):
+        """
+        Test remove_snaps() issues a single subvol delete for all existing
+        snapshots, and destroys only their qgroups that exist, via a single
+        qgroup show.
+        """
+        pool = Pool(raid="raid1", name="test-pool")
+        root_mnt = "/mnt2/test-pool"
+        self.mock_mount_root.return_value = root_mnt
+        self.patch_snap_idmap = patch("fs.btrfs.snapshot_idmap")
+        self.mock_snap_idmap = self.patch_snap_idmap.start()
+        self.mock_snap_idmap.return_value = {
+            "258": ".snapshots/share1/snap1",
+            "259": ".snapshots/share1/snap2",
+        }
+        self.patch_is_mounted = patch("fs.btrfs.is_mounted")
+        self.mock_is_mounted = self.patch_is_mounted.start()
+        self.mock_is_mounted.return_value = False
+        qgroup_show_out = [
+            "qgroupid         rfer         excl ",
+            "--------         ----         ---- ",
+            "0/5          16.00KiB     16.00KiB ",
+            "0/258        16.00KiB     16.00KiB ",
+            "",
+        ]
+        self.mock_run_command.side_effect = [
+            ([""], [""], 0),  # btrfs subvolume delete
+            (qgroup_show_out, [""], 0),  # btrfs qgroup show
+            ([""], [""], 0),  # btrfs qgroup destroy 0/258
+        ]
+        snaps = [
+            ("share1", "snap1", "0/258"),
+            ("share1", "snap2", "0/259"),
+            ("share1", "snap-gone", "0/260"),
+        ]
+        returned = remove_snaps(pool, snaps)
+        self.assertEqual(returned, ["0/258"])
+        self.assertEqual(self.mock_run_command.call_count, 3)
+        self.assertEqual(
+            self.mock_run_command.call_args_list[0],
+            call(
+                [
+                    "/usr/sbin/btrfs",
+                    "subvolume",
+                    "delete",
+                    "{}/.snapshots/share1/snap1".format(root_mnt),
+                    "{}/.snapshots/share1/snap2".format(root_mnt),
+                ],
+                log=True,
+            ),
+        )
+        self.assertEqual(
+            self.mock_run_command.call_args_list[2],
+            call(["/usr/sbin/btrfs", "qgroup", "destroy", "0/258", root_mnt], log=True),
+        )
+
+    def test_qgroup_maintenance(self):
+        """
+        Test qgroup_maintenance() establishes orphaned qgroups and limited
+        parent qgroups from one qgroup show and one subvolume list, and applies
+        them via ioctl, falling back to the btrfs command on ioctl failure.
+        """
+        root_mnt = "/mnt2/test-pool"
+        qgroup_show_out = [
+            "qgroupid         rfer         excl     max_rfer     max_excl parent  ",
+            "--------         ----         ----     --------     -------- ------  ",
+            "0/5             16384        16384         none         none ---     ",
+            "0/257           16384        16384         none         none 2015/1  ",
+            "0/258           16384        16384         none         none 2015/2  ",
+            "0/300           16384        16384         none         none ---     ",
+            "0/301           16384        16384         none         none ---     ",
+            "2015/1          16384        16384   1073741824         none ---     ",
+            "2015/2          16384        16384         none         none ---     ",
+            "",
+        ]
+        subvol_list_out = [
+            "ID 257 gen 12 top level 5 path share1",
+            "ID 258 gen 14 top level 5 path share2",
+            "",
+        ]
+        self.mock_run_command.side_effect = [
+            (qgroup_show_out, [""], 0),
+            (subvol_list_out, [""], 0),
+        ]
+        expected = QgroupPlan(orphans=["0/300", "0/301"], limits=["2015/1"])
+        returned = qgroup_maintenance(root_mnt, dry_run=True)
+        self.assertEqual(returned, expected)
+        self.assertEqual(self.mock_run_command.call_count, 2)
+        self.assertEqual(qgroupid("2015/1"), (2015 << 48) | 1)
+
+        self.mock_run_command.reset_mock()
+        self.mock_run_command.side_effect = [
+            (qgroup_show_out, [""], 0),
+            (subvol_list_out, [""], 0),
+            ([""], [""], 0),  # btrfs qgroup destroy 0/301 fallback
+        ]
+        self.patch_os_open = patch("fs.btrfs.os.open")
+        self.mock_os_open = self.patch_os_open.start()
+        self.mock_os_open.return_value = 42
+        self.patch_os_close = patch("fs.btrfs.os.close")
+        self.mock_os_close = self.patch_os_close.start()
+        self.patch_ioctl = patch("fs.btrfs.fcntl.ioctl")
+        self.mock_ioctl = self.patch_ioctl.start()
+        self.mock_ioctl.side_effect = [None, IOError(25, "ENOTTY"), None]
+        returned = qgroup_maintenance(root_mnt)
+        self.assertEqual(returned, expected)
+        self.assertEqual(self.mock_ioctl.call_count, 3)
+        self.mock_os_open.assert_called_once_with(root_mnt, os.O_RDONLY)
+        self.mock_os_close.assert_called_once_with(42)
+        self.assertEqual(
+            self.mock_run_command.call_args_list[2],
+            call(["/usr/sbin/btrfs", "qgroup", "destroy", "0/301", root_mnt], log=False),
+        )
@@ -17,4 +17,6 @@ along with this program. If not, see <http://www.gnu.org/licenses/>.
 """
 
 from generic_view import GenericView  # noqa F401
+from sorted_list import SortedListMixin  # noqa F401
 from renderers import IgnoreClient  # noqa F401
+from etag import bump_versions  # noqa F401
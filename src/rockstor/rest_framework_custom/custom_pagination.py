@@ -19,5 +19,42 @@ along with this program. If not, see <http://www.gnu.org/licenses/>.
 from rest_framework import pagination
 
 
+class KeysetPagination(pagination.CursorPagination):
+    """
+    Cursor (keyset) pagination in the queryset's own order, as established
+    by the view, ie via SortedListMixin. Pages are fetched with a
+    "WHERE <order field> > <position>" clause rather than OFFSET, so the cost
+    of a page does not grow with its distance from the start.
+    """
+    page_size_query_param = 'page_size'
+
+    def get_ordering(self, request, queryset, view):
+        ordering = tuple(queryset.query.order_by)
+        if not ordering:
+            return ('-pk',)
+        return ordering
+
+
 class CustomPagination(pagination.PageNumberPagination):
+    """
+    Page number pagination by default: ?page=<n>. Querysets requested with
+    ?cursor= (empty for the first page) are instead keyset paginated, with
+    "next" and "previous" links carrying the cursor, but with no "count".
+    Lists, and sliced querysets, are always page number paginated.
+    """
     page_size_query_param = 'page_size'
+    cursor_query_param = 'cursor'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.keyset = None
+        if (self.cursor_query_param in request.query_params and
+                hasattr(queryset, 'query') and queryset.query.can_filter()):
+            self.keyset = KeysetPagination()
+            return self.keyset.paginate_queryset(queryset, request, view)
+        return super(CustomPagination, self).paginate_queryset(
+            queryset, request, view)
+
+    def get_paginated_response(self, data):
+        if self.keyset is not None:
+            return self.keyset.get_paginated_response(data)
+        return super(CustomPagination, self).get_paginated_response(data)
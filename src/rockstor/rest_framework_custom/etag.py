@@ -0,0 +1,171 @@
+"""
+Copyright (c) 2012-2023 RockStor, Inc. <http://rockstor.com>
+This file is part of RockStor.
+
+RockStor is free software; you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published
+by the Free Software Foundation; either version 2 of the License,
+or (at your option) any later version.
+
+RockStor is distributed in the hope that it will be useful, but
+WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program. If not, see <http://www.gnu.org/licenses/>.
+"""
+
+import fcntl
+import hashlib
+import os
+import time
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.utils.http import parse_etags, quote_etag
+
+# Model groups: a version counter per group is bumped whenever one of its
+# models is saved or deleted. Views declare the groups their representation
+# depends on (GenericView.etag_groups) and their ETag is derived from those
+# versions, so it changes whenever any of the underlying rows do.
+MODEL_GROUPS = {
+    "pools": ("storageadmin.Pool", "smart_manager.PoolUsage"),
+    "disks": ("storageadmin.Disk",),
+    # Snapshots and NFS exports are nested in the share representation.
+    "shares": (
+        "storageadmin.Share",
+        "storageadmin.Snapshot",
+        "storageadmin.NFSExport",
+    ),
+    # ServiceStatus is re-sampled (saved) by every service list GET, so only
+    # config changes and writes via the service views count; see max_age.
+    "services": ("smart_manager.Service",),
+}
+
+
+def _version_path(group):
+    return os.path.join(settings.ETAG["dir"], group)
+
+
+def get_version(group):
+    """
+    Current version of a model group, shared by all processes via a file in
+    settings.ETAG['dir'] (written by atomic rename, so reads need no lock).
+    """
+    try:
+        with open(_version_path(group)) as fo:
+            return fo.read()
+    except IOError:
+        return bump_version(group)
+
+
+def bump_version(group):
+    """
+    Increment a model group's version, invalidating all ETags derived from it.
+    A new counter is seeded from the clock so versions handed out before a
+    reboot (settings.ETAG['dir'] is on tmpfs) are not reissued.
+    :return: the new version string.
+    """
+    path = _version_path(group)
+    if not os.path.isdir(settings.ETAG["dir"]):
+        try:
+            os.makedirs(settings.ETAG["dir"])
+        except OSError:
+            # Created concurrently by another process.
+            pass
+    with open("{}.lock".format(path), "w") as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        try:
+            with open(path) as fo:
+                version = int(fo.read()) + 1
+        except (IOError, ValueError):
+            version = int(time.time() * 1000)
+        tmp_path = "{}.tmp".format(path)
+        with open(tmp_path, "w") as fo:
+            fo.write(str(version))
+        os.rename(tmp_path, path)
+    return str(version)
+
+
+class _PendingBumps(object):
+    """
+    on_commit callback bumping a set of model groups, shared by all the saves
+    and deletes of a transaction so each group is bumped once on commit.
+    """
+
+    def __init__(self, groups):
+        self.groups = set(groups)
+
+    def __call__(self):
+        for group in self.groups:
+            bump_version(group)
+
+
+def bump_versions(groups, using=None):
+    """
+    Bump the versions of the given model groups once the current transaction
+    on the "using" db commits (immediately in autocommit mode). Bumping any
+    earlier would let a concurrent GET tag the pre-commit state with the new
+    version. Within a transaction the groups join the bumps already pending
+    at an enclosing savepoint level, so a bulk save writes each version once.
+    """
+    connection = transaction.get_connection(using)
+    if connection.in_atomic_block:
+        # Only join callbacks a rollback can not discard without also
+        # discarding the change at hand, i.e. of still active savepoints.
+        active = set(connection.savepoint_ids)
+        for sids, func in connection.run_on_commit:
+            if isinstance(func, _PendingBumps) and sids <= active:
+                func.groups.update(groups)
+                return
+    transaction.on_commit(_PendingBumps(groups), using=using)
+
+
+def _model_changed(sender, using=None, **kwargs):
+    bump_versions(_groups_by_model[sender._meta.label], using=using)
+
+
+_groups_by_model = {}
+for _group, _models in MODEL_GROUPS.items():
+    for _model in _models:
+        _groups_by_model.setdefault(_model, []).append(_group)
+for _model in _groups_by_model:
+    post_save.connect(
+        _model_changed, sender=_model, dispatch_uid="etag_save_{}".format(_model)
+    )
+    post_delete.connect(
+        _model_changed, sender=_model, dispatch_uid="etag_delete_{}".format(_model)
+    )
+
+
+def make_etag(request, groups):
+    """
+    ETag of a GET request to a view depending on the given model groups: a
+    hash of the full path (query parameters select the page, sort order etc),
+    the negotiated media type and the group versions. It also changes every
+    settings.ETAG['max_age'] seconds, bounding the staleness of serializer
+    fields that are read live from the system rather than the db.
+    """
+    key = [
+        request.get_full_path(),
+        request.META.get("HTTP_ACCEPT", ""),
+        str(int(time.time()) // settings.ETAG["max_age"]),
+    ]
+    key.extend(get_version(g) for g in groups)
+    return quote_etag(hashlib.md5("\n".join(key)).hexdigest())
+
+
+def etag_matches(request, etag):
+    """
+    True if the request's If-None-Match header lists etag (or is "*"). As per
+    RFC 7232 the comparison is weak, nginx weakens ETags when compressing.
+    """
+    if_none_match = request.META.get("HTTP_IF_NONE_MATCH")
+    if if_none_match is None:
+        return False
+    for candidate in parse_etags(if_none_match):
+        if candidate == "*" or candidate.replace("W/", "", 1) == etag:
+            return True
+    return False
@@ -16,7 +16,10 @@ You should have received a copy of the GNU General Public License
 along with this program. If not, see <http://www.gnu.org/licenses/>.
 """
 
+from rest_framework import status
 from rest_framework.generics import ListCreateAPIView
+from rest_framework.permissions import SAFE_METHODS
+from rest_framework.response import Response
 from rest_framework.authentication import (BasicAuthentication,
                                            SessionAuthentication,)
 from storageadmin.auth import DigestAuthentication
@@ -25,6 +28,7 @@ from oauth_wrapper import RockstorOAuth2Authentication
 from contextlib import contextmanager
 from storageadmin.util import handle_exception
 from storageadmin.exceptions import RockStorAPIException
+from etag import bump_versions, etag_matches, make_etag
 
 
 # TODO: Only allow put, and patch where necessary. This works right now
@@ -33,6 +37,33 @@ class GenericView(ListCreateAPIView):
                               BasicAuthentication,
                               RockstorOAuth2Authentication,)
     permission_classes = (IsAuthenticated, )
+    # Model groups (see etag.MODEL_GROUPS) this view's representation depends
+    # on. If any, list GETs are conditional (ETag / If-None-Match) on their
+    # versions and successful writes through the view bump them.
+    etag_groups = ()
+
+    def get(self, request, *args, **kwargs):
+        if not self.etag_groups:
+            return super(GenericView, self).get(request, *args, **kwargs)
+        # Versions are read before the queryset is, so a concurrent change
+        # can only cause a needless full response, never a stale 304.
+        etag = make_etag(request, self.etag_groups)
+        headers = {'ETag': etag, 'Cache-Control': 'no-cache'}
+        if etag_matches(request, etag):
+            return Response(status=status.HTTP_304_NOT_MODIFIED,
+                            headers=headers)
+        response = super(GenericView, self).get(request, *args, **kwargs)
+        if response.status_code == status.HTTP_200_OK:
+            for header, value in headers.items():
+                response[header] = value
+        return response
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        if (self.etag_groups and request.method not in SAFE_METHODS and
+                response.status_code < 400):
+            bump_versions(self.etag_groups)
+        return super(GenericView, self).finalize_response(
+            request, response, *args, **kwargs)
 
     @staticmethod
     @contextmanager
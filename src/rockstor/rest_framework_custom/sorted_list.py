@@ -0,0 +1,75 @@
+"""
+Copyright (c) 2012-2023 RockStor, Inc. <http://rockstor.com>
+This file is part of RockStor.
+
+RockStor is free software; you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published
+by the Free Software Foundation; either version 2 of the License,
+or (at your option) any later version.
+
+RockStor is distributed in the hope that it will be useful, but
+WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program. If not, see <http://www.gnu.org/licenses/>.
+"""
+
+from operator import attrgetter
+
+from storageadmin.util import handle_exception
+
+
+class SortedListMixin(object):
+    """
+    Database side sorting and filtering for rfc.GenericView list views.
+    ?sortby=<name>[&reverse=yes] orders by the model field mapped to <name>
+    in sort_fields, with the primary key as tie breaker, and unknown names are
+    rejected. Query parameters named in filter_fields are applied as their
+    mapped ORM lookups. The result suits both page number and keyset
+    (?cursor=) pagination, see CustomPagination.
+    """
+    # {sortby value: model field}
+    sort_fields = {}
+    # {query parameter: ORM lookup}, ie {'name': 'name__icontains'}
+    filter_fields = {}
+    default_ordering = ('-id',)
+
+    def _sort_field(self):
+        # Model field requested via ?sortby=, None if not requested.
+        sort_col = self.request.query_params.get('sortby', None)
+        if sort_col is None:
+            return None
+        if sort_col not in self.sort_fields:
+            e_msg = ('Unsupported sortby ({}). Supported values are: '
+                     '{}.').format(sort_col, ', '.join(sorted(self.sort_fields)))
+            handle_exception(Exception(e_msg), self.request, status_code=400)
+        return self.sort_fields[sort_col]
+
+    def _reverse(self):
+        return self.request.query_params.get('reverse', 'no') == 'yes'
+
+    def sort_and_filter(self, queryset):
+        filters = {}
+        for param, lookup in self.filter_fields.items():
+            value = self.request.query_params.get(param)
+            if value is not None and value != '':
+                filters[lookup] = value
+        if filters:
+            queryset = queryset.filter(**filters)
+        field = self._sort_field()
+        if field is None:
+            return queryset.order_by(*self.default_ordering)
+        prefix = '-' if self._reverse() else ''
+        return queryset.order_by(prefix + field, prefix + 'pk')
+
+    def sort_list(self, items):
+        """
+        As per sort_and_filter()'s sorting, but in Python, for a list merged
+        from several sources. The list is returned as is if no sortby is given.
+        """
+        field = self._sort_field()
+        if field is None:
+            return items
+        return sorted(items, key=attrgetter(field), reverse=self._reverse())
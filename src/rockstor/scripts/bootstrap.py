@@ -29,6 +29,9 @@ BASE_DIR = settings.ROOT_DIR
 BASE_BIN = "{}.venv/bin".format(BASE_DIR)
 QGROUP_CLEAN = "{}/qgroup-clean".format(BASE_BIN)
 QGROUP_MAXOUT_LIMIT = "{}/qgroup-maxout-limit".format(BASE_BIN)
+# Retry delay, in seconds, doubling per failed attempt up to RETRY_MAX_DELAY.
+RETRY_DELAY = 0.5
+RETRY_MAX_DELAY = 8
 
 
 def main():
@@ -51,10 +54,10 @@ def main():
         return
 
     num_attempts = 0
+    delay = RETRY_DELAY
     while True:
         try:
             aw = APIWrapper()
-            time.sleep(2)
             aw.api_call("network")
             aw.api_call("commands/bootstrap", calltype="post")
             break
@@ -71,9 +74,10 @@ def main():
             print(
                 "Exception occured while bootstrapping. This could be "
                 "because rockstor.service is still starting up. will "
-                "wait 2 seconds and try again. Exception: %s" % e.__str__()
+                "wait %s seconds and try again. Exception: %s" % (delay, e.__str__())
             )
-            time.sleep(2)
+            time.sleep(delay)
+            delay = min(delay * 2, RETRY_MAX_DELAY)
             num_attempts += 1
     print("Bootstrapping complete")
 
@@ -21,7 +21,6 @@ import logging
 import os
 import re
 import shutil
-import stat
 import sys
 from tempfile import mkstemp
 
@@ -116,14 +115,6 @@ LOCAL_FILES = {
     "samba_config": LocalFile(
         path="/etc/samba/smb.conf", mask=None, services=["nmb", "smb"]
     ),
-    "rockstor_crontab": LocalFile(
-        path="/etc/cron.d/rockstortab", mask=stat.S_IRUSR | stat.S_IWUSR, services=None
-    ),
-    "replication_crontab": LocalFile(
-        path="/etc/cron.d/replicationtab",
-        mask=stat.S_IRUSR | stat.S_IWUSR,
-        services=None,
-    ),
 }
 
 
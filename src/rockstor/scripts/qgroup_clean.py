@@ -16,45 +16,31 @@ You should have received a copy of the GNU General Public License
 along with this program. If not, see <http://www.gnu.org/licenses/>.
 """
 
-import re
+import sys
 from storageadmin.models import Pool
-from system.osi import run_command
-from fs.btrfs import mount_root
-
-BTRFS = "/usr/sbin/btrfs"
+from fs.btrfs import mount_root, qgroup_maintenance
 
 
 def main():
+    # qgroup-clean [--dry-run]
+    dry_run = "--dry-run" in sys.argv[1:]
     for p in Pool.objects.all():
         try:
             print("Processing pool(%s)" % p.name)
             mnt_pt = mount_root(p)
-            o, e, rc = run_command([BTRFS, "subvol", "list", mnt_pt])
-            subvol_ids = []
-            for l in o:
-                if re.match("ID ", l) is not None:
-                    subvol_ids.append(l.split()[1])
-
-            o, e, rc = run_command([BTRFS, "qgroup", "show", mnt_pt], throw=False)
-            if rc != 0:
+            plan = qgroup_maintenance(mnt_pt, limits=False, dry_run=dry_run)
+            if plan is None:
                 print("Quotas not enabled on pool(%s). Skipping it." % p.name)
                 continue
-
-            qgroup_ids = []
-            for l in o:
-                if re.match("0/", l) is not None:
-                    q = l.split()[0].split("/")[1]
-                    if q == "5":
-                        continue
-                    qgroup_ids.append(l.split()[0].split("/")[1])
-
-            for q in qgroup_ids:
-                if q not in subvol_ids:
-                    print("qgroup %s not in use. deleting" % q)
-                    run_command([BTRFS, "qgroup", "destroy", "0/%s" % q, mnt_pt])
+            for q in plan.orphans:
+                if dry_run:
+                    print("qgroup %s not in use. Would delete (dry run)." % q)
                 else:
-                    print("qgroup %s is in use. Moving on." % q)
-            print("Finished processing pool(%s)" % p.name)
+                    print("qgroup %s not in use. deleted" % q)
+            print(
+                "Finished processing pool(%s): %d orphaned qgroup(s)"
+                % (p.name, len(plan.orphans))
+            )
         except Exception as e:
             print(
                 "Exception while qgroup-cleanup of Pool(%s): %s" % (p.name, e.__str__())
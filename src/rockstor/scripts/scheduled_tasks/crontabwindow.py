@@ -22,14 +22,19 @@ from datetime import datetime, time
 # snapshots and scrubs tasks
 
 
-def crontab_range(range):
+def crontab_range(range, now=None):
+    """
+    :param range: crontabwindow string, ie "*-*-*-*-*-*" or "8-0-17-30-0-4".
+    :param now: datetime to test, defaults to the current local time.
+    :return: True if now falls within the window.
+    """
     inrange = False
     # logger.debug('Crontab window is %s' % range)
     if range == "*-*-*-*-*-*":
         # on range value equal to always (*-*-*-*-*-*), always exec tasks
         inrange = True
     else:
-        today = datetime.today()
+        today = now if now is not None else datetime.today()
         today_time = today.time()
         today_weekday = today.weekday()
         range_windows = range.split("-")
@@ -46,6 +46,69 @@ def update_state(t, pool, aw):
     return t.state
 
 
+def start_scrub(tdo, aw):
+    """
+    Start a scrub as per the given scrub TaskDefinition, unless the last scrub
+    started by this definition is still running, and record it as a Task.
+    :param tdo: TaskDefinition object of task_type scrub.
+    :param aw: APIWrapper instance.
+    :return: the new Task, or None if no scrub was started.
+    """
+    if tdo.task_type != "scrub":
+        logger.error("task_type(%s) is not scrub." % tdo.task_type)
+        return None
+    meta = json.loads(tdo.json_meta)
+
+    if Task.objects.filter(task_def=tdo).exists():
+        ll = Task.objects.filter(task_def=tdo).order_by("-id")[0]
+        if ll.state not in TERMINAL_SCRUB_STATES:
+            logger.debug(
+                "Non terminal state(%s) for task(%d). Checking "
+                "again." % (ll.state, tdo.id)
+            )
+            cur_state = update_state(ll, meta["pool"], aw)
+            if cur_state not in TERMINAL_SCRUB_STATES:
+                logger.debug(
+                    "Non terminal state(%s) for task(%d). "
+                    "A new task will not be run." % (cur_state, tdo.id)
+                )
+                return None
+
+    now = datetime.utcnow().replace(second=0, microsecond=0, tzinfo=utc)
+    t = Task(task_def=tdo, state="started", start=now)
+    url = "pools/%s/scrub" % meta["pool"]
+    try:
+        aw.api_call(url, data=None, calltype="post", save_error=False)
+        logger.debug("Started scrub at %s" % url)
+        t.state = "running"
+    except Exception as e:
+        logger.error("Failed to start scrub at %s" % url)
+        t.state = "error"
+        logger.exception(e)
+    finally:
+        t.save()
+    return t
+
+
+def check_scrub(t, aw):
+    """
+    Update the state of a scrub Task, and its end time once terminal.
+    :param t: Task object of a scrub TaskDefinition.
+    :param aw: APIWrapper instance.
+    :return: True if the scrub has reached a terminal state.
+    """
+    meta = json.loads(t.task_def.json_meta)
+    cur_state = update_state(t, meta["pool"], aw)
+    if cur_state in TERMINAL_SCRUB_STATES:
+        logger.debug(
+            "task(%d) finished with state(%s)." % (t.task_def.id, cur_state)
+        )
+        t.end = datetime.utcnow().replace(tzinfo=utc)
+        t.save()
+        return True
+    return False
+
+
 def main():
     tid = int(sys.argv[1])
     cwindow = sys.argv[2] if len(sys.argv) > 2 else "*-*-*-*-*-*"
@@ -53,49 +116,14 @@ def main():
         # Performance note: immediately check task execution time/day window
         # range to avoid other calls
         tdo = TaskDefinition.objects.get(id=tid)
-        if tdo.task_type != "scrub":
-            return logger.error("task_type(%s) is not scrub." % tdo.task_type)
-        meta = json.loads(tdo.json_meta)
         aw = APIWrapper()
-
-        if Task.objects.filter(task_def=tdo).exists():
-            ll = Task.objects.filter(task_def=tdo).order_by("-id")[0]
-            if ll.state not in TERMINAL_SCRUB_STATES:
-                logger.debug(
-                    "Non terminal state(%s) for task(%d). Checking "
-                    "again." % (ll.state, tid)
-                )
-                cur_state = update_state(ll, meta["pool"], aw)
-                if cur_state not in TERMINAL_SCRUB_STATES:
-                    return logger.debug(
-                        "Non terminal state(%s) for task(%d). "
-                        "A new task will not be run." % (cur_state, tid)
-                    )
-
-        now = datetime.utcnow().replace(second=0, microsecond=0, tzinfo=utc)
-        t = Task(task_def=tdo, state="started", start=now)
-        url = "pools/%s/scrub" % meta["pool"]
-        try:
-            aw.api_call(url, data=None, calltype="post", save_error=False)
-            logger.debug("Started scrub at %s" % url)
-            t.state = "running"
-        except Exception as e:
-            logger.error("Failed to start scrub at %s" % url)
-            t.state = "error"
-            logger.exception(e)
-        finally:
-            t.save()
-
-        while True:
-            cur_state = update_state(t, meta["pool"], aw)
-            if cur_state in TERMINAL_SCRUB_STATES:
-                logger.debug("task(%d) finished with state(%s)." % (tid, cur_state))
-                t.end = datetime.utcnow().replace(tzinfo=utc)
-                t.save()
-                break
+        t = start_scrub(tdo, aw)
+        if t is None:
+            return
+        while not check_scrub(t, aw):
             logger.debug(
                 "pending state(%s) for scrub task(%d). Will check "
-                "again in 60 seconds." % (cur_state, tid)
+                "again in 60 seconds." % (t.state, tid)
             )
             time.sleep(60)
     else:
@@ -24,40 +24,51 @@ import logging
 logger = logging.getLogger(__name__)
 
 
-def main():
-    rid = int(sys.argv[1])
+def request_send(rid, num_tries=12):
+    """
+    Ask the Replication service (replicad) to start a new send for the given
+    Replica, retrying while it does not respond.
+    :param rid: Replica object id.
+    :param num_tries: number of 5 second attempts to reach the service.
+    :return: (success, reply) tuple.
+    """
     ctx = zmq.Context()
     poll = zmq.Poller()
-    num_tries = 12
-    while True:
-        req = ctx.socket(zmq.DEALER)
-        poll.register(req, zmq.POLLIN)
-        req.connect("ipc://%s" % settings.REPLICATION.get("ipc_socket"))
-        req.send_multipart(["new-send", b"%d" % rid])
+    try:
+        while True:
+            req = ctx.socket(zmq.DEALER)
+            poll.register(req, zmq.POLLIN)
+            req.connect("ipc://%s" % settings.REPLICATION.get("ipc_socket"))
+            req.send_multipart(["new-send", b"%d" % rid])
 
-        socks = dict(poll.poll(5000))
-        if socks.get(req) == zmq.POLLIN:
-            rcommand, reply = req.recv_multipart()
-            if rcommand == "SUCCESS":
-                print(reply)
-                break
-            ctx.destroy(linger=0)
-            sys.exit(reply)
-        num_tries -= 1
-        print(
-            "No response from Replication service. Number of retry "
-            "attempts left: %d" % num_tries
-        )
-        if num_tries == 0:
-            ctx.destroy(linger=0)
-            sys.exit(
-                "Check that Replication service is running properly and try again."
+            socks = dict(poll.poll(5000))
+            if socks.get(req) == zmq.POLLIN:
+                rcommand, reply = req.recv_multipart()
+                return rcommand == "SUCCESS", reply
+            num_tries -= 1
+            logger.debug(
+                "No response from Replication service. Number of retry "
+                "attempts left: %d" % num_tries
             )
-        req.setsockopt(zmq.LINGER, 0)
-        req.close()
-        poll.unregister(req)
+            if num_tries == 0:
+                return (
+                    False,
+                    "Check that Replication service is running properly and "
+                    "try again.",
+                )
+            req.setsockopt(zmq.LINGER, 0)
+            req.close()
+            poll.unregister(req)
+    finally:
+        ctx.destroy(linger=0)
+
 
-    ctx.destroy(linger=0)
+def main():
+    rid = int(sys.argv[1])
+    success, reply = request_send(rid)
+    if not success:
+        sys.exit(reply)
+    print(reply)
     sys.exit(0)
 
 
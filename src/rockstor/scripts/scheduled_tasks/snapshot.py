@@ -70,20 +70,96 @@ def delete(aw, share, snap_type, prefix, max_count):
     snapshots = Snapshot.objects.filter(
         share=share, snap_type=snap_type, name__startswith=prefix
     ).order_by("-id")
-    for snap in snapshots[max_count:]:
-        try:
-            url = "shares/{}/snapshots/{}".format(share.id, snap.name)
-            aw.api_call(url, data=None, calltype="delete", save_error=False)
-        except Exception as e:
-            logger.error(
-                "Failed to delete old snapshots exceeding the "
-                "maximum count(%d)" % max_count
-            )
-            logger.exception(e)
-            return False
+    snap_ids = [snap.id for snap in snapshots[max_count:]]
+    if len(snap_ids) == 0:
+        return True
+    # A single bulk delete: one subvol delete, qgroup pass and db transaction.
+    try:
+        url = "shares/{}/snapshots".format(share.id)
+        aw.api_call(
+            url,
+            data={"ids": snap_ids},
+            calltype="delete",
+            headers={"content-type": "application/json"},
+            save_error=False,
+        )
+    except Exception as e:
+        logger.error(
+            "Failed to delete old snapshots exceeding the "
+            "maximum count(%d)" % max_count
+        )
+        logger.exception(e)
+        return False
     return True
 
 
+def run_snapshot(tdo, aw):
+    """
+    Create a new snapshot as per the given snapshot TaskDefinition, pruning
+    those beyond its max_count, and record the outcome as a Task.
+    :param tdo: TaskDefinition object of task_type snapshot.
+    :param aw: APIWrapper instance.
+    """
+    stype = "task_scheduler"
+    if tdo.task_type != "snapshot":
+        logger.error("task_type(%s) is not snapshot." % tdo.task_type)
+        return
+    meta = json.loads(tdo.json_meta)
+    validate_snap_meta(meta)
+
+    # to keep backwards compatibility, allow for share to be either
+    # name or id and migrate the metadata. To be removed in #1854
+    try:
+        share = Share.objects.get(id=meta["share"])
+    except ValueError:
+        share = Share.objects.get(name=meta["share"])
+        meta["share"] = share.id
+        tdo.json_meta = json.dumps(meta)
+        tdo.save()
+
+    max_count = int(float(meta["max_count"]))
+    prefix = "%s_" % meta["prefix"]
+
+    now = datetime.utcnow().replace(second=0, microsecond=0, tzinfo=utc)
+    t = Task(task_def=tdo, state="started", start=now)
+
+    snap_created = False
+    t.state = "error"
+    try:
+        name = "%s_%s" % (
+            meta["prefix"],
+            datetime.now().strftime(settings.SNAP_TS_FORMAT),
+        )
+        url = "shares/{}/snapshots/{}".format(share.id, name)
+        # only create a new snap if there's no overflow situation. This
+        # prevents runaway snapshot creation beyond max_count+1.
+        if delete(aw, share, stype, prefix, max_count):
+            data = {
+                "snap_type": stype,
+                "uvisible": meta["visible"],
+                "writable": meta["writable"],
+            }
+            headers = {"content-type": "application/json"}
+            aw.api_call(
+                url, data=data, calltype="post", headers=headers, save_error=False
+            )
+            logger.debug("created snapshot at %s" % url)
+            t.state = "finished"
+            snap_created = True
+    except Exception as e:
+        logger.error("Failed to create snapshot at %s" % url)
+        logger.exception(e)
+    finally:
+        t.end = datetime.utcnow().replace(tzinfo=utc)
+        t.save()
+
+    # best effort pruning without erroring out. If deletion fails, we'll
+    # have max_count+1 number of snapshots and it would be dealt with on
+    # the next round.
+    if snap_created:
+        delete(aw, share, stype, prefix, max_count)
+
+
 def main():
     tid = int(sys.argv[1])
     cwindow = sys.argv[2] if len(sys.argv) > 2 else "*-*-*-*-*-*"
@@ -91,65 +167,7 @@ def main():
         # Performance note: immediately check task execution time/day window
         # range to avoid other calls
         tdo = TaskDefinition.objects.get(id=tid)
-        stype = "task_scheduler"
-        aw = APIWrapper()
-        if tdo.task_type != "snapshot":
-            logger.error("task_type(%s) is not snapshot." % tdo.task_type)
-            return
-        meta = json.loads(tdo.json_meta)
-        validate_snap_meta(meta)
-
-        # to keep backwards compatibility, allow for share to be either
-        # name or id and migrate the metadata. To be removed in #1854
-        try:
-            share = Share.objects.get(id=meta["share"])
-        except ValueError:
-            share = Share.objects.get(name=meta["share"])
-            meta["share"] = share.id
-            tdo.json_meta = json.dumps(meta)
-            tdo.save()
-
-        max_count = int(float(meta["max_count"]))
-        prefix = "%s_" % meta["prefix"]
-
-        now = datetime.utcnow().replace(second=0, microsecond=0, tzinfo=utc)
-        t = Task(task_def=tdo, state="started", start=now)
-
-        snap_created = False
-        t.state = "error"
-        try:
-            name = "%s_%s" % (
-                meta["prefix"],
-                datetime.now().strftime(settings.SNAP_TS_FORMAT),
-            )
-            url = "shares/{}/snapshots/{}".format(share.id, name)
-            # only create a new snap if there's no overflow situation. This
-            # prevents runaway snapshot creation beyond max_count+1.
-            if delete(aw, share, stype, prefix, max_count):
-                data = {
-                    "snap_type": stype,
-                    "uvisible": meta["visible"],
-                    "writable": meta["writable"],
-                }
-                headers = {"content-type": "application/json"}
-                aw.api_call(
-                    url, data=data, calltype="post", headers=headers, save_error=False
-                )
-                logger.debug("created snapshot at %s" % url)
-                t.state = "finished"
-                snap_created = True
-        except Exception as e:
-            logger.error("Failed to create snapshot at %s" % url)
-            logger.exception(e)
-        finally:
-            t.end = datetime.utcnow().replace(tzinfo=utc)
-            t.save()
-
-        # best effort pruning without erroring out. If deletion fails, we'll
-        # have max_count+1 number of snapshots and it would be dealt with on
-        # the next round.
-        if snap_created:
-            delete(aw, share, stype, prefix, max_count)
+        run_snapshot(tdo, APIWrapper())
     else:
         logger.debug(
             "Cron scheduled task not executed because outside time/day window ranges"
@@ -374,6 +374,17 @@ MODEL_DEFS = {
 
 OAUTH_INTERNAL_APP = 'cliapp'
 
+# Internal REST API client (cli.api_wrapper.APIWrapper) settings.
+# pool_size: max keep-alive connections per process to a given api url.
+# unix_socket: gunicorn's unix socket (see supervisord.conf) e.g.
+# '/run/gunicorn.sock'. None = use tcp on 127.0.0.1:8000.
+# token_refresh_margin: seconds before expiry at which a cached token is renewed.
+API_WRAPPER = {
+    'pool_size': 10,
+    'unix_socket': None,
+    'token_refresh_margin': 600,
+}
+
 # Header string to separate auto config options from rest of config file.
 # this could be generalized across all Rockstor config files, problems during
 # upgrades though
@@ -421,7 +432,55 @@ UPDATE_CHANNELS = {
 HUEY = SqliteHuey(filename='{}/rockstor-tasks-huey.db'.format(BASE_DIR))
 
 TASK_SCHEDULER = {
-	       'max_log': 100 #max number of task log entries to keep
+	       'max_log': 100, #max number of task log entries to keep
+	       'workers': 4, #max number of scheduled tasks run concurrently
+	       'max_catchup': 10, #minutes of missed schedule to run when delayed
+}
+
+BOOTSTRAP = {
+	       'workers': 4, #max number of share/snapshot/sftp mounts run concurrently
+}
+
+ROCKON_STATUS = {
+	       'ttl': 2, #seconds a "docker ps" snapshot of container states is reused
+}
+
+POOL_USAGE = {
+	       'interval': 60, #min seconds between btrfs pool usage samples
+	       'ttl': 5, #seconds a process reuses the latest recorded sample
+	       'retain': 7, #days of recorded samples kept as usage history
+}
+
+POOL_PROGRESS = {
+	       'interval': 10, #min seconds between btrfs balance/scrub status samples
+}
+
+SHARE_ACL = {
+	       'workers': 4, #max top level directories of a share walked concurrently
+	       'interval': 5, #seconds between progress updates of an ownership/perms change
+	       'stale': 120, #seconds without progress after which a change is deemed dead
+}
+
+RUN_COMMAND = {
+	       'timeouts': {'smartctl': 120, 'hdparm': 30, 'lsblk': 30, 'blkid': 30, 'udevadm': 30}, #default seconds before a command of these binaries is killed
+	       'samples': 1000, #most recent durations kept per binary for percentiles
+	       'grace': 1, #seconds output is still read from a killed command and its children
+}
+
+MEMOIZE = {
+	       'default_subvol': 60, #seconds the default subvolume of / is reused
+	       'byid_name_map': 5, #seconds the by-id to sdX name map is reused, disk rescans invalidate it
+	       'device_mapper_map': 5, #seconds the dm-N to /dev/mapper name map is reused
+}
+
+DISK_PROBE = {
+	       'workers': 8, #max number of disks probed (hdparm, btrfs stats) concurrently
+	       'ttl': 10, #seconds a process reuses a disk's latest probe results
+}
+
+ETAG = {
+	       'dir': '/run/rockstor-etag', #model group versions, shared by all processes
+	       'max_age': 30, #seconds after which an ETag expires regardless of versions
 }
 
 OAUTH2_PROVIDER_APPLICATION_MODEL = 'oauth2_provider.Application'
@@ -59,6 +59,7 @@ from datetime import datetime, timedelta  # noqa E402
 import time  # noqa E402
 from django.utils.timezone import utc  # noqa E402
 from storageadmin.models import Disk, Pool  # noqa E402
+from storageadmin.views.pool_progress import sample_pool_progress  # noqa E402
 from smart_manager.models import Service  # noqa E402
 from system.services import service_status  # noqa E402
 from cli.api_wrapper import APIWrapper  # noqa E402
@@ -921,6 +922,7 @@ class SysinfoNamespace(RockstorIO):
         self.spawn(self.shutdown_status, sid)
         self.spawn(self.pool_degraded_status, sid)
         self.spawn(self.pool_dev_stats, sid)
+        self.spawn(self.pool_progress, sid)
 
     # Run on every disconnect
     def on_disconnect(self, sid):
@@ -1084,6 +1086,22 @@ class SysinfoNamespace(RockstorIO):
 
             gevent.sleep(30)
 
+    def pool_progress(self):
+
+        # Ongoing balance and scrub progress, sampled at most once per interval
+        # irrespective of the number of connected clients.
+        interval = settings.POOL_PROGRESS["interval"]
+        while self.start:
+            try:
+                data = sample_pool_progress(interval)
+                if data:
+                    self.emit(
+                        "pool_progress", {"key": "sysinfo:pool_progress", "data": data}
+                    )
+            except Exception as e:
+                logger.error("Exception while sampling pool progress: %s" % e.__str__())
+            gevent.sleep(interval)
+
     def pool_dev_stats(self):
 
         # Examples of data.message:
@@ -0,0 +1,217 @@
+"""
+Copyright (c) 2012-2023 RockStor, Inc. <http://rockstor.com>
+This file is part of RockStor.
+
+RockStor is free software; you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published
+by the Free Software Foundation; either version 2 of the License,
+or (at your option) any later version.
+
+RockStor is distributed in the hope that it will be useful, but
+WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program. If not, see <http://www.gnu.org/licenses/>.
+"""
+
+import logging
+import os
+import threading
+from datetime import datetime, timedelta
+from multiprocessing.pool import ThreadPool
+
+from django.conf import settings
+from django.db import connections
+from huey import crontab
+from huey.contrib.djhuey import db_periodic_task
+
+from cli.api_wrapper import APIWrapper
+from scripts.scheduled_tasks.crontabwindow import crontab_range
+from scripts.scheduled_tasks.pool_scrub import (
+    TERMINAL_SCRUB_STATES,
+    check_scrub,
+    start_scrub,
+)
+from scripts.scheduled_tasks.reboot_shutdown import run_power_task
+from scripts.scheduled_tasks.send_replica import request_send
+from scripts.scheduled_tasks.snapshot import run_snapshot
+from smart_manager.models import Replica, Task, TaskDefinition
+
+"""
+In-daemon scheduler for TaskDefinition and Replica crontabs.
+
+A Huey periodic task, run each minute by the Huey consumer (ztask-daemon),
+evaluates all enabled crontabs and their crontab windows in memory. Due tasks
+are run on a bounded pool of threads within the consumer process: avoiding a
+Python + Django interpreter start per cron job. Running scrubs are followed up
+on each tick rather than by a per-scrub polling process.
+"""
+
+logger = logging.getLogger(__name__)
+
+# Cron files used, prior to this scheduler, to run each task via its own script.
+LEGACY_CRONTABS = ("/etc/cron.d/rockstortab", "/etc/cron.d/replicationtab")
+
+TASK_RUNNERS = {
+    "snapshot": run_snapshot,
+    "scrub": start_scrub,
+    "reboot": run_power_task,
+    "shutdown": run_power_task,
+    "suspend": run_power_task,
+}
+
+# Consumer process state: the Huey consumer runs our periodic task in one of
+# its worker threads so access is guarded by _state_lock.
+_state_lock = threading.Lock()
+_pool = None
+_last_tick = None
+# Jobs, ie ("task", <id>) or ("replica", <id>), currently queued or running.
+_active = set()
+# crontab string: huey validate_datetime function.
+_crontabs = {}
+
+
+def _worker_pool():
+    global _pool
+    with _state_lock:
+        if _pool is None:
+            _pool = ThreadPool(settings.TASK_SCHEDULER["workers"])
+            for legacy_crontab in LEGACY_CRONTABS:
+                if os.path.isfile(legacy_crontab):
+                    logger.info("Removing legacy cron file ({}).".format(legacy_crontab))
+                    os.remove(legacy_crontab)
+        return _pool
+
+
+def crontab_due(tab, dt):
+    """
+    Evaluate a standard 5 field crontab string against a datetime.
+    :param tab: crontab string, ie "42 3 * * 5".
+    :param dt: datetime, local time as per cron.
+    :return: True if the crontab fires at dt's minute.
+    """
+    validate = _crontabs.get(tab)
+    if validate is None:
+        try:
+            minute, hour, day, month, day_of_week = tab.split()
+            validate = crontab(minute, hour, day, month, day_of_week)
+        except ValueError as e:
+            logger.error("Ignoring invalid crontab ({}): {}".format(tab, e.__str__()))
+            return False
+        _crontabs[tab] = validate
+    return validate(dt)
+
+
+def tick_minutes(now):
+    """
+    Return the minutes to evaluate on this tick: the current minute plus any
+    missed since the last tick (Huey workers all busy), bounded by
+    settings.TASK_SCHEDULER["max_catchup"].
+    :param now: datetime of this tick.
+    :return: list of datetimes, with zero seconds, oldest first.
+    """
+    global _last_tick
+    now = now.replace(second=0, microsecond=0)
+    with _state_lock:
+        last = _last_tick
+        if last is not None and now <= last:
+            return []
+        _last_tick = now
+    first = now
+    if last is not None:
+        first = max(
+            last + timedelta(minutes=1),
+            now - timedelta(minutes=settings.TASK_SCHEDULER["max_catchup"] - 1),
+        )
+    minutes = []
+    while first <= now:
+        minutes.append(first)
+        first += timedelta(minutes=1)
+    return minutes
+
+
+def _submit(job, func, *args):
+    """
+    Run func(*args) on the worker pool unless the same job is still pending
+    or running from a prior tick.
+    """
+    with _state_lock:
+        if job in _active:
+            logger.info("Scheduled {} ({}) still active, skipping.".format(*job))
+            return False
+        _active.add(job)
+    _worker_pool().apply_async(_run_job, (job, func) + args)
+    return True
+
+
+def _run_job(job, func, *args):
+    try:
+        func(*args)
+    except Exception as e:
+        logger.error("Scheduled {} ({}) failed: {}".format(job[0], job[1], e.__str__()))
+        logger.exception(e)
+    finally:
+        # Each pool thread has its own db connection, don't leave it open.
+        connections.close_all()
+        with _state_lock:
+            _active.discard(job)
+
+
+def run_task_definition(tdid):
+    tdo = TaskDefinition.objects.get(id=tdid)
+    runner = TASK_RUNNERS.get(tdo.task_type)
+    if runner is None:
+        logger.error("ignoring unknown task_type: {}".format(tdo.task_type))
+        return
+    runner(tdo, APIWrapper())
+
+
+def run_replica(rid):
+    success, reply = request_send(rid)
+    if not success:
+        logger.error("Replication send for Replica ({}) failed: {}".format(rid, reply))
+
+
+def update_scrub_tasks():
+    aw = APIWrapper()
+    for t in (
+        Task.objects.filter(task_def__task_type="scrub")
+        .exclude(state__in=TERMINAL_SCRUB_STATES)
+        .select_related("task_def")
+    ):
+        check_scrub(t, aw)
+
+
+@db_periodic_task(crontab(minute="*"))
+def run_scheduled_tasks(now=None):
+    """
+    Start all enabled TaskDefinitions and Replicas whose crontab fires at this
+    minute, or at a missed one, and whose crontab window includes now.
+    """
+    if now is None:
+        now = datetime.now()
+    minutes = tick_minutes(now)
+    if len(minutes) == 0:
+        return
+    if Task.objects.filter(task_def__task_type="scrub").exclude(
+        state__in=TERMINAL_SCRUB_STATES
+    ).exists():
+        _submit(("scrub-status", 0), update_scrub_tasks)
+    for td in TaskDefinition.objects.filter(enabled=True, crontab__isnull=False):
+        if not any(crontab_due(td.crontab, m) for m in minutes):
+            continue
+        if td.crontabwindow is None:
+            logger.error("missing crontab window value")
+            continue
+        if not crontab_range(td.crontabwindow, now):
+            logger.debug(
+                "Scheduled task ({}) not executed because outside time/day "
+                "window ranges".format(td.name)
+            )
+            continue
+        _submit(("task", td.id), run_task_definition, td.id)
+    for replica in Replica.objects.filter(enabled=True, crontab__isnull=False):
+        if any(crontab_due(replica.crontab, m) for m in minutes):
+            _submit(("replica", replica.id), run_replica, replica.id)
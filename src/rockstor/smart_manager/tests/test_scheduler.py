@@ -0,0 +1,100 @@
+"""
+Copyright (c) 2012-2023 RockStor, Inc. <http://rockstor.com>
+This file is part of RockStor.
+
+RockStor is free software; you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published
+by the Free Software Foundation; either version 2 of the License,
+or (at your option) any later version.
+
+RockStor is distributed in the hope that it will be useful, but
+WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program. If not, see <http://www.gnu.org/licenses/>.
+"""
+import unittest
+from datetime import datetime
+
+from mock import patch, MagicMock
+
+import smart_manager.scheduler as scheduler
+from smart_manager.scheduler import crontab_due, tick_minutes, run_scheduled_tasks
+
+
+class SchedulerTests(unittest.TestCase):
+    """
+    To run the tests:
+    export DJANGO_SETTINGS_MODULE="settings"
+    cd src/rockstor && poetry run django-admin test -v 2 -p test_scheduler.py
+    """
+
+    def setUp(self):
+        scheduler._last_tick = None
+
+        self.patch_submit = patch("smart_manager.scheduler._submit")
+        self.mock_submit = self.patch_submit.start()
+
+        self.patch_task = patch("smart_manager.scheduler.Task")
+        self.mock_task = self.patch_task.start()
+        self.mock_task.objects.filter.return_value.exclude.return_value.exists.return_value = (  # noqa E501
+            False
+        )
+
+        self.patch_replica = patch("smart_manager.scheduler.Replica")
+        self.mock_replica = self.patch_replica.start()
+        self.mock_replica.objects.filter.return_value = []
+
+        self.patch_task_def = patch("smart_manager.scheduler.TaskDefinition")
+        self.mock_task_def = self.patch_task_def.start()
+
+    def tearDown(self):
+        patch.stopall()
+
+    def test_crontab_due(self):
+        # Friday 3:42
+        dt = datetime(2023, 6, 2, 3, 42)
+        self.assertTrue(crontab_due("42 3 * * 5", dt))
+        self.assertTrue(crontab_due("*/6 * * * *", dt))
+        self.assertFalse(crontab_due("42 3 * * 1", dt))
+        self.assertFalse(crontab_due("0 * * * *", dt))
+        # Invalid crontabs are never due.
+        self.assertFalse(crontab_due("61 3 * * *", dt))
+        self.assertFalse(crontab_due("42 3 *", dt))
+
+    def test_tick_minutes(self):
+        first = datetime(2023, 6, 2, 3, 42, 5)
+        self.assertEqual(tick_minutes(first), [datetime(2023, 6, 2, 3, 42)])
+        # Same minute again: nothing to do.
+        self.assertEqual(tick_minutes(first.replace(second=55)), [])
+        # Missed minutes are caught up on.
+        self.assertEqual(
+            tick_minutes(datetime(2023, 6, 2, 3, 45, 1)),
+            [
+                datetime(2023, 6, 2, 3, 43),
+                datetime(2023, 6, 2, 3, 44),
+                datetime(2023, 6, 2, 3, 45),
+            ],
+        )
+        # But only as far back as max_catchup.
+        self.assertEqual(len(tick_minutes(datetime(2023, 6, 2, 5, 0))), 10)
+
+    def test_run_scheduled_tasks(self):
+        due = MagicMock(id=1, crontab="42 3 * * *", crontabwindow="*-*-*-*-*-*")
+        not_due = MagicMock(id=2, crontab="0 4 * * *", crontabwindow="*-*-*-*-*-*")
+        # Window of 08:00 - 17:59.
+        out_of_window = MagicMock(
+            id=3, crontab="42 3 * * *", crontabwindow="8-0-17-59-*-*"
+        )
+        self.mock_task_def.objects.filter.return_value = [due, not_due, out_of_window]
+        replica = MagicMock(id=7, crontab="*/2 * * * *")
+        self.mock_replica.objects.filter.return_value = [replica]
+
+        run_scheduled_tasks.call_local(now=datetime(2023, 6, 2, 3, 42))
+        self.assertEqual(self.mock_submit.call_count, 2)
+        self.mock_submit.assert_any_call(
+            ("task", 1), scheduler.run_task_definition, 1
+        )
+        self.mock_submit.assert_any_call(("replica", 7), scheduler.run_replica, 7)
@@ -77,6 +77,7 @@ class ServiceMixin(object):
 
 class BaseServiceView(ServiceMixin, rfc.GenericView):
     serializer_class = ServiceStatusSerializer
+    etag_groups = ("services",)
 
     @transaction.atomic
     def get_queryset(self, *args, **kwargs):
@@ -97,6 +98,7 @@ class BaseServiceView(ServiceMixin, rfc.GenericView):
 
 class BaseServiceDetailView(ServiceMixin, rfc.GenericView):
     serializer_class = ServiceStatusSerializer
+    etag_groups = ("services",)
 
     @transaction.atomic
     def get(self, request, *args, **kwargs):
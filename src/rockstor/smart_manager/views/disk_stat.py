@@ -16,7 +16,6 @@ You should have received a copy of the GNU General Public License
 along with this program. If not, see <http://www.gnu.org/licenses/>.
 """
 
-from operator import attrgetter
 from smart_manager.models import DiskStat
 from storageadmin.models import Disk
 from smart_manager.serializers import DiskStatSerializer
@@ -28,8 +27,16 @@ class DiskStatView(GenericSProbeView):
     serializer_class = DiskStatSerializer
     model_obj = DiskStat
 
-    def _sorted_results(self, sort_col, reverse):
-        qs = []
-        for d in Disk.objects.all():
-            qs.append(self.model_obj.objects.filter(name=d.name).order_by("-ts")[0])
-        return sorted(qs, key=attrgetter(sort_col), reverse=reverse)
+    def _sorted_results(self):
+        # Latest entry of each disk, sorted by the database.
+        latest_ids = []
+        for name in Disk.objects.values_list("name", flat=True):
+            latest_id = (
+                self.model_obj.objects.filter(name=name)
+                .order_by("-ts")
+                .values_list("id", flat=True)
+                .first()
+            )
+            if latest_id is not None:
+                latest_ids.append(latest_id)
+        return self.sort_and_filter(self.model_obj.objects.filter(id__in=latest_ids))
@@ -21,8 +21,14 @@ from django.db.models import Count
 import rest_framework_custom as rfc
 
 
-class GenericSProbeView(rfc.GenericView):
+class GenericSProbeView(rfc.SortedListMixin, rfc.GenericView):
     content_negotiation_class = rfc.IgnoreClient
+    default_ordering = ("-ts",)
+
+    @property
+    def sort_fields(self):
+        # Any of the probe's own (metric) fields.
+        return {f.name: f.name for f in self.model_obj._meta.concrete_fields}
 
     def get_queryset(self):
         limit = self.request.query_params.get(
@@ -48,12 +54,9 @@ class GenericSProbeView(rfc.GenericView):
         if t1 is not None and t2 is not None:
             return self.model_obj.objects.filter(ts__gt=t1, ts__lte=t2)
 
-        sort_col = self.request.query_params.get("sortby", None)
-        if sort_col is not None:
-            reverse = self.request.query_params.get("reverse", "no")
-            if reverse == "yes":
-                reverse = True
-            else:
-                reverse = False
-            return self._sorted_results(sort_col, reverse)
+        if "sortby" in self.request.query_params:
+            return self._sorted_results()
         return self.model_obj.objects.all().order_by("-ts")[0:limit]
+
+    def _sorted_results(self):
+        return self.sort_and_filter(self.model_obj.objects.all())
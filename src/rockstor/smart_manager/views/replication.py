@@ -15,21 +15,15 @@ General Public License for more details.
 You should have received a copy of the GNU General Public License
 along with this program. If not, see <http://www.gnu.org/licenses/>.
 """
-import os
-import shutil
-import stat
-from tempfile import mkstemp
-
 from rest_framework.response import Response
 from rest_framework.exceptions import NotFound
 from django.db import transaction
-from storageadmin.models import Share, Appliance, EmailClient
+from storageadmin.models import Share, Appliance
 from smart_manager.models import Replica, ReplicaTrail
 from smart_manager.serializers import ReplicaSerializer
 from storageadmin.util import handle_exception
 from datetime import datetime
 from django.utils.timezone import utc
-from django.conf import settings
 import rest_framework_custom as rfc
 import logging
 
@@ -39,31 +33,6 @@ logger = logging.getLogger(__name__)
 class ReplicaMixin(object):
     serializer_class = ReplicaSerializer
 
-    @staticmethod
-    def _refresh_crontab():
-        mail_from = None
-        if EmailClient.objects.filter().exists():
-            eco = EmailClient.objects.filter().order_by("-id")[0]
-            mail_from = eco.sender
-        fh, npath = mkstemp()
-        with open(npath, "w") as cfo:
-            cfo.write("SHELL=/bin/bash\n")
-            cfo.write("PATH=/sbin:/bin:/usr/sbin:/usr/bin\n")
-            cfo.write("MAILTO=root\n")
-            if mail_from is not None:
-                cfo.write("MAILFROM={}\n".format(mail_from))
-            cfo.write("# These entries are auto generated by Rockstor. Do not edit.\n")
-            for replica in Replica.objects.filter(enabled=True):
-                if replica.crontab is not None:
-                    cfo.write(
-                        "{} root {}.venv/bin/send-replica {}\n".format(
-                            replica.crontab, settings.ROOT_DIR, replica.id
-                        )
-                    )
-        # Set file to rw- --- --- (600) via stat constants
-        os.chmod(npath, stat.S_IRUSR | stat.S_IWUSR)
-        shutil.move(npath, "/etc/cron.d/replicationtab")
-
     @staticmethod
     def _validate_port(port, request):
         try:
@@ -125,7 +94,6 @@ class ReplicaListView(ReplicaMixin, rfc.GenericView):
                 replication_ip=replication_ip,
             )
             r.save()
-            self._refresh_crontab()
             return Response(ReplicaSerializer(r).data)
 
     @staticmethod
@@ -180,7 +148,6 @@ class ReplicaDetailView(ReplicaMixin, rfc.GenericView):
             ts = datetime.utcnow().replace(tzinfo=utc)
             r.ts = ts
             r.save()
-            self._refresh_crontab()
             return Response(ReplicaSerializer(r).data)
 
     def delete(self, request, rid):
@@ -200,5 +167,4 @@ class ReplicaDetailView(ReplicaMixin, rfc.GenericView):
 
             ReplicaTrail.objects.filter(replica=r).delete()
             r.delete()
-            self._refresh_crontab()
             return Response()
@@ -18,19 +18,14 @@ along with this program. If not, see <http://www.gnu.org/licenses/>.
 
 import json
 import logging
-import os
-import shutil
-import stat
-from tempfile import mkstemp
 
-from django.conf import settings
 from django.db import transaction
 from rest_framework.response import Response
 
 import rest_framework_custom as rfc
 from smart_manager.models import TaskDefinition
 from smart_manager.serializers import TaskDefinitionSerializer
-from storageadmin.models import Pool, Share, EmailClient
+from storageadmin.models import Pool, Share
 from storageadmin.util import handle_exception
 
 logger = logging.getLogger(__name__)
@@ -88,58 +83,6 @@ class TaskSchedulerMixin(object):
             e_msg = "Event with id: {} does not exist".format(tdid)
             handle_exception(Exception(e_msg), request)
 
-    @staticmethod
-    def _refresh_crontab():
-        mail_from = None
-        if EmailClient.objects.filter().exists():
-            eco = EmailClient.objects.filter().order_by("-id")[0]
-            mail_from = eco.sender
-        fh, npath = mkstemp()
-        with open(npath, "w") as cfo:
-            cfo.write("SHELL=/bin/bash\n")
-            cfo.write("PATH=/sbin:/bin:/usr/sbin:/usr/bin\n")
-            cfo.write("MAILTO=root\n")
-            if mail_from is not None:
-                cfo.write("MAILFROM={}\n".format(mail_from))
-            cfo.write("# These entries are auto generated by Rockstor. Do not edit.\n")
-            for td in TaskDefinition.objects.filter(enabled=True):
-                if td.crontab is not None:
-                    tab = "{} root".format(td.crontab)
-                    if td.task_type == "snapshot":
-                        tab = "{} {}.venv/bin/st-snapshot {}".format(
-                            tab,
-                            settings.ROOT_DIR,
-                            td.id,
-                        )
-                    elif td.task_type == "scrub":
-                        tab = "{} {}.venv/bin/st-pool-scrub {}".format(
-                            tab,
-                            settings.ROOT_DIR,
-                            td.id,
-                        )
-                    elif td.task_type in ["reboot", "shutdown", "suspend"]:
-                        tab = "{} {}.venv/bin/st-system-power {}".format(
-                            tab,
-                            settings.ROOT_DIR,
-                            td.id,
-                        )
-                    else:
-                        logger.error(
-                            "ignoring unknown task_type: {}".format(td.task_type)
-                        )
-                        continue
-                    if td.crontabwindow is not None:
-                        # add crontabwindow as 2nd arg to task script, new line
-                        # moved here
-                        tab = "{} \{}\n".format(tab, td.crontabwindow)
-                    else:
-                        logger.error("missing crontab window value")
-                        continue
-                    cfo.write(tab)
-        # Set file to rw- --- --- (600) via stat constants.
-        os.chmod(npath, stat.S_IRUSR | stat.S_IWUSR)
-        shutil.move(npath, "/etc/cron.d/rockstortab")
-
 
 class TaskSchedulerListView(TaskSchedulerMixin, rfc.GenericView):
     serializer_class = TaskDefinitionSerializer
@@ -181,7 +124,6 @@ class TaskSchedulerListView(TaskSchedulerMixin, rfc.GenericView):
                 enabled=enabled,
             )
             td.save()
-            self._refresh_crontab()
             return Response(TaskDefinitionSerializer(td).data)
 
 
@@ -208,12 +150,10 @@ class TaskSchedulerDetailView(TaskSchedulerMixin, rfc.GenericView):
             meta.update(new_meta)
             tdo.json_meta = json.dumps(meta)
             tdo.save()
-            self._refresh_crontab()
             return Response(TaskDefinitionSerializer(tdo).data)
 
     @transaction.atomic
     def delete(self, request, tdid):
         tdo = self._task_def(request, tdid)
         tdo.delete()
-        self._refresh_crontab()
         return Response()
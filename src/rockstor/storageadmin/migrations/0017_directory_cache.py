@@ -0,0 +1,38 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('storageadmin', '0016_auto_20221020_1605'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DirectoryGroup',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('groupname', models.CharField(max_length=1024, unique=True)),
+                ('gid', models.IntegerField(db_index=True)),
+            ],
+            options={
+                'ordering': ['groupname'],
+            },
+        ),
+        migrations.CreateModel(
+            name='DirectoryUser',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('username', models.CharField(max_length=4096, unique=True)),
+                ('uid', models.IntegerField(db_index=True)),
+                ('gid', models.IntegerField()),
+                ('shell', models.CharField(max_length=1024, null=True)),
+            ],
+            options={
+                'ordering': ['username'],
+            },
+        ),
+    ]
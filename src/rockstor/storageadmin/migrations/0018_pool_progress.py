@@ -0,0 +1,39 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('storageadmin', '0017_directory_cache'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='poolbalance',
+            name='eta',
+            field=models.DateTimeField(null=True),
+        ),
+        migrations.AddField(
+            model_name='poolbalance',
+            name='rate',
+            field=models.CharField(default='', max_length=15),
+        ),
+        migrations.AddField(
+            model_name='poolbalance',
+            name='sampled',
+            field=models.DateTimeField(null=True),
+        ),
+        migrations.AddField(
+            model_name='poolbalance',
+            name='time_left',
+            field=models.BigIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='poolscrub',
+            name='sampled',
+            field=models.DateTimeField(null=True),
+        ),
+    ]
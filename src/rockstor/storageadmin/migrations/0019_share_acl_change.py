@@ -0,0 +1,41 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('storageadmin', '0018_pool_progress'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ShareACLChange',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('status', models.CharField(default='pending', max_length=10)),
+                ('tid', models.CharField(max_length=36, null=True)),
+                ('owner', models.CharField(max_length=4096)),
+                ('group', models.CharField(max_length=4096)),
+                ('perms', models.CharField(max_length=9)),
+                ('orecursive', models.BooleanField(default=True)),
+                ('precursive', models.BooleanField(default=True)),
+                ('message', models.CharField(max_length=1024, null=True)),
+                ('start_time', models.DateTimeField(auto_now_add=True)),
+                ('end_time', models.DateTimeField(null=True)),
+                ('visited', models.BigIntegerField(default=0)),
+                ('changed', models.BigIntegerField(default=0)),
+                ('errors', models.BigIntegerField(default=0)),
+                ('rate', models.FloatField(default=0)),
+                ('estimate', models.BigIntegerField(null=True)),
+                ('percent_done', models.IntegerField(null=True)),
+                ('share', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='storageadmin.Share')),
+            ],
+            options={
+                'get_latest_by': 'start_time',
+            },
+        ),
+    ]
@@ -32,6 +32,7 @@ from support_case import SupportCase  # noqa E501
 from dashboard_config import DashboardConfig  # noqa E501
 from group import Group  # noqa E501
 from user import User  # noqa E501
+from directory_cache import DirectoryUser, DirectoryGroup  # noqa E501
 from samba_share import SambaShare  # noqa E501
 from samba_custom import SambaCustomConfig  # noqa E501
 from posix_acls import PosixACLs  # noqa E501
@@ -42,6 +43,7 @@ from plugin import Plugin  # noqa E501
 from adv_nfs_exports import AdvancedNFSExport  # noqa E501
 from oauth_app import OauthApp  # noqa E501
 from pool_balance import PoolBalance  # noqa E501
+from share_acl import ShareACLChange  # noqa E501
 from tls_certificate import TLSCertificate  # noqa E501
 from rockon import (RockOn, DImage, DContainer, DPort, DVolume,  # noqa E501
                     ContainerOption, DCustomConfig, DContainerLink,  # noqa E501
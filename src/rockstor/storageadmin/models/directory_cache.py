@@ -0,0 +1,49 @@
+"""
+Copyright (c) 2012-2023 RockStor, Inc. <http://rockstor.com>
+This file is part of RockStor.
+
+RockStor is free software; you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published
+by the Free Software Foundation; either version 2 of the License,
+or (at your option) any later version.
+
+RockStor is distributed in the hope that it will be useful, but
+WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program. If not, see <http://www.gnu.org/licenses/>.
+"""
+
+from django.db import models
+
+
+class DirectoryUser(models.Model):
+    """
+    Cached passwd entry, as enumerated via NSS (and so any joined directory)
+    by ug_helpers.refresh_directory_cache(). Read by the users list in place
+    of enumerating on each request.
+    """
+
+    username = models.CharField(max_length=4096, unique=True)
+    uid = models.IntegerField(db_index=True)
+    gid = models.IntegerField()
+    shell = models.CharField(max_length=1024, null=True)
+
+    class Meta:
+        app_label = "storageadmin"
+        ordering = ["username"]
+
+
+class DirectoryGroup(models.Model):
+    """
+    Cached group entry, see DirectoryUser.
+    """
+
+    groupname = models.CharField(max_length=1024, unique=True)
+    gid = models.IntegerField(db_index=True)
+
+    class Meta:
+        app_label = "storageadmin"
+        ordering = ["groupname"]
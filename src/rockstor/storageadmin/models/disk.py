@@ -17,6 +17,11 @@ along with this program. If not, see <http://www.gnu.org/licenses/>.
 """
 
 import json
+import threading
+import time
+from multiprocessing.pool import ThreadPool
+
+from django.conf import settings
 from django.db import models
 from fs.btrfs import get_dev_io_error_stats
 from storageadmin.models import Pool
@@ -27,6 +32,35 @@ from system.osi import (
     get_dev_temp_name,
 )
 
+# hdparm -C states in which we refrain from any command that may wake a drive.
+SPUN_DOWN_STATES = ("standby", "sleeping")
+
+# Per process cache of {disk name: (probe dict, time.time() when probed)} of
+# the hdparm and btrfs device stats derived Disk properties.
+_probe_cache = {}
+_probe_lock = threading.Lock()
+
+
+def _try(func, *args):
+    try:
+        return func(*args)
+    except:
+        return None
+
+
+def _probe_disk(args):
+    name, target, previous = args
+    probe = {"power_state": _try(get_disk_power_status, name)}
+    if probe["power_state"] in SPUN_DOWN_STATES:
+        # hdparm -B is not guaranteed to leave a drive in standby: keep the
+        # level last read while it was spun up.
+        probe["apm_level"] = previous.get("apm_level")
+    else:
+        probe["apm_level"] = _try(get_disk_APM_level, name)
+    probe["hdparm_setting"] = _try(read_hdparm_setting, name)
+    probe["io_error_stats"] = _try(get_dev_io_error_stats, target)
+    return name, probe
+
 
 class AttachedManager(models.Manager):
     """Manager subclass to return only attached disks"""
@@ -96,32 +130,76 @@ class Disk(models.Model):
 
     @property
     def power_state(self, *args, **kwargs):
-        try:
-            return get_disk_power_status(str(self.name))
-        except:
-            return None
+        return self.probe().get("power_state")
 
     @property
     def hdparm_setting(self, *args, **kwargs):
-        try:
-            return read_hdparm_setting(str(self.name))
-        except:
-            return None
+        return self.probe().get("hdparm_setting")
 
     @property
     def apm_level(self, *args, **kwargs):
-        try:
-            return get_disk_APM_level(str(self.name))
-        except:
-            return None
+        return self.probe().get("apm_level")
 
     @property
     def io_error_stats(self, *args, **kwargs):
         # json charfield format
-        try:
-            return get_dev_io_error_stats(str(self.target_name))
-        except:
-            return None
+        return self.probe().get("io_error_stats")
+
+    def probe(self):
+        return Disk.probe_all([self])[self.name]
+
+    @staticmethod
+    def probe_all(disks, force=False):
+        """
+        Establish the power state, APM level, hdparm setting and io error stats
+        of the given disks. Results are reused for settings.DISK_PROBE['ttl']
+        seconds; the remainder are probed concurrently by up to
+        settings.DISK_PROBE['workers'] threads, as each probe is a few
+        commands mostly spent waiting on the drive. Spun down drives are only
+        queried via runtime PM / hdparm -C, neither of which wakes them.
+        :param disks: iterable of Disk.
+        :param force: ignore cached results.
+        :return: dict of probe dicts indexed by disk name.
+        """
+        now = time.time()
+        probes = {}
+        stale = {}
+        with _probe_lock:
+            for d in disks:
+                cached = _probe_cache.get(d.name)
+                if (
+                    not force
+                    and cached is not None
+                    and now - cached[1] < settings.DISK_PROBE["ttl"]
+                ):
+                    probes[d.name] = cached[0]
+                elif d.name not in stale:
+                    previous = cached[0] if cached is not None else {}
+                    stale[d.name] = (str(d.name), str(d.target_name), previous)
+        if len(stale) == 1:
+            results = [_probe_disk(stale.values()[0])]
+        elif len(stale) > 1:
+            pool = ThreadPool(min(settings.DISK_PROBE["workers"], len(stale)))
+            try:
+                results = pool.map(_probe_disk, stale.values())
+            finally:
+                pool.close()
+                pool.join()
+        else:
+            results = []
+        with _probe_lock:
+            for name, probe in results:
+                _probe_cache[name] = (probe, time.time())
+                probes[name] = probe
+        return probes
+
+    def forget_probe(self):
+        """
+        Drop this disk's cached probe results, ie after changing its power
+        settings, so that they are read afresh on next access.
+        """
+        with _probe_lock:
+            _probe_cache.pop(self.name, None)
 
     @property
     def temp_name(self, *args, **kwargs):
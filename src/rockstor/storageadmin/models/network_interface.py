@@ -61,6 +61,15 @@ class NetworkConnection(models.Model):
     # slave connections have a master. eg: team
     master = models.ForeignKey("NetworkConnection", null=True)
 
+    @staticmethod
+    def _first(related_set):
+        # As related_set.first(), but iterating .all() so that a list view's
+        # prefetch_related() cache is used rather than a query per call.
+        members = sorted(related_set.all(), key=lambda m: m.id)
+        if len(members) > 0:
+            return members[0]
+        return None
+
     @property
     def ipaddr(self):
         if self.ipv4_addresses is None:
@@ -70,7 +79,7 @@ class NetworkConnection(models.Model):
     @property
     def mtu(self):
         if self.ethernetconnection_set.count() > 0:
-            eco = self.ethernetconnection_set.first()
+            eco = self._first(self.ethernetconnection_set)
             try:
                 return int(eco.mtu)
             except ValueError:
@@ -93,7 +102,7 @@ class NetworkConnection(models.Model):
     def team_profile(self):
         profile = None
         try:
-            tco = self.teamconnection_set.first()
+            tco = self._first(self.teamconnection_set)
             config_d = json.loads(tco.config)
             profile = config_d["runner"]["name"]
         except:
@@ -105,7 +114,7 @@ class NetworkConnection(models.Model):
     def bond_profile(self):
         profile = None
         try:
-            bco = self.bondconnection_set.first()
+            bco = self._first(self.bondconnection_set)
             config_d = json.loads(bco.config)
             profile = config_d["mode"]
         except:
@@ -117,7 +126,7 @@ class NetworkConnection(models.Model):
     def docker_name(self):
         dname = None
         if self.bridgeconnection_set.count() > 0:
-            brco = self.bridgeconnection_set.first()
+            brco = self._first(self.bridgeconnection_set)
             dname = brco.docker_name
         return dname
 
@@ -130,7 +139,7 @@ class NetworkConnection(models.Model):
         """
         user_dnet = None
         if self.bridgeconnection_set.count() > 0:
-            brco = self.bridgeconnection_set.first()
+            brco = self._first(self.bridgeconnection_set)
             user_dnet = brco.usercon
             if user_dnet:
                 user_dnet = True
@@ -145,23 +154,12 @@ class NetworkConnection(models.Model):
         """
         docker_options = {}
         if self.bridgeconnection_set.count() > 0:
-            brco = self.bridgeconnection_set.first()
+            brco = self._first(self.bridgeconnection_set)
             connected_containers = []
-            if brco.dcontainernetwork_set.filter(connection=brco.id).count() > 0:
-                for i in range(
-                    brco.dcontainernetwork_set.filter(connection=brco.id).count()
-                ):
-                    cname = (
-                        brco.dcontainernetwork_set.filter(connection=brco.id)
-                        .order_by("id")[i]
-                        .container_name
-                    )
-                    rname = (
-                        brco.dcontainernetwork_set.filter(connection=brco.id)
-                        .order_by("id")[i]
-                        .container.rockon.name
-                    )
-                    connected_containers.append("{} ({})".format(cname, rname))
+            for cno in sorted(brco.dcontainernetwork_set.all(), key=lambda c: c.id):
+                connected_containers.append(
+                    "{} ({})".format(cno.container_name, cno.container.rockon.name)
+                )
             docker_options["aux_address"] = brco.aux_address
             docker_options["dgateway"] = brco.dgateway
             docker_options["host_binding"] = brco.host_binding
@@ -16,8 +16,14 @@ You should have received a copy of the GNU General Public License
 along with this program. If not, see <http://www.gnu.org/licenses/>.
 """
 
+import threading
+import time
+from collections import namedtuple
+from datetime import datetime
+
 from django.db import models
 from django.conf import settings
+from django.utils.timezone import utc
 from fs.btrfs import (
     pool_usage,
     usage_bound,
@@ -31,6 +37,28 @@ from system.osi import mount_status
 
 RETURN_BOOLEAN = True
 
+# Pool usage sample: free and reclaimable in KB, and ts (time sampled).
+UsageSample = namedtuple("UsageSample", "free reclaimable ts")
+
+# Per process cache of {pool name: (UsageSample, time.time() when read)} in
+# front of the latest smart_manager PoolUsage entry of each pool.
+_usage_cache = {}
+_usage_lock = threading.Lock()
+
+
+def _latest_pool_usage(pool_name):
+    # N.B. smart_manager.models imports storageadmin.models.
+    from smart_manager.models import PoolUsage
+
+    return PoolUsage.objects.filter(pool=pool_name).order_by("-id").first()
+
+
+def _cache_usage(pool_name, pu):
+    usage = UsageSample(pu.free, pu.reclaimable, pu.ts)
+    with _usage_lock:
+        _usage_cache[pool_name] = (usage, time.time())
+    return usage
+
 
 class Pool(models.Model):
     # Name of the pool
@@ -112,18 +140,58 @@ class Pool(models.Model):
     def dev_stats_ok(self, *args, **kwargs):
         return self.dev_stats_zero
 
+    @property
+    def usage(self, *args, **kwargs):
+        # Pool usage is read for every pool, and every share (nested pool), on
+        # each serialization: so we serve the latest recorded sample, see
+        # refresh_usage(). Only a pool with no sample yet is sampled in place.
+        with _usage_lock:
+            cached = _usage_cache.get(self.name)
+        if cached is not None and time.time() - cached[1] < settings.POOL_USAGE["ttl"]:
+            return cached[0]
+        pu = _latest_pool_usage(self.name)
+        if pu is None:
+            return self.refresh_usage(force=True)
+        return _cache_usage(self.name, pu)
+
+    def refresh_usage(self, force=False):
+        """
+        Sample pool usage via btrfs, and record it as PoolUsage history, unless
+        the latest sample is younger than settings.POOL_USAGE['interval']
+        seconds. Called periodically, and after writes that change usage.
+        :param force: sample irrespective of the age of the latest sample.
+        :return: UsageSample
+        """
+        from smart_manager.models import PoolUsage
+
+        now = datetime.utcnow().replace(tzinfo=utc)
+        pu = _latest_pool_usage(self.name)
+        if (
+            not force
+            and pu is not None
+            and (now - pu.ts).total_seconds() < settings.POOL_USAGE["interval"]
+        ):
+            return _cache_usage(self.name, pu)
+        free = self.size - pool_usage(self.mnt_pt_var)
+        # As for ShareUsage, an unchanged sample only updates ts and count.
+        if pu is not None and pu.free == free and pu.reclaimable == 0:
+            pu.count += 1
+        else:
+            pu = PoolUsage(pool=self.name, free=free, reclaimable=0)
+        pu.save()  # ts is auto_now
+        return _cache_usage(self.name, pu)
+
     @property
     def free(self, *args, **kwargs):
-        # Why do we compute pool usage on the fly like this and not like
-        # share usage as part of state refresh? This is a lot simpler and
-        # less code. For share usage, this type of logic could slow things
-        # down quite a bit because there can be 100's of Shares, but number
-        # of Pools even on a large instance is usually no more than a few.
-        return self.size - pool_usage(self.mnt_pt_var)
+        return self.usage.free
 
     @property
     def reclaimable(self, *args, **kwargs):
-        return 0
+        return self.usage.reclaimable
+
+    @property
+    def usage_ts(self, *args, **kwargs):
+        return self.usage.ts
 
     def usage_bound(self):
         disk_sizes = [
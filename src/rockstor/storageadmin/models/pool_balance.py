@@ -31,6 +31,12 @@ class PoolBalance(models.Model):
     start_time = models.DateTimeField(auto_now=True)
     end_time = models.DateTimeField(null=True)
     percent_done = models.IntegerField(default=0)
+    # Progress rate and estimates, as maintained by pool_progress sampling.
+    rate = models.CharField(max_length=15, default="")
+    time_left = models.BigIntegerField(default=0)
+    eta = models.DateTimeField(null=True)
+    # When status/percent_done were last sampled from btrfs.
+    sampled = models.DateTimeField(null=True)
     # Flag to denote internal auto initiated balance ie during dev delete.
     internal = models.BooleanField(default=False)
 
@@ -47,6 +47,8 @@ class PoolScrub(models.Model):
     unverified_errors = models.IntegerField(default=0)
     corrected_errors = models.IntegerField(default=0)
     last_physical = models.BigIntegerField(default=0)
+    # When status and statistics were last sampled from btrfs.
+    sampled = models.DateTimeField(null=True)
 
     class Meta:
         app_label = "storageadmin"
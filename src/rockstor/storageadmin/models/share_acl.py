@@ -0,0 +1,55 @@
+"""
+Copyright (c) 2012-2023 RockStor, Inc. <http://rockstor.com>
+This file is part of RockStor.
+
+RockStor is free software; you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published
+by the Free Software Foundation; either version 2 of the License,
+or (at your option) any later version.
+
+RockStor is distributed in the hope that it will be useful, but
+WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program. If not, see <http://www.gnu.org/licenses/>.
+"""
+
+from django.db import models
+from storageadmin.models import Share
+
+
+class ShareACLChange(models.Model):
+    """
+    A (recursive) ownership/permissions change of a share, as run by the
+    change_share_acl Huey task, with its progress.
+    """
+
+    share = models.ForeignKey(Share)
+    # pending|running|finished|failed
+    status = models.CharField(max_length=10, default="pending")
+    # huey uuid
+    tid = models.CharField(max_length=36, null=True)
+    owner = models.CharField(max_length=4096)
+    group = models.CharField(max_length=4096)
+    perms = models.CharField(max_length=9)
+    orecursive = models.BooleanField(default=True)
+    precursive = models.BooleanField(default=True)
+    message = models.CharField(max_length=1024, null=True)
+    start_time = models.DateTimeField(auto_now_add=True)
+    end_time = models.DateTimeField(null=True)
+    # Last save, ie progress update: see is_live_acl_change().
+    updated = models.DateTimeField(auto_now=True)
+    # Progress: inodes visited, changed and failed, visit rate (inodes/sec),
+    # and percent of the estimated inode count (null if unknown).
+    visited = models.BigIntegerField(default=0)
+    changed = models.BigIntegerField(default=0)
+    errors = models.BigIntegerField(default=0)
+    rate = models.FloatField(default=0)
+    estimate = models.BigIntegerField(null=True)
+    percent_done = models.IntegerField(null=True)
+
+    class Meta:
+        app_label = "storageadmin"
+        get_latest_by = "start_time"
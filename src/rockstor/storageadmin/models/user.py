@@ -50,11 +50,14 @@ class User(models.Model):
 
         Get the user's groupname from the following sources, in order:
           - linked Group model entry
+          - directory cache, as set by ug_helpers.combined_users()
           - from the system, using `grp`
           - from InfoPipe: useful for domain users
         """
         if self.group is not None:
             return self.group.groupname
+        if getattr(self, "cached_groupname", None) is not None:
+            return self.cached_groupname
         if self.gid is not None:
             try:
                 groupname = grp.getgrgid(self.gid).gr_name
@@ -16,6 +16,8 @@ You should have received a copy of the GNU General Public License
 along with this program. If not, see <http://www.gnu.org/licenses/>.
 """
 
+from django.db import models
+from django.db.models import Prefetch
 from rest_framework import serializers
 from storageadmin.models import (
     Disk,
@@ -35,6 +37,7 @@ from storageadmin.models import (
     Setup,
     NFSExportGroup,
     SFTP,
+    ShareACLChange,
     AdvancedNFSExport,
     OauthApp,
     Group,
@@ -65,6 +68,17 @@ from storageadmin.models import (
 from django.contrib.auth.models import User as DjangoUser
 
 
+class DiskListSerializer(serializers.ListSerializer):
+    def to_representation(self, data):
+        # Probe all disks up front, concurrently, rather than one by one as
+        # each disk's power_state etc is serialized.
+        if isinstance(data, models.Manager):
+            data = data.all()
+        disks = list(data)
+        Disk.probe_all(disks)
+        return super(DiskListSerializer, self).to_representation(disks)
+
+
 class DiskInfoSerializer(serializers.ModelSerializer):
     pool_name = serializers.CharField()
     power_state = serializers.CharField()
@@ -77,12 +91,18 @@ class DiskInfoSerializer(serializers.ModelSerializer):
     class Meta:
         model = Disk
         fields = "__all__"
+        list_serializer_class = DiskListSerializer
+
+    @staticmethod
+    def setup_eager_loading(queryset):
+        return queryset.select_related("pool")
 
 
 class PoolInfoSerializer(serializers.ModelSerializer):
     disks = DiskInfoSerializer(many=True, source="disk_set")
     free = serializers.IntegerField()
     reclaimable = serializers.IntegerField()
+    usage_ts = serializers.DateTimeField()
     mount_status = serializers.CharField()
     is_mounted = serializers.BooleanField()
     quotas_enabled = serializers.BooleanField()
@@ -93,11 +113,16 @@ class PoolInfoSerializer(serializers.ModelSerializer):
     data_raid = serializers.CharField()
     metadata_raid = serializers.CharField()
 
-
     class Meta:
         model = Pool
         fields = "__all__"
 
+    @staticmethod
+    def setup_eager_loading(queryset, prefix=""):
+        # Disks of every pool in one query. Each Disk gets its pool cached
+        # by the reverse prefetch, for pool_name.
+        return queryset.prefetch_related("{}disk_set".format(prefix))
+
 
 class SnapshotSerializer(serializers.ModelSerializer):
     class Meta:
@@ -121,6 +146,14 @@ class NFSExportGroupSerializer(serializers.ModelSerializer):
         model = NFSExportGroup
         fields = "__all__"
 
+    @staticmethod
+    def setup_eager_loading(queryset):
+        return queryset.prefetch_related(
+            Prefetch(
+                "nfsexport_set", queryset=NFSExport.objects.select_related("share")
+            )
+        )
+
 
 class AdvancedNFSExportSerializer(serializers.ModelSerializer):
     class Meta:
@@ -174,6 +207,17 @@ class SambaShareSerializer(serializers.ModelSerializer):
         model = SambaShare
         fields = "__all__"
 
+    @staticmethod
+    def setup_eager_loading(queryset):
+        # admin_users are serialized with their own smb_shares, and their
+        # groupname reads the user's linked Group.
+        admin_users = User.objects.select_related("group").prefetch_related(
+            "smb_shares"
+        )
+        return queryset.select_related("share").prefetch_related(
+            Prefetch("admin_users", queryset=admin_users), "sambacustomconfig_set"
+        )
+
 
 
 class IscsiSerializer(serializers.ModelSerializer):
@@ -202,6 +246,21 @@ class ShareSerializer(serializers.ModelSerializer):
         model = Share
         fields = "__all__"
 
+    @staticmethod
+    def setup_eager_loading(queryset):
+        # nfsexport_set's share_name is served by the reverse prefetch's
+        # cached share, as is each nested pool disk's pool_name.
+        queryset = queryset.select_related("pool").prefetch_related(
+            "snapshot_set", "nfsexport_set"
+        )
+        return PoolInfoSerializer.setup_eager_loading(queryset, prefix="pool__")
+
+
+class ShareACLChangeSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = ShareACLChange
+        fields = "__all__"
+
 
 class ApplianceSerializer(serializers.ModelSerializer):
     ip = serializers.CharField(source="ipaddr")
@@ -231,6 +290,10 @@ class NetworkDeviceSerializer(serializers.ModelSerializer):
         model = NetworkDevice
         fields = "__all__"
 
+    @staticmethod
+    def setup_eager_loading(queryset):
+        return queryset.select_related("connection")
+
 
 class NetworkConnectionSerializer(serializers.ModelSerializer):
     ctype = serializers.CharField()
@@ -245,6 +308,22 @@ class NetworkConnectionSerializer(serializers.ModelSerializer):
         model = NetworkConnection
         fields = "__all__"
 
+    @staticmethod
+    def setup_eager_loading(queryset):
+        # Connection type members, and a bridge's connected containers with
+        # their rock-on for docker_options.
+        return queryset.prefetch_related(
+            "ethernetconnection_set",
+            "teamconnection_set",
+            "bondconnection_set",
+            Prefetch(
+                "bridgeconnection_set__dcontainernetwork_set",
+                queryset=DContainerNetwork.objects.select_related(
+                    "container__rockon"
+                ),
+            ),
+        )
+
 
 class PoolScrubSerializer(serializers.ModelSerializer):
     class Meta:
@@ -272,6 +351,10 @@ class SFTPSerializer(serializers.ModelSerializer):
         model = SFTP
         fields = "__all__"
 
+    @staticmethod
+    def setup_eager_loading(queryset):
+        return queryset.select_related("share")
+
 
 class OauthAppSerializer(serializers.ModelSerializer):
     client_id = serializers.CharField()
@@ -297,6 +380,11 @@ class RockOnSerializer(serializers.ModelSerializer):
         model = RockOn
         fields = "__all__"
 
+    @staticmethod
+    def setup_eager_loading(queryset):
+        # ui_port, ui_publish and host_network walk containers and their ports.
+        return queryset.prefetch_related("dcontainer_set__dport_set")
+
 
 class RockOnContainerSerializer(serializers.ModelSerializer):
     class Meta:
@@ -311,6 +399,10 @@ class RockOnVolumeSerializer(serializers.ModelSerializer):
         model = DVolume
         fields = "__all__"
 
+    @staticmethod
+    def setup_eager_loading(queryset):
+        return queryset.select_related("share")
+
 
 class RockOnPortSerializer(serializers.ModelSerializer):
     container_name = serializers.CharField()
@@ -319,6 +411,10 @@ class RockOnPortSerializer(serializers.ModelSerializer):
         model = DPort
         fields = "__all__"
 
+    @staticmethod
+    def setup_eager_loading(queryset):
+        return queryset.select_related("container")
+
 
 class RockOnCustomConfigSerializer(serializers.ModelSerializer):
     class Meta:
@@ -352,6 +448,10 @@ class RockOnNetworkSerializer(serializers.ModelSerializer):
         model = DContainerNetwork
         fields = "__all__"
 
+    @staticmethod
+    def setup_eager_loading(queryset):
+        return queryset.select_related("container", "connection")
+
 
 class SMARTCapabilitySerializer(serializers.ModelSerializer):
     class Meta:
@@ -65,6 +65,24 @@ PoolDetailsLayoutView = RockstorLayoutView.extend({
         });
     },
 
+    cleanup: function() {
+        delete RockStorSocket.handlerMap['sysinfo:pool_progress'];
+    },
+
+    poolProgress: function(data) {
+        var _this = this;
+        _.each(data, function(entry) {
+            if (entry.pool == _this.pid) {
+                if (!_.isNull(entry.balance)) {
+                    _this.poolrebalances.fetch({reset: true});
+                }
+                if (!_.isNull(entry.scrub)) {
+                    _this.poolscrubs.fetch({reset: true});
+                }
+            }
+        });
+    },
+
     events: {
         'click #delete-pool': 'deletePool',
         'click #js-confirm-pool-delete': 'confirmPoolDelete',
@@ -110,6 +128,8 @@ PoolDetailsLayoutView = RockstorLayoutView.extend({
         this.pool.on('change', this.subviews['pool-info'].render, this.subviews['pool-info']);
         this.pool.on('change', this.subviews['pool-usage'].render, this.subviews['pool-usage']);
         this.poolscrubs.on('change', this.subviews['pool-scrubs'].render, this.subviews['pool-scrubs']);
+        // Stored balance / scrub progress is re-read as the server samples it.
+        RockStorSocket.addListener(this.poolProgress, this, 'sysinfo:pool_progress');
         this.$('#ph-pool-info').html(this.subviews['pool-info'].render().el);
         this.$('#ph-pool-usage').html(this.subviews['pool-usage'].render().el);
         this.$('#ph-pool-scrubs').html(this.subviews['pool-scrubs'].render().el);
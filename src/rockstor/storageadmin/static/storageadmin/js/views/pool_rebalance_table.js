@@ -138,6 +138,10 @@ PoolRebalanceTableModule = RockstorModuleView.extend({
                     html += 'unavailable';
                 } else {
                     html += percent_done;
+                    if (poolrebalance.get('status') == 'running' && poolrebalance.get('eta')) {
+                        html += ' (' + poolrebalance.get('rate') + ', ETA ' +
+                            moment(poolrebalance.get('eta')).format(RS_DATE_FORMAT) + ')';
+                    }
                 }
                 html + '</td>';
                 html += '<td>';
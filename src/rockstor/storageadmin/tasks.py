@@ -36,9 +36,14 @@ from storageadmin.models import PoolBalance
 # N.B. these imports are required for task auto-discovery, even if not used here-in.
 from fs.btrfs import start_resize_pool, start_balance
 from smart_manager.views.ztask_helpers import restart_rockstor
+from smart_manager.scheduler import run_scheduled_tasks
 from storageadmin.views.rockon_helpers import start, stop, update, install, uninstall
 from storageadmin.views.config_backup import restore_config, restore_rockons
 from storageadmin.views.pool_balance import update_end_time
+from storageadmin.views.pool_progress import track_pool_progress
+from storageadmin.views.pool import refresh_pool_usage
+from storageadmin.views.ug_helpers import refresh_directory_cache
+from storageadmin.views.share_acl import change_share_acl
 
 import logging
 
@@ -16,6 +16,8 @@ You should have received a copy of the GNU General Public License
 along with this program. If not, see <http://www.gnu.org/licenses/>.
 """
 from django.contrib.auth.models import User
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 from rest_framework import status
 from rest_framework.test import APITestCase
 from mock import patch
@@ -62,3 +64,21 @@ class APITestMixin(APITestCase):
             response1 = self.client.get('%s/1234567' % baseurl)
         self.assertEqual(response1.status_code, status.HTTP_404_NOT_FOUND,
                          msg=response1)
+
+    def get_max_queries(self, baseurl, max_queries):
+        """
+        Test GET request within a database query budget
+        1. Get base URL
+        2. Assert no more than max_queries queries were issued, to catch list
+        views falling back to per row (N+1) relation lookups
+        """
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(baseurl)
+        self.assertEqual(response.status_code, status.HTTP_200_OK,
+                         msg=response.data)
+        queries = [q['sql'] for q in context.captured_queries]
+        self.assertLessEqual(len(queries), max_queries,
+                             msg='%d queries for %s (max %d):\n%s' % (
+                                 len(queries), baseurl, max_queries,
+                                 '\n'.join(queries)))
+        return response
@@ -0,0 +1,68 @@
+"""
+Copyright (c) 2012-2023 RockStor, Inc. <http://rockstor.com>
+This file is part of RockStor.
+RockStor is free software; you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published
+by the Free Software Foundation; either version 2 of the License,
+or (at your option) any later version.
+RockStor is distributed in the hope that it will be useful, but
+WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+General Public License for more details.
+You should have received a copy of the GNU General Public License
+along with this program. If not, see <http://www.gnu.org/licenses/>.
+"""
+
+
+from rest_framework import status
+from mock import patch
+from storageadmin.tests.test_api import APITestMixin
+
+
+class BatchTests(APITestMixin):
+    fixtures = ["test_api.json"]
+    BASE_URL = "/api/batch"
+
+    @classmethod
+    def setUpClass(cls):
+        super(BatchTests, cls).setUpClass()
+
+        cls.patch_uptime = patch("storageadmin.views.command.uptime")
+        cls.mock_uptime = cls.patch_uptime.start()
+        cls.mock_uptime.return_value = 1234
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.patch_uptime.stop()
+        super(BatchTests, cls).tearDownClass()
+
+    def test_batch(self):
+        data = {
+            "requests": [
+                {"url": "commands/uptime", "method": "post"},
+                {"url": "commands/current-user", "method": "post"},
+                {"url": "invalid-end-point"},
+                {"url": "commands/uptime", "method": "patch"},
+                {"url": "batch", "method": "post"},
+            ]
+        }
+        response = self.client.post(self.BASE_URL, data=data)
+        self.assertEqual(response.status_code, status.HTTP_200_OK, msg=response.data)
+        results = response.data
+        self.assertEqual(len(results), 5)
+        # Sub-requests are dispatched in order with the batch user's identity.
+        self.assertEqual(results[0]["status_code"], status.HTTP_200_OK)
+        self.assertEqual(results[0]["data"], 1234)
+        self.assertEqual(results[1]["status_code"], status.HTTP_200_OK)
+        self.assertEqual(results[1]["data"], "admin")
+        self.assertEqual(results[2]["status_code"], status.HTTP_404_NOT_FOUND)
+        self.assertEqual(results[3]["status_code"], status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(results[4]["status_code"], status.HTTP_400_BAD_REQUEST)
+
+    def test_batch_invalid_input(self):
+        response = self.client.post(self.BASE_URL, data={"requests": "uptime"})
+        self.assertEqual(
+            response.status_code,
+            status.HTTP_400_BAD_REQUEST,
+            msg=response.data,
+        )
@@ -35,7 +35,9 @@ class CommandTests(APITestMixin):
         cls.patch_pool_raid = patch("storageadmin.views.command.get_pool_raid_levels")
         cls.mock_pool_raid = cls.patch_pool_raid.start()
 
-        cls.patch_mount_share = patch("storageadmin.views.command.mount_share")
+        cls.patch_mount_share = patch(
+            "storageadmin.views.bootstrap_helpers.mount_share"
+        )
         cls.mock_mount_share = cls.patch_mount_share.start()
         cls.mock_mount_share.return_value = True
 
@@ -43,7 +45,9 @@ class CommandTests(APITestMixin):
         cls.mock_mount_root = cls.patch_mount_root.start()
         cls.mock_mount_root.return_value = "dir/poolname"
 
-        cls.patch_mount_snap = patch("storageadmin.views.command.mount_snap")
+        cls.patch_mount_snap = patch(
+            "storageadmin.views.bootstrap_helpers.mount_snap"
+        )
         cls.mock_mount_snap = cls.patch_mount_snap.start()
         cls.mock_mount_snap.return_value = True
 
@@ -76,6 +80,16 @@ class CommandTests(APITestMixin):
         )
         cls.mock_import_snapshots = cls.patch_import_snapshots.start()
 
+        cls.patch_bootstrap_import_snapshots = patch(
+            "storageadmin.views.bootstrap_helpers.import_snapshots"
+        )
+        cls.mock_bootstrap_import_snapshots = (
+            cls.patch_bootstrap_import_snapshots.start()
+        )
+
+        cls.patch_sftp_mount = patch("storageadmin.views.bootstrap_helpers.sftp_mount")
+        cls.mock_sftp_mount = cls.patch_sftp_mount.start()
+
     @classmethod
     def tearDownClass(cls):
         super(CommandTests, cls).tearDownClass()
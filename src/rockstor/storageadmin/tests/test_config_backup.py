@@ -12,13 +12,23 @@ General Public License for more details.
 You should have received a copy of the GNU General Public License
 along with this program. If not, see <http://www.gnu.org/licenses/>.
 """
+import gzip
+import io
+import json
+import os
+import shutil
+import tempfile
+
 import mock
 from rest_framework import status
 
-from storageadmin.models import ConfigBackup
+from storageadmin.models import ConfigBackup, Share, User
 from storageadmin.tests.test_api import APITestMixin
+from system.config_backup import backup_config
 from storageadmin.views.config_backup import (
+    generic_batch,
     get_sname,
+    iter_json_arrays,
     update_rockon_shares,
     validate_install_config,
     validate_update_config,
@@ -1342,6 +1352,67 @@ class ConfigBackupTests(APITestMixin):
                 "expected = {}.".format(returned, sname),
             )
 
+    def test_iter_json_arrays(self):
+        # Backup file layout: storageadmin then smart_manager models, one line each.
+        data = "{}\n{}".format(json.dumps(self.sa_ml), json.dumps(self.sm_ml))
+        # Small chunk sizes exercise elements split across reads.
+        for chunk_size in [7, 1024, 65536]:
+            parsed = list(iter_json_arrays(io.BytesIO(data), chunk_size=chunk_size))
+            self.assertEqual([m for i, m in parsed if i == 0], self.sa_ml)
+            self.assertEqual([m for i, m in parsed if i == 1], self.sm_ml)
+        with self.assertRaises(ValueError):
+            list(iter_json_arrays(io.BytesIO(data[:-10])))
+
+    def test_backup_config(self):
+        cb_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, cb_dir)
+        with mock.patch.object(ConfigBackup, "cb_dir", return_value=cb_dir):
+            cbo = backup_config()
+        fp = os.path.join(cb_dir, cbo.filename)
+        self.assertEqual(cbo.size, os.stat(fp).st_size)
+        with gzip.open(fp) as gfo:
+            lines = gfo.read().split("\n")
+        # One json list per database, one per line, as read by restore_config().
+        self.assertEqual(len(lines), 2)
+        with gzip.open(fp) as gfo:
+            parsed = list(iter_json_arrays(gfo, chunk_size=64))
+        sa_models = [m["model"] for i, m in parsed if i == 0]
+        self.assertEqual(sa_models.count("storageadmin.share"), Share.objects.count())
+        self.assertEqual(sa_models.count("storageadmin.user"), User.objects.count())
+        self.assertTrue(all(m.startswith("storageadmin.") for m in sa_models))
+        sm_models = [m["model"] for i, m in parsed if i == 1]
+        self.assertTrue(all(m.startswith("smart_manager.") for m in sm_models))
+        shares = [m for i, m in parsed if m["model"] == "storageadmin.share"]
+        self.assertEqual(
+            [m["pk"] for m in shares],
+            list(Share.objects.order_by("id").values_list("id", flat=True)),
+        )
+
+    @mock.patch("storageadmin.views.config_backup.aw")
+    def test_generic_batch(self, mock_aw):
+        mock_aw.batch.side_effect = lambda reqs, save_error: [
+            {"status_code": 200, "data": {}} for r in reqs
+        ]
+        calls = [("sm/tasks", {"name": "task{}".format(i)}) for i in range(7)]
+        generic_batch(calls, batch_size=3)
+        # Submitted in bounded api/batch round trips, in order.
+        self.assertEqual(
+            [len(c[0][0]) for c in mock_aw.batch.call_args_list], [3, 3, 1]
+        )
+        submitted = [r["data"] for c in mock_aw.batch.call_args_list for r in c[0][0]]
+        self.assertEqual(submitted, [p for u, p in calls])
+        # A failed round trip is logged and the remaining batches still go ahead.
+        mock_aw.reset_mock()
+        mock_aw.batch.side_effect = [
+            Exception("timeout"),
+            [{"status_code": 200, "data": {}}] * 3,
+            [{"status_code": 200, "data": {}}],
+        ]
+        generic_batch(calls, batch_size=3)
+        self.assertEqual(mock_aw.batch.call_count, 3)
+        generic_batch([])
+        self.assertEqual(mock_aw.batch.call_count, 3)
+
     # @mock.patch("storageadmin.views.config_backup.RockOn.objects")
     # def test_validate_rockons(self):
     #     # mock_rockon.filter.return_value = mock_rockon
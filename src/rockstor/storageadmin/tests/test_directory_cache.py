@@ -0,0 +1,108 @@
+"""
+Copyright (c) 2012-2023 RockStor, Inc. <http://rockstor.com>
+This file is part of RockStor.
+
+RockStor is free software; you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published
+by the Free Software Foundation; either version 2 of the License,
+or (at your option) any later version.
+
+RockStor is distributed in the hope that it will be useful, but
+WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program. If not, see <http://www.gnu.org/licenses/>.
+"""
+import os
+
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from storageadmin.models import DirectoryUser, Group, User
+from storageadmin.tests.test_api import APITestMixin
+from storageadmin.views.ug_helpers import (
+    _reconcile_db,
+    _sync_cache,
+    nss_group,
+    nss_user,
+)
+
+
+class DirectoryCacheTests(APITestMixin):
+    fixtures = ["test_api.json"]
+
+    def write_queries(self, context, table):
+        return [
+            q["sql"]
+            for q in context.captured_queries
+            if table in q["sql"] and not q["sql"].startswith("SELECT")
+        ]
+
+    def test_sync_cache(self):
+        DirectoryUser.objects.create(username="stale", uid=1001, gid=100)
+        DirectoryUser.objects.create(username="same", uid=1002, gid=100)
+        DirectoryUser.objects.create(username="changed", uid=1003, gid=100)
+        entries = {
+            "same": {"uid": 1002, "gid": 100, "shell": None},
+            "changed": {"uid": 1003, "gid": 100, "shell": "/bin/bash"},
+            "new": {"uid": 1004, "gid": 100, "shell": "/bin/bash"},
+        }
+        with CaptureQueriesContext(connection) as context:
+            _sync_cache(DirectoryUser, "username", entries)
+        self.assertEqual(
+            sorted(DirectoryUser.objects.values_list("username", "uid", "shell")),
+            [
+                ("changed", 1003, "/bin/bash"),
+                ("new", 1004, "/bin/bash"),
+                ("same", 1002, None),
+            ],
+        )
+        # One delete, one insert, and an update of the changed entry only.
+        writes = self.write_queries(context, "directoryuser")
+        self.assertEqual(len(writes), 3, msg="\n".join(writes))
+        # An unchanged directory writes nothing.
+        with CaptureQueriesContext(connection) as context:
+            _sync_cache(DirectoryUser, "username", entries)
+        self.assertEqual(self.write_queries(context, "directoryuser"), [])
+
+    def test_reconcile_db(self):
+        staff = Group.objects.create(groupname="staff", gid=2000)
+        renumbered = Group.objects.create(groupname="renumbered", gid=2001)
+        User.objects.create(username="moved", uid=3000, gid=2000, group=staff)
+        User.objects.create(
+            username="same", uid=3001, gid=2000, shell="/bin/bash", group=staff
+        )
+        User.objects.create(username="gone", uid=3002, gid=2000, group=staff)
+        sys_users = {
+            "moved": (3100, 2002, "/bin/sh"),
+            "same": (3001, 2000, "/bin/bash"),
+        }
+        gid_names = {2000: "staff", 2002: "projects", 2005: "renumbered"}
+        _reconcile_db(sys_users, gid_names)
+        # Group gid follows the system, matched by name.
+        renumbered.refresh_from_db()
+        self.assertEqual(renumbered.gid, 2005)
+        # User's uid, shell and primary group follow the system: the latter
+        # created as needed.
+        moved = User.objects.get(username="moved")
+        self.assertEqual((moved.uid, moved.gid, moved.shell), (3100, 2002, "/bin/sh"))
+        self.assertEqual(moved.group.groupname, "projects")
+        self.assertEqual(moved.group.gid, 2002)
+        # Users unknown to the system are left as is.
+        self.assertEqual(User.objects.get(username="gone").uid, 3002)
+        # Unchanged entries are not saved.
+        with CaptureQueriesContext(connection) as context:
+            _reconcile_db(sys_users, gid_names)
+        self.assertEqual(self.write_queries(context, "storageadmin_user"), [])
+        self.assertEqual(self.write_queries(context, "storageadmin_group"), [])
+
+    def test_nss_lookups(self):
+        self.assertEqual(nss_user("root").pw_uid, 0)
+        self.assertEqual(nss_user(uid=0).pw_name, "root")
+        self.assertIsNone(nss_user("no-such-rockstor-user"))
+        gid = os.getgid()
+        self.assertEqual(nss_group(gid=gid).gr_gid, gid)
+        self.assertEqual(nss_group(nss_group(gid=gid).gr_name).gr_gid, gid)
+        self.assertIsNone(nss_group("no-such-rockstor-group"))
@@ -0,0 +1,71 @@
+"""
+Copyright (c) 2012-2023 RockStor, Inc. <http://rockstor.com>
+This file is part of RockStor.
+
+RockStor is free software; you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published
+by the Free Software Foundation; either version 2 of the License,
+or (at your option) any later version.
+
+RockStor is distributed in the hope that it will be useful, but
+WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program. If not, see <http://www.gnu.org/licenses/>.
+"""
+
+import unittest
+
+from mock import patch
+
+import storageadmin.models.disk as disk_model
+from storageadmin.models import Disk
+
+
+class DiskProbeTests(unittest.TestCase):
+    def setUp(self):
+        disk_model._probe_cache.clear()
+        self.disks = [Disk(name="virtio-{}".format(i)) for i in range(3)]
+        self.patch_power = patch("storageadmin.models.disk.get_disk_power_status")
+        self.mock_power = self.patch_power.start()
+        self.mock_power.return_value = "active/idle"
+        self.patch_apm = patch("storageadmin.models.disk.get_disk_APM_level")
+        self.mock_apm = self.patch_apm.start()
+        self.mock_apm.return_value = 127
+        self.patch_hdparm = patch("storageadmin.models.disk.read_hdparm_setting")
+        self.mock_hdparm = self.patch_hdparm.start()
+        self.mock_hdparm.return_value = None
+        self.patch_stats = patch("storageadmin.models.disk.get_dev_io_error_stats")
+        self.mock_stats = self.patch_stats.start()
+        self.mock_stats.side_effect = Exception("no btrfs mount")
+
+    def tearDown(self):
+        patch.stopall()
+        disk_model._probe_cache.clear()
+
+    def test_probe_all_cached(self):
+        probes = Disk.probe_all(self.disks)
+        self.assertEqual(sorted(probes), ["virtio-0", "virtio-1", "virtio-2"])
+        self.assertEqual(probes["virtio-1"]["apm_level"], 127)
+        # A failing probe command reads as None, as per the prior properties.
+        self.assertIsNone(probes["virtio-1"]["io_error_stats"])
+        self.assertEqual(self.mock_power.call_count, 3)
+        # Properties are then served from the process cache.
+        self.assertEqual(self.disks[0].power_state, "active/idle")
+        self.assertEqual(self.disks[0].apm_level, 127)
+        self.assertEqual(self.mock_power.call_count, 3)
+        self.disks[0].forget_probe()
+        self.assertEqual(self.disks[0].power_state, "active/idle")
+        self.assertEqual(self.mock_power.call_count, 4)
+
+    def test_probe_spun_down(self):
+        Disk.probe_all(self.disks[:1])
+        self.mock_power.return_value = "standby"
+        self.mock_apm.return_value = 254
+        probe = Disk.probe_all(self.disks[:1], force=True)["virtio-0"]
+        self.assertEqual(probe["power_state"], "standby")
+        # hdparm -B is not run on a spun down drive: last known level stands.
+        self.assertEqual(probe["apm_level"], 127)
+        self.assertEqual(self.mock_apm.call_count, 1)
@@ -0,0 +1,203 @@
+"""
+Copyright (c) 2012-2023 RockStor, Inc. <http://rockstor.com>
+This file is part of RockStor.
+
+RockStor is free software; you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published
+by the Free Software Foundation; either version 2 of the License,
+or (at your option) any later version.
+
+RockStor is distributed in the hope that it will be useful, but
+WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program. If not, see <http://www.gnu.org/licenses/>.
+"""
+import json
+import time
+
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from mock import patch
+
+from fs.btrfs import DefaultSubvol, DevPoolInfo
+from storageadmin.models import Disk, Pool
+from storageadmin.tests.test_api import APITestMixin
+from storageadmin.views.disk import DiskMixin
+from system.luks import LuksInventory
+from system.osi import Disk as ScanDisk
+
+# Drive types, per fstype label, of the 36 disk Dell PERC H710 + MD1220 system
+# in system/tests/test_osi.py test_scan_disks_dell_perk_h710_md1220_36_disks:
+# (count, model, serial prefix, size, transport, vendor, label, uuid)
+MD1220_DISKS = [
+    (11, "HUC101212CSS600", "5000cca01d", 1181116006, "sas", "HGST",
+     "MD1220-DAS", "12d76eb6-7aad-46ba-863e-d9c51e8e6f2d"),
+    (12, "ST91000640SS", "5000c50063", 976748544, "sas", "SEAGATE",
+     "SCRATCH", "a90e6787-1c45-46d6-a2ba-41017a17c1d5"),
+    (9, "PERC H710", "6848f690e9364500", 7838315315, None, "DELL",
+     "BIGDATA", "cb15142f-9d1e-4cb2-9b1f-adda3af6555f"),
+    (3, "INTEL SSDSC2KW24", "CVLT6153", 234461593, "sas", "ATA",
+     "INTEL_SSD", "a504bf03-0299-4648-8a95-c91aba291de8"),
+]
+ROOT_DISK = ScanDisk(
+    name="/dev/sda3", model="PERC H710",
+    serial="6848f690e936450018b7c3a11330997b", size=277558067, transport=None,
+    vendor="DELL", hctl="0:2:0:0", type="part", fstype="btrfs",
+    label="rockstor_rockstor", uuid="7f7acdd7-493e-4bb5-b801-b7b7dc289535",
+    parted=True, root=True, partitions={},
+)
+
+
+def md1220_scan(shelves):
+    """
+    scan_disks() result of our 36 disk system with its 35 data disks repeated
+    over the given number of shelves: ie 351 devices for 10 shelves.
+    """
+    disks = [ROOT_DISK]
+    for shelf in range(shelves):
+        for count, model, serial, size, tran, vendor, label, uuid in MD1220_DISKS:
+            for n in range(count):
+                index = len(disks)
+                disks.append(
+                    ScanDisk(
+                        name="/dev/sd{}".format(index), model=model,
+                        serial="{}{:06x}".format(serial, index), size=size,
+                        transport=tran, vendor=vendor,
+                        hctl="{}:0:{}:0".format(shelf + 1, index),
+                        type="disk", fstype="btrfs", label=label, uuid=uuid,
+                        parted=False, root=False, partitions={},
+                    )
+                )
+    return disks
+
+
+class DiskStateTests(APITestMixin):
+    fixtures = ["test_api.json"]
+
+    def setUp(self):
+        super(DiskStateTests, self).setUp()
+        self.disks = md1220_scan(10)
+        self.patch_scan_disks = patch("storageadmin.views.disk.scan_disks")
+        self.mock_scan_disks = self.patch_scan_disks.start()
+        self.mock_scan_disks.side_effect = lambda min_size: self.disks
+        # by-id names follow kernel names so they may move between drives.
+        self.patch_byid_names = patch("storageadmin.views.disk.get_dev_byid_names")
+        self.mock_byid_names = self.patch_byid_names.start()
+        self.mock_byid_names.side_effect = lambda names, remove_path: {
+            n: ("scsi-{}".format(n.split("/")[-1]), True) for n in names
+        }
+        self.patch_byid_map = patch("storageadmin.views.disk.get_byid_name_map")
+        self.patch_byid_map.start().return_value = {}
+        self.patch_luks = patch("storageadmin.views.disk.luks_inventory")
+        self.patch_luks.start().return_value = LuksInventory({}, [], {})
+        self.patch_pool_info = patch("storageadmin.views.disk.get_dev_pool_info")
+        self.mock_pool_info = self.patch_pool_info.start()
+        self.mock_pool_info.side_effect = lambda: {
+            d.name: DevPoolInfo(
+                devid=n + 1, size=d.size, allocated=0, uuid=d.uuid, label=d.label
+            )
+            for n, d in enumerate(self.disks)
+        }
+        self.patch_raid = patch("storageadmin.views.disk.get_pool_raid_levels")
+        self.patch_raid.start().return_value = {"data": "single"}
+        self.patch_profile = patch("storageadmin.views.disk.get_pool_raid_profile")
+        self.patch_profile.start().return_value = "single"
+        self.patch_enable_quota = patch("storageadmin.views.disk.enable_quota")
+        self.patch_enable_quota.start()
+        self.patch_default_subvol = patch("storageadmin.models.pool.default_subvol")
+        self.patch_default_subvol.start().return_value = DefaultSubvol(
+            "256", "@/.snapshots/1/snapshot", False
+        )
+        self.patch_smart = patch("storageadmin.views.disk.smart.available")
+        self.patch_smart.start().return_value = (True, True)
+        # Reconciliation only: our disks' live hdparm / SMART properties aside.
+        self.patch_serializer = patch("storageadmin.views.disk.DiskInfoSerializer")
+        self.patch_serializer.start()
+
+    def tearDown(self):
+        patch.stopall()
+        super(DiskStateTests, self).tearDown()
+
+    def update_disk_state(self):
+        """
+        :return: number of queries issued by, and duration of, a disk state
+        update.
+        """
+        start = time.time()
+        with CaptureQueriesContext(connection) as context:
+            DiskMixin._update_disk_state()
+        return len(context.captured_queries), time.time() - start
+
+    def test_initial_scan(self):
+        self.update_disk_state()
+        self.assertEqual(Disk.objects.count(), 351)
+        self.assertFalse(Disk.objects.filter(offline=True).exists())
+        # Root pool created and attributed to our system disk.
+        root_disk = Disk.objects.get(serial=ROOT_DISK.serial)
+        self.assertEqual(root_disk.name, "scsi-sda3")
+        self.assertEqual(root_disk.pool.name, "rockstor_rockstor")
+        self.assertEqual(root_disk.pool.role, "root")
+        self.assertEqual(json.loads(root_disk.role), {"root": "btrfs"})
+        self.assertEqual(
+            Disk.objects.filter(smart_available=True, smart_enabled=True).count(), 351
+        )
+
+    def test_rescan_queries_independent_of_disk_count(self):
+        """
+        An unchanged rescan issues the same number of queries for one shelf as
+        for ten, ie no per disk queries.
+        """
+        results = {}
+        for shelves in (1, 10):
+            Disk.objects.all().delete()
+            Pool.objects.all().delete()
+            self.disks = md1220_scan(shelves)
+            self.update_disk_state()
+            results[shelves] = self.update_disk_state()
+        msg = "Rescan (queries, seconds) by shelves: {}".format(results)
+        self.assertEqual(results[1][0], results[10][0], msg=msg)
+        self.assertLessEqual(results[10][0], 4, msg=msg)
+
+    def test_rescan_detached_and_renamed(self):
+        self.update_disk_state()
+        # Non scan_disks() roles are preserved.
+        Disk.objects.filter(serial=self.disks[1].serial).update(
+            role=json.dumps({"redirect": "scsi-sd1-part1", "root": "btrfs"})
+        )
+        # Our last shelf is detached and two drives swap kernel names.
+        detached = self.disks[-35:]
+        self.disks = self.disks[:-35]
+        self.disks[1], self.disks[2] = (
+            self.disks[1]._replace(name=self.disks[2].name),
+            self.disks[2]._replace(name=self.disks[1].name),
+        )
+        queries, duration = self.update_disk_state()
+        self.assertEqual(Disk.objects.count(), 351)
+        offline = Disk.objects.filter(offline=True)
+        self.assertEqual(
+            sorted(offline.values_list("serial", flat=True)),
+            sorted(d.serial for d in detached),
+        )
+        for do in offline:
+            self.assertTrue(do.name.startswith("detached-"))
+            self.assertFalse(do.smart_available or do.smart_enabled)
+        swapped = Disk.objects.get(serial=self.disks[1].serial)
+        self.assertEqual(swapped.name, "scsi-sd2")
+        self.assertEqual(json.loads(swapped.role), {"redirect": "scsi-sd1-part1"})
+        self.assertEqual(
+            Disk.objects.get(serial=self.disks[2].serial).name, "scsi-sd1"
+        )
+        # Grouped updates of renamed and detached drives, a save per drive
+        # with other changes.
+        self.assertLessEqual(queries, 8, msg="{} queries".format(queries))
+        # Reattached drives are brought back online under their by-id name.
+        self.disks.extend(detached)
+        self.update_disk_state()
+        self.assertFalse(Disk.objects.filter(offline=True).exists())
+        self.assertEqual(
+            Disk.objects.get(serial=detached[0].serial).name,
+            "scsi-{}".format(detached[0].name.split("/")[-1]),
+        )
@@ -19,7 +19,7 @@ import mock
 from rest_framework import status
 from mock import patch
 
-from storageadmin.models import Disk
+from storageadmin.models import Disk, Pool
 from storageadmin.tests.test_api import APITestMixin
 
 
@@ -77,6 +77,29 @@ class DiskTests(APITestMixin):
     def tearDownClass(cls):
         super(DiskTests, cls).tearDownClass()
 
+    @mock.patch("storageadmin.models.disk.get_dev_temp_name")
+    @mock.patch("storageadmin.models.disk._probe_disk")
+    def test_get_query_count(self, mock_probe_disk, mock_temp_name):
+        """
+        Test GET request of the disk list issues a fixed number of queries,
+        regardless of the number of disks and their pools.
+        """
+        mock_probe_disk.side_effect = lambda args: (args[0], {})
+        mock_temp_name.side_effect = lambda name: name
+        for p in range(2):
+            pool = Pool.objects.create(
+                name="rock-pool{}".format(p), raid="raid1", size=5242880
+            )
+            for d in range(3):
+                Disk.objects.create(
+                    name="virtio-{}-{}".format(p, d),
+                    pool=pool,
+                    size=5242880,
+                    parted=False,
+                )
+        Disk.objects.create(name="virtio-unused", size=5242880, parted=False)
+        self.get_max_queries(self.BASE_URL, 2)
+
     def test_disk_scan(self):
         response = self.client.post(
             ("{}/scan".format(self.BASE_URL)), data=None, format="json"
@@ -0,0 +1,108 @@
+"""
+Copyright (c) 2012-2023 RockStor, Inc. <http://rockstor.com>
+This file is part of RockStor.
+
+RockStor is free software; you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published
+by the Free Software Foundation; either version 2 of the License,
+or (at your option) any later version.
+
+RockStor is distributed in the hope that it will be useful, but
+WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program. If not, see <http://www.gnu.org/licenses/>.
+"""
+
+import shutil
+import tempfile
+import unittest
+
+from django.conf import settings
+from django.db import transaction
+from mock import MagicMock, patch
+
+from rest_framework_custom.etag import (
+    bump_version,
+    bump_versions,
+    etag_matches,
+    get_version,
+    make_etag,
+)
+
+
+class ETagTests(unittest.TestCase):
+    def setUp(self):
+        self.etag_dir = tempfile.mkdtemp()
+        patcher = patch.dict(settings.ETAG, {"dir": self.etag_dir, "max_age": 30})
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.addCleanup(shutil.rmtree, self.etag_dir)
+
+    @staticmethod
+    def request(path="/api/pools", if_none_match=None):
+        request = MagicMock(META={"HTTP_ACCEPT": "application/json"})
+        request.get_full_path.return_value = path
+        if if_none_match is not None:
+            request.META["HTTP_IF_NONE_MATCH"] = if_none_match
+        return request
+
+    def test_versions(self):
+        version = get_version("pools")
+        self.assertEqual(get_version("pools"), version)
+        self.assertEqual(bump_version("pools"), str(int(version) + 1))
+        self.assertEqual(get_version("pools"), str(int(version) + 1))
+
+    @patch("rest_framework_custom.etag.time")
+    def test_make_etag(self, mock_time):
+        mock_time.time.return_value = 3000
+        etag = make_etag(self.request(), ("pools", "disks"))
+        self.assertEqual(make_etag(self.request(), ("pools", "disks")), etag)
+        # Query parameters, versions and age all change the ETag.
+        self.assertNotEqual(
+            make_etag(self.request("/api/pools?page=2"), ("pools", "disks")), etag
+        )
+        bump_version("disks")
+        etag2 = make_etag(self.request(), ("pools", "disks"))
+        self.assertNotEqual(etag2, etag)
+        mock_time.time.return_value = 3030
+        self.assertNotEqual(make_etag(self.request(), ("pools", "disks")), etag2)
+
+    def test_etag_matches(self):
+        etag = '"abc"'
+        self.assertFalse(etag_matches(self.request(), etag))
+        self.assertTrue(etag_matches(self.request(if_none_match='"abc"'), etag))
+        self.assertTrue(etag_matches(self.request(if_none_match='W/"abc"'), etag))
+        self.assertTrue(etag_matches(self.request(if_none_match='"x", "abc"'), etag))
+        self.assertTrue(etag_matches(self.request(if_none_match="*"), etag))
+        self.assertFalse(etag_matches(self.request(if_none_match='"x"'), etag))
+
+    @patch("rest_framework_custom.etag.bump_version")
+    def test_bump_versions(self, mock_bump):
+        # The smart_manager db (PoolUsage, Service) as APITestMixin tests only
+        # wrap the default db in a transaction.
+        db = "smart_manager"
+        # Autocommit: bumped straight away.
+        bump_versions(["pools"], using=db)
+        mock_bump.assert_called_once_with("pools")
+        mock_bump.reset_mock()
+        # Bulk saves in a transaction, incl. nested ones: each group once,
+        # on commit.
+        with transaction.atomic(using=db):
+            for i in range(3):
+                bump_versions(["pools"], using=db)
+                with transaction.atomic(using=db):
+                    bump_versions(["pools", "services"], using=db)
+            mock_bump.assert_not_called()
+        self.assertEqual(
+            sorted(c[0][0] for c in mock_bump.call_args_list), ["pools", "services"]
+        )
+        mock_bump.reset_mock()
+        # Rolled back: no bump.
+        with self.assertRaises(ValueError):
+            with transaction.atomic(using=db):
+                bump_versions(["services"], using=db)
+                raise ValueError()
+        mock_bump.assert_not_called()
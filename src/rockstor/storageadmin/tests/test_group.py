@@ -44,10 +44,26 @@ class GroupTests(APITestMixin):
         cls.mock_getgrnam = cls.patch_getgrnam.start()
         cls.mock_getgrnam.return_value = "grname", "2", "001"
 
+        # NSS groups by name with their gid, as checked before groupadd.
+        cls.patch_nss_group = patch("storageadmin.views.group.nss_group")
+        cls.mock_nss_group = cls.patch_nss_group.start()
+        cls.mock_nss_group.side_effect = cls.nss_group
+
     @classmethod
     def tearDownClass(cls):
         super(GroupTests, cls).tearDownClass()
 
+    def setUp(self):
+        super(GroupTests, self).setUp()
+        GroupTests.nss_groups = {"root": 0, "users": 100}
+
+    @classmethod
+    def nss_group(cls, groupname=None, gid=None):
+        for name, g in cls.nss_groups.items():
+            if name == groupname or (groupname is None and g == gid):
+                return name, "x", g
+        return None
+
     def test_get_requests(self):
         # self.get_base(self.BASE_URL)
         response = self.client.get(self.BASE_URL)
@@ -105,6 +121,30 @@ class GroupTests(APITestMixin):
         response = self.client.post(self.BASE_URL, data=data)
         self.assertEqual(response.status_code, status.HTTP_200_OK, msg=response.data)
 
+    def test_post_group_added_outside_rockstor(self):
+        """
+        Groups not yet in our directory cache, ie just added to a joined
+        domain, are found via NSS rather than failing in groupadd.
+        """
+        self.mock_groupadd.reset_mock()
+        self.nss_groups["domaingroup"] = 70001
+        data = {"groupname": "domaingroup"}
+        response = self.client.post(self.BASE_URL, data=data)
+        self.assertEqual(
+            response.status_code, status.HTTP_400_BAD_REQUEST, msg=response.data
+        )
+        err_msg = "Group (domaingroup) already exists. Choose a different one."
+        self.assertEqual(response.data[0], err_msg)
+
+        data = {"groupname": "newgroup2", "gid": 70001}
+        response = self.client.post(self.BASE_URL, data=data)
+        self.assertEqual(
+            response.status_code, status.HTTP_400_BAD_REQUEST, msg=response.data
+        )
+        err_msg = "GID (70001) already exists. Choose a different one."
+        self.assertEqual(response.data[0], err_msg)
+        self.mock_groupadd.assert_not_called()
+
     def test_delete_requests(self):
         # delete group that doesn't exist
         response = self.client.delete("{}/foobargroup".format(self.BASE_URL))
@@ -20,7 +20,18 @@ import mock
 from rest_framework import status
 from mock import patch
 from storageadmin.tests.test_api import APITestMixin
-from storageadmin.models import NetworkConnection, NetworkDevice
+from storageadmin.models import (
+    BondConnection,
+    BridgeConnection,
+    DContainer,
+    DContainerNetwork,
+    DImage,
+    EthernetConnection,
+    NetworkConnection,
+    NetworkDevice,
+    RockOn,
+    TeamConnection,
+)
 
 
 class NetworkTests(APITestMixin):
@@ -48,7 +59,7 @@ class NetworkTests(APITestMixin):
         # post mocks
 
         # devices map dictionary
-        cls.patch_devices = patch("system.network.get_dev_config")
+        cls.patch_devices = patch("system.network.get_dev_map")
         cls.mock_devices = cls.patch_devices.start()
         cls.mock_devices.return_value = {
             "lo": {
@@ -67,7 +78,7 @@ class NetworkTests(APITestMixin):
         }
 
         # connections map dictionary
-        cls.patch_connections = patch("system.network.get_con_config")
+        cls.patch_connections = patch("system.network.get_con_map")
         cls.mock_connections = cls.patch_connections.start()
         cls.mock_connections.return_value = {
             "8dca3630-8c54-4ad7-8421-327cc2d3d14a": {
@@ -166,6 +177,50 @@ class NetworkTests(APITestMixin):
             "response.data = ({}).\n ".format(response.status_code, response.data),
         )
 
+    def test_get_query_count(self):
+        """
+        Test GET request of the network connection list issues a fixed number
+        of queries, regardless of the number of connections of each type and
+        of the rock-on containers attached to docker networks.
+        """
+        rockon = RockOn.objects.create(
+            name="rockon1",
+            description="",
+            version="1",
+            state="installed",
+            status="started",
+        )
+        dimage = DImage.objects.create(name="image1", tag="latest", repo="na")
+        for i in range(2):
+            eco = NetworkConnection.objects.create(
+                name="eth{}".format(i), uuid="uuid-eth{}".format(i)
+            )
+            EthernetConnection.objects.create(connection=eco, mtu="9000")
+            tco = NetworkConnection.objects.create(
+                name="team{}".format(i), uuid="uuid-team{}".format(i)
+            )
+            TeamConnection.objects.create(
+                connection=tco, config='{"runner": {"name": "roundrobin"}}'
+            )
+            bco = NetworkConnection.objects.create(
+                name="bond{}".format(i), uuid="uuid-bond{}".format(i)
+            )
+            BondConnection.objects.create(
+                connection=bco, config='{"mode": "balance-rr"}'
+            )
+            brco = NetworkConnection.objects.create(
+                name="docker{}".format(i), uuid="uuid-docker{}".format(i)
+            )
+            bridge = BridgeConnection.objects.create(
+                connection=brco, docker_name="rocknet{}".format(i), usercon=True
+            )
+            for c in range(2):
+                container = DContainer.objects.create(
+                    rockon=rockon, dimage=dimage, name="container{}-{}".format(i, c)
+                )
+                DContainerNetwork.objects.create(container=container, connection=bridge)
+        self.get_max_queries(self.BASE_URL, 7)
+
     def test_put_invalid_id(self):
         """
         test with invalid connection id
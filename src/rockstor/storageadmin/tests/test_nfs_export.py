@@ -86,6 +86,28 @@ class NFSExportTests(APITestMixin):
     #     self.assertEqual(response.status_code, status.HTTP_200_OK,
     #                      msg=response)
 
+    def test_get_query_count(self):
+        """
+        Test GET request of the NFS export list issues a fixed number of
+        queries, regardless of the number of export groups and their exports.
+        """
+        pool = Pool.objects.create(name="rock-pool", raid="single", size=5242880)
+        for i in range(4):
+            share = Share.objects.create(
+                pool=pool,
+                name="share{}".format(i),
+                qgroup="0/{}".format(258 + i),
+                subvol_name="share{}".format(i),
+            )
+            for host_str in ("*", "host{}".format(i)):
+                eg = NFSExportGroup.objects.create(host_str=host_str)
+                NFSExport.objects.create(
+                    export_group=eg,
+                    share=share,
+                    mount="/export/share{}".format(i),
+                )
+        self.get_max_queries(self.BASE_URL, 3)
+
     def test_invalid_get(self):
         # get nfs-export with invalid id
         response = self.client.get("{}/99999".format(self.BASE_URL))
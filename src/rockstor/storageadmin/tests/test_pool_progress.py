@@ -0,0 +1,68 @@
+"""
+Copyright (c) 2012-2023 RockStor, Inc. <http://rockstor.com>
+This file is part of RockStor.
+
+RockStor is free software; you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published
+by the Free Software Foundation; either version 2 of the License,
+or (at your option) any later version.
+
+RockStor is distributed in the hope that it will be useful, but
+WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program. If not, see <http://www.gnu.org/licenses/>.
+"""
+
+import unittest
+from datetime import datetime, timedelta
+
+from mock import MagicMock, patch
+
+from storageadmin.models import PoolBalance
+from storageadmin.views.pool_balance import balance_progress
+from storageadmin.views.pool_progress import _due, _sample_balance
+
+
+class PoolProgressTests(unittest.TestCase):
+    def setUp(self):
+        self.now = datetime(2023, 1, 1, 12, 0, 0)
+
+    def test_balance_progress(self):
+        # 25% in 10 minutes: 2.5%/min leaving 30 minutes.
+        ps = PoolBalance(start_time=self.now - timedelta(minutes=10))
+        progress = balance_progress(ps, 25, self.now)
+        self.assertEqual(progress["rate"], "2.50%/min")
+        self.assertEqual(progress["time_left"], 1800)
+        self.assertEqual(progress["eta"], self.now + timedelta(minutes=30))
+        # No estimate before any progress is seen.
+        self.assertEqual(balance_progress(ps, 0, self.now), {})
+
+    def test_due(self):
+        entry = MagicMock(sampled=None)
+        self.assertTrue(_due(entry, self.now, 10))
+        entry.sampled = self.now - timedelta(seconds=5)
+        self.assertFalse(_due(entry, self.now, 10))
+        entry.sampled = self.now - timedelta(seconds=10)
+        self.assertTrue(_due(entry, self.now, 10))
+
+    @patch("storageadmin.views.pool_progress.PoolBalanceSerializer")
+    @patch("storageadmin.views.pool_progress.PoolBalanceView")
+    @patch("storageadmin.views.pool_progress.PoolBalance.objects")
+    def test_sample_balance_recent(self, mock_objects, mock_view, mock_serializer):
+        # An entry sampled within the interval is served as stored.
+        pb = PoolBalance(status="running", sampled=self.now)
+        mock_objects.filter.return_value.latest.return_value = pb
+        _sample_balance(MagicMock(), self.now, 10)
+        mock_view._balance_status.assert_not_called()
+        mock_serializer.assert_called_once_with(pb)
+
+    @patch("storageadmin.views.pool_progress.PoolBalanceView")
+    @patch("storageadmin.views.pool_progress.PoolBalance.objects")
+    def test_sample_balance_inactive(self, mock_objects, mock_view):
+        pb = PoolBalance(status="finished")
+        mock_objects.filter.return_value.latest.return_value = pb
+        self.assertIsNone(_sample_balance(MagicMock(), self.now, 10))
+        mock_view._balance_status.assert_not_called()
@@ -0,0 +1,106 @@
+"""
+Copyright (c) 2012-2023 RockStor, Inc. <http://rockstor.com>
+This file is part of RockStor.
+
+RockStor is free software; you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published
+by the Free Software Foundation; either version 2 of the License,
+or (at your option) any later version.
+
+RockStor is distributed in the hope that it will be useful, but
+WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program. If not, see <http://www.gnu.org/licenses/>.
+"""
+
+import unittest
+from datetime import datetime, timedelta
+
+from django.utils.timezone import utc
+from mock import MagicMock, patch
+
+import storageadmin.models.pool as pool_model
+from smart_manager.models import PoolUsage
+from storageadmin.models import Pool
+from storageadmin.tests.test_api import APITestMixin
+from storageadmin.views.pool import prune_pool_usage
+
+
+class PoolUsageCacheTests(unittest.TestCase):
+    def setUp(self):
+        pool_model._usage_cache.clear()
+        self.pool = Pool(name="test-pool", size=1000)
+        self.patch_pool_usage = patch("storageadmin.models.pool.pool_usage")
+        self.mock_pool_usage = self.patch_pool_usage.start()
+        self.mock_pool_usage.return_value = 100
+        self.patch_latest = patch("storageadmin.models.pool._latest_pool_usage")
+        self.mock_latest = self.patch_latest.start()
+        self.patch_model = patch("smart_manager.models.PoolUsage")
+        self.mock_model = self.patch_model.start()
+
+    def tearDown(self):
+        patch.stopall()
+        pool_model._usage_cache.clear()
+
+    def recorded(self, free, age):
+        ts = datetime.utcnow().replace(tzinfo=utc) - timedelta(seconds=age)
+        return MagicMock(free=free, reclaimable=0, ts=ts, count=1)
+
+    def test_free_reads_recorded_sample(self):
+        self.mock_latest.return_value = self.recorded(500, 3600)
+        self.assertEqual(self.pool.free, 500)
+        # Served from the process cache thereafter.
+        self.assertEqual(self.pool.free, 500)
+        self.assertEqual(self.mock_latest.call_count, 1)
+        self.mock_pool_usage.assert_not_called()
+
+    def test_free_samples_unrecorded_pool(self):
+        self.mock_latest.return_value = None
+        self.mock_model.return_value = self.recorded(900, 0)
+        self.assertEqual(self.pool.free, 900)
+        self.mock_model.assert_called_once_with(
+            pool="test-pool", free=900, reclaimable=0
+        )
+        self.mock_pool_usage.assert_called_once()
+
+    def test_refresh_usage_interval(self):
+        pu = self.recorded(900, 1)
+        self.mock_latest.return_value = pu
+        self.pool.refresh_usage()
+        self.mock_pool_usage.assert_not_called()
+        # Forced, unchanged: the latest entry's count is bumped.
+        self.pool.refresh_usage(force=True)
+        self.assertEqual(pu.count, 2)
+        pu.save.assert_called_once()
+        self.mock_model.assert_not_called()
+
+
+class PoolUsagePruneTests(APITestMixin):
+    # PoolUsage is routed to the smart_manager database.
+    multi_db = True
+    fixtures = ["test_api.json"]
+
+    def record(self, pool, free, days):
+        pu = PoolUsage.objects.create(pool=pool, free=free)
+        ts = datetime.utcnow().replace(tzinfo=utc) - timedelta(days=days)
+        # ts is auto_now, so back-date via update().
+        PoolUsage.objects.filter(id=pu.id).update(ts=ts)
+        return pu.id
+
+    def test_prune_pool_usage(self):
+        Pool.objects.create(name="rock-pool", raid="single", size=1000)
+        Pool.objects.create(name="idle-pool", raid="single", size=1000)
+        old = self.record("rock-pool", 100, 30)
+        recent = self.record("rock-pool", 200, 1)
+        latest = self.record("rock-pool", 300, 0)
+        # An unmounted pool's only, long outdated, sample is still its usage.
+        idle = self.record("idle-pool", 400, 30)
+        gone = self.record("deleted-pool", 500, 30)
+        prune_pool_usage()
+        kept = PoolUsage.objects.filter(id__in=(old, recent, latest, idle, gone))
+        self.assertEqual(
+            sorted(kept.values_list("id", flat=True)), [recent, latest, idle]
+        )
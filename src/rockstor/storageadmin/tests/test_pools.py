@@ -137,6 +137,13 @@ class PoolTests(APITestMixin):
         response = self.client.get("{}/{}".format(self.BASE_URL, pId))
         self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND, msg=response)
 
+    def test_get_query_count(self):
+        """
+        Test GET request of the pool list issues a fixed number of queries,
+        regardless of the number of pools and their nested relations.
+        """
+        self.get_max_queries(self.BASE_URL, 3)
+
     def test_invalid_post_requests_name_clash(self):
         """
         invalid pool api operations
@@ -0,0 +1,144 @@
+"""
+Copyright (c) 2012-2023 RockStor, Inc. <http://rockstor.com>
+This file is part of RockStor.
+
+RockStor is free software; you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published
+by the Free Software Foundation; either version 2 of the License,
+or (at your option) any later version.
+
+RockStor is distributed in the hope that it will be useful, but
+WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program. If not, see <http://www.gnu.org/licenses/>.
+"""
+
+import json
+import shutil
+import tempfile
+import threading
+import unittest
+from BaseHTTPServer import BaseHTTPRequestHandler, HTTPServer
+
+from storageadmin.views.rockon_metastore import (
+    metastore_session,
+    conditional_get,
+    fetch_all,
+    definition_hash,
+    load_hashes,
+    save_hashes,
+)
+
+METASTORE = {
+    "/root.json": {"Plex": "plex.json", "Syncthing": "syncthing.json"},
+    "/plex.json": {"Plex": {"description": "Plex", "containers": {}}},
+    "/syncthing.json": {"Syncthing": {"description": "Sync", "containers": {}}},
+}
+
+
+class MetastoreHandler(BaseHTTPRequestHandler):
+    # Local stand-in for the remote metastore: serves METASTORE with an ETag
+    # per document and honours If-None-Match.
+    def do_GET(self):
+        if self.path not in METASTORE:
+            self.send_response(404)
+            self.end_headers()
+            return
+        body = json.dumps(METASTORE[self.path])
+        etag = '"{}"'.format(definition_hash(METASTORE[self.path]))
+        self.server.requests.append(self.path)
+        if self.headers.get("If-None-Match") == etag:
+            self.server.not_modified.append(self.path)
+            self.send_response(304)
+            self.end_headers()
+            return
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.send_header("ETag", etag)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+class RockOnMetastoreTests(unittest.TestCase):
+    """
+    The tests in this suite can be run via the following command:
+    cd <root dir of rockstor ie /opt/rockstor>
+    ./bin/test --settings=test-settings -v 3 -p test_rockon_metastore*
+    """
+
+    def setUp(self):
+        self.server = HTTPServer(("127.0.0.1", 0), MetastoreHandler)
+        self.server.requests = []
+        self.server.not_modified = []
+        self.thread = threading.Thread(target=self.server.serve_forever)
+        self.thread.daemon = True
+        self.thread.start()
+        self.url_root = "http://127.0.0.1:{}".format(self.server.server_port)
+        self.cache_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+        shutil.rmtree(self.cache_dir)
+
+    def fetch_metastore(self):
+        session = metastore_session(4)
+        root = conditional_get(
+            session, "{}/root.json".format(self.url_root), self.cache_dir
+        )
+        urls = ["{}/{}".format(self.url_root, v) for v in sorted(root.values())]
+        return fetch_all(session, urls, self.cache_dir, 4)
+
+    def test_conditional_fetch(self):
+        """
+        Test definitions are fetched concurrently, and once cached are only
+        revalidated (304) on subsequent fetches with identical results.
+        """
+        first = self.fetch_metastore()
+        self.assertEqual(self.server.not_modified, [])
+        self.assertEqual([e for u, d, e in first], [None, None])
+        self.assertEqual(first[0][1], METASTORE["/plex.json"])
+        second = self.fetch_metastore()
+        self.assertEqual(second, first)
+        self.assertEqual(
+            sorted(self.server.not_modified),
+            ["/plex.json", "/root.json", "/syncthing.json"],
+        )
+
+    def test_fetch_error(self):
+        """
+        Test a failed definition fetch is reported against its url without
+        failing the others.
+        """
+        session = metastore_session(4)
+        urls = [
+            "{}/plex.json".format(self.url_root),
+            "{}/missing.json".format(self.url_root),
+        ]
+        returned = fetch_all(session, urls, self.cache_dir, 4)
+        self.assertEqual(returned[0][1], METASTORE["/plex.json"])
+        self.assertEqual(returned[1][0], urls[1])
+        self.assertIsNone(returned[1][1])
+        self.assertIsNotNone(returned[1][2])
+
+    def test_hashes(self):
+        """
+        Test definition hashes round trip via the cache and are key order
+        independent.
+        """
+        self.assertEqual(load_hashes(self.cache_dir), {})
+        r_d = {"description": "Plex", "containers": {"a": 1, "b": 2}}
+        hashes = {"Plex": definition_hash(r_d)}
+        save_hashes(self.cache_dir, hashes)
+        self.assertEqual(load_hashes(self.cache_dir), hashes)
+        self.assertEqual(
+            definition_hash({"containers": {"b": 2, "a": 1}, "description": "Plex"}),
+            hashes["Plex"],
+        )
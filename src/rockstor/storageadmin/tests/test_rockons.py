@@ -0,0 +1,78 @@
+"""
+Copyright (c) 2012-2023 RockStor, Inc. <http://rockstor.com>
+This file is part of RockStor.
+
+RockStor is free software; you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published
+by the Free Software Foundation; either version 2 of the License,
+or (at your option) any later version.
+
+RockStor is distributed in the hope that it will be useful, but
+WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program. If not, see <http://www.gnu.org/licenses/>.
+"""
+
+from mock import patch
+
+from storageadmin.models import DContainer, DImage, DPort, RockOn
+from storageadmin.tests.test_api import APITestMixin
+
+
+class RockOnTests(APITestMixin):
+    fixtures = ["test_api.json"]
+    BASE_URL = "/api/rockons"
+
+    @classmethod
+    def setUpClass(cls):
+        super(RockOnTests, cls).setUpClass()
+
+        # Keep the list view away from the docker daemon.
+        cls.patch_docker_status = patch("storageadmin.views.rockon.docker_status")
+        cls.mock_docker_status = cls.patch_docker_status.start()
+        cls.mock_docker_status.return_value = False
+
+        cls.patch_probe_containers = patch(
+            "storageadmin.models.rockon.probe_containers"
+        )
+        cls.mock_probe_containers = cls.patch_probe_containers.start()
+        cls.mock_probe_containers.return_value = []
+
+    @classmethod
+    def tearDownClass(cls):
+        super(RockOnTests, cls).tearDownClass()
+        patch.stopall()
+
+    def test_get_query_count(self):
+        """
+        Test GET request of the rock-on list issues a fixed number of queries,
+        regardless of the number of rock-ons, their containers and ports.
+        """
+        dimage = DImage.objects.create(name="image1", tag="latest", repo="na")
+        hostp = 8080
+        for r in range(3):
+            rockon = RockOn.objects.create(
+                name="rockon{}".format(r),
+                description="Rock-on {}".format(r),
+                version="1.0",
+                state="installed",
+                status="stopped",
+                ui=True,
+            )
+            for c in range(2):
+                container = DContainer.objects.create(
+                    rockon=rockon, dimage=dimage, name="container{}-{}".format(r, c)
+                )
+                for p in range(2):
+                    DPort.objects.create(
+                        hostp=hostp,
+                        containerp=80 + p,
+                        container=container,
+                        uiport=(c == 1 and p == 1),
+                        publish=True,
+                    )
+                    hostp += 1
+        self.get_max_queries(self.BASE_URL, 6)
@@ -20,7 +20,14 @@ from mock import patch
 from rest_framework import status
 
 from storageadmin.exceptions import RockStorAPIException
-from storageadmin.models import Pool, Share, SambaShare, User
+from storageadmin.models import (
+    Group,
+    Pool,
+    SambaCustomConfig,
+    SambaShare,
+    Share,
+    User,
+)
 from storageadmin.tests.test_api import APITestMixin
 from storageadmin.views.samba import SambaListView
 
@@ -75,8 +82,10 @@ class SambaTests(APITestMixin, SambaListView):
         cls.mock_status = cls.patch_status.start()
         cls.mock_status.return_value = "out", "err", 0
 
-        cls.patch_restart_samba = patch("storageadmin.views.samba.restart_samba")
-        cls.mock_status = cls.patch_restart_samba.start()
+        cls.patch_reload_samba_config = patch(
+            "storageadmin.views.samba.reload_samba_config"
+        )
+        cls.mock_reload_samba_config = cls.patch_reload_samba_config.start()
 
         cls.patch_refresh_smb_config = patch(
             "storageadmin.views.samba.refresh_smb_config"
@@ -316,6 +325,31 @@ class SambaTests(APITestMixin, SambaListView):
     #     self.assertEqual(response.status_code, status.HTTP_200_OK, msg=response.data)
     #     self.assertEqual(response.data["id"], smb_id)
 
+    def test_get_query_count(self):
+        """
+        Test GET request of the samba export list issues a fixed number of
+        queries, regardless of the number of exports, their admin users and
+        custom configs.
+        """
+        group = Group.objects.create(gid=1000, groupname="smbgroup")
+        users = [
+            User.objects.create(
+                username="smbuser{}".format(i), uid=1000 + i, group=group
+            )
+            for i in range(3)
+        ]
+        for share in Share.objects.exclude(sambashare__isnull=False):
+            smb_share = SambaShare.objects.create(
+                share=share, path="/mnt2/{}".format(share.name)
+            )
+            smb_share.admin_users.add(*users)
+            for i in range(2):
+                SambaCustomConfig.objects.create(
+                    smb_share=smb_share, custom_config="option{} = yes".format(i)
+                )
+        self.assertEqual(SambaShare.objects.count(), 3)
+        self.get_max_queries(self.BASE_URL, 5)
+
     def test_get_non_existent(self):
         """
         Test GET request
@@ -466,6 +500,36 @@ class SambaTests(APITestMixin, SambaListView):
         response = self.client.post(self.BASE_URL, data=data)
         self.assertEqual(response.status_code, status.HTTP_200_OK, msg=response.data)
 
+    @patch("storageadmin.views.samba.refresh_smb_discovery")
+    def test_reload_only_on_config_change(self, mock_refresh_smb_discovery):
+        """
+        Samba is reloaded only when refresh_smb_config() rewrote smb.conf.
+        """
+        self.mock_reload_samba_config.reset_mock()
+        self.addCleanup(
+            setattr, self.mock_refresh_smb_config, "return_value", "smbconfig"
+        )
+        # Rendered shares section unchanged: no rewrite and no reload.
+        self.mock_refresh_smb_config.return_value = False
+        data = {
+            "shares": ["3"],
+            "browsable": "yes",
+            "guest_ok": "yes",
+            "read_only": "yes",
+        }
+        response = self.client.post(self.BASE_URL, data=data)
+        self.assertEqual(response.status_code, status.HTTP_200_OK, msg=response.data)
+        self.mock_reload_samba_config.assert_not_called()
+        # Changed section: smb.conf rewritten so samba is reloaded.
+        self.mock_refresh_smb_config.return_value = True
+        data["browsable"] = "no"
+        del data["shares"]
+        response = self.client.put(
+            "{}/{}".format(self.BASE_URL, response.data["id"]), data=data
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK, msg=response.data)
+        self.assertEqual(self.mock_reload_samba_config.call_count, 1)
+
     def test_put_requests_1(self):
         """
         . Edit samba that does not exists
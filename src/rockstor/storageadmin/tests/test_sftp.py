@@ -103,6 +103,13 @@ class SFTPTests(APITestMixin):
         response = self.client.get("{}/1".format(self.BASE_URL))
         self.assertEqual(response.status_code, status.HTTP_200_OK, msg=response)
 
+    def test_get_query_count(self):
+        """
+        Test GET request of the SFTP export list issues a fixed number of queries,
+        regardless of the number of SFTP exports and their nested relations.
+        """
+        self.get_max_queries(self.BASE_URL, 2)
+
     def test_post_requests_1(self):
         """
         invalid sftp operations
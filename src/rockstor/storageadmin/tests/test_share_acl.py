@@ -14,6 +14,9 @@ along with this program. If not, see <http://www.gnu.org/licenses/>.
 """
 
 
+from datetime import timedelta
+
+from django.utils.timezone import now
 from rest_framework import status
 from rest_framework.test import APITestCase
 from rest_framework import serializers
@@ -21,12 +24,12 @@ import mock
 from mock import patch
 
 from storageadmin import serializers
-from storageadmin.models import Snapshot, Pool, Share
+from storageadmin.models import Snapshot, Pool, Share, ShareACLChange
 from storageadmin.tests.test_api import APITestMixin
 
 
 class ShareAclTests(APITestMixin, APITestCase):
-    fixtures = ['fix2.json']
+    fixtures = ['test_api.json', 'test_shares.json']
     BASE_URL = '/api/shares'
 
     @classmethod
@@ -37,20 +40,74 @@ class ShareAclTests(APITestMixin, APITestCase):
                                       'mount_share')
         cls.mock_mount_share = cls.patch_mount_share.start()
 
-        # patch chown - system.acl wrappers for run_command
-        cls.patch_chown = patch('storageadmin.views.share_acl.chown')
-        cls.mock_chown = cls.patch_chown.start()
-        cls.mock_chown.return_value = ([''], [''], 0)
+        # patch the Huey task walking the share, see system.acl.set_tree_acl
+        cls.patch_change_share_acl = patch('storageadmin.views.share_acl.'
+                                           'change_share_acl')
+        cls.mock_change_share_acl = cls.patch_change_share_acl.start()
 
-        # patch chmod - system.acl wrapper for run_command
-        cls.patch_chmod = patch('storageadmin.views.share_acl.chmod')
-        cls.mock_chmod = cls.patch_chmod.start()
-        cls.mock_chmod.return_value = ([''], [''], 0)
+        cls.patch_huey = patch('storageadmin.views.share_acl.HUEY')
+        cls.mock_huey = cls.patch_huey.start()
 
     @classmethod
     def tearDownClass(cls):
         super(ShareAclTests, cls).tearDownClass()
 
+    def setUp(self):
+        super(ShareAclTests, self).setUp()
+        self.mock_huey.pending.return_value = []
+
+    def _post(self, share_id):
+        return self.client.post('{}/{}/acl'.format(self.BASE_URL, share_id),
+                                data={'owner': 'root', 'perms': '755'})
+
+    def test_post_in_progress(self):
+        """
+        1. Refused while a pending change's task is queued
+        2. Accepted once that task is no longer queued: change marked failed
+        3. Refused while a running change records progress
+        4. Accepted once that progress is stale: change marked failed
+        """
+        share_id = 7  # rock-share in test_shares.json
+        pending = ShareACLChange.objects.create(
+            share_id=share_id, owner='root', group='root', perms='755',
+            tid='tid-1')
+        task = mock.Mock(id='tid-1')
+        task.name = 'change_share_acl'
+        self.mock_huey.pending.return_value = [task]
+        response = self._post(share_id)
+        self.assertEqual(response.status_code,
+                         status.HTTP_400_BAD_REQUEST, msg=response.data)
+        e_msg = ('An ownership/permissions change of share (rock-share) is '
+                 'already in progress.')
+        self.assertEqual(response.data[0], e_msg)
+
+        self.mock_huey.pending.return_value = []
+        response = self._post(share_id)
+        self.assertEqual(response.status_code,
+                         status.HTTP_200_OK, msg=response.data)
+        self.assertEqual(ShareACLChange.objects.get(id=pending.id).status,
+                         'failed')
+
+        # The change just posted, as if its task were now running.
+        running = ShareACLChange.objects.get(share_id=share_id,
+                                             status='pending')
+        running.status = 'running'
+        running.save()
+        response = self._post(share_id)
+        self.assertEqual(response.status_code,
+                         status.HTTP_400_BAD_REQUEST, msg=response.data)
+
+        # N.B. update() bypasses the auto_now of updated.
+        ShareACLChange.objects.filter(id=running.id).update(
+            updated=now() - timedelta(hours=1))
+        response = self._post(share_id)
+        self.assertEqual(response.status_code,
+                         status.HTTP_200_OK, msg=response.data)
+        self.assertEqual(ShareACLChange.objects.get(id=running.id).status,
+                         'failed')
+        self.assertEqual(ShareACLChange.objects.filter(
+            share_id=share_id, status='pending').count(), 1)
+
     # # May need to moc the ShareSerializer
     # @mock.patch('storageadmin.views.share_acl.ShareSerializer')
     # # we require Snapshot mock as ShareSerializer includes a snapshots field,
@@ -159,6 +159,13 @@ class ShareTests(APITestMixin):
         response2 = self.client.get("%s?sortby=usage" % self.BASE_URL)
         self.assertEqual(response1.status_code, status.HTTP_200_OK, msg=response2.data)
 
+    def test_get_query_count(self):
+        """
+        Test GET request of the share list issues a fixed number of queries,
+        regardless of the number of shares and their nested relations.
+        """
+        self.get_max_queries(self.BASE_URL, 5)
+
     def test_name_regex(self):
         """
         Share name must start with a alphanumeric (a-z0-9) ' 'character and
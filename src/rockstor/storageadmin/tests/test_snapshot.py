@@ -17,6 +17,7 @@ along with this program. If not, see <http://www.gnu.org/licenses/>.
 from rest_framework import status
 from mock import patch
 
+from storageadmin.models import Snapshot
 from storageadmin.tests.test_api import APITestMixin
 
 """
@@ -79,6 +80,10 @@ class SnapshotTests(APITestMixin):
         cls.mock_remove_snap = cls.patch_remove_snap.start()
         cls.mock_remove_snap.return_value = True
 
+        cls.patch_remove_snaps = patch("storageadmin.views.snapshot." "remove_snaps")
+        cls.mock_remove_snaps = cls.patch_remove_snaps.start()
+        cls.mock_remove_snaps.return_value = []
+
         cls.patch_create_clone = patch("storageadmin.views.snapshot." "create_clone")
         cls.mock_create_clone = cls.patch_create_clone.start()
 
@@ -95,6 +100,29 @@ class SnapshotTests(APITestMixin):
         response = self.client.get("/api/snapshots")
         self.assertEqual(response.status_code, status.HTTP_200_OK, msg=response.data)
 
+    def test_get_sorted(self):
+        """
+        Test GET with sort, filter and cursor parameters
+        1. Sort by a supported field
+        2. Sort by an unsupported field
+        3. Keyset (cursor) pagination returns no total count
+        """
+
+        response = self.client.get("/api/snapshots?sortby=name&reverse=yes")
+        self.assertEqual(response.status_code, status.HTTP_200_OK, msg=response.data)
+        names = [s["name"] for s in response.data["results"]]
+        self.assertEqual(names, sorted(names, reverse=True))
+
+        response = self.client.get("/api/snapshots?sortby=bogus")
+        self.assertEqual(
+            response.status_code, status.HTTP_400_BAD_REQUEST, msg=response.data
+        )
+
+        response = self.client.get("/api/snapshots?cursor=&page_size=1")
+        self.assertEqual(response.status_code, status.HTTP_200_OK, msg=response.data)
+        self.assertNotIn("count", response.data)
+        self.assertEqual(len(response.data["results"]), 1)
+
     def test_post_requests_1(self):
         """
         invalid snapshot post operation via invalid share name
@@ -276,3 +304,78 @@ class SnapshotTests(APITestMixin):
             '{}/{}/snapshots/{}'.format(self.BASE_URL, share_id, snap_name))
         self.assertEqual(response.status_code,
                          status.HTTP_200_OK, msg=response.data)
+
+    def test_bulk_delete_requests(self):
+        """
+        1. Bulk delete including a snapshot id not of the given share
+        2. Bulk delete by "ids" list in request body - happy path
+        """
+        # snap2 (id=2) belongs to share2 (id=3) not share1 (id=2)
+        share_id = 2
+        response = self.client.delete(
+            "{}/{}/snapshots".format(self.BASE_URL, share_id),
+            data={"ids": [1, 2]},
+        )
+        self.assertEqual(
+            response.status_code,
+            status.HTTP_500_INTERNAL_SERVER_ERROR,
+            msg=response.data,
+        )
+        e_msg = "Snapshot id (2) does not exist."
+        self.assertEqual(response.data[0], e_msg)
+
+        self.mock_remove_snaps.reset_mock()
+        response = self.client.delete(
+            "{}/{}/snapshots".format(self.BASE_URL, share_id), data={"ids": [1]}
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK, msg=response.data)
+        self.assertEqual(self.mock_remove_snaps.call_count, 1)
+        self.assertEqual(
+            self.mock_remove_snaps.call_args[0][1], [("share1", "snap1", "0/259")]
+        )
+
+    def test_put_visibility(self):
+        """
+        1. Bulk visibility change with a non boolean uvisible
+        2. Bulk visibility change including a snapshot id not of the share
+        3. Make snap1 visible - happy path
+        4. Make snap1 visible again - no change
+        """
+        share_id = 2  # from fixture share_name = "share1"
+        response = self.client.put(
+            "{}/{}/snapshots".format(self.BASE_URL, share_id),
+            data={"ids": [1], "uvisible": "yes"},
+        )
+        self.assertEqual(
+            response.status_code, status.HTTP_400_BAD_REQUEST, msg=response.data
+        )
+        e_msg = "Element 'uvisible' must be a boolean, not (<type 'unicode'>)."
+        self.assertEqual(response.data[0], e_msg)
+
+        response = self.client.put(
+            "{}/{}/snapshots".format(self.BASE_URL, share_id),
+            data={"ids": [1, 2], "uvisible": True},
+        )
+        self.assertEqual(
+            response.status_code, status.HTTP_400_BAD_REQUEST, msg=response.data
+        )
+        e_msg = "Snapshot id (2) does not exist."
+        self.assertEqual(response.data[0], e_msg)
+
+        self.mock_mount_snap.reset_mock()
+        response = self.client.put(
+            "{}/{}/snapshots".format(self.BASE_URL, share_id),
+            data={"ids": [1], "uvisible": True},
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK, msg=response.data)
+        self.assertTrue(response.data[0]["uvisible"])
+        self.assertTrue(Snapshot.objects.get(id=1).uvisible)
+        self.assertEqual(self.mock_mount_snap.call_count, 1)
+
+        # Already visible: nothing left to mount.
+        response = self.client.put(
+            "{}/{}/snapshots".format(self.BASE_URL, share_id),
+            data={"ids": [1], "uvisible": True},
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK, msg=response.data)
+        self.assertEqual(self.mock_mount_snap.call_count, 1)
@@ -0,0 +1,144 @@
+"""
+Copyright (c) 2012-2023 RockStor, Inc. <http://rockstor.com>
+This file is part of RockStor.
+
+RockStor is free software; you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published
+by the Free Software Foundation; either version 2 of the License,
+or (at your option) any later version.
+
+RockStor is distributed in the hope that it will be useful, but
+WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program. If not, see <http://www.gnu.org/licenses/>.
+"""
+from collections import namedtuple
+
+from rest_framework import status
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+from rest_framework_custom import SortedListMixin
+from storageadmin.exceptions import RockStorAPIException
+from storageadmin.models import Share, Snapshot
+from storageadmin.tests.test_api import APITestMixin
+
+
+class SortedListTests(APITestMixin):
+    """
+    Sorting, filtering and keyset (?cursor=) pagination of list views, as per
+    rfc.SortedListMixin and KeysetPagination, via the snapshots list view.
+    """
+
+    fixtures = ["test_api.json", "test_snapshot.json"]
+    BASE_URL = "/api/snapshots"
+
+    def setUp(self):
+        super(SortedListTests, self).setUp()
+        # Fixture snapshots (id 1 & 2) are both of size 16: add more such ties.
+        share = Share.objects.get(id=2)
+        for name, size, snap_type in [
+            ("snap3", 16, "admin"),
+            ("snap4", 8, "replication"),
+            ("snap5", 16, "admin"),
+            ("snap6", 32, "admin"),
+        ]:
+            Snapshot.objects.create(
+                share=share, name=name, size=size, qgroup="0/na", snap_type=snap_type
+            )
+
+    def _ids(self, response):
+        return [s["id"] for s in response.data["results"]]
+
+    def _expected(self, reverse=False):
+        # Order by size with ties broken by id, as per sort_and_filter().
+        snaps = sorted(Snapshot.objects.all(), key=lambda s: (s.size, s.id))
+        if reverse:
+            snaps.reverse()
+        return [s.id for s in snaps]
+
+    def test_invalid_sort_field(self):
+        response = self.client.get("{}?sortby=bogus".format(self.BASE_URL))
+        self.assertEqual(
+            response.status_code, status.HTTP_400_BAD_REQUEST, msg=response.data
+        )
+        e_msg = (
+            "Unsupported sortby (bogus). Supported values are: "
+            "eusage, id, name, rusage, size, toc."
+        )
+        self.assertEqual(response.data[0], e_msg)
+        # Also rejected when keyset paginated.
+        response = self.client.get("{}?sortby=bogus&cursor=".format(self.BASE_URL))
+        self.assertEqual(
+            response.status_code, status.HTTP_400_BAD_REQUEST, msg=response.data
+        )
+
+    def test_default_ordering(self):
+        response = self.client.get(self.BASE_URL)
+        self.assertEqual(response.status_code, status.HTTP_200_OK, msg=response.data)
+        expected = list(Snapshot.objects.order_by("-id").values_list("id", flat=True))
+        self.assertEqual(self._ids(response), expected)
+
+    def test_sort_tie_break_on_id(self):
+        response = self.client.get("{}?sortby=size".format(self.BASE_URL))
+        self.assertEqual(response.status_code, status.HTTP_200_OK, msg=response.data)
+        self.assertEqual(self._ids(response), self._expected())
+        # Reversed order also reverses the id tie breaker.
+        response = self.client.get("{}?sortby=size&reverse=yes".format(self.BASE_URL))
+        self.assertEqual(response.status_code, status.HTTP_200_OK, msg=response.data)
+        self.assertEqual(self._ids(response), self._expected(reverse=True))
+
+    def test_filter(self):
+        response = self.client.get("{}?snap_type=replication".format(self.BASE_URL))
+        self.assertEqual(response.status_code, status.HTTP_200_OK, msg=response.data)
+        self.assertEqual([s["name"] for s in response.data["results"]], ["snap4"])
+        response = self.client.get("{}?name=SNAP1".format(self.BASE_URL))
+        self.assertEqual(response.status_code, status.HTTP_200_OK, msg=response.data)
+        self.assertEqual([s["name"] for s in response.data["results"]], ["snap1"])
+
+    def test_cursor_round_trip(self):
+        for reverse in ["no", "yes"]:
+            url = "{}?sortby=size&reverse={}&cursor=&page_size=2".format(
+                self.BASE_URL, reverse
+            )
+            pages = []
+            while url is not None:
+                response = self.client.get(url)
+                self.assertEqual(
+                    response.status_code, status.HTTP_200_OK, msg=response.data
+                )
+                self.assertNotIn("count", response.data)
+                pages.append(self._ids(response))
+                previous = response.data["previous"]
+                url = response.data["next"]
+            # Every snapshot once, in (size, id) order, despite the size ties
+            # spanning pages.
+            self.assertEqual(
+                [i for page in pages for i in page],
+                self._expected(reverse=(reverse == "yes")),
+            )
+            self.assertEqual([len(page) for page in pages], [2, 2, 2])
+            # And back again from the last page.
+            response = self.client.get(previous)
+            self.assertEqual(
+                response.status_code, status.HTTP_200_OK, msg=response.data
+            )
+            self.assertEqual(self._ids(response), pages[-2])
+
+    def test_sort_list(self):
+        Item = namedtuple("Item", "name uid")
+        items = [Item("b", 2), Item("c", 1), Item("a", 3)]
+        view = SortedListMixin()
+        view.sort_fields = {"name": "name", "uid": "uid"}
+        factory = APIRequestFactory()
+
+        view.request = Request(factory.get("/", {"sortby": "uid", "reverse": "yes"}))
+        self.assertEqual([i.uid for i in view.sort_list(items)], [3, 2, 1])
+        view.request = Request(factory.get("/"))
+        self.assertEqual(view.sort_list(items), items)
+        view.request = Request(factory.get("/", {"sortby": "bogus"}))
+        with self.assertRaises(RockStorAPIException):
+            view.sort_list(items)
@@ -72,10 +72,26 @@ class UserTests(APITestMixin):
         cls.mock_update_shell = cls.patch_update_shell.start()
         cls.mock_update_shell.return_value = True
 
+        # NSS users by name with their uid, as checked before useradd.
+        cls.patch_nss_user = patch("storageadmin.views.user.nss_user")
+        cls.mock_nss_user = cls.patch_nss_user.start()
+        cls.mock_nss_user.side_effect = cls.nss_user
+
     @classmethod
     def tearDownClass(cls):
         super(UserTests, cls).tearDownClass()
 
+    def setUp(self):
+        super(UserTests, self).setUp()
+        UserTests.nss_users = {"root": 0, "chrony": 475, "nobody": 65534}
+
+    @classmethod
+    def nss_user(cls, username=None, uid=None):
+        for name, u in cls.nss_users.items():
+            if name == username or (username is None and u == uid):
+                return name, "x", u
+        return None
+
     def test_get(self):
         """
         Test GET request
@@ -88,6 +104,12 @@ class UserTests(APITestMixin):
         response = self.client.get("%s" % self.BASE_URL)
         self.assertEqual(response.status_code, status.HTTP_200_OK, msg=response.data)
 
+        # search users, as served from the directory cache:
+        response = self.client.get("{}?search=admin".format(self.BASE_URL))
+        self.assertEqual(response.status_code, status.HTTP_200_OK, msg=response.data)
+        for u in response.data["results"]:
+            self.assertIn("admin", u["username"].lower())
+
     def test_post_requests(self):
 
         data = {"username": "user1", "password": "pwuser1"}
@@ -216,6 +238,32 @@ class UserTests(APITestMixin):
         self.assertEqual(response.status_code, status.HTTP_200_OK, msg=response.data)
         self.assertEqual(response.data["username"], "newUser2")
 
+    def test_post_user_added_outside_rockstor(self):
+        """
+        Users not yet in our directory cache, ie just added to a joined domain,
+        are found via NSS rather than failing in useradd.
+        """
+        self.mock_useradd.reset_mock()
+        self.nss_users["domainuser"] = 70001
+        data = {"username": "domainuser", "password": "pwuser1"}
+        response = self.client.post(self.BASE_URL, data=data)
+        self.assertEqual(
+            response.status_code, status.HTTP_400_BAD_REQUEST, msg=response.data
+        )
+        e_msg = "User (domainuser) already exists. Please choose a different username."
+        self.assertEqual(response.data[0], e_msg)
+
+        data = {"username": "newuser3", "password": "pwuser1", "uid": "70001"}
+        response = self.client.post(self.BASE_URL, data=data)
+        self.assertEqual(
+            response.status_code,
+            status.HTTP_500_INTERNAL_SERVER_ERROR,
+            msg=response.data,
+        )
+        e_msg = "UID (70001) already exists. Please choose a different one."
+        self.assertEqual(response.data[0], e_msg)
+        self.mock_useradd.assert_not_called()
+
     def test_invalid_UID(self):
         # Create username with non int UID
         data = {
@@ -24,7 +24,7 @@ valid_commands = (
     "|shutdown|reboot|kernel|current-user|auto-update-status"
     "|enable-auto-update|disable-auto-update|refresh-disk-state"
     "|refresh-pool-state|refresh-share-state"
-    "|refresh-snapshot-state"
+    "|refresh-snapshot-state|command-stats"
 )
 
 urlpatterns =[
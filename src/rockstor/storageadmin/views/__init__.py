@@ -70,3 +70,4 @@ from update_subscription import (
     UpdateSubscriptionDetailView,
 )  # noqa F401
 from pincard import PincardView  # noqa F401
+from batch import BatchView  # noqa F401
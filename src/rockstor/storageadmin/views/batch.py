@@ -0,0 +1,105 @@
+"""
+Copyright (c) 2012-2023 RockStor, Inc. <http://rockstor.com>
+This file is part of RockStor.
+
+RockStor is free software; you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published
+by the Free Software Foundation; either version 2 of the License,
+or (at your option) any later version.
+
+RockStor is distributed in the hope that it will be useful, but
+WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program. If not, see <http://www.gnu.org/licenses/>.
+"""
+
+import json
+from io import BytesIO
+
+from django.core.handlers.wsgi import WSGIRequest
+from django.urls import Resolver404, resolve
+from rest_framework.response import Response
+
+import rest_framework_custom as rfc
+from storageadmin.util import handle_exception
+
+import logging
+
+logger = logging.getLogger(__name__)
+
+BATCH_METHODS = ("GET", "POST", "PUT", "DELETE")
+
+
+class BatchView(rfc.GenericView):
+    """
+    Execute several api calls in one round trip. Each sub-request is
+    dispatched, in order, to its normal view with the identity already
+    authenticated for the batch request. Sub-requests are independent: each
+    view keeps its own transaction handling and a failure is reported in that
+    sub-request's result rather than aborting the batch.
+    """
+
+    def post(self, request):
+        sub_requests = request.data.get("requests")
+        if not isinstance(sub_requests, list):
+            e_msg = "Expected a list of sub-requests under the key 'requests'."
+            handle_exception(Exception(e_msg), request, status_code=400)
+        return Response([self._dispatch(request, sub) for sub in sub_requests])
+
+    @staticmethod
+    def _dispatch(request, sub):
+        url = sub.get("url", "").lstrip("/")
+        method = sub.get("method", "get").upper()
+        result = {"url": url, "status_code": 400, "data": None}
+        if method not in BATCH_METHODS:
+            result["data"] = {
+                "detail": "Unsupported method ({}). Valid methods are: {}.".format(
+                    method, ", ".join(BATCH_METHODS)
+                )
+            }
+            return result
+        path, _, query = "/api/{}".format(url).partition("?")
+        try:
+            match = resolve(path)
+        except Resolver404:
+            result["status_code"] = 404
+            result["data"] = {"detail": "Invalid api end point: {}".format(url)}
+            return result
+        if getattr(match.func, "view_class", None) is BatchView:
+            result["data"] = {"detail": "Nested batch requests are not supported."}
+            return result
+
+        body = json.dumps(sub.get("data") or {}).encode("utf-8")
+        environ = request._request.META.copy()
+        environ.update(
+            {
+                "REQUEST_METHOD": method,
+                "PATH_INFO": path,
+                "QUERY_STRING": query,
+                "CONTENT_TYPE": "application/json",
+                "CONTENT_LENGTH": str(len(body)),
+                "wsgi.input": BytesIO(body),
+            }
+        )
+        sub_request = WSGIRequest(environ)
+        sub_request.session = getattr(request._request, "session", None)
+        # Re-use the batch request's authentication rather than re-running it,
+        # also keeping request.auth for views that distinguish token callers.
+        sub_request._force_auth_user = request.user
+        sub_request._force_auth_token = request.auth
+        try:
+            response = match.func(sub_request, *match.args, **match.kwargs)
+        except Exception as e:
+            logger.exception(e)
+            result["status_code"] = 500
+            result["data"] = {"detail": e.__str__()}
+            return result
+        result["status_code"] = response.status_code
+        if hasattr(response, "data"):
+            result["data"] = response.data
+        else:
+            result["data"] = response.content.decode("utf-8")
+        return result
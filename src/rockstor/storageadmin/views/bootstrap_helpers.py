@@ -0,0 +1,198 @@
+"""
+Copyright (c) 2012-2023 RockStor, Inc. <http://rockstor.com>
+This file is part of RockStor.
+
+RockStor is free software; you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published
+by the Free Software Foundation; either version 2 of the License,
+or (at your option) any later version.
+
+RockStor is distributed in the hope that it will be useful, but
+WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program. If not, see <http://www.gnu.org/licenses/>.
+"""
+
+import logging
+import time
+from contextlib import contextmanager
+from multiprocessing.pool import ThreadPool
+
+from django.conf import settings
+from django.db import connections, transaction
+
+from fs.btrfs import mount_share, mount_snap
+from share_helpers import import_snapshots, sftp_snap_toggle
+from storageadmin.models import Share, Snapshot, SFTP
+from system.osi import mount_points
+from system.ssh import sftp_mount_map, sftp_mount
+
+logger = logging.getLogger(__name__)
+
+"""
+Boot time mounting follows the dependency graph pool -> share -> snapshot /
+sftp. Each level of that graph is run in turn and the independent nodes
+within a level, ie the shares of all mounted pools, are run concurrently on a
+bounded worker pool. A node whose parent failed to mount is skipped, and mount
+state is read from /proc/mounts once up front rather than per node.
+"""
+
+
+@contextmanager
+def bootstrap_phase(timings, name):
+    """
+    Record the wall clock duration of a bootstrap phase.
+    :param timings: list of (name, seconds) tuples, appended to.
+    :param name: phase name as reported in the bootstrap log.
+    """
+    start = time.time()
+    try:
+        yield
+    finally:
+        timings.append((name, time.time() - start))
+
+
+def format_timings(timings):
+    return ", ".join("{} {:.2f}s".format(name, secs) for name, secs in timings)
+
+
+def _run_node(node):
+    label, func, args = node
+    try:
+        func(*args)
+        return True
+    except Exception as e:
+        logger.error("Exception during bootstrap {}: ({}).".format(label, e.__str__()))
+        logger.exception(e)
+        return False
+    finally:
+        # Each pool thread has its own db connection, don't leave it open.
+        connections.close_all()
+
+
+def _run_level(pool, nodes):
+    """
+    Run one level of independent bootstrap nodes concurrently.
+    :param pool: ThreadPool.
+    :param nodes: list of (label, func, args) tuples.
+    :return: list of booleans, True for each node that succeeded, in order.
+    """
+    if len(nodes) == 0:
+        return []
+    return pool.map(_run_node, nodes)
+
+
+@transaction.atomic
+def _import_snapshots(share):
+    import_snapshots(share)
+
+
+def _sftp_export(sftpo, mnt_map):
+    # The following may be buggy when used with system mounted (fstab) /home
+    # but we currently don't allow /home to be exported.
+    sftp_mount(
+        sftpo.share, settings.MNT_PT, settings.SFTP_MNT_ROOT, mnt_map, sftpo.editable
+    )
+    sftp_snap_toggle(sftpo.share)
+
+
+def bootstrap_mounts(timings, workers=None):
+    """
+    Mount all shares of mounted pools, import their snapshots, then mount user
+    visible snapshots and SFTP binds; concurrently within each level. Must be
+    called outside of a transaction so that pool threads, each with their own
+    db connection, see the state committed by the prior (pool) phases.
+    :param timings: list of (name, seconds) tuples, appended to per level.
+    :param workers: max concurrent nodes, default settings.BOOTSTRAP["workers"].
+    """
+    if workers is None:
+        workers = settings.BOOTSTRAP["workers"]
+    mounted = mount_points()
+    pool = ThreadPool(workers)
+    try:
+        with bootstrap_phase(timings, "shares"):
+            shares = []
+            for share in Share.objects.select_related("pool"):
+                if share.pool.mnt_pt not in mounted:
+                    logger.error(
+                        "Skipping mount of share ({}) as pool ({}) is "
+                        "not mounted (see previous errors)"
+                        ".".format(share.name, share.pool.name)
+                    )
+                    continue
+                shares.append(share)
+            # System mounted shares i.e. home will already be mounted.
+            to_mount = [s for s in shares if s.mnt_pt not in mounted]
+            nodes = [
+                ("mount of share ({})".format(s.name), mount_share, (s, s.mnt_pt))
+                for s in to_mount
+            ]
+            nodes.extend(
+                [
+                    (
+                        "snapshot import of share ({})".format(s.name),
+                        _import_snapshots,
+                        (s,),
+                    )
+                    for s in shares
+                ]
+            )
+            results = _run_level(pool, nodes)
+            for share, ok in zip(to_mount, results):
+                if ok:
+                    mounted.add(share.mnt_pt)
+
+        with bootstrap_phase(timings, "snapshots"):
+            snaps = []
+            for snap in Snapshot.objects.filter(uvisible=True).select_related(
+                "share__pool"
+            ):
+                if snap.share.mnt_pt not in mounted:
+                    logger.error(
+                        "Skipping mount of snapshot ({}) as share ({}) is "
+                        "not mounted.".format(snap.real_name, snap.share.name)
+                    )
+                    continue
+                snap_mnt = "{}/.{}".format(snap.share.mnt_pt, snap.real_name)
+                if snap_mnt not in mounted:
+                    snaps.append(snap)
+            _run_level(
+                pool,
+                [
+                    (
+                        "mount of snapshot ({})".format(s.real_name),
+                        mount_snap,
+                        (s.share, s.real_name, s.qgroup),
+                    )
+                    for s in snaps
+                ],
+            )
+
+        with bootstrap_phase(timings, "sftp"):
+            mnt_map = sftp_mount_map(settings.SFTP_MNT_ROOT)
+            exports = []
+            for sftpo in SFTP.objects.select_related("share__pool"):
+                if sftpo.share.mnt_pt not in mounted:
+                    logger.error(
+                        "Skipping SFTP export of share ({}) as it is not "
+                        "mounted.".format(sftpo.share.name)
+                    )
+                    continue
+                exports.append(sftpo)
+            _run_level(
+                pool,
+                [
+                    (
+                        "SFTP export of share ({})".format(s.share.name),
+                        _sftp_export,
+                        (s, mnt_map),
+                    )
+                    for s in exports
+                ],
+            )
+    finally:
+        pool.close()
+        pool.join()
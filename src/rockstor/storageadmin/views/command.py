@@ -22,10 +22,9 @@ from rest_framework.authentication import BasicAuthentication, SessionAuthentica
 from storageadmin.auth import DigestAuthentication
 from rest_framework.permissions import IsAuthenticated
 from storageadmin.views import DiskMixin
-from system.osi import uptime, kernel_info, get_device_mapper_map
-from fs.btrfs import mount_share, mount_root, get_dev_pool_info, get_pool_raid_levels, mount_snap, \
+from system.osi import uptime, kernel_info, get_device_mapper_map, command_stats
+from fs.btrfs import mount_root, get_dev_pool_info, get_pool_raid_levels, \
     get_pool_raid_profile
-from system.ssh import sftp_mount_map, sftp_mount
 from system.osi import (
     system_shutdown,
     system_reboot,
@@ -35,19 +34,18 @@ from system.osi import (
 from storageadmin.models import (
     Share,
     NFSExport,
-    SFTP,
     Pool,
-    Snapshot,
     UpdateSubscription,
     AdvancedNFSExport,
 )
 from storageadmin.util import handle_exception
 from datetime import datetime
 from django.utils.timezone import utc
-from django.conf import settings
 from django.db import transaction
-from share_helpers import sftp_snap_toggle, import_shares, import_snapshots
+from share_helpers import import_shares, import_snapshots
+from bootstrap_helpers import bootstrap_mounts, bootstrap_phase, format_timings
 from rest_framework_custom.oauth_wrapper import RockstorOAuth2Authentication
+from rest_framework_custom.etag import bump_versions
 from system.pkg_mgmt import (
     auto_update,
     current_version,
@@ -57,6 +55,7 @@ from system.pkg_mgmt import (
 )
 from nfs_exports import NFSExportMixin
 import logging
+import os
 
 logger = logging.getLogger(__name__)
 
@@ -139,89 +138,31 @@ class CommandView(DiskMixin, NFSExportMixin, APIView):
                 )
                 logger.exception(e)
 
-    @transaction.atomic
-    def post(self, request, command, rtcepoch=None):
-        if command == "bootstrap":
+    def _bootstrap(self, request):
+        timings = []
+        with bootstrap_phase(timings, "disks"):
             self._update_disk_state()
+        with bootstrap_phase(timings, "pools"):
             self._refresh_pool_state()
-            for p in Pool.objects.all():
-                if p.disk_set.attached().count() == 0:
-                    continue
-                if not p.is_mounted:
-                    # Prior _refresh_pool_state() should have ensure a mount.
-                    logger.error(
-                        "Skipping import/update of prior known "
-                        "shares for pool ({}) as it is not mounted. "
-                        "(see previous errors)"
-                        ".".format(p.name)
-                    )
-                    continue
-                # Import / update db shares counterpart for managed pool.
-                import_shares(p, request)
-
-            for share in Share.objects.all():
-                if share.pool.disk_set.attached().count() == 0:
-                    continue
-                if not share.pool.is_mounted:
-                    logger.error(
-                        "Skipping mount of share ({}) as pool () is "
-                        "not mounted (see previous errors)"
-                        ".".format(share.name, share.pool.name)
-                    )
-                    continue
-                try:
-                    if not share.is_mounted:
-                        # System mounted shares i.e. home will already be mounted.
-                        mnt_pt = "{}{}".format(settings.MNT_PT, share.name)
-                        mount_share(share, mnt_pt)
-                except Exception as e:
-                    e_msg = (
-                        "Exception while mounting a share ({}) during "
-                        "bootstrap: ({})."
-                    ).format(share.name, e.__str__())
-                    logger.error(e_msg)
-                    logger.exception(e)
+            with transaction.atomic():
+                for p in Pool.objects.all():
+                    if p.disk_set.attached().count() == 0:
+                        continue
+                    if not p.is_mounted:
+                        # Prior _refresh_pool_state() should have ensure a mount.
+                        logger.error(
+                            "Skipping import/update of prior known "
+                            "shares for pool ({}) as it is not mounted. "
+                            "(see previous errors)"
+                            ".".format(p.name)
+                        )
+                        continue
+                    # Import / update db shares counterpart for managed pool.
+                    import_shares(p, request)
 
-                try:
-                    import_snapshots(share)
-                except Exception as e:
-                    e_msg = (
-                        "Exception while importing snapshots of share ({}): ({})."
-                    ).format(share.name, e.__str__())
-                    logger.error(e_msg)
-                    logger.exception(e)
-
-            for snap in Snapshot.objects.all():
-                if snap.uvisible:
-                    try:
-                        mount_snap(snap.share, snap.real_name, snap.qgroup)
-                    except Exception as e:
-                        e_msg = (
-                            "Failed to make the snapshot ({}) visible. "
-                            "Exception: ({})."
-                        ).format(snap.real_name, e.__str__())
-                        logger.error(e_msg)
-
-            mnt_map = sftp_mount_map(settings.SFTP_MNT_ROOT)
-            for sftpo in SFTP.objects.all():
-                # The following may be buggy when used with system mounted (fstab) /home
-                # but we currently don't allow /home to be exported.
-                try:
-                    sftp_mount(
-                        sftpo.share,
-                        settings.MNT_PT,
-                        settings.SFTP_MNT_ROOT,
-                        mnt_map,
-                        sftpo.editable,
-                    )
-                    sftp_snap_toggle(sftpo.share)
-                except Exception as e:
-                    e_msg = (
-                        "Exception while exporting a SFTP share during "
-                        "bootstrap: ({})."
-                    ).format(e.__str__())
-                    logger.error(e_msg)
+        bootstrap_mounts(timings)
 
+        with bootstrap_phase(timings, "nfs"):
             try:
                 adv_entries = [a.export_str for a in AdvancedNFSExport.objects.all()]
                 exports_d = self.create_adv_nfs_export_input(adv_entries, request)
@@ -232,9 +173,21 @@ class CommandView(DiskMixin, NFSExportMixin, APIView):
                 e_msg = ("Exception while bootstrapping NFS: ({}).").format(e.__str__())
                 logger.error(e_msg)
 
-            logger.debug("Bootstrap operations completed")
-            return Response()
+        logger.info(
+            "Bootstrap operations completed: {}".format(format_timings(timings))
+        )
+        bump_versions(("disks", "pools", "shares"))
+        return Response()
+
+    def post(self, request, command, rtcepoch=None):
+        if command == "bootstrap":
+            # Not run in a single transaction: the concurrent mount phases use
+            # their own db connections and must see the prior phases' state.
+            return self._bootstrap(request)
+        return self._command(request, command, rtcepoch)
 
+    @transaction.atomic
+    def _command(self, request, command, rtcepoch=None):
         if command == "utcnow":
             return Response(datetime.utcnow().replace(tzinfo=utc))
 
@@ -247,6 +200,11 @@ class CommandView(DiskMixin, NFSExportMixin, APIView):
             except Exception as e:
                 handle_exception(e, request)
 
+        if command == "command-stats":
+            # Statistics are per process: those of the worker serving us.
+            reset = request.data.get("reset", False) is True
+            return Response({"pid": os.getpid(), "commands": command_stats(reset)})
+
         if command == "update-check":
             try:
                 subo = None
@@ -382,20 +340,26 @@ class CommandView(DiskMixin, NFSExportMixin, APIView):
                 ).format(e.__str__())
                 handle_exception(Exception(msg), request)
 
+        # State refreshes also pick up live (non db) state, such as mounts, so
+        # invalidate conditional GETs even if no row changed.
         if command == "refresh-disk-state":
             self._update_disk_state()
+            bump_versions(("disks",))
             return Response()
 
         if command == "refresh-pool-state":
             self._refresh_pool_state()
+            bump_versions(("pools",))
             return Response()
 
         if command == "refresh-share-state":
             for p in Pool.objects.all():
                 import_shares(p, request)
+            bump_versions(("shares",))
             return Response()
 
         if command == "refresh-snapshot-state":
             for share in Share.objects.all():
                 import_snapshots(share)
+            bump_versions(("shares",))
             return Response()
@@ -16,6 +16,7 @@ You should have received a copy of the GNU General Public License
 along with this program. If not, see <http://www.gnu.org/licenses/>.
 """
 
+import codecs
 import gzip
 import json
 import logging
@@ -31,6 +32,7 @@ from rest_framework.parsers import FileUploadParser, MultiPartParser
 from rest_framework.response import Response
 
 import rest_framework_custom as rfc
+from cli.api_wrapper import APIWrapper
 from cli.rest_util import api_call
 from smart_manager.models.service import Service, ServiceStatus
 from storageadmin.models import ConfigBackup, RockOn, Pool, Share
@@ -42,6 +44,22 @@ from system.osi import md5sum, run_command
 
 logger = logging.getLogger(__name__)
 BASE_URL = "https://localhost/api"
+aw = APIWrapper()
+# Maximum number of requests submitted per api/batch round trip on restore.
+RESTORE_BATCH_SIZE = 25
+
+# Models consumed by restore_rockons(), which is passed only these.
+ROCKON_MODELS = (
+    "storageadmin.rockon",
+    "storageadmin.dcontainer",
+    "storageadmin.dcustomconfig",
+    "storageadmin.dcontainerenv",
+    "storageadmin.dcontainerlabel",
+    "storageadmin.dvolume",
+    "storageadmin.dport",
+    "storageadmin.dcontainerdevice",
+    "storageadmin.share",
+)
 
 
 def generic_post(url, payload):
@@ -64,6 +82,95 @@ def generic_post(url, payload):
         )
 
 
+def generic_batch(calls, batch_size=None):
+    """
+    Submit a list of POST requests via api/batch round trips of at most
+    batch_size (default: RESTORE_BATCH_SIZE) requests each. This keeps each
+    round trip well within the gunicorn worker timeout. As per generic_post(),
+    each failure is logged and we move on.
+    :param calls: list of (url, payload) tuples, with url relative to api/.
+    :param batch_size: maximum number of requests per api/batch call.
+    """
+    if batch_size is None:
+        batch_size = RESTORE_BATCH_SIZE
+    for start in range(0, len(calls), batch_size):
+        chunk = calls[start : start + batch_size]
+        try:
+            results = aw.batch(
+                [{"url": u, "calltype": "post", "data": p} for u, p in chunk],
+                save_error=False,
+            )
+        except Exception as e:
+            logger.error(
+                "Exception occurred while submitting ({}) requests: {}. "
+                "Moving on.".format(len(chunk), e.__str__())
+            )
+            continue
+        for (url, payload), result in zip(chunk, results):
+            # Remove "password" indexed items from our payload to avoid logging them.
+            if isinstance(payload, dict):
+                payload.pop("password", None)
+            if result["status_code"] == 200:
+                logger.info(
+                    "Successfully created resource: {}. Payload: {}".format(
+                        url, payload
+                    )
+                )
+            else:
+                logger.error(
+                    "Exception occurred while creating resource: {}. "
+                    "Payload: {}. Status: {}, {}. "
+                    "Moving on.".format(
+                        url, payload, result["status_code"], result["data"]
+                    )
+                )
+
+
+def iter_json_arrays(fo, chunk_size=65536):
+    """
+    Incremental parser for a stream of consecutive JSON arrays, ie the lines
+    of a config backup file, that yields each array element as soon as it has
+    been read. The raw JSON text is never held whole: only the unparsed
+    remainder of the current chunk is buffered.
+    :param fo: file like object, ie as returned by gzip.open().
+    :param chunk_size: bytes read from fo at a time.
+    :return: generator of (array index, element) tuples.
+    """
+    decoder = json.JSONDecoder()
+    utf8 = codecs.getincrementaldecoder("utf-8")()
+    buf = u""
+    index = -1
+    in_array = False
+    while True:
+        buf = buf.lstrip(u" \t\r\n,") if in_array else buf.lstrip()
+        if buf.startswith(u"[") and not in_array:
+            in_array = True
+            index += 1
+            buf = buf[1:]
+            continue
+        if buf.startswith(u"]") and in_array:
+            in_array = False
+            buf = buf[1:]
+            continue
+        if buf and not in_array:
+            raise ValueError("Expected a JSON array, found: {}".format(buf[:32]))
+        if buf:
+            try:
+                element, end = decoder.raw_decode(buf)
+            except ValueError:
+                pass  # Incomplete element: read on.
+            else:
+                yield index, element
+                buf = buf[end:]
+                continue
+        chunk = fo.read(chunk_size)
+        if not chunk:
+            if in_array:
+                raise ValueError("Truncated JSON array ({}).".format(index))
+            return
+        buf += utf8.decode(chunk)
+
+
 def random_pass(length):
     """
     Generate a random password for use during user restore.
@@ -89,14 +196,14 @@ def restore_users_groups(ml):
             groups.append(m["fields"])
 
     # order is important, first create all the groups and then users.
-    for g in groups:
-        generic_post("{}/groups".format(BASE_URL), g)
+    calls = [("groups", g) for g in groups]
     for u in users:
         # Replace user record 'group' field pk value with resolved group name.
         u["group"] = groupname_from_pk[u["group"]]
         # users are created with a random password
         u["password"] = random_pass(128)
-        generic_post("{}/users".format(BASE_URL), u)
+        calls.append(("users", u))
+    generic_batch(calls)
     logger.info("Finished restoring users and groups.")
 
 
@@ -125,14 +232,16 @@ def restore_nfs_exports(ml):
             export_groups[m["pk"]] = m["fields"]
         elif m["model"] == "storageadmin.advancednfsexport":
             adv_exports["entries"].append(m["fields"]["export_str"])
+    calls = []
     for e in exports:
         if len(e["mount"].split("/")) != 3:
             logger.info("skipping nfs export with mount: {}".format(e["mount"]))
             continue
         e["shares"] = [e["mount"].split("/")[2]]
         payload = dict(export_groups[e["export_group"]], **e)
-        generic_post("{}/nfs-exports".format(BASE_URL), payload)
-    generic_post("{}/adv-nfs-exports".format(BASE_URL), adv_exports)
+        calls.append(("nfs-exports", payload))
+    calls.append(("adv-nfs-exports", adv_exports))
+    generic_batch(calls)
     logger.info("Finished restoring NFS exports.")
 
 
@@ -147,11 +256,10 @@ def restore_services(ml):
             if config is not None:
                 config = json.loads(config)
                 services[name] = {"conf": {"config": config}, "id": pkid}
+    calls = []
     for s in services:
         logger.info("Restore the following service: {}".format(s))
-        generic_post(
-            "{}/sm/services/{}/config".format(BASE_URL, s), services[s]["conf"]
-        )
+        calls.append(("sm/services/{}/config".format(s), services[s]["conf"]))
         # Turn the service ON if it is ON in backup AND currently OFF
         so = False
         cur_status = False
@@ -165,7 +273,8 @@ def restore_services(ml):
                 "The {} service has no ServiceStatus entry, so assume OFF".format(s)
             )
         if so and validate_service_status(ml, services[s]["id"]) and not cur_status:
-            generic_post("{}/sm/services/{}/start".format(BASE_URL, s), {})
+            calls.append(("sm/services/{}/start".format(s), {}))
+    generic_batch(calls)
     logger.info("Finished restoring services.")
 
 
@@ -233,8 +342,7 @@ def restore_scheduled_tasks(ml, sa_ml):
     """
     logger.info("Started restoring scheduled tasks.")
     tasks = validate_task_definitions(ml, sa_ml)
-    for t in tasks:
-        generic_post("{}/sm/tasks".format(BASE_URL), t)
+    generic_batch([("sm/tasks", t) for t in tasks])
     logger.info("Finished restoring scheduled tasks.")
 
 
@@ -577,11 +685,16 @@ def get_target_pool_id(source_name):
 def restore_config(cbid):
     cbo = ConfigBackup.objects.get(id=cbid)
     fp = os.path.join(settings.MEDIA_ROOT, "config-backups", cbo.filename)
-    gfo = gzip.open(fp)
-    lines = gfo.readlines()
-    sa_ml = json.loads(lines[0])
-    sm_ml = json.loads(lines[1])
-    gfo.close()
+    # N.B. restore of one section depends on models from another, ie scheduled
+    # tasks reference shares: so all parsed models are kept for the duration.
+    sa_ml = []
+    sm_ml = []
+    with gzip.open(fp) as gfo:
+        for index, m in iter_json_arrays(gfo):
+            if index == 0:
+                sa_ml.append(m)
+            elif index == 1:
+                sm_ml.append(m)
     restore_users_groups(sa_ml)
     restore_samba_exports(sa_ml)
     restore_nfs_exports(sa_ml)
@@ -590,8 +703,9 @@ def restore_config(cbid):
     # restore_appliances(ml)
     # restore_network(sa_ml)
     restore_scheduled_tasks(sm_ml, sa_ml)
-    # N.B. the following is also a Huey task in its own right.
-    restore_rockons(sa_ml)
+    # N.B. the following is also a Huey task in its own right: so we pass only
+    # the models it needs for storage in its queued arguments.
+    restore_rockons([m for m in sa_ml if m["model"] in ROCKON_MODELS])
 
 
 class ConfigBackupMixin(object):
@@ -19,6 +19,8 @@ import os
 import re
 from rest_framework.response import Response
 from django.db import transaction
+from django.db.models import TextField, Value
+from django.db.models.functions import Cast, Concat
 from storageadmin.models import Disk, Pool, Share
 from fs.btrfs import (
     enable_quota,
@@ -38,8 +40,7 @@ import rest_framework_custom as rfc
 from system import smart
 from system.luks import (
     luks_format_disk,
-    get_unlocked_luks_containers_uuids,
-    get_crypttab_entries,
+    luks_inventory,
     update_crypttab,
     native_keyfile_exists,
     establish_keyfile,
@@ -49,7 +50,7 @@ from system.luks import (
 from system.osi import (
     set_disk_spindown,
     enter_standby,
-    get_dev_byid_name,
+    get_dev_byid_names,
     wipe_disk,
     blink_disk,
     scan_disks,
@@ -58,7 +59,7 @@ from system.osi import (
     systemd_name_escape,
 )
 from system.services import systemctl
-from copy import deepcopy
+from system.memoize import invalidate
 import uuid
 import json
 import logging
@@ -93,6 +94,172 @@ SCAN_DISKS_KNOWN_ROLES = [
 WHOLE_DISK_FORMAT_ROLES = ["LUKS", "bcache", "bcachecdev", "LVM2member"]
 
 
+# Disk fields (attnames) reconciled by DiskMixin._update_disk_state().
+DISK_STATE_FIELDS = (
+    "name",
+    "size",
+    "parted",
+    "offline",
+    "model",
+    "transport",
+    "vendor",
+    "btrfs_uuid",
+    "devid",
+    "allocated",
+    "role",
+    "pool_id",
+    "smart_available",
+    "smart_enabled",
+)
+
+
+def _disk_state(do):
+    return {f: getattr(do, f) for f in DISK_STATE_FIELDS}
+
+
+def _scanned_disk_roles(d, luks, byid_names, byid_name_map):
+    """
+    Identify the roles of a device from its scan_disks() entry.
+    :param d: scan_disks() Disk namedtuple.
+    :param luks: luks_inventory() result.
+    :param byid_names: get_dev_byid_names() result for our devices and their
+    partitions, without path.
+    :param byid_name_map: get_byid_name_map() result.
+    :return: dictionary of SCAN_DISKS_KNOWN_ROLES.
+    """
+    disk_roles_identified = {}
+    if d.fstype == "isw_raid_member" or d.fstype == "linux_raid_member":
+        # MDRAID MEMBER: scan_disks() can informs us of the truth
+        # regarding mdraid membership via d.fstype indicators.
+        # create or update an mdraid dictionary entry
+        disk_roles_identified["mdraid"] = str(d.fstype)
+    if d.fstype == "crypto_LUKS":
+        # LUKS FULL DISK: scan_disks() can inform us of the truth
+        # regarding full disk LUKS containers which on creation have a
+        # unique uuid. Stash this uuid so we might later work out our
+        # container mapping. Currently required as only btrfs uuids
+        # are stored in the Disk model field. Also flag if we are the
+        # container for a currently open LUKS volume.
+        is_unlocked = d.uuid in luks.unlocked
+        disk_roles_identified["LUKS"] = {
+            "uuid": str(d.uuid),
+            "unlocked": is_unlocked,
+        }
+        # We also inform this role of the current crypttab status
+        # of this device, ie: no entry = no "crypttab" key.
+        # Device listed in crypttab = dict key entry of "crypttab".
+        # If crypttab key entry then it's value is 3rd column ie:
+        # 'none' = password on boot
+        # '/root/keyfile-<uuid>' = full path to keyfile
+        # Note that we also set a boolean in the LUKS disk role of
+        # 'keyfileExists' true if a crypttab entry exists or if our
+        # default /root/keyfile-<uuid> exists, false otherwise.
+        # So the current keyfile takes priority when setting this flag.
+        # This may have to be split out later to discern the two states
+        # separately.
+        if d.uuid in luks.crypttab:
+            # Our device has a UUID= match in crypttab so save as
+            # value the current cryptfile 3rd column entry.
+            disk_roles_identified["LUKS"]["crypttab"] = luks.crypttab[d.uuid]
+            # if crypttab 3rd column indicates keyfile: does that
+            # keyfile exist. N.B. non 'none' entry assumed to be
+            # keyfile. Allows for existing user created keyfiles.
+            # TODO: could be problematic during crypttab rewrite where
+            # keyfile is auto named but we should self correct on our
+            # next run, ie new file entry is checked there after.
+            if luks.crypttab[d.uuid] != "none":
+                disk_roles_identified["LUKS"]["keyfileExists"] = os.path.isfile(
+                    luks.crypttab[d.uuid]
+                )
+        if "keyfileExists" not in disk_roles_identified["LUKS"]:
+            # We haven't yet set our keyfileExists flag: ie no entry,
+            # custom or otherwise, in crypttab to check or the entry
+            # was "none". Revert to defining this flag against the
+            # existence or otherwise of our native keyfile:
+            disk_roles_identified["LUKS"]["keyfileExists"] = native_keyfile_exists(
+                d.uuid
+            )
+    if d.type == "crypt":
+        # OPEN LUKS DISK: scan_disks() can inform us of the truth
+        # regarding an opened LUKS container which appears as a mapped
+        # device.
+        # disk_roles_identified['openLUKS'] = 'dm-name-%s' % d.name
+        mapped_name = d.name.split("/")[-1]
+        if mapped_name in luks.volumes:
+            luks_volume_status = dict(luks.volumes[mapped_name])
+            del luks_volume_status["container_uuid"]
+        else:
+            luks_volume_status = get_open_luks_volume_status(d.name, byid_name_map)
+        disk_roles_identified["openLUKS"] = luks_volume_status
+    if d.fstype == "bcache":
+        # BCACHE: scan_disks() can inform us of the truth regarding
+        # bcache "backing devices" so we assign a role to avoid these
+        # devices being seen as unused and accidentally deleted. Once
+        # formatted with make-bcache -B they are accessed via a virtual
+        # device which should end up with a serial of bcache-(d.uuid)
+        # here we tag our backing device with it's virtual counterparts
+        # serial number.
+        disk_roles_identified["bcache"] = "bcache-%s" % d.uuid
+    if d.fstype == "bcachecdev":
+        # BCACHE: continued; here we use the scan_disks() added info
+        # of this bcache device being a cache device not a backing
+        # device, so it will have no virtual block device counterpart
+        # but likewise must be specifically attributed (ie to fast
+        # ssd type drives) so we flag in the role system differently.
+        disk_roles_identified["bcachecdev"] = "bcache-%s" % d.uuid
+    if d.fstype == "LVM2_member":
+        # LVM2 Physical Volume: scan_disks() can inform us of the truth
+        # regarding whole disk physical volumes via their fstype.
+        # Assigning a role to avoid these devices being seen as unused.
+        # The current value of this role is a placeholder and unused.
+        disk_roles_identified["LVM2member"] = str(d.fstype)
+    if d.root is True:
+        # ROOT DISK: scan_disks() has already identified the current
+        # truth regarding the device hosting our root '/' fs so update
+        # our role accordingly.
+        # N.B. value of d.fstype here is essentially a place holder as
+        # the presence or otherwise of the 'root' key is all we need.
+        disk_roles_identified["root"] = str(d.fstype)
+    if d.partitions != {}:
+        # PARTITIONS: scan_disks() has built an updated partitions dict
+        # so create a partitions role containing this dictionary, by-id
+        # indexed. In the following we fail over to "" on failed index.
+        disk_roles_identified["partitions"] = {
+            byid_names[part][0]: d.partitions.get(part, "") for part in d.partitions
+        }
+    return disk_roles_identified
+
+
+def _merge_roles(role, disk_roles_identified):
+    """
+    Join the non scan_disks() identified roles of a Disk.role db value with
+    those freshly identified from scan_disks() data: we assert the new truth
+    regarding the latter.
+    :param role: Disk.role db value, json format or None.
+    :param disk_roles_identified: dictionary of scan_disks() identified roles.
+    :return: new Disk.role value, or the given role if unchanged.
+    """
+    previous_roles = {}
+    # Deal with legacy non json role field contents by erasure.
+    # N.B. We have a minor legacy issue in that prior to using json
+    # format for the db role field we stored one of 2 strings.
+    # Existing mdraid members will be re-assigned if appropriate
+    # using the new json format.
+    # TODO: Can be removed post openSUSE as then no legacy installs.
+    if role is not None and role not in ("isw_raid_member", "linux_raid_member"):
+        previous_roles = json.loads(role)
+    combined_roles = {
+        r: v for r, v in previous_roles.items() if r not in SCAN_DISKS_KNOWN_ROLES
+    }
+    combined_roles.update(disk_roles_identified)
+    # Note that dict of {} isn't None
+    if combined_roles == {}:
+        return None
+    if combined_roles == previous_roles:
+        return role
+    return json.dumps(combined_roles)
+
+
 class DiskMixin(object):
     serializer_class = DiskInfoSerializer
 
@@ -104,47 +271,48 @@ class DiskMixin(object):
         Works only on device serial numbers for drive identification.
         Calls scan_disks to establish the current connected drives info.
         Initially removes duplicate by serial number db entries to deal
-        with legacy db states and obfuscates all previous device names as they
-        are transient. The drive database is then updated with the attached
-        disks info and previously known drives no longer found attached are
-        marked as offline. All offline drives have their SMART availability and
+        with legacy db states. The scan and remaining db entries are then
+        indexed by serial and reconciled in memory: new drives are created,
+        known drives are updated with their attached info, and those no longer
+        found attached are marked as offline and have their transient device
+        name obfuscated. All offline drives have their SMART availability and
         activation status removed and all attached drives have their SMART
-        availability assessed and activated if available.
+        availability assessed and activated if available. Finally only those
+        db entries and fields found to differ are written, grouped into single
+        queries where the values allow.
         :return: serialized models of attached and missing disks via serial num
         """
+        # A rescan is to reflect newly (dis)connected or (un)locked devices.
+        invalidate("byid_name_map", "device_mapper_map")
         # Acquire a list (namedtupil collection) of attached drives > min size
         disks = scan_disks(MIN_DISK_SIZE)
-        # Acquire a list of uuid's for currently unlocked LUKS containers.
-        # Although we could tally these as we go by noting fstype crypt_LUKS
-        # and then loop through our db Disks again updating all matching
-        # base device entries, this approach helps to abstract this component
-        # and to localise role based db manipulations to our second loop.
-        unlocked_luks_containers_uuids = get_unlocked_luks_containers_uuids()
-        serial_numbers_seen = []
-        # Acquire a dictionary of crypttab entries, dev uuid as indexed.
-        dev_uuids_in_crypttab = get_crypttab_entries()
-        # Acquire a dictionary of temp_names (no path) to /dev/disk/by-id names
-        byid_name_map = get_byid_name_map()
-        # Make sane our db entries in view of what we know we have attached.
         # Device serial number is only known external unique entry, scan_disks
         # make this so in the case of empty or repeat entries by providing
         # fake serial numbers which are flagged via WebUI as unreliable.
-        # 1) Scrub all device names with unique but nonsense uuid4.
-        # 2) Mark all offline disks as such via db flag.
-        # 3) Mark all offline disks smart available and enabled flags as False.
-        for do in Disk.objects.all():
-            # Replace all device names with a unique placeholder on each scan
-            # N.B. do not optimize by re-using uuid index as this could lead
-            # to a non refreshed webui acting upon an entry that is different
-            # from that shown to the user.
-            do.name = "detached-" + str(uuid.uuid4()).replace("-", "")
-            do.save(update_fields=["name"])
-            # Delete duplicate or fake by serial number db disk entries.
-            # It makes no sense to save fake serial number drives between scans
-            # as on each scan the serial number is re-generated (fake) anyway.
-            # Serial numbers beginning with 'fake-serial-' are from scan_disks.
+        scanned = {d.serial: d for d in disks}
+        # Acquire a dictionary of temp_names (no path) to /dev/disk/by-id names
+        byid_name_map = get_byid_name_map()
+        # Single pass inventory of open LUKS volumes and crypttab: rather than
+        # calling cryptsetup per device as we go.
+        luks = luks_inventory(byid_name_map)
+        # Convert our transient but just scanned so current sda type names, of
+        # devices and their partitions, to more useful by-id type names as
+        # found in /dev/disk/by-id. Note path is removed as we store, ideally,
+        # byid in Disk.name.
+        byid_names = get_dev_byid_names(
+            [d.name for d in disks] + [p for d in disks for p in d.partitions],
+            remove_path=True,
+        )
+        # Index our db entries by serial, first deleting duplicate or fake by
+        # serial number entries. It makes no sense to save fake serial number
+        # drives between scans as on each scan the serial number is
+        # re-generated (fake) anyway. Serial numbers beginning with
+        # 'fake-serial-' are from scan_disks.
+        known = {}
+        duplicates = []
+        for do in Disk.objects.select_related("pool"):
             if (
-                (do.serial in serial_numbers_seen)
+                (do.serial in known)
                 or (do.serial is None)
                 or (re.match("fake-serial-", do.serial) is not None)
             ):
@@ -152,42 +320,68 @@ class DiskMixin(object):
                     "Deleting duplicate or fake (by serial) disk db "
                     "entry. Serial = ({}).".format(do.serial)
                 )
-                # TODO: Post django update retrieve items deleted and log.
-                do.delete()  # django >=1.9 returns a dict of deleted items.
-                # Continue onto next db disk object as nothing more to process.
+                duplicates.append(do.id)
                 continue
-            # first encounter of this serial in the db so stash it for
-            # reference
-            serial_numbers_seen.append(deepcopy(do.serial))
-            # Look for devices (by serial number) that are in the db but not in
-            # our disk scan, ie offline / missing.
-            if do.serial not in [d.serial for d in disks]:
-                # update the db entry as offline
-                do.offline = True
-                # disable S.M.A.R.T available and enabled flags.
-                do.smart_available = do.smart_enabled = False
-            do.save()  # make sure all updates are flushed to db
-        # Our db now has no device name info: all dev names are place holders.
-        # Iterate over attached drives to update the db's knowledge of them.
+            known[do.serial] = do
+        if duplicates:
+            # TODO: Post django update retrieve items deleted and log.
+            Disk.objects.filter(id__in=duplicates).delete()
+        # The db state of each known entry: to establish what we need to write.
+        db_state = {do.id: _disk_state(do) for do in known.values()}
+        # Replace the device names of all detached disks with a unique
+        # placeholder on each scan.
+        # N.B. do not optimize by re-using a placeholder between scans as this
+        # could lead to a non refreshed webui acting upon an entry that is
+        # different from that shown to the user.
+        placeholder = "detached-{}-".format(uuid.uuid4().hex)
+        # Look for devices (by serial number) that are in the db but not in
+        # our disk scan, ie offline / missing.
+        detached = [do for serial, do in known.items() if serial not in scanned]
+        # Per pool devid usage of those detached disks still known to a pool.
+        devid_usage = {}
+        for do in detached:
+            do.name = "{}{}".format(placeholder, do.id)
+            # update the db entry as offline
+            do.offline = True
+            # disable S.M.A.R.T available and enabled flags.
+            do.smart_available = do.smart_enabled = False
+            # Update detached disks previously know to a pool i.e. missing.
+            # After a reboot device name is lost and replaced by 'missing'
+            # so we compare via btrfs devid stored prior to detached state.
+            # N.B. potential flag mechanism to denote required reboot if
+            # missing device has non existent dev entry rather than missing
+            # otherwise remove missing / detached fails with:
+            # "no missing devices found to remove".
+            # Suspect this will be fixed in future btrfs variants.
+            if do.pool is not None and do.pool.is_mounted:
+                if do.pool.id not in devid_usage:
+                    mnt_pt = "{}{}".format(settings.MNT_PT, do.pool.name)
+                    devid_usage[do.pool.id] = get_devid_usage(mnt_pt)
+                if do.devid in devid_usage[do.pool.id]:
+                    dev_info = devid_usage[do.pool.id][do.devid]
+                    do.size = dev_info.size
+                    do.allocated = dev_info.allocated
+                else:
+                    # Our device has likely been removed from this pool as
+                    # it's devid no longer show up in it's associated pool.
+                    # Reset all btrfs related elements for disk db object:
+                    do.pool = None
+                    do.btrfs_uuid = None
+                    do.devid = 0  # db default and int flag for None.
+                    do.allocated = 0  # No devid_usage = no allocation.
+        # Iterate over attached drives to update our knowledge of them.
         # Get temp_name (kernel dev names) to btrfs pool info for all attached.
         dev_pool_info = get_dev_pool_info()
+        pools = {p.name: p for p in Pool.objects.all()}
+        new_disks = []
+        root_pools = []
         for d in disks:
-            # start with an empty disk object
-            dob = None
-            # an empty dictionary of non scan_disk() roles
-            non_scan_disks_roles = {}
-            # and an empty dictionary of discovered roles
-            disk_roles_identified = {}
-            # Convert our transient but just scanned so current sda type name
-            # to a more useful by-id type name as found in /dev/disk/by-id
-            # Note path is removed as we store, ideally, byid in Disk.name.
-            byid_disk_name, is_byid = get_dev_byid_name(d.name, remove_path=True)
+            byid_disk_name, is_byid = byid_names[d.name]
             # If the db has an entry with this disk's serial number then
             # use this db entry and update the device name from our new scan.
-            if Disk.objects.filter(serial=d.serial).exists():
-                dob = Disk.objects.get(serial=d.serial)
+            dob = known.get(d.serial)
+            if dob is not None:
                 dob.name = byid_disk_name
-                dob.save(update_fields=["name"])
             else:
                 # We have an assumed new disk entry as no serial match in db.
                 # Build a new entry for this disk.  N.B. we may want to force a
@@ -197,6 +391,7 @@ class DiskMixin(object):
                 # virtio disks with no serial so scan_disks will have already
                 # given it a fake serial in d.serial.
                 dob = Disk(name=byid_disk_name, serial=d.serial, role=None)
+                new_disks.append(dob)
             # Update the db disk object (existing or new) with our scanned info
             dob.size = d.size
             dob.parted = d.parted
@@ -218,149 +413,10 @@ class DiskMixin(object):
                 dob.btrfs_uuid = None
                 dob.devid = 0
                 dob.allocated = 0
-            dob.save()
-            # ### BEGINNING OF ROLE FIELD UPDATE ###
             # Update the role field with scan_disks findings.
-            # SCAN_DISKS_KNOWN_ROLES a list of scan_disks identifiable roles.
-            # Deal with legacy non json role field contents by erasure.
-            # N.B. We have a minor legacy issue in that prior to using json
-            # format for the db role field we stored one of 2 strings.
-            # If either of these 2 strings are found reset to db default of
-            # None.
-            # TODO: Can be removed post openSUSE as then no legacy installs.
-            if dob.role == "isw_raid_member" or dob.role == "linux_raid_member":
-                # These are the only legacy non json formatted roles used.
-                # Erase legacy role entries as we are about to update the role
-                # anyway and new entries will then be in the new json format.
-                # This helps to keeps the following role logic cleaner and
-                # existing mdraid members will be re-assigned if appropriate
-                # using the new json format.
-                dob.role = None
-                dob.save(update_fields=["role"])
-            # First extract all non scan_disks assigned roles so we can add
-            # them back later; all scan_disks assigned roles will be identified
-            # from our recent scan_disks data so we assert the new truth.
-            if dob.role is not None:  # db default null=True so None here.
-                # Get our previous roles into a dictionary
-                previous_roles = json.loads(dob.role)
-                # Preserve non scan_disks identified roles for this db entry
-                non_scan_disks_roles = {
-                    role: v
-                    for role, v in previous_roles.items()
-                    if role not in SCAN_DISKS_KNOWN_ROLES
-                }
-            if d.fstype == "isw_raid_member" or d.fstype == "linux_raid_member":
-                # MDRAID MEMBER: scan_disks() can informs us of the truth
-                # regarding mdraid membership via d.fstype indicators.
-                # create or update an mdraid dictionary entry
-                disk_roles_identified["mdraid"] = str(d.fstype)
-            if d.fstype == "crypto_LUKS":
-                # LUKS FULL DISK: scan_disks() can inform us of the truth
-                # regarding full disk LUKS containers which on creation have a
-                # unique uuid. Stash this uuid so we might later work out our
-                # container mapping. Currently required as only btrfs uuids
-                # are stored in the Disk model field. Also flag if we are the
-                # container for a currently open LUKS volume.
-                is_unlocked = d.uuid in unlocked_luks_containers_uuids
-                disk_roles_identified["LUKS"] = {
-                    "uuid": str(d.uuid),
-                    "unlocked": is_unlocked,
-                }
-                # We also inform this role of the current crypttab status
-                # of this device, ie: no entry = no "crypttab" key.
-                # Device listed in crypttab = dict key entry of "crypttab".
-                # If crypttab key entry then it's value is 3rd column ie:
-                # 'none' = password on boot
-                # '/root/keyfile-<uuid>' = full path to keyfile
-                # Note that we also set a boolean in the LUKS disk role of
-                # 'keyfileExists' true if a crypttab entry exists or if our
-                # default /root/keyfile-<uuid> exists, false otherwise.
-                # So the current keyfile takes priority when setting this flag.
-                # This may have to be split out later to discern the two states
-                # separately.
-                if d.uuid in dev_uuids_in_crypttab.keys():
-                    # Our device has a UUID= match in crypttab so save as
-                    # value the current cryptfile 3rd column entry.
-                    disk_roles_identified["LUKS"]["crypttab"] = dev_uuids_in_crypttab[
-                        d.uuid
-                    ]
-                    # if crypttab 3rd column indicates keyfile: does that
-                    # keyfile exist. N.B. non 'none' entry assumed to be
-                    # keyfile. Allows for existing user created keyfiles.
-                    # TODO: could be problematic during crypttab rewrite where
-                    # keyfile is auto named but we should self correct on our
-                    # next run, ie new file entry is checked there after.
-                    if dev_uuids_in_crypttab[d.uuid] != "none":
-                        disk_roles_identified["LUKS"]["keyfileExists"] = os.path.isfile(
-                            dev_uuids_in_crypttab[d.uuid]
-                        )
-                if "keyfileExists" not in disk_roles_identified["LUKS"]:
-                    # We haven't yet set our keyfileExists flag: ie no entry,
-                    # custom or otherwise, in crypttab to check or the entry
-                    # was "none". Revert to defining this flag against the
-                    # existence or otherwise of our native keyfile:
-                    disk_roles_identified["LUKS"][
-                        "keyfileExists"
-                    ] = native_keyfile_exists(d.uuid)
-            if d.type == "crypt":
-                # OPEN LUKS DISK: scan_disks() can inform us of the truth
-                # regarding an opened LUKS container which appears as a mapped
-                # device.
-                # disk_roles_identified['openLUKS'] = 'dm-name-%s' % d.name
-                luks_volume_status = get_open_luks_volume_status(d.name, byid_name_map)
-                disk_roles_identified["openLUKS"] = luks_volume_status
-            if d.fstype == "bcache":
-                # BCACHE: scan_disks() can inform us of the truth regarding
-                # bcache "backing devices" so we assign a role to avoid these
-                # devices being seen as unused and accidentally deleted. Once
-                # formatted with make-bcache -B they are accessed via a virtual
-                # device which should end up with a serial of bcache-(d.uuid)
-                # here we tag our backing device with it's virtual counterparts
-                # serial number.
-                disk_roles_identified["bcache"] = "bcache-%s" % d.uuid
-            if d.fstype == "bcachecdev":
-                # BCACHE: continued; here we use the scan_disks() added info
-                # of this bcache device being a cache device not a backing
-                # device, so it will have no virtual block device counterpart
-                # but likewise must be specifically attributed (ie to fast
-                # ssd type drives) so we flag in the role system differently.
-                disk_roles_identified["bcachecdev"] = "bcache-%s" % d.uuid
-            if d.fstype == "LVM2_member":
-                # LVM2 Physical Volume: scan_disks() can inform us of the truth
-                # regarding whole disk physical volumes via their fstype.
-                # Assigning a role to avoid these devices being seen as unused.
-                # The current value of this role is a placeholder and unused.
-                disk_roles_identified["LVM2member"] = str(d.fstype)
-            if d.root is True:
-                # ROOT DISK: scan_disks() has already identified the current
-                # truth regarding the device hosting our root '/' fs so update
-                # our role accordingly.
-                # N.B. value of d.fstype here is essentially a place holder as
-                # the presence or otherwise of the 'root' key is all we need.
-                disk_roles_identified["root"] = str(d.fstype)
-            if d.partitions != {}:
-                # PARTITIONS: scan_disks() has built an updated partitions dict
-                # so create a partitions role containing this dictionary.
-                # Convert scan_disks() transient (but just scanned so current)
-                # sda type names to a more useful by-id type name as found
-                # in /dev/disk/by-id for each partition name.
-                byid_partitions = {
-                    get_dev_byid_name(part, True)[0]: d.partitions.get(part, "")
-                    for part in d.partitions
-                }
-                # In the above we fail over to "" on failed index for now.
-                disk_roles_identified["partitions"] = byid_partitions
-            # Now we join the previous non scan_disks identified roles dict
-            # with those we have identified/updated from our fresh scan_disks()
-            # data and return the result to our db entry in json format.
-            # Note that dict of {} isn't None
-            if (non_scan_disks_roles != {}) or (disk_roles_identified != {}):
-                combined_roles = dict(non_scan_disks_roles, **disk_roles_identified)
-                dob.role = json.dumps(combined_roles)
-            else:
-                dob.role = None
-            dob.save(update_fields=["role"])
-            # ### END OF ROLE FIELD UPDATE ###
+            dob.role = _merge_roles(
+                dob.role, _scanned_disk_roles(d, luks, byid_names, byid_name_map)
+            )
             # Does our existing Pool db know of this disk's pool?
             # Find pool association, if any, of the current disk:
             pool_name = None  # Until we find otherwise.
@@ -387,15 +443,14 @@ class DiskMixin(object):
                 # which should also fix btrfs in partition size as whole disk.
                 dob.size = p_info.size
                 dob.allocated = p_info.allocated
-            # Quick 'not None' test first to avoid redundant lengthy db filter.
-            if pool_name is not None and Pool.objects.filter(name=pool_name).exists():
+            if pool_name in pools:
                 # update the disk db object's pool field accordingly.
-                dob.pool = Pool.objects.get(name=pool_name)
+                dob.pool = pools[pool_name]
                 # this is for backwards compatibility. root pools created
                 # before the pool.role migration need this. It can safely be
                 # removed a few versions after 3.8-11 or when we reset
                 # migrations.
-                if d.root is True:
+                if d.root is True and dob.pool.role != "root":
                     dob.pool.role = "root"
                     dob.pool.save()
             else:  # disk not member of db pool via get_dev_pool_info()
@@ -427,94 +482,115 @@ class DiskMixin(object):
                         uuid=d.uuid,
                     )
                     p.save()
-                    p.disk_set.add(dob)
+                    pools[pool_name] = p
                     # update disk db object to reflect special root pool status
                     dob.pool = p
-                    dob.save()
-                    p.size = p.usage_bound()
-                    enable_quota(p)
-                    p.save()
+                    # Pool size and quotas once our disk entry is written.
+                    root_pools.append(p)
                 else:
                     # Likely unlabeled pool & auto label failed - system disk.
                     logger.error(
                         "Skipping system pool creation. Ensure the "
                         "system disk has a unique serial."
                     )
-            # save our updated db disk object
-            dob.save()
-        # Update online db entries with S.M.A.R.T availability and status.
-        for do in Disk.objects.all():
-            # find all the not offline db entries
-            if not do.offline:
-                # We have an attached disk db entry.
-                # Since our Disk.name model now uses by-id type names we can
-                # do cheap matches to the beginnings of these names to find
-                # virtio, md, or sdcard devices which are assumed to have no
-                # SMART capability.
-                # We also disable devices smart support when they have a
-                # fake serial number as ascribed by scan_disks as any SMART
-                # data collected is then less likely to be wrongly associated
-                # with the next device that takes this temporary drive's name.
-                # Also note that with no serial number some device types will
-                # not have a by-id type name expected by the smart subsystem.
-                # This has only been observed in no serial virtio devices.
-                if (re.match("fake-serial-", do.serial) is not None) or (
-                    re.match("virtio-|md-|mmc-|nvme-|dm-name-luks-|bcache|nbd", do.name)
-                    is not None
-                ):
-                    # Virtio disks (named virtio-*), md devices (named md-*),
-                    # and an sdcard reader that provides devs named mmc-* have
-                    # no smart capability so avoid cluttering logs with
-                    # exceptions on probing these with smart.available.
-                    # nvme not yet supported by CentOS 7 smartmontools:
-                    # https://www.smartmontools.org/ticket/657
-                    # Thanks to @snafu in rockstor forum post 1567 for this.
-                    do.smart_available = do.smart_enabled = False
-                    continue
-                # try to establish smart availability and status and update db
+            # Since our Disk.name model now uses by-id type names we can
+            # do cheap matches to the beginnings of these names to find
+            # virtio, md, or sdcard devices which are assumed to have no
+            # SMART capability.
+            # We also disable devices smart support when they have a
+            # fake serial number as ascribed by scan_disks as any SMART
+            # data collected is then less likely to be wrongly associated
+            # with the next device that takes this temporary drive's name.
+            # Also note that with no serial number some device types will
+            # not have a by-id type name expected by the smart subsystem.
+            # This has only been observed in no serial virtio devices.
+            if (re.match("fake-serial-", dob.serial) is not None) or (
+                re.match("virtio-|md-|mmc-|nvme-|dm-name-luks-|bcache|nbd", dob.name)
+                is not None
+            ):
+                # Virtio disks (named virtio-*), md devices (named md-*),
+                # and an sdcard reader that provides devs named mmc-* have
+                # no smart capability so avoid cluttering logs with
+                # exceptions on probing these with smart.available.
+                # nvme not yet supported by CentOS 7 smartmontools:
+                # https://www.smartmontools.org/ticket/657
+                # Thanks to @snafu in rockstor forum post 1567 for this.
+                dob.smart_available = dob.smart_enabled = False
+            else:
+                # try to establish smart availability and status
                 try:
                     # for non ata/sata drives
-                    do.smart_available, do.smart_enabled = smart.available(
-                        do.name, do.smart_options
+                    dob.smart_available, dob.smart_enabled = smart.available(
+                        dob.name, dob.smart_options
                     )
                 except Exception as e:
                     logger.exception(e)
-                    do.smart_available = do.smart_enabled = False
-            else:  # We have offline / detached Disk db entries.
-                # Update detached disks previously know to a pool i.e. missing.
-                # After a reboot device name is lost and replaced by 'missing'
-                # so we compare via btrfs devid stored prior to detached state.
-                # N.B. potential flag mechanism to denote required reboot if
-                # missing device has non existent dev entry rather than missing
-                # otherwise remove missing / detached fails with:
-                # "no missing devices found to remove".
-                # Suspect this will be fixed in future btrfs variants.
-                if do.pool is not None and do.pool.is_mounted:
-                    mnt_pt = "{}{}".format(settings.MNT_PT, do.pool.name)
-                    devid_usage = get_devid_usage(mnt_pt)
-                    if do.devid in devid_usage:
-                        dev_info = devid_usage[do.devid]
-                        do.size = dev_info.size
-                        do.allocated = dev_info.allocated
-                    else:
-                        # Our device has likely been removed from this pool as
-                        # it's devid no longer show up in it's associated pool.
-                        # Reset all btrfs related elements for disk db object:
-                        do.pool = None
-                        do.btrfs_uuid = None
-                        do.devid = 0  # db default and int flag for None.
-                        do.allocated = 0  # No devid_usage = no allocation.
-            do.save()
+                    dob.smart_available = dob.smart_enabled = False
+        # Write our reconciled state. Known entries with a changed device name
+        # are first given a placeholder, in a single query, so that device
+        # names may move between entries without violating their uniqueness.
+        renamed = [do.id for do in known.values() if do.name != db_state[do.id]["name"]]
+        if renamed:
+            Disk.objects.filter(id__in=renamed).update(
+                name=Concat(Value(placeholder), Cast("id", TextField()))
+            )
+            for disk_id in renamed:
+                db_state[disk_id]["name"] = "{}{}".format(placeholder, disk_id)
+        # Likewise mark our newly detached entries as offline.
+        offline = [
+            do.id
+            for do in detached
+            if db_state[do.id]["offline"] is not True
+            or db_state[do.id]["smart_available"] is not False
+            or db_state[do.id]["smart_enabled"] is not False
+        ]
+        if offline:
+            Disk.objects.filter(id__in=offline).update(
+                offline=True, smart_available=False, smart_enabled=False
+            )
+            for disk_id in offline:
+                db_state[disk_id].update(
+                    offline=True, smart_available=False, smart_enabled=False
+                )
+        # Remaining changes are specific to each entry.
+        for do in known.values():
+            changed = [f for f, v in db_state[do.id].items() if getattr(do, f) != v]
+            if changed:
+                do.save(update_fields=changed)
+        if new_disks:
+            Disk.objects.bulk_create(new_disks)
+        for p in root_pools:
+            p.size = p.usage_bound()
+            enable_quota(p)
+            p.save()
+        if renamed or offline or new_disks:
+            # Query set updates and bulk_create() send no post_save signals.
+            rfc.bump_versions(("disks",))
         ds = DiskInfoSerializer(Disk.objects.all().order_by("name"), many=True)
         return Response(ds.data)
 
 
-class DiskListView(DiskMixin, rfc.GenericView):
+class DiskListView(DiskMixin, rfc.SortedListMixin, rfc.GenericView):
     serializer_class = DiskInfoSerializer
+    etag_groups = ("disks", "pools")
+    sort_fields = {
+        "id": "id",
+        "name": "name",
+        "size": "size",
+        "allocated": "allocated",
+        "serial": "serial",
+        "model": "model",
+        "transport": "transport",
+        "vendor": "vendor",
+    }
+    filter_fields = {"pool": "pool__name", "name": "name__icontains"}
+    default_ordering = ("name",)
 
     def get_queryset(self, *args, **kwargs):
         with self._handle_exception(self.request):
-            return Disk.objects.all().order_by("name")
+            return self.sort_and_filter(
+                DiskInfoSerializer.setup_eager_loading(Disk.objects.all())
+            )
 
     def post(self, request, command, did=None):
         with self._handle_exception(request):
@@ -527,6 +603,7 @@ class DiskListView(DiskMixin, rfc.GenericView):
 
 class DiskDetailView(rfc.GenericView):
     serializer_class = DiskInfoSerializer
+    etag_groups = ("disks", "pools")
 
     @staticmethod
     def _validate_disk(did, request):
@@ -1241,10 +1318,12 @@ class DiskDetailView(rfc.GenericView):
         spindown_message = str(request.data.get("spindown_message", "message issue!"))
         apm_value = int(request.data.get("apm_value", 0))
         set_disk_spindown(disk.name, spindown_time, apm_value, spindown_message)
+        disk.forget_probe()
         return Response()
 
     @classmethod
     def _pause(cls, did, request):
         disk = cls._validate_disk(did, request)
         enter_standby(disk.name)
+        disk.forget_probe()
         return Response()
@@ -21,11 +21,11 @@ from rest_framework.response import Response
 from django.db import transaction
 from storageadmin.util import handle_exception
 from storageadmin.serializers import GroupSerializer
-from storageadmin.models import Group
+from storageadmin.models import Group, DirectoryGroup
 import rest_framework_custom as rfc
 from system.users import groupadd, groupdel
 import grp
-from ug_helpers import combined_groups
+from ug_helpers import combined_groups, nss_group
 import logging
 from django.conf import settings
 
@@ -37,7 +37,7 @@ class GroupListView(rfc.GenericView):
 
     def get_queryset(self, *args, **kwargs):
         with self._handle_exception(self.request):
-            return combined_groups()
+            return combined_groups(search=self.request.query_params.get("search"))
 
     @transaction.atomic
     def post(self, request):
@@ -70,6 +70,16 @@ class GroupListView(rfc.GenericView):
                         gid
                     )
                     handle_exception(Exception(e_msg), request, status_code=400)
+            # Our directory cache may not yet include groups recently added
+            # outside of Rockstor, so also check with NSS before groupadd.
+            if nss_group(groupname) is not None:
+                e_msg = ("Group ({}) already exists. Choose a different one.").format(
+                    groupname
+                )
+                handle_exception(Exception(e_msg), request, status_code=400)
+            if gid is not None and nss_group(gid=gid) is not None:
+                e_msg = ("GID ({}) already exists. Choose a different one.").format(gid)
+                handle_exception(Exception(e_msg), request, status_code=400)
 
             groupadd(groupname, gid)
             grp_entries = grp.getgrnam(groupname)
@@ -171,5 +181,6 @@ class GroupDetailView(rfc.GenericView):
                 groupdel(groupname)
             except Exception as e:
                 handle_exception(e, request)
+            DirectoryGroup.objects.filter(groupname=groupname).delete()
 
             return Response()
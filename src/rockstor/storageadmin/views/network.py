@@ -78,154 +78,159 @@ class NetworkMixin(object):
 
     @staticmethod
     @transaction.atomic
-    def _update_or_create_ctype(co, ctype, config):
+    def _update_or_create_ctype(co, ctype, config, cto=None):
+        """
+        Update, only if changed, or create the type specific config object of
+        the given connection.
+        :param cto: existing type specific object of co, if already fetched.
+        """
         logger.debug("The function _update_or_create_ctype has been called")
+
+        def sync(model, fields):
+            obj = cto
+            if obj is None:
+                obj = model.objects.filter(connection=co).first()
+            if obj is None:
+                model.objects.create(connection=co, **fields)
+            elif any(getattr(obj, k) != v for k, v in fields.items()):
+                obj.__dict__.update(**fields)
+                obj.save()
+
         if ctype == "802-3-ethernet":
-            try:
-                eco = EthernetConnection.objects.get(connection=co)
-                eco.mac = config["mac"]
-                eco.cloned_mac = config["cloned_mac"]
-                eco.mtu = config["mtu"]
-                eco.save()
-            except EthernetConnection.DoesNotExist:
-                EthernetConnection.objects.create(connection=co, **config)
-        elif ctype == "team":
-            try:
-                tco = TeamConnection.objects.get(connection=co)
-                tco.name = co.name
-                tco.config = config["config"]
-                tco.save()
-            except TeamConnection.DoesNotExist:
-                TeamConnection.objects.create(connection=co, **config)
-        elif ctype == "bond":
-            try:
-                bco = BondConnection.objects.get(connection=co)
-                bco.name = co.name
-                bco.config = config["config"]
-                bco.save()
-            except BondConnection.DoesNotExist:
-                BondConnection.objects.create(connection=co, **config)
+            sync(EthernetConnection, config)
+        elif ctype in ("team", "bond"):
+            model = TeamConnection if ctype == "team" else BondConnection
+            sync(model, dict(config, name=co.name))
         elif (ctype == "bridge") and (docker_status()):
-            try:
-                brco = BridgeConnection.objects.get(connection=co)
-                brco.docker_name = config["docker_name"]
-                if (not DContainerLink.objects.filter(name=brco.docker_name)) and (
-                    "docker0" not in brco.docker_name
-                ):
-                    # The bridge connection is not the default docker bridge network
-                    # and isn't a docker bridge network defined as a container_link
-                    brco.usercon = True
-                brco.save()
-            except BridgeConnection.DoesNotExist:
-                usercon = False
-                docker_name = config["docker_name"]
-                if (not DContainerLink.objects.filter(name=docker_name)) and (
-                    "docker0" not in docker_name
-                ):
-                    # The bridge connection is not the default docker bridge network
-                    # and isn't a docker bridge network defined as a container_link
-                    usercon = True
+            usercon = False
+            docker_name = config["docker_name"]
+            if (not DContainerLink.objects.filter(name=docker_name)) and (
+                "docker0" not in docker_name
+            ):
+                # The bridge connection is not the default docker bridge network
+                # and isn't a docker bridge network defined as a container_link
+                usercon = True
+            brco = cto
+            if brco is None:
+                brco = BridgeConnection.objects.filter(connection=co).first()
+            if brco is None:
                 BridgeConnection.objects.create(
                     connection=co, usercon=usercon, **config
                 )
+            elif brco.docker_name != docker_name or (usercon and not brco.usercon):
+                brco.docker_name = docker_name
+                if usercon:
+                    brco.usercon = True
+                brco.save()
 
         else:
             logger.debug("Unknown ctype: {} config: {}".format(ctype, config))
 
     @staticmethod
-    @transaction.atomic
-    def _update_master(co, config, defer_list=None):
-        if "master" not in config:
-            return config
-        try:
-            co.master = NetworkConnection.objects.get(name=config["master"])
-        except (
-            NetworkConnection.DoesNotExist,
-            NetworkConnection.MultipleObjectsReturned,
-        ):
-            if not isinstance(defer_list, list):
-                raise
-            defer_list.append({"uuid": co.uuid, "master": config["master"]})
-        del config["master"]
+    def _connections_by_name():
+        """
+        Map of connection name to NetworkConnection, with None for names
+        shared by multiple connections (as per a MultipleObjectsReturned).
+        """
+        by_name = {}
+        for nco in NetworkConnection.objects.all():
+            by_name[nco.name] = None if nco.name in by_name else nco
+        return by_name
 
     @classmethod
     @transaction.atomic
     def _refresh_connections(cls):
-        cmap = sysnet.get_con_config(sysnet.get_con_list())
-        defer_master_updates = []
-        for nco in NetworkConnection.objects.all():
-            if nco.uuid not in cmap:
-                nco.delete()
-                continue
-            config = cmap[nco.uuid]
-            if "ctype" in config:
-                ctype = config["ctype"]
-                cls._update_or_create_ctype(nco, ctype, config[ctype])
-                del config[ctype]
-                del config["ctype"]
-            cls._update_master(nco, config, defer_master_updates)
-            NetworkConnection.objects.filter(uuid=nco.uuid).update(**config)
-            del cmap[nco.uuid]
-        for uuid in cmap:
-            # new connections not yet in administrative state.
-            config = cmap[uuid]
-            config["uuid"] = uuid
-            ctype = ctype_d = None
-            if "ctype" in config:
-                ctype = config["ctype"]
-                ctype_d = config[ctype]
-                del config[ctype]
-                del config["ctype"]
+        """
+        Bring NetworkConnection (and type specific) entries in line with the
+        system: one read per table, a bulk delete of vanished connections and
+        writes for new or changed entries only.
+        """
+        cmap = sysnet.get_con_map()
+        existing = {nco.uuid: nco for nco in NetworkConnection.objects.all()}
+        vanished = [uuid for uuid in existing if uuid not in cmap]
+        if len(vanished) > 0:
+            NetworkConnection.objects.filter(uuid__in=vanished).delete()
+        ctype_objects = {}
+        for ctype, model in (
+            ("802-3-ethernet", EthernetConnection),
+            ("team", TeamConnection),
+            ("bond", BondConnection),
+            ("bridge", BridgeConnection),
+        ):
+            ctype_objects[ctype] = {
+                cto.connection_id: cto for cto in model.objects.all()
+            }
+        masters = {}
+        for uuid, config in cmap.items():
+            ctype = config.pop("ctype", None)
+            ctype_d = config.pop(ctype, None)
             if "master" in config:
-                defer_master_updates.append({"uuid": uuid, "master": config["master"]})
-                del config["master"]
-            nco = NetworkConnection.objects.create(**config)
+                masters[uuid] = config.pop("master")
+            nco = existing.get(uuid)
+            if nco is None:
+                # new connections not yet in administrative state.
+                nco = NetworkConnection.objects.create(uuid=uuid, **config)
+                existing[uuid] = nco
+            elif any(getattr(nco, k) != v for k, v in config.items()):
+                NetworkConnection.objects.filter(id=nco.id).update(**config)
+                nco.__dict__.update(**config)
             if ctype is not None:
-                cls._update_or_create_ctype(nco, ctype, ctype_d)
-        for e in defer_master_updates:
-            slave_co = NetworkConnection.objects.get(uuid=e["uuid"])
-            try:
-                slave_co.master = NetworkConnection.objects.get(
-                    name=e["master"]
-                )  # noqa E501
-            except (
-                NetworkConnection.DoesNotExist,
-                NetworkConnection.MultipleObjectsReturned,
-            ) as e:
-                logger.exception(e)
-            slave_co.save()
+                cto = ctype_objects.get(ctype, {}).get(nco.id)
+                cls._update_or_create_ctype(nco, ctype, ctype_d, cto)
+        # Masters are resolved last as they may be among the new connections.
+        by_name = cls._connections_by_name()
+        for uuid, master in masters.items():
+            slave_co = existing[uuid]
+            master_co = by_name.get(master, existing.get(master))
+            if master_co is None:
+                logger.error(
+                    "Master ({}) of connection ({}) not found or not "
+                    "unique.".format(master, slave_co.name)
+                )
+                continue
+            if slave_co.master_id != master_co.id:
+                NetworkConnection.objects.filter(id=slave_co.id).update(
+                    master=master_co
+                )
 
-    @staticmethod
+    @classmethod
     @transaction.atomic
-    def _refresh_devices():
-        dmap = sysnet.get_dev_config(sysnet.get_dev_list())
+    def _refresh_devices(cls):
+        """
+        Bring NetworkDevice entries in line with the system: one read, a bulk
+        delete of vanished devices, a bulk create of new ones and updates of
+        changed ones only.
+        """
+        dmap = sysnet.get_dev_map()
+        by_name = cls._connections_by_name()
 
         def update_connection(dconfig):
             if "connection" in dconfig:
-                try:
-                    dconfig["connection"] = NetworkConnection.objects.get(
-                        name=dconfig["connection"]
+                dconfig["connection"] = by_name.get(dconfig["connection"])
+                if dconfig["connection"] is None:
+                    logger.error(
+                        "Device connection not found or not unique: "
+                        "{}".format(dconfig)
                     )
-                except (
-                    NetworkConnection.DoesNotExist,
-                    NetworkConnection.MultipleObjectsReturned,
-                ) as e:
-                    logger.exception(e)
-                    dconfig["connection"] = None
 
-        for ndo in NetworkDevice.objects.all():
-            if ndo.name not in dmap:
-                ndo.delete()
-                continue
-            dconfig = dmap[ndo.name]
-            update_connection(dconfig)
-            NetworkDevice.objects.filter(name=ndo.name).update(**dconfig)
-            del dmap[ndo.name]
-        for dev in dmap:
-            dconfig = dmap[dev]
-            dconfig["name"] = dev
+        existing = {ndo.name: ndo for ndo in NetworkDevice.objects.all()}
+        vanished = [name for name in existing if name not in dmap]
+        if len(vanished) > 0:
+            NetworkDevice.objects.filter(name__in=vanished).delete()
+        new_devices = []
+        for dev, dconfig in dmap.items():
             update_connection(dconfig)
-            NetworkDevice.objects.create(**dconfig)
+            ndo = existing.get(dev)
+            if ndo is None:
+                new_devices.append(NetworkDevice(name=dev, **dconfig))
+                continue
+            fields = dict(dconfig)
+            if "connection" in fields:
+                co = fields.pop("connection")
+                fields["connection_id"] = co.id if co is not None else None
+            if any(getattr(ndo, k) != v for k, v in fields.items()):
+                NetworkDevice.objects.filter(id=ndo.id).update(**dconfig)
+        NetworkDevice.objects.bulk_create(new_devices)
 
 
 class NetworkDeviceListView(rfc.GenericView, NetworkMixin):
@@ -236,7 +241,9 @@ class NetworkDeviceListView(rfc.GenericView, NetworkMixin):
             self._refresh_devices()
             # don't return unmanaged devices return
             # NetworkDevice.objects.filter(~Q(state='10 (unmanaged)'))
-            return NetworkDevice.objects.all()
+            return NetworkDeviceSerializer.setup_eager_loading(
+                NetworkDevice.objects.all()
+            )
 
 
 class NetworkConnectionListView(rfc.GenericView, NetworkMixin):
@@ -250,7 +257,9 @@ class NetworkConnectionListView(rfc.GenericView, NetworkMixin):
     def get_queryset(self, *args, **kwargs):
         with self._handle_exception(self.request):
             self._refresh_connections()
-            return NetworkConnection.objects.all()
+            return NetworkConnectionSerializer.setup_eager_loading(
+                NetworkConnection.objects.all()
+            )
 
     @staticmethod
     def _validate_devices(devices, request, size=2):
@@ -593,11 +602,13 @@ class NetworkStateView(rfc.GenericView, NetworkMixin):
     serializer_class = NetworkConnectionSerializer
 
     def get_queryset(self, *args, **kwargs):
-        return NetworkConnection.objects.all()
+        return NetworkConnectionSerializer.setup_eager_loading(
+            NetworkConnection.objects.all()
+        )
 
     def post(self, request):
         with self._handle_exception(request):
             self._refresh_connections()
             self._refresh_devices()
-            ns = NetworkConnectionSerializer(NetworkConnection.objects.all(), many=True)
+            ns = NetworkConnectionSerializer(self.get_queryset(), many=True)
             return Response(ns.data)
@@ -156,7 +156,9 @@ class NFSExportGroupListView(NFSExportMixin, rfc.GenericView):
     serializer_class = NFSExportGroupSerializer
 
     def get_queryset(self, *args, **kwargs):
-        return NFSExportGroup.objects.filter(nohide=False)
+        return NFSExportGroupSerializer.setup_eager_loading(
+            NFSExportGroup.objects.filter(nohide=False)
+        )
 
     @transaction.atomic
     def post(self, request):
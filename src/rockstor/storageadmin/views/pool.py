@@ -16,12 +16,18 @@ You should have received a copy of the GNU General Public License
 along with this program. If not, see <http://www.gnu.org/licenses/>.
 """
 import re
+from datetime import datetime, timedelta
 from rest_framework.response import Response
 from rest_framework import status
 from rest_framework.decorators import api_view
 from django.db import transaction
+from django.db.models import Max
+from django.utils.timezone import utc
+from huey import crontab
+from huey.contrib.djhuey import db_periodic_task, lock_task
 from storageadmin.serializers import PoolInfoSerializer
 from storageadmin.models import Disk, Pool, Share, PoolBalance
+from smart_manager.models import PoolUsage
 from fs.btrfs import (
     add_pool,
     resize_pool_cmd,
@@ -363,6 +369,8 @@ class PoolMixin(object):
 
 
 class PoolListView(PoolMixin, rfc.GenericView):
+    etag_groups = ("pools", "disks")
+
     def get_queryset(self, *args, **kwargs):
         sort_col = self.request.query_params.get("sortby", None)
         if sort_col is not None and sort_col == "usage":
@@ -372,9 +380,11 @@ class PoolListView(PoolMixin, rfc.GenericView):
             else:
                 reverse = False
             return sorted(
-                Pool.objects.all(), key=lambda u: u.cur_usage(), reverse=reverse
+                PoolInfoSerializer.setup_eager_loading(Pool.objects.all()),
+                key=lambda u: u.cur_usage(),
+                reverse=reverse,
             )
-        return Pool.objects.all()
+        return PoolInfoSerializer.setup_eager_loading(Pool.objects.all())
 
     @transaction.atomic
     def post(self, request):
@@ -474,6 +484,8 @@ class PoolListView(PoolMixin, rfc.GenericView):
 
 
 class PoolDetailView(PoolMixin, rfc.GenericView):
+    etag_groups = ("pools", "disks")
+
     def get(self, *args, **kwargs):
         try:
             pool = Pool.objects.get(id=self.kwargs["pid"])
@@ -709,7 +721,8 @@ class PoolDetailView(PoolMixin, rfc.GenericView):
                                 d.name, d.allocated
                             )
                         )
-                    available_free = pool.free
+                    # Fresh sample: a stale figure could allow an unsafe removal.
+                    available_free = pool.refresh_usage(force=True).free
                     logger.debug("available_free = {}".format(available_free))
                     logger.debug("pool size = {}".format(pool.size))
                     # TODO improve disk list presentation in the following msg.
@@ -753,6 +766,7 @@ class PoolDetailView(PoolMixin, rfc.GenericView):
                 handle_exception(Exception(e_msg), request)
             pool.size = pool.usage_bound()
             pool.save()
+            refresh_usage_after_write(pool)
             return Response(PoolInfoSerializer(pool).data)
 
     @transaction.atomic
@@ -799,6 +813,62 @@ class PoolDetailView(PoolMixin, rfc.GenericView):
             return Response()
 
 
+def refresh_usage_after_write(pool):
+    """
+    Re-sample usage of a pool whose size or content has just been changed.
+    Failure is only logged as the next refresh_pool_usage() will retry.
+    :param pool: Pool object
+    """
+    try:
+        pool.refresh_usage(force=True)
+    except Exception as e:
+        logger.error(
+            "Failed to refresh usage of Pool ({}): {}".format(pool.name, e.__str__())
+        )
+
+
+def prune_pool_usage():
+    """
+    Drop PoolUsage history older than settings.POOL_USAGE['retain'] days. The
+    latest entry of each existing pool is kept whatever its age, as Pool.usage
+    reads it; entries of removed pools go once they are old enough.
+    """
+    ts0 = datetime.utcnow().replace(tzinfo=utc) - timedelta(
+        days=settings.POOL_USAGE["retain"]
+    )
+    # PoolUsage lives in the smart_manager database: no cross database join.
+    pools = list(Pool.objects.values_list("name", flat=True))
+    latest = (
+        PoolUsage.objects.filter(pool__in=pools)
+        .values("pool")
+        .annotate(latest_id=Max("id"))
+        .values_list("latest_id", flat=True)
+    )
+    PoolUsage.objects.filter(ts__lt=ts0).exclude(id__in=list(latest)).delete()
+
+
+@db_periodic_task(crontab(minute="*"))
+@lock_task("refresh_pool_usage")
+def refresh_pool_usage():
+    """
+    Keep the recorded usage of each mounted pool no older than
+    settings.POOL_USAGE['interval'] seconds, or a minute if that is less, and
+    prune the history beyond settings.POOL_USAGE['retain'] days.
+    """
+    for p in Pool.objects.all():
+        try:
+            if p.is_mounted:
+                p.refresh_usage()
+        except Exception as e:
+            logger.error(
+                "Failed to refresh usage of Pool ({}): {}".format(p.name, e.__str__())
+            )
+    try:
+        prune_pool_usage()
+    except Exception as e:
+        logger.error("Failed to prune pool usage history: {}".format(e.__str__()))
+
+
 @api_view()
 def get_usage_bound(request):
     """Simple view to relay the computed usage bound to the front end."""
@@ -20,6 +20,7 @@ from django.core.exceptions import ObjectDoesNotExist
 from rest_framework import status
 from rest_framework.response import Response
 from django.db import transaction
+from django.utils import timezone
 from huey.contrib.djhuey import HUEY
 from storageadmin.util import handle_exception
 from storageadmin.serializers import PoolBalanceSerializer
@@ -28,6 +29,7 @@ import rest_framework_custom as rfc
 from fs.btrfs import balance_status_all
 from pool import PoolMixin
 from huey.contrib.djhuey import db_task
+from datetime import timedelta
 
 import logging
 
@@ -67,6 +69,28 @@ def balance_status_filter(prior_status, live_status):
     return live_status
 
 
+def balance_progress(ps, percent_done, now):
+    """
+    Estimate rate and time remaining for a running balance from its average
+    progress since the PoolBalance start_time. Balance chunks vary greatly in
+    duration so this average is steadier than the rate between two samples.
+    :param ps: PoolBalance instance being updated.
+    :param percent_done: freshly sampled percent_done.
+    :param now: sample time.
+    :return: dict of rate, time_left, and eta field values, empty if unknown.
+    """
+    elapsed = (now - ps.start_time).total_seconds()
+    if percent_done <= 0 or elapsed <= 0:
+        return {}
+    rate = percent_done / elapsed  # percent per second
+    time_left = int((100 - percent_done) / rate)
+    return {
+        "rate": "{:.2f}%/min".format(rate * 60),
+        "time_left": time_left,
+        "eta": now + timedelta(seconds=time_left),
+    }
+
+
 def is_pending_balance_task(Huey_handle, tid):
     """
     Boolean indicator of task id pending status.
@@ -122,7 +146,8 @@ class PoolBalanceView(PoolMixin, rfc.GenericView):
         with self._handle_exception(self.request):
             logger.debug("PoolBalanceView get_queryset() called")
             pool = self._validate_pool(self.kwargs["pid"], self.request)
-            self._balance_status(pool)
+            # Stored state only: sampling of ongoing balances is left to
+            # pool_progress, or an explicit "status" command.
             return PoolBalance.objects.filter(pool=pool).order_by("start_time")
 
     @staticmethod
@@ -224,6 +249,14 @@ class PoolBalanceView(PoolMixin, rfc.GenericView):
                         + " Pool name {}, PoolBalance ID {}.".format(pool.name, ps.id)
                     )
             else:  # prior_status is neither finished nor cancelled, so we update it.
+                if proposed_status["status"] == u"running":
+                    proposed_status.update(
+                        balance_progress(
+                            ps, proposed_status["percent_done"], timezone.now()
+                        )
+                    )
+                else:
+                    proposed_status["time_left"] = 0
                 logger.debug(
                     "UPDATING RECORD ID {} WITH {}.".format(ps.id, proposed_status)
                 )
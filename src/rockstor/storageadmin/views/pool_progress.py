@@ -0,0 +1,120 @@
+"""
+Copyright (c) 2012-2023 RockStor, Inc. <http://rockstor.com>
+This file is part of RockStor.
+
+RockStor is free software; you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published
+by the Free Software Foundation; either version 2 of the License,
+or (at your option) any later version.
+
+RockStor is distributed in the hope that it will be useful, but
+WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program. If not, see <http://www.gnu.org/licenses/>.
+"""
+
+from django.conf import settings
+from django.db.models import Q
+from django.utils import timezone
+from huey import crontab
+from huey.contrib.djhuey import db_periodic_task, lock_task
+
+from storageadmin.models import Pool, PoolBalance, PoolScrub
+from storageadmin.serializers import PoolBalanceSerializer, PoolScrubSerializer
+from pool_balance import PoolBalanceView
+from pool_scrub import PoolScrubView
+
+import logging
+
+logger = logging.getLogger(__name__)
+
+"""
+Balance and scrub progress is sampled from btrfs here, at most once per
+settings.POOL_PROGRESS['interval'] seconds per pool, and stored in the
+relevant PoolBalance / PoolScrub entry. The REST api serves only this stored
+state, so concurrent viewers no longer each fork btrfs status commands.
+Samplers are the periodic track_pool_progress() task, ensuring end states are
+recorded with no Web-UI open, and data_collector's sysinfo namespace which
+pushes the results to connected clients.
+"""
+
+# Only the latest entry of a pool, if in one of these states, is sampled.
+BALANCE_ACTIVE = ("started", "running", "cancelling", "pausing")
+SCRUB_ACTIVE = ("started", "running")
+
+
+def _due(entry, now, interval):
+    return (
+        entry.sampled is None or (now - entry.sampled).total_seconds() >= interval
+    )
+
+
+def _sample_balance(pool, now, interval):
+    try:
+        pb = PoolBalance.objects.filter(pool=pool).latest()
+    except PoolBalance.DoesNotExist:
+        return None
+    if pb.status not in BALANCE_ACTIVE:
+        return None
+    if _due(pb, now, interval):
+        pb = PoolBalanceView._balance_status(pool)
+        if not isinstance(pb, PoolBalance):
+            return None
+        PoolBalance.objects.filter(id=pb.id).update(sampled=now)
+        pb.refresh_from_db()
+    return PoolBalanceSerializer(pb).data
+
+
+def _sample_scrub(pool, now, interval):
+    ps = PoolScrub.objects.filter(pool=pool).order_by("-id").first()
+    if ps is None or ps.status not in SCRUB_ACTIVE:
+        return None
+    if _due(ps, now, interval):
+        PoolScrubView._scrub_status(pool)
+        PoolScrub.objects.filter(id=ps.id).update(sampled=now)
+        ps.refresh_from_db()
+    return PoolScrubSerializer(ps).data
+
+
+def sample_pool_progress(interval=None):
+    """
+    Sample, and store, the progress of every ongoing balance and scrub whose
+    last sample is older than interval seconds.
+    :param interval: minimum seconds between samples of the same pool entry,
+    defaults to settings.POOL_PROGRESS['interval'].
+    :return: list of {"pool", "name", "balance", "scrub"} dicts, one per pool
+    with an ongoing balance or scrub at the time of the call. Balance and scrub
+    values are serialized PoolBalance / PoolScrub entries, or None.
+    """
+    if interval is None:
+        interval = settings.POOL_PROGRESS["interval"]
+    now = timezone.now()
+    pools = Pool.objects.filter(
+        Q(poolbalance__status__in=BALANCE_ACTIVE)
+        | Q(poolscrub__status__in=SCRUB_ACTIVE)
+    ).distinct()
+    progress = []
+    for pool in pools:
+        entry = {"pool": pool.id, "name": pool.name}
+        for key, sampler in (("balance", _sample_balance), ("scrub", _sample_scrub)):
+            try:
+                entry[key] = sampler(pool, now, interval)
+            except Exception as e:
+                logger.error(
+                    "Failed to sample {} progress of Pool ({}): {}".format(
+                        key, pool.name, e.__str__()
+                    )
+                )
+                entry[key] = None
+        if entry["balance"] is not None or entry["scrub"] is not None:
+            progress.append(entry)
+    return progress
+
+
+@db_periodic_task(crontab(minute="*"))
+@lock_task("track_pool_progress")
+def track_pool_progress():
+    sample_pool_progress()
@@ -46,11 +46,13 @@ class PoolScrubView(rfc.GenericView):
     def get_queryset(self, *args, **kwargs):
         with self._handle_exception(self.request):
             pool = self._validate_pool(self.kwargs["pid"], self.request)
-            self._scrub_status(pool)
+            # Stored state only: sampling of ongoing scrubs is left to
+            # pool_progress, or an explicit "status" command.
             return PoolScrub.objects.filter(pool=pool).order_by("-id")
 
+    @staticmethod
     @transaction.atomic
-    def _scrub_status(self, pool):
+    def _scrub_status(pool):
         try:
             ps = PoolScrub.objects.filter(pool=pool).order_by("-id")[0]
         except:
@@ -22,7 +22,6 @@ import os
 import re
 import fnmatch
 
-import requests
 from django.db import transaction
 from rest_framework.response import Response
 
@@ -44,6 +43,15 @@ from storageadmin.serializers import RockOnSerializer
 from storageadmin.util import handle_exception
 import rest_framework_custom as rfc
 from rockon_helpers import rockon_status
+from rockon_utils import container_states
+from rockon_metastore import (
+    metastore_session,
+    conditional_get,
+    fetch_all,
+    definition_hash,
+    load_hashes,
+    save_hashes,
+)
 from system.docker import docker_status
 from huey.contrib.djhuey import HUEY
 from django.conf import settings
@@ -54,6 +62,8 @@ ROCKONS = {
     "remote_metastore": "https://rockstor.com/rockons",
     "remote_root": "root.json",
     "local_metastore": "{}/rockons-metastore".format(settings.BASE_DIR),
+    "cache": "{}/var/rockons-cache".format(settings.BASE_DIR),
+    "fetch_workers": 8,
 }
 
 
@@ -70,22 +80,21 @@ class RockOnView(rfc.GenericView):
             # [storageadmin.views.rockon_helpers.rock_helpers.uninstall:
             # 7ce769d4-a468-4cd0-8706-c246d207e81c]
             # But for above task.name = "uninstall"
-            hi = HUEY
-            logger.debug("HUEY.pending() {}".format(hi.pending()))
+            pending = HUEY.pending()
+            logger.debug("HUEY.pending() {}".format(pending))
             # List of pending rockon related tasks.
             pending_task_ids = [
                 task.id
-                for task in hi.pending()
+                for task in pending
                 if task.name in ["start", "stop", "update", "install", "uninstall"]
             ]
-            for item in hi.pending():
+            for item in pending:
                 logger.debug("Pending task name: {}, ID: {}".format(item.name, item.id))
             logger.debug("PENDING TASK ID'S {}".format(pending_task_ids))
+            rockons = list(RockOn.objects.all())
             # List of rockons with an associated active pending task.
             pending_rockon_ids = [
-                rockon.id
-                for rockon in RockOn.objects.all()
-                if rockon.taskid in pending_task_ids
+                rockon.id for rockon in rockons if rockon.taskid in pending_task_ids
             ]
             logger.debug("PENDING ROCKON_ID'S {}".format(pending_rockon_ids))
             # https://huey.readthedocs.io/en/latest/api.html#Huey.all_results
@@ -95,12 +104,29 @@ class RockOnView(rfc.GenericView):
             # https://huey.readthedocs.io/en/latest/api.html#Huey.__len__
             # HUEY.__len__ Return the number of items currently in the queue.
 
+            # Installed rockons to update the running status of: with their
+            # last launched container and a single docker ps for all.
+            installed = [
+                ro.id
+                for ro in rockons
+                if ro.state == "installed" and ro.id not in pending_rockon_ids
+            ]
+            containers = {}
+            states = {}
+            if len(installed) > 0:
+                for co in DContainer.objects.filter(rockon__in=installed).order_by(
+                    "-launch_order"
+                ):
+                    containers.setdefault(co.rockon_id, co)
+                states = container_states()
+
             # For all RockOns
-            for ro in RockOn.objects.all():
+            for ro in rockons:
+                prior = (ro.state, ro.status)
                 if ro.state == "installed":
                     # update current running status of installed rockons.
                     if ro.id not in pending_rockon_ids:
-                        ro.status = rockon_status(ro)
+                        ro.status = rockon_status(ro, states, containers.get(ro.id))
                 elif re.search("pending", ro.state) is not None:
                     if ro.id not in pending_rockon_ids:
                         logger.info(
@@ -117,8 +143,11 @@ class RockOnView(rfc.GenericView):
                         )
                 elif ro.state == "uninstall_failed":
                     ro.state = "installed"
-                ro.save()
-        return RockOn.objects.filter().order_by("name")
+                if (ro.state, ro.status) != prior:
+                    ro.save()
+        return RockOnSerializer.setup_eager_loading(
+            RockOn.objects.filter().order_by("name")
+        )
 
     @transaction.atomic
     def put(self, request):
@@ -133,13 +162,27 @@ class RockOnView(rfc.GenericView):
                 # Delete metadata for apps no longer in metastores.
                 self._delete_deprecated(rockons)
 
+                # Skip the db update of available Rock-ons whose definition is
+                # unchanged since last applied. Installed ones are always
+                # updated as some of their attributes are not, until available.
+                cache_dir = ROCKONS.get("cache")
+                hashes = load_hashes(cache_dir)
+                cur_states = dict(RockOn.objects.values_list("name", "state"))
                 error_str = ""
                 for r in rockons:
+                    r_hash = definition_hash(rockons[r])
+                    if (
+                        cur_states.get(r) in ("available", "install_failed")
+                        and hashes.get(r) == r_hash
+                    ):
+                        continue
                     try:
                         self._create_update_meta(r, rockons[r])
+                        hashes[r] = r_hash
                     except Exception as e:
                         error_str = "{}: {}".format(r, e.__str__())
                         logger.exception(e)
+                save_hashes(cache_dir, {r: hashes[r] for r in rockons if r in hashes})
                 if len(error_str) > 0:
                     e_msg = (
                         "Errors occurred while processing updates for "
@@ -482,22 +525,23 @@ class RockOnView(rfc.GenericView):
 
         url_root = ROCKONS.get("remote_metastore")
         remote_root = "{}/{}".format(url_root, ROCKONS.get("remote_root"))
+        cache_dir = ROCKONS.get("cache")
+        workers = ROCKONS.get("fetch_workers")
+        session = metastore_session(workers)
         msg = "Error while processing remote metastore at ({}).".format(remote_root)
         with self._handle_exception(self.request, msg=msg):
-            response = requests.get(remote_root, timeout=10)
-            if response.status_code != 200:
-                response.raise_for_status()
-            root = response.json()
+            root = conditional_get(session, remote_root, cache_dir)
 
         meta_cfg = {}
-        for k, v in root.items():
-            cur_meta_url = "{}/{}".format(url_root, v)
+        meta_urls = ["{}/{}".format(url_root, v) for k, v in root.items()]
+        for cur_meta_url, profile, e in fetch_all(
+            session, meta_urls, cache_dir, workers
+        ):
             msg = "Error while processing Rock-on profile at ({}).".format(cur_meta_url)
             with self._handle_exception(self.request, msg=msg):
-                cur_res = requests.get(cur_meta_url, timeout=10)
-                if cur_res.status_code != 200:
-                    cur_res.raise_for_status()
-                meta_cfg.update(cur_res.json())
+                if e is not None:
+                    raise e
+                meta_cfg.update(profile)
 
         local_root = ROCKONS.get("local_metastore")
         if os.path.isdir(local_root):
@@ -53,12 +53,14 @@ logger = logging.getLogger(__name__)
 aw = APIWrapper()
 
 
-def rockon_status(ro):
+def rockon_status(ro, states=None, co=None):
     # Run/return container_status() or custom "rockon.name.lower()_status" if it exists.
+    # states: optional container_states() snapshot, co: ro's last launched container.
     if globals().get("{}_status".format(ro.name.lower())) is not None:
         return globals().get("{}_status".format(ro.name.lower()))(ro)
-    co = DContainer.objects.filter(rockon=ro).order_by("-launch_order")[0]
-    return container_status(co.name)
+    if co is None:
+        co = DContainer.objects.filter(rockon=ro).order_by("-launch_order")[0]
+    return container_status(co.name, states)
 
 
 def rm_container(name):
@@ -0,0 +1,153 @@
+"""
+Copyright (c) 2012-2023 RockStor, Inc. <http://rockstor.com>
+This file is part of RockStor.
+
+RockStor is free software; you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published
+by the Free Software Foundation; either version 2 of the License,
+or (at your option) any later version.
+
+RockStor is distributed in the hope that it will be useful, but
+WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program. If not, see <http://www.gnu.org/licenses/>.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import threading
+from multiprocessing.pool import ThreadPool
+
+import requests
+from requests.adapters import HTTPAdapter
+
+logger = logging.getLogger(__name__)
+
+"""
+Rock-on metastore sync: definitions are fetched concurrently over a shared
+keep-alive session, and revalidated against an on-disk cache via
+If-None-Match / If-Modified-Since so that unchanged definitions cost a 304
+only. A content hash per Rock-on then lets our caller skip the db update of
+definitions that have not changed.
+"""
+
+HASHES_FILE = "hashes.json"
+
+
+def metastore_session(workers):
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=workers)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+
+def _cache_path(cache_dir, url):
+    return os.path.join(
+        cache_dir, "{}.json".format(hashlib.sha1(url.encode("utf-8")).hexdigest())
+    )
+
+
+def _read_json(path):
+    try:
+        with open(path) as fo:
+            return json.load(fo)
+    except (IOError, ValueError):
+        return None
+
+
+def _write_json(path, data):
+    if not os.path.isdir(os.path.dirname(path)):
+        try:
+            os.makedirs(os.path.dirname(path))
+        except OSError:
+            # Created concurrently by another fetch.
+            pass
+    # Write then rename so that concurrent readers never see a partial file.
+    tmp = "{}.tmp{}.{}".format(path, os.getpid(), threading.current_thread().ident)
+    with open(tmp, "w") as fo:
+        json.dump(data, fo)
+    os.rename(tmp, path)
+
+
+def conditional_get(session, url, cache_dir, timeout=10):
+    """
+    Fetch and parse a json document, revalidating any cached copy from a
+    prior fetch: a 304 (Not Modified) response returns the cached copy.
+    :param session: requests.Session, see metastore_session().
+    :param url: json document url.
+    :param cache_dir: directory of the on-disk cache.
+    :param timeout: request timeout in seconds.
+    :return: parsed json document.
+    """
+    cache_file = _cache_path(cache_dir, url)
+    cached = _read_json(cache_file)
+    headers = {}
+    if cached is not None:
+        if cached.get("etag") is not None:
+            headers["If-None-Match"] = cached["etag"]
+        if cached.get("last_modified") is not None:
+            headers["If-Modified-Since"] = cached["last_modified"]
+    response = session.get(url, headers=headers, timeout=timeout)
+    if response.status_code == 304 and cached is not None:
+        return cached["body"]
+    if response.status_code != 200:
+        response.raise_for_status()
+    body = response.json()
+    etag = response.headers.get("ETag")
+    last_modified = response.headers.get("Last-Modified")
+    if etag is not None or last_modified is not None:
+        _write_json(
+            cache_file, {"etag": etag, "last_modified": last_modified, "body": body}
+        )
+    return body
+
+
+def _fetch(args):
+    session, url, cache_dir = args
+    try:
+        return url, conditional_get(session, url, cache_dir), None
+    except Exception as e:
+        return url, None, e
+
+
+def fetch_all(session, urls, cache_dir, workers):
+    """
+    conditional_get() each of the given urls on a bounded pool of threads.
+    :param urls: list of json document urls.
+    :param workers: max concurrent requests.
+    :return: list of (url, document, exception) tuples in urls order, where
+    exception is None on success, otherwise document is None.
+    """
+    if len(urls) == 0:
+        return []
+    pool = ThreadPool(min(workers, len(urls)))
+    try:
+        return pool.map(_fetch, [(session, url, cache_dir) for url in urls])
+    finally:
+        pool.close()
+        pool.join()
+
+
+def definition_hash(r_d):
+    return hashlib.sha1(json.dumps(r_d, sort_keys=True).encode("utf-8")).hexdigest()
+
+
+def load_hashes(cache_dir):
+    """
+    :return: dict of Rock-on name to definition_hash() as last applied to the
+    db, empty if none were recorded.
+    """
+    hashes = _read_json(os.path.join(cache_dir, HASHES_FILE))
+    if hashes is None:
+        return {}
+    return hashes
+
+
+def save_hashes(cache_dir, hashes):
+    _write_json(os.path.join(cache_dir, HASHES_FILE), hashes)
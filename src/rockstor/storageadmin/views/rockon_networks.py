@@ -33,4 +33,6 @@ class RockOnNetworkView(rfc.GenericView):
             handle_exception(Exception(e_msg), self.request)
 
         containers = DContainer.objects.filter(rockon=rockon)
-        return DContainerNetwork.objects.filter(container__in=containers).order_by("id")
+        return RockOnNetworkSerializer.setup_eager_loading(
+            DContainerNetwork.objects.filter(container__in=containers).order_by("id")
+        )
@@ -37,4 +37,6 @@ class RockOnPortView(rfc.GenericView):
             handle_exception(Exception(e_msg), self.request)
 
         containers = DContainer.objects.filter(rockon=rockon)
-        return DPort.objects.filter(container__in=containers).order_by("label")
+        return RockOnPortSerializer.setup_eager_loading(
+            DPort.objects.filter(container__in=containers).order_by("label")
+        )
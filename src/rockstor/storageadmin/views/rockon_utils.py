@@ -17,15 +17,71 @@ along with this program. If not, see <http://www.gnu.org/licenses/>.
 """
 
 from system.osi import run_command
+from django.conf import settings
+import json
 import logging
+import re
+import threading
+import time
 
 logger = logging.getLogger(__name__)
 
 
 DOCKER = "/usr/bin/docker"
+# "docker ps" states for which "docker inspect" reports .State.Running true.
+RUNNING_STATES = ("running", "paused", "restarting")
 
+# Per process snapshot of all containers' state: (time taken, states dict).
+_states = (0, {})
+_states_lock = threading.Lock()
 
-def container_status(name):
+
+def container_states():
+    """
+    Establish the state of all containers from a single "docker ps -a",
+    reused for settings.ROCKON_STATUS["ttl"] seconds so that concurrent, and
+    polling, Rock-on list requests share one docker call.
+    :return: dict indexed by container name of (state, exit_code) tuples, ie
+    ("exited", 1). exit_code is None unless the container has exited.
+    """
+    global _states
+    with _states_lock:
+        taken, states = _states
+        if time.time() - taken < settings.ROCKON_STATUS["ttl"]:
+            return states
+        o, e, rc = run_command(
+            [DOCKER, "ps", "-a", "--no-trunc", "--format", "{{json .}}"]
+        )
+        states = {}
+        for l in o:
+            if len(l.strip()) == 0:
+                continue
+            c = json.loads(l)
+            exited = re.match(r"Exited \((-?\d+)\)", c.get("Status", ""))
+            exit_code = int(exited.group(1)) if exited is not None else None
+            for name in c["Names"].split(","):
+                states[name] = (c["State"], exit_code)
+        _states = (time.time(), states)
+        return states
+
+
+def container_status(name, states=None):
+    """
+    Return the Rock-on status of a container: "started", "stopped", or for a
+    container that exited with an error "exitcode: n error: msg".
+    :param name: container name.
+    :param states: optional container_states() snapshot, in which case docker
+    inspect is only run, for the error message, on containers that exited
+    with an error.
+    """
+    if states is not None:
+        if name not in states:
+            return "unknown_error"
+        state, exit_code = states[name]
+        if state in RUNNING_STATES:
+            return "started"
+        if not exit_code:
+            return "stopped"
     state = "unknown_error"
     try:
         o, e, rc = run_command(
@@ -37,4 +37,6 @@ class RockOnVolumeView(rfc.GenericView):
             handle_exception(Exception(e_msg), self.request)
 
         containers = DContainer.objects.filter(rockon=rockon)
-        return DVolume.objects.filter(container__in=containers).order_by("label")
+        return RockOnVolumeSerializer.setup_eager_loading(
+            DVolume.objects.filter(container__in=containers).order_by("label")
+        )
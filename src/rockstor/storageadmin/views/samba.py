@@ -33,7 +33,7 @@ from storageadmin.views.ug_helpers import combined_users
 from system.samba import (
     refresh_smb_config,
     status,
-    restart_samba,
+    reload_samba_config,
     refresh_smb_discovery,
 )
 from system.users import ifp_get_properties_from_name_or_id
@@ -56,10 +56,11 @@ class SambaMixin(object):
     BOOL_OPTS = ("yes", "no")
 
     @staticmethod
-    def _restart_samba():
+    def _reload_samba():
+        # A reload, rather than restart, keeps existing client sessions.
         out = status()
         if out[2] == 0:
-            restart_samba(hard=True)
+            reload_samba_config()
 
     @classmethod
     def _validate_input(cls, rdata, smbo=None):
@@ -167,7 +168,8 @@ class SambaMixin(object):
 
 
 class SambaListView(SambaMixin, ShareMixin, rfc.GenericView):
-    queryset = SambaShare.objects.all()
+    def get_queryset(self, *args, **kwargs):
+        return SambaShareSerializer.setup_eager_loading(SambaShare.objects.all())
 
     @transaction.atomic
     def post(self, request):
@@ -176,9 +178,10 @@ class SambaListView(SambaMixin, ShareMixin, rfc.GenericView):
                 smb_share = self.create_samba_share(se)
         else:
             smb_share = self.create_samba_share(request.data)
-        refresh_smb_config(list(SambaShare.objects.all()))
-        refresh_smb_discovery(list(SambaShare.objects.all()))
-        self._restart_samba()
+        smb_exports = list(SambaShare.objects.all())
+        if refresh_smb_config(smb_exports):
+            self._reload_samba()
+        refresh_smb_discovery(smb_exports)
         return Response(SambaShareSerializer(smb_share).data)
 
     def create_samba_share(self, rdata):
@@ -237,9 +240,10 @@ class SambaDetailView(SambaMixin, rfc.GenericView):
             handle_exception(Exception(e_msg), request)
 
         with self._handle_exception(request):
-            refresh_smb_config(list(SambaShare.objects.all()))
-            refresh_smb_discovery(list(SambaShare.objects.all()))
-            self._restart_samba()
+            smb_exports = list(SambaShare.objects.all())
+            if refresh_smb_config(smb_exports):
+                self._reload_samba()
+            refresh_smb_discovery(smb_exports)
             return Response()
 
     @transaction.atomic
@@ -285,7 +289,8 @@ class SambaDetailView(SambaMixin, rfc.GenericView):
                             ).format(smb_o.share.name)
                             handle_exception(Exception(e_msg), request)
 
-            refresh_smb_config(list(SambaShare.objects.all()))
-            refresh_smb_discovery(list(SambaShare.objects.all()))
-            self._restart_samba()
+            smb_exports = list(SambaShare.objects.all())
+            if refresh_smb_config(smb_exports):
+                self._reload_samba()
+            refresh_smb_discovery(smb_exports)
             return Response(SambaShareSerializer(smbo).data)
@@ -39,7 +39,7 @@ class SFTPListView(rfc.GenericView):
     serializer_class = SFTPSerializer
 
     def get_queryset(self, *args, **kwargs):
-        return SFTP.objects.all()
+        return SFTPSerializer.setup_eager_loading(SFTP.objects.all())
 
     @transaction.atomic
     def post(self, request):
@@ -44,6 +44,7 @@ from fs.btrfs import (
 from system.services import systemctl
 from storageadmin.serializers import ShareSerializer, SharePoolSerializer
 from storageadmin.util import handle_exception
+from pool import refresh_usage_after_write
 from django.conf import settings
 import rest_framework_custom as rfc
 import json
@@ -103,25 +104,27 @@ class ShareMixin(object):
             handle_exception(Exception(e_msg), request)
 
 
-class ShareListView(ShareMixin, rfc.GenericView):
+class ShareListView(ShareMixin, rfc.SortedListMixin, rfc.GenericView):
     serializer_class = ShareSerializer
+    etag_groups = ("shares", "pools", "disks")
+    sort_fields = {
+        "id": "id",
+        "name": "name",
+        "size": "size",
+        "usage": "rusage",
+        "rusage": "rusage",
+        "eusage": "eusage",
+        "owner": "owner",
+        "group": "group",
+        "toc": "toc",
+    }
+    filter_fields = {"name": "name__icontains", "pool": "pool__name"}
 
     def get_queryset(self, *args, **kwargs):
         with self._handle_exception(self.request):
-            sort_col = self.request.query_params.get("sortby", None)
-            if sort_col is not None:
-                reverse = self.request.query_params.get("reverse", "no")
-                if reverse == "yes":
-                    reverse = True
-                else:
-                    reverse = False
-                if sort_col == "usage":
-                    sort_col = "rusage"
-                return sorted(
-                    Share.objects.all(),
-                    key=lambda u: getattr(u, sort_col),
-                    reverse=reverse,
-                )
+            shares = ShareSerializer.setup_eager_loading(Share.objects.all())
+            if "sortby" in self.request.query_params:
+                return self.sort_and_filter(shares)
             # If this box is receiving replication backups, the first full-send
             # is interpreted as a Share(because it does not have a parent
             # subvol/snapshot) It is a transient subvolume that gets rolled
@@ -130,9 +133,9 @@ class ShareListView(ShareMixin, rfc.GenericView):
             # for cosmetic and UX reasons.
             # TODO: This currently fails to work, needs investigating, leaving
             # TODO: for now as good for indicting the initial rep phases.
-            return Share.objects.exclude(
-                name__regex=r"^\.snapshots/.*/.*_replication_"
-            ).order_by("-id")
+            return self.sort_and_filter(
+                shares.exclude(name__regex=r"^\.snapshots/.*/.*_replication_")
+            )
 
     @transaction.atomic
     def post(self, request):
@@ -239,6 +242,7 @@ class PoolShareListView(ShareMixin, rfc.GenericView):
 
 class ShareDetailView(ShareMixin, rfc.GenericView):
     serializer_class = ShareSerializer
+    etag_groups = ("shares", "pools", "disks")
 
     def get(self, *args, **kwargs):
         try:
@@ -385,5 +389,6 @@ class ShareDetailView(ShareMixin, rfc.GenericView):
                     "Failed to delete the share ({}). Error from the OS: {}"
                 ).format(share.name, e.__str__())
                 handle_exception(Exception(e_msg), request)
+            refresh_usage_after_write(share.pool)
             share.delete()
             return Response()
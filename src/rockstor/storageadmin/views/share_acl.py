@@ -16,21 +16,174 @@ You should have received a copy of the GNU General Public License
 along with this program. If not, see <http://www.gnu.org/licenses/>.
 """
 
-from rest_framework.response import Response
-from django.db import transaction
+import logging
+import os
+import re
+from datetime import timedelta
+from functools import partial
+
 from django.conf import settings
-from storageadmin.models import Share
-from storageadmin.serializers import ShareSerializer
+from django.db import transaction
+from django.utils.timezone import now
+from huey.contrib.djhuey import db_task, HUEY
+from rest_framework.response import Response
+
+import rest_framework_custom as rfc
 from fs.btrfs import mount_share, umount_root
-from storageadmin.views import ShareListView
-from system.acl import chown, chmod
+from storageadmin.models import Share, ShareACLChange
+from storageadmin.serializers import ShareACLChangeSerializer, ShareSerializer
+from storageadmin.util import handle_exception
+from system.acl import owner_ids, set_tree_acl
+
+logger = logging.getLogger(__name__)
+
+
+def inode_estimate(share, mnt_pt):
+    """
+    Estimated inode count of a share: as visited by its last completed ACL
+    change, else the used inodes of its filesystem if reported (btrfs does
+    not), else None.
+    """
+    last = (
+        ShareACLChange.objects.filter(share=share, status="finished")
+        .exclude(visited=0)
+        .order_by("-start_time")
+        .first()
+    )
+    if last is not None:
+        return last.visited
+    vfs = os.statvfs(mnt_pt)
+    if vfs.f_files > 0:
+        return vfs.f_files - vfs.f_ffree
+    return None
+
+
+def _record_progress(change, stats):
+    change.visited = stats.visited
+    change.changed = stats.changed
+    change.errors = stats.errors
+    change.rate = round(stats.rate, 1)
+    if change.estimate:
+        # Capped as the estimate may be exceeded.
+        change.percent_done = min(99, stats.visited * 100 // change.estimate)
+    change.save(
+        update_fields=[
+            "visited",
+            "changed",
+            "errors",
+            "rate",
+            "percent_done",
+            "updated",
+        ]
+    )
+
+
+@db_task(context=True)
+def change_share_acl(cid, task=None):
+    """
+    Apply a ShareACLChange: a single walk of the share setting ownership and
+    permissions, recording progress every settings.SHARE_ACL['interval']
+    seconds.
+    """
+    change = ShareACLChange.objects.get(id=cid)
+    if change.status != "pending":
+        # Given up on while queued, see is_live_acl_change().
+        logger.error(
+            "Ownership/permissions change ({}) is {}: skipping.".format(
+                cid, change.status
+            )
+        )
+        return
+    change.tid = task.id
+    change.status = "running"
+    change.save(update_fields=["tid", "status", "updated"])
+    share = change.share
+    mnt_pt = "{}{}".format(settings.MNT_PT, share.name)
+    force_mount = False
+    try:
+        if not share.is_mounted:
+            mount_share(share, mnt_pt)
+            force_mount = True
+        uid, gid = owner_ids(change.owner, change.group)
+        change.estimate = inode_estimate(share, mnt_pt)
+        change.save(update_fields=["estimate", "updated"])
+        stats = set_tree_acl(
+            mnt_pt,
+            uid=uid,
+            gid=gid,
+            mode=int(change.perms, 8),
+            owner_recursive=change.orecursive,
+            perms_recursive=change.precursive,
+            workers=settings.SHARE_ACL["workers"],
+            progress=partial(_record_progress, change),
+            interval=settings.SHARE_ACL["interval"],
+        )
+        change.status = "finished"
+        change.percent_done = 100
+        if stats.errors > 0:
+            change.message = (
+                "Failed to change {} file(s), see the log for details."
+            ).format(stats.errors)
+    except Exception as e:
+        logger.exception(e)
+        change.status = "failed"
+        change.message = e.__str__()[:1024]
+    finally:
+        if force_mount is True:
+            umount_root(mnt_pt)
+        change.end_time = now()
+        change.save()
+
+
+def queue_change_share_acl(cid):
+    """
+    Enqueue the change_share_acl task for a ShareACLChange, recording its task
+    id so that is_live_acl_change() can find it while it is still queued.
+    """
+    task = change_share_acl(cid)
+    ShareACLChange.objects.filter(id=cid, tid__isnull=True).update(tid=task.id)
+
+
+def is_live_acl_change(change):
+    """
+    Boolean indicator of a pending or running ShareACLChange still having a
+    live Huey task. A pending change must have its task queued, and a running
+    change must have recorded progress within the last
+    settings.SHARE_ACL['stale'] seconds: the task does so every 'interval'
+    seconds. Otherwise the consumer died, or was restarted, mid-task.
+    :param change: ShareACLChange instance.
+    :return: Boolean, true if change is live.
+    """
+    if change.status == "pending":
+        pending_task_ids = [
+            task.id for task in HUEY.pending() if task.name == "change_share_acl"
+        ]
+        return change.tid in pending_task_ids
+    stale = now() - timedelta(seconds=settings.SHARE_ACL["stale"])
+    return change.status == "running" and change.updated > stale
+
+
+class ShareACLView(rfc.GenericView):
+    serializer_class = ShareACLChangeSerializer
+
+    def get_queryset(self, *args, **kwargs):
+        # Progress of this share's ACL changes, most recent first.
+        with self._handle_exception(self.request):
+            share = self._validate_share(self.kwargs["sid"], self.request)
+            return ShareACLChange.objects.filter(share=share).order_by("-start_time")
 
+    @staticmethod
+    def _validate_share(sid, request):
+        try:
+            return Share.objects.get(id=sid)
+        except Share.DoesNotExist:
+            e_msg = "Share id ({}) does not exist.".format(sid)
+            handle_exception(Exception(e_msg), request, status_code=404)
 
-class ShareACLView(ShareListView):
     @transaction.atomic
     def post(self, request, sid):
         with self._handle_exception(request):
-            share = Share.objects.get(id=sid)
+            share = self._validate_share(sid, request)
             options = {
                 "owner": "root",
                 "group": "root",
@@ -47,18 +200,46 @@ class ShareACLView(ShareListView):
             options["precursive"] = request.data.get(
                 "precursive", options["precursive"]
             )
+            if re.match(r"^[0-7]{3,4}$", str(options["perms"])) is None:
+                e_msg = (
+                    "Invalid permissions ({}). Expected 3 or 4 octal digits."
+                ).format(options["perms"])
+                handle_exception(Exception(e_msg), request, status_code=400)
+            try:
+                owner_ids(options["owner"], options["group"])
+            except KeyError:
+                e_msg = "Unknown owner ({}) or group ({}).".format(
+                    options["owner"], options["group"]
+                )
+                handle_exception(Exception(e_msg), request, status_code=400)
+            for change in ShareACLChange.objects.filter(
+                share=share, status__in=("pending", "running")
+            ):
+                if is_live_acl_change(change):
+                    e_msg = (
+                        "An ownership/permissions change of share ({}) is "
+                        "already in progress."
+                    ).format(share.name)
+                    handle_exception(Exception(e_msg), request, status_code=400)
+                logger.error(
+                    "Ownership/permissions change ({}) of share ({}) has no live "
+                    "task ({}): marking it failed.".format(
+                        change.id, share.name, change.tid
+                    )
+                )
+                change.status = "failed"
+                change.message = "Task lost: no progress recorded since {}.".format(
+                    change.updated
+                )
+                change.end_time = now()
+                change.save()
             share.owner = options["owner"]
             share.group = options["group"]
             share.perms = options["perms"]
             share.save()
 
-            mnt_pt = "%s%s" % (settings.MNT_PT, share.name)
-            force_mount = False
-            if not share.is_mounted:
-                mount_share(share, mnt_pt)
-                force_mount = True
-            chown(mnt_pt, options["owner"], options["group"], options["orecursive"])
-            chmod(mnt_pt, options["perms"], options["precursive"])
-            if force_mount is True:
-                umount_root(mnt_pt)
+            # The tree walk is left to a Huey task, once committed, as it may
+            # take far longer than a request on large shares.
+            change = ShareACLChange.objects.create(share=share, **options)
+            transaction.on_commit(partial(queue_change_share_acl, change.id))
             return Response(ShareSerializer(share).data)
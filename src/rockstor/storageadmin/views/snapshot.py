@@ -24,18 +24,18 @@ from storageadmin.models import (
     Share,
     NFSExport,
     NFSExportGroup,
-    AdvancedNFSExport,
 )
 from fs.btrfs import (
     add_snap,
     share_id,
     volume_usage,
     remove_snap,
+    remove_snaps,
     umount_root,
     mount_snap,
     qgroup_assign,
 )
-from system.osi import refresh_nfs_exports
+from system.osi import update_nfs_exports
 from storageadmin.serializers import SnapshotSerializer
 from storageadmin.util import handle_exception
 import rest_framework_custom as rfc
@@ -48,8 +48,17 @@ import logging
 logger = logging.getLogger(__name__)
 
 
-class SnapshotView(NFSExportMixin, rfc.GenericView):
+class SnapshotView(NFSExportMixin, rfc.SortedListMixin, rfc.GenericView):
     serializer_class = SnapshotSerializer
+    sort_fields = {
+        "id": "id",
+        "name": "name",
+        "size": "size",
+        "toc": "toc",
+        "rusage": "rusage",
+        "eusage": "eusage",
+    }
+    filter_fields = {"snap_type": "snap_type", "name": "name__icontains"}
 
     def get_queryset(self, *args, **kwargs):
         with self._handle_exception(self.request):
@@ -57,7 +66,7 @@ class SnapshotView(NFSExportMixin, rfc.GenericView):
                 share = Share.objects.get(id=self.kwargs["sid"])
             except:
                 if "sid" not in self.kwargs:
-                    return Snapshot.objects.filter().order_by("-id")
+                    return self.sort_and_filter(Snapshot.objects.all())
 
                 e_msg = ("Share id ({}) does not exist.").format(self.kwargs["sid"])
                 handle_exception(Exception(e_msg), self.request)
@@ -71,55 +80,65 @@ class SnapshotView(NFSExportMixin, rfc.GenericView):
                 except:
                     return []
 
-            snap_type = self.request.query_params.get("snap_type", None)
-            if snap_type is not None and snap_type != "":
-                return Snapshot.objects.filter(
-                    share=share, snap_type=snap_type
-                ).order_by("-id")
+            return self.sort_and_filter(Snapshot.objects.filter(share=share))
 
-            return Snapshot.objects.filter(share=share).order_by("-id")
-
-    @transaction.atomic
     def _toggle_visibility(self, share, snap_name, snap_qgroup, on=True):
-        cur_exports = list(NFSExport.objects.all())
-        # The following may be buggy when used with system mounted (fstab) /home
-        # but we currently don't allow /home to be exported.
-        snap_mnt_pt = "{}{}/.{}".format(settings.MNT_PT, share.name, snap_name)
-        export_pt = snap_mnt_pt.replace(settings.MNT_PT, settings.NFS_EXPORT_ROOT)
-        if on:
-            mount_snap(share, snap_name, snap_qgroup)
+        self._set_visibility(share, [(snap_name, snap_qgroup)], on=on)
 
-            if NFSExport.objects.filter(share=share).exists():
-                se = NFSExport.objects.filter(share=share)[0]
-                export_group = NFSExportGroup(
-                    host_str=se.export_group.host_str, nohide=True
-                )
-                export_group.save()
-                export = NFSExport(
-                    share=share, export_group=export_group, mount=export_pt
-                )
-                export.full_clean()
-                export.save()
-                cur_exports.append(export)
-        else:
-            for mnt in (snap_mnt_pt, export_pt):
-                try:
-                    export = NFSExport.objects.get(share=share, mount=mnt)
-                    cur_exports.remove(export)
+    @transaction.atomic
+    def _set_visibility(self, share, snapshots, on=True):
+        """
+        Mounts (on) or unmounts the given snapshots of share and, if the share
+        is NFS exported, adds or removes their nohide sub-exports. Only the
+        affected export points are passed, in one go, to update_nfs_exports();
+        other exports are left alone.
+        :param snapshots: list of (snap_name, snap_qgroup) tuples.
+        """
+        exports = {}
+        new_exports = []
+        unmount = []
+        se = (
+            NFSExport.objects.filter(share=share)
+            .exclude(export_group__nohide=True)
+            .select_related("export_group")
+            .first()
+        )
+        for snap_name, snap_qgroup in snapshots:
+            # The following may be buggy when used with system mounted (fstab)
+            # /home but we currently don't allow /home to be exported.
+            snap_mnt_pt = "{}{}/.{}".format(settings.MNT_PT, share.name, snap_name)
+            export_pt = snap_mnt_pt.replace(settings.MNT_PT, settings.NFS_EXPORT_ROOT)
+            if on:
+                mount_snap(share, snap_name, snap_qgroup)
+                if se is not None:
+                    export_group = NFSExportGroup(
+                        host_str=se.export_group.host_str, nohide=True
+                    )
+                    export_group.save()
+                    export = NFSExport(
+                        share=share, export_group=export_group, mount=export_pt
+                    )
+                    export.full_clean()
+                    export.save()
+                    new_exports.append(export)
+                continue
+            unmount.extend([export_pt, snap_mnt_pt])
+            try:
+                for export in NFSExport.objects.filter(
+                    share=share, mount__in=(snap_mnt_pt, export_pt)
+                ).select_related("export_group"):
                     export.export_group.delete()
                     export.delete()
-                except NFSExport.DoesNotExist:
-                    pass
-                except Exception as e:
-                    logger.exception(e)
-                finally:
-                    umount_root(export_pt)
-                    umount_root(snap_mnt_pt)
-        exports = self.create_nfs_export_input(cur_exports)
-        adv_entries = [x.export_str for x in AdvancedNFSExport.objects.all()]
-        exports_d = self.create_adv_nfs_export_input(adv_entries, self.request)
-        exports.update(exports_d)
-        refresh_nfs_exports(exports)
+                    exports[export_pt] = []
+            except Exception as e:
+                logger.exception(e)
+        exports.update(self.create_nfs_export_input(new_exports))
+        try:
+            if len(exports) > 0:
+                update_nfs_exports(exports)
+        finally:
+            for mnt in unmount:
+                umount_root(mnt)
 
     @transaction.atomic
     def _create(self, share, snap_name, request, uvisible, snap_type, writable):
@@ -277,16 +296,77 @@ class SnapshotView(NFSExportMixin, rfc.GenericView):
         snapshot.delete()
         return Response()
 
+    @transaction.atomic
+    def _delete_snapshots(self, request, sid, ids):
+        """
+        Bulk variant of _delete_snapshot() as used by snapshot retention
+        pruning: all subvols go in one remove_snaps() and all db rows in one
+        query, within a single transaction.
+        """
+        share = self._validate_share(sid, request)
+        snapshots = list(Snapshot.objects.filter(share=share, id__in=ids))
+        found_ids = set(str(s.id) for s in snapshots)
+        for si in ids:
+            if str(si) not in found_ids:
+                e_msg = "Snapshot id ({}) does not exist.".format(si)
+                handle_exception(Exception(e_msg), request)
+
+        visible = [(s.real_name, s.qgroup) for s in snapshots if s.uvisible]
+        self._set_visibility(share, visible, on=False)
+        for snap_name, snap_qgroup in visible:
+            toggle_sftp_visibility(share, snap_name, snap_qgroup, on=False)
+
+        remove_snaps(
+            share.pool, [(share.name, s.name, s.qgroup) for s in snapshots]
+        )
+        Snapshot.objects.filter(id__in=[s.id for s in snapshots]).delete()
+        return Response()
+
+    @transaction.atomic
+    def put(self, request, sid, snap_name=None):
+        """
+        Sets the visibility of a list of snapshots, given by id as an "ids"
+        list in the request body, to the "uvisible" boolean in one go.
+        """
+        with self._handle_exception(request):
+            share = self._validate_share(sid, request)
+            uvisible = request.data.get("uvisible", None)
+            if type(uvisible) != bool:
+                e_msg = ("Element 'uvisible' must be a boolean, not ({}).").format(
+                    type(uvisible)
+                )
+                handle_exception(Exception(e_msg), request, status_code=400)
+            ids = request.data.get("ids", [])
+            snapshots = list(Snapshot.objects.filter(share=share, id__in=ids))
+            found_ids = set(str(s.id) for s in snapshots)
+            for si in ids:
+                if str(si) not in found_ids:
+                    e_msg = "Snapshot id ({}) does not exist.".format(si)
+                    handle_exception(Exception(e_msg), request, status_code=400)
+
+            changed = [s for s in snapshots if s.uvisible != uvisible]
+            toggle = [(s.real_name, s.qgroup) for s in changed]
+            self._set_visibility(share, toggle, on=uvisible)
+            for snap_name, snap_qgroup in toggle:
+                toggle_sftp_visibility(share, snap_name, snap_qgroup, on=uvisible)
+            for s in changed:
+                s.uvisible = uvisible
+                s.save()
+            return Response(SnapshotSerializer(snapshots, many=True).data)
+
     def delete(self, request, sid, snap_name=None):
         """
-        deletes a snapshot
+        deletes a snapshot, or a list of snapshots given by id either as
+        ?id=1,2,3 or as an "ids" list in the request body.
         """
         with self._handle_exception(request):
             if snap_name is None:
+                snap_ids = request.data.get("ids", None)
                 snap_qp = self.request.query_params.get("id", None)
-                if snap_qp is not None:
-                    for si in snap_qp.split(","):
-                        self._delete_snapshot(request, sid, id=si)
+                if snap_ids is None and snap_qp is not None:
+                    snap_ids = snap_qp.split(",")
+                if snap_ids:
+                    self._delete_snapshots(request, sid, snap_ids)
             else:
                 self._delete_snapshot(request, sid, snap_name=snap_name)
             return Response()
@@ -16,88 +16,245 @@ You should have received a copy of the GNU General Public License
 along with this program. If not, see <http://www.gnu.org/licenses/>.
 """
 
+import grp
+import logging
+import pwd
+
+from django.db import transaction
+from django.db.models import Count
+from huey import crontab
+from huey.contrib.djhuey import db_periodic_task, lock_task
+from huey.exceptions import TaskLockedException
+
 from storageadmin.models import (
     User,
     Group,
+    Pincard,
+    DirectoryUser,
+    DirectoryGroup,
 )
-from system.pinmanager import pincard_states
+from system.pinmanager import email_notification_enabled
 from system.users import get_users, get_groups
 
+logger = logging.getLogger(__name__)
 
-def combined_users():
-    users = []
-    sys_users = get_users()
-    uname_list = sys_users.keys()
-    for u in uname_list:
-        try:
-            uo = User.objects.get(username=u)
-            uo.uid = sys_users[u][0]
-            uo.gid = sys_users[u][1]
-            uo.shell = sys_users[u][2]
-            gname = get_groups(uo.gid).keys()[0]
-            create = True
-            if uo.group is not None:
-                if uo.group.gid == uo.gid or uo.group.groupname == gname:
-                    uo.group.groupname = gname
-                    uo.group.gid = uo.gid
-                    uo.group.save()
-                    create = False
-            if create:
-                try:
-                    go = Group.objects.get(groupname=gname)
-                    go.gid = uo.gid
+"""
+User and group listings are served from a directory cache (DirectoryUser,
+DirectoryGroup) refreshed in the background, rather than enumerating NSS on
+every request: with a joined AD/LDAP domain the latter can take minutes.
+"""
+
+
+def _sync_cache(model, key, entries):
+    """
+    Bring a directory cache table in line with the given entries: one read,
+    then a bulk delete of stale rows, a bulk create of new ones, and an update
+    for each changed row only.
+    :param model: DirectoryUser or DirectoryGroup.
+    :param key: name of the model's unique field, ie "username".
+    :param entries: dict of field dicts indexed by key value.
+    """
+    # N.B. in_bulk(field_name=) requires Django >= 2.0.
+    cached = {getattr(o, key): o for o in model.objects.all()}
+    stale = [o.id for k, o in cached.items() if k not in entries]
+    if len(stale) > 0:
+        model.objects.filter(id__in=stale).delete()
+    new = []
+    for k, fields in entries.items():
+        o = cached.get(k)
+        if o is None:
+            fields[key] = k
+            new.append(model(**fields))
+        elif any(getattr(o, f) != v for f, v in fields.items()):
+            model.objects.filter(id=o.id).update(**fields)
+    model.objects.bulk_create(new, batch_size=500)
+
+
+def _reconcile_db(sys_users, gid_names):
+    """
+    Update Rockstor managed User (uid, gid, shell, group) and Group (gid)
+    entries to match the system, saving only those that have changed. Groups
+    are looked up from in memory maps rather than queried for each user.
+    :param sys_users: dict as returned by get_users().
+    :param gid_names: dict of group names indexed by gid.
+    """
+    groups = list(Group.objects.all())
+    gname_map = {g.groupname: g for g in groups}
+    gid_map = {g.gid: g for g in groups}
+    for gid, gname in gid_names.items():
+        go = gname_map.get(gname)
+        if go is not None and go.gid != gid and gid not in gid_map:
+            del gid_map[go.gid]
+            go.gid = gid
+            go.save()
+            gid_map[gid] = go
+    for uo in User.objects.select_related("group"):
+        if uo.username not in sys_users:
+            continue
+        uid, gid, shell = sys_users[uo.username]
+        changed = (uo.uid, uo.gid, uo.shell) != (uid, gid, shell)
+        uo.uid, uo.gid, uo.shell = uid, gid, shell
+        gname = gid_names.get(gid)
+        if gname is not None:
+            go = uo.group
+            if go is not None and (go.gid == gid or go.groupname == gname):
+                if (go.gid, go.groupname) != (gid, gname):
+                    go.gid, go.groupname = gid, gname
                     go.save()
-                    uo.group = go
-                except Group.DoesNotExist:
-                    try:
-                        go = Group.objects.get(gid=uo.gid)
-                        go.groupname = gname
-                        go.save()
-                        uo.group = go
-                    except Group.DoesNotExist:
-                        go = Group(groupname=gname, gid=uo.gid)
-                        go.save()
-                        uo.group = go
+            else:
+                go = gname_map.get(gname) or gid_map.get(gid)
+                if go is None:
+                    go = Group(groupname=gname, gid=gid)
+                    go.save()
+                elif (go.gid, go.groupname) != (gid, gname):
+                    go.gid, go.groupname = gid, gname
+                    go.save()
+                gname_map[gname] = gid_map[gid] = go
+                uo.group = go
+                changed = True
+        if changed:
             uo.save()
-            uo.pincard_allowed, uo.has_pincard = pincard_states(uo)
-            users.append(uo)
-
-        except User.DoesNotExist:
-            temp_uo = User(
-                username=u,
-                uid=sys_users[u][0],
-                gid=sys_users[u][1],
-                shell=sys_users[u][2],
-                admin=False,
-            )
-            temp_uo.managed_user = False
-            temp_uo.pincard_allowed, temp_uo.has_pincard = pincard_states(temp_uo)
-            users.append(temp_uo)
-
-    for u in User.objects.all():
-        if u.username not in uname_list:
-            users.append(u)
-    return sorted(
-        users, cmp=lambda x, y: cmp(x.username.lower(), y.username.lower())  # noqa F821
-    )
 
 
-def combined_groups():
-    groups = []
+@db_periodic_task(crontab(minute="*/15"))
+@lock_task("refresh_directory_cache")
+def refresh_directory_cache():
+    """
+    Enumerate system (and directory) users and groups into the directory
+    cache and reconcile Rockstor's User and Group entries with them. Runs
+    periodically in the background; also on first use of an empty cache.
+    """
+    sys_users = get_users()
     sys_groups = get_groups()
-    gname_list = sys_groups.keys()
-    for g in gname_list:
+    gid_names = {gid: gname for gname, gid in sys_groups.items()}
+    # Primary groups not enumerated, ie of domain users, are fetched once each.
+    for gid in set(u[1] for u in sys_users.values()) - set(gid_names):
         try:
-            go = Group.objects.get(groupname=g)
-            go.gid = sys_groups[g]
-            go.save()
-            groups.append(go)
-        except Group.DoesNotExist:
-            groups.append(Group(groupname=g, gid=sys_groups[g]))
-    for g in Group.objects.all():
-        if g.groupname not in gname_list:
-            groups.append(g)
-    return sorted(
-        groups,
-        cmp=lambda x, y: cmp(x.groupname.lower(), y.groupname.lower()),  # noqa F821
+            for gname, g in get_groups(gid).items():
+                gid_names[g] = gname
+        except Exception as e:
+            logger.error("Failed to resolve gid ({}): {}".format(gid, e.__str__()))
+    with transaction.atomic():
+        _sync_cache(
+            DirectoryUser,
+            "username",
+            {
+                u: {"uid": v[0], "gid": v[1], "shell": v[2]}
+                for u, v in sys_users.items()
+            },
+        )
+        _sync_cache(
+            DirectoryGroup,
+            "groupname",
+            {gname: {"gid": gid} for gid, gname in gid_names.items()},
+        )
+        _reconcile_db(sys_users, gid_names)
+    logger.debug(
+        "Directory cache refreshed: {} users, {} groups.".format(
+            len(sys_users), len(gid_names)
+        )
+    )
+
+
+def nss_user(username=None, uid=None):
+    """
+    Look up a user directly via NSS, by name or else by uid. Unlike the
+    directory cache this reflects users just added outside of Rockstor, ie in
+    a joined domain, so is used to validate new users.
+    :return: pwd struct_passwd or None if not found.
+    """
+    try:
+        if username is not None:
+            return pwd.getpwnam(username)
+        return pwd.getpwuid(uid)
+    except KeyError:
+        return None
+
+
+def nss_group(groupname=None, gid=None):
+    """
+    Look up a group directly via NSS, by name or else by gid: see nss_user().
+    :return: grp struct_group or None if not found.
+    """
+    try:
+        if groupname is not None:
+            return grp.getgrnam(groupname)
+        return grp.getgrgid(gid)
+    except KeyError:
+        return None
+
+
+def _ensure_directory_cache():
+    if not DirectoryUser.objects.exists():
+        try:
+            refresh_directory_cache.call_local()
+        except TaskLockedException:
+            # Already being populated in the background.
+            pass
+
+
+def combined_users(search=None):
+    """
+    Rockstor managed users plus those known to the system, as per the
+    directory cache. No per user queries or system calls are made.
+    :param search: optional case insensitive username substring filter.
+    :return: list of User objects, those not managed by Rockstor unsaved,
+    sorted by username.
+    """
+    _ensure_directory_cache()
+    db_users = User.objects.select_related("group")
+    dir_users = DirectoryUser.objects.all()
+    if search:
+        db_users = db_users.filter(username__icontains=search)
+        dir_users = dir_users.filter(username__icontains=search)
+    users = list(db_users)
+    managed = set(u.username for u in users)
+    gid_names = dict(DirectoryGroup.objects.values_list("gid", "groupname"))
+    for du in dir_users:
+        if du.username in managed:
+            continue
+        uo = User(
+            username=du.username, uid=du.uid, gid=du.gid, shell=du.shell, admin=False
+        )
+        uo.managed_user = False
+        uo.cached_groupname = gid_names.get(du.gid)
+        users.append(uo)
+    # Bulk equivalent of system.pinmanager.pincard_states() for each user.
+    pincard_uids = set(
+        Pincard.objects.values("user")
+        .annotate(pins=Count("id"))
+        .filter(pins=24)
+        .values_list("user", flat=True)
     )
+    root_pincard = "yes" if email_notification_enabled() else "otp"
+    for uo in users:
+        uo.has_pincard = int(uo.uid) in pincard_uids
+        if uo.managed_user:
+            uo.pincard_allowed = "yes"
+        elif int(uo.uid) == 0:
+            uo.pincard_allowed = root_pincard
+        else:
+            uo.pincard_allowed = "no"
+    return sorted(users, key=lambda u: u.username.lower())
+
+
+def combined_groups(search=None):
+    """
+    Rockstor managed groups plus those known to the system, as per the
+    directory cache.
+    :param search: optional case insensitive groupname substring filter.
+    :return: list of Group objects, those not managed by Rockstor unsaved,
+    sorted by groupname.
+    """
+    _ensure_directory_cache()
+    db_groups = Group.objects.all()
+    dir_groups = DirectoryGroup.objects.all()
+    if search:
+        db_groups = db_groups.filter(groupname__icontains=search)
+        dir_groups = dir_groups.filter(groupname__icontains=search)
+    groups = list(db_groups)
+    known = set(g.groupname for g in groups)
+    for dg in dir_groups:
+        if dg.groupname not in known:
+            groups.append(Group(groupname=dg.groupname, gid=dg.gid))
+    return sorted(groups, key=lambda g: (g.groupname or "").lower())
@@ -23,13 +23,13 @@ from django.conf import settings
 from storageadmin.util import handle_exception
 from django.contrib.auth.models import User as DjangoUser
 from storageadmin.serializers import SUserSerializer
-from storageadmin.models import User, Group
+from storageadmin.models import User, Group, DirectoryUser
 import rest_framework_custom as rfc
 from system.users import useradd, usermod, userdel, smbpasswd, add_ssh_key, update_shell
 import pwd
 from system.pinmanager import username_to_uid, flush_pincard
 from system.ssh import is_pub_key
-from ug_helpers import combined_users, combined_groups
+from ug_helpers import combined_users, combined_groups, nss_user
 import logging
 import re
 
@@ -128,10 +128,16 @@ class UserMixin(object):
         return public_key
 
 
-class UserListView(UserMixin, rfc.GenericView):
+class UserListView(UserMixin, rfc.SortedListMixin, rfc.GenericView):
+    sort_fields = {"username": "username", "uid": "uid", "gid": "gid"}
+
     def get_queryset(self, *args, **kwargs):
         with self._handle_exception(self.request):
-            return combined_users()
+            # Managed and directory (cache) users are merged, and so sorted, in
+            # Python. Filtering (search) is applied in the database.
+            return self.sort_list(
+                combined_users(search=self.request.query_params.get("search"))
+            )
 
     @transaction.atomic
     def post(self, request):
@@ -174,6 +180,15 @@ class UserListView(UserMixin, rfc.GenericView):
                         "UID ({}) already exists. Please choose a different one."
                     ).format(invar["uid"])
                     handle_exception(Exception(e_msg), request)
+            # Our directory cache may not yet include users recently added
+            # outside of Rockstor, so also check with NSS before useradd.
+            if nss_user(invar["username"]) is not None:
+                handle_exception(Exception(e_msg), request, status_code=400)
+            if invar["uid"] is not None and nss_user(uid=invar["uid"]) is not None:
+                e_msg = (
+                    "UID ({}) already exists. Please choose a different one."
+                ).format(invar["uid"])
+                handle_exception(Exception(e_msg), request)
 
             if invar["admin"]:
                 # Create Django user
@@ -351,5 +366,6 @@ class UserDetailView(UserMixin, rfc.GenericView):
                     "A low level error occurred while deleting the user ({})."
                 ).format(username)
                 handle_exception(Exception(e_msg), request)
+            DirectoryUser.objects.filter(username=username).delete()
 
             return Response()
@@ -16,10 +16,25 @@ You should have received a copy of the GNU General Public License
 along with this program. If not, see <http://www.gnu.org/licenses/>.
 """
 
+import grp
+import logging
+import os
+import pwd
+import stat
+import threading
+import time
+from multiprocessing.pool import ThreadPool
+
 from osi import run_command
 
+logger = logging.getLogger(__name__)
+
 CHOWN = "/usr/bin/chown"
 CHMOD = "/usr/bin/chmod"
+# As per GNU chmod, a numeric mode leaves a directory's setuid/setgid bits be.
+SETID_BITS = stat.S_ISUID | stat.S_ISGID
+# Entries a walker thread processes between updates of the shared TreeStats.
+FLUSH_EVERY = 1000
 
 
 def chown(share, owner, group=None, recursive=False):
@@ -42,3 +57,194 @@ def chmod(share, perm_bits, recursive=False):
         cmd.append("-R")
     cmd.extend([perm_bits, share])
     return run_command(cmd)
+
+
+def owner_ids(owner, group=None):
+    """
+    Resolve an owner and optional group, by name or number as accepted by
+    chown, to a (uid, gid) pair. gid is -1 (unchanged) if group is None.
+    :raises KeyError: for unknown names.
+    """
+    try:
+        uid = pwd.getpwnam(owner).pw_uid
+    except KeyError:
+        if not str(owner).isdigit():
+            raise
+        uid = int(owner)
+    gid = -1
+    if group is not None:
+        try:
+            gid = grp.getgrnam(group).gr_gid
+        except KeyError:
+            if not str(group).isdigit():
+                raise
+            gid = int(group)
+    return uid, gid
+
+
+class TreeStats(object):
+    """
+    Thread safe counters of a tree walk: inodes visited, inodes changed and
+    errors (inodes that could not be read or changed).
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.visited = 0
+        self.changed = 0
+        self.errors = 0
+        self.start = time.time()
+
+    def add(self, visited, changed, errors):
+        with self.lock:
+            self.visited += visited
+            self.changed += changed
+            self.errors += errors
+
+    @property
+    def rate(self):
+        # Inodes visited per second.
+        elapsed = time.time() - self.start
+        if elapsed <= 0:
+            return 0.0
+        return self.visited / elapsed
+
+
+class _TreeWalker(object):
+    """
+    Single pass chown and chmod of a tree: one lstat per inode, which is also
+    used to skip inodes that already match. Symlinks are not followed, their
+    ownership is changed (as chown -R) but not their mode (as chmod -R).
+    """
+
+    def __init__(self, uid, gid, mode, stats):
+        # uid/gid of -1 and mode of None leave the respective attribute as is.
+        self.uid = uid
+        self.gid = gid
+        self.mode = mode
+        self.stats = stats
+
+    def apply(self, path, st):
+        """
+        :return: number of changes made to path (0 or 1).
+        """
+        changed = 0
+        if (self.uid != -1 and st.st_uid != self.uid) or (
+            self.gid != -1 and st.st_gid != self.gid
+        ):
+            os.lchown(path, self.uid, self.gid)
+            changed = 1
+            if st.st_mode & SETID_BITS and self.mode is not None:
+                # chown may have cleared setuid/setgid, compare afresh.
+                st = os.lstat(path)
+        if self.mode is not None and not stat.S_ISLNK(st.st_mode):
+            mode = self.mode
+            if stat.S_ISDIR(st.st_mode):
+                mode |= st.st_mode & SETID_BITS
+            if stat.S_IMODE(st.st_mode) != mode:
+                os.chmod(path, mode)
+                changed = 1
+        return changed
+
+    def walk(self, top, st):
+        """
+        Apply to top and, if a directory, all below it; depth first with an
+        explicit stack. Errors are logged and counted, not raised, as chown -R.
+        """
+        visited = changed = errors = 0
+        stack = [(top, st)]
+        while len(stack) > 0:
+            path, st = stack.pop()
+            visited += 1
+            try:
+                changed += self.apply(path, st)
+                if stat.S_ISDIR(st.st_mode):
+                    for name in os.listdir(path):
+                        child = os.path.join(path, name)
+                        try:
+                            stack.append((child, os.lstat(child)))
+                        except OSError as e:
+                            errors += 1
+                            logger.error("Failed to stat ({}): {}".format(child, e))
+            except OSError as e:
+                errors += 1
+                logger.error("Failed to set ACL on ({}): {}".format(path, e))
+            if visited >= FLUSH_EVERY:
+                self.stats.add(visited, changed, errors)
+                visited = changed = errors = 0
+        self.stats.add(visited, changed, errors)
+
+
+def set_tree_acl(
+    path,
+    uid=-1,
+    gid=-1,
+    mode=None,
+    owner_recursive=False,
+    perms_recursive=False,
+    workers=1,
+    progress=None,
+    interval=5,
+):
+    """
+    Set the ownership and/or permission bits of path, and optionally of
+    everything below it, in a single walk of the tree. An alternative to
+    chown -R followed by chmod -R which walks the tree twice and rewrites
+    every inode. The top level directories of path are walked concurrently
+    by up to the given number of threads.
+    :param path: directory, ie a share's mount point.
+    :param uid: owner uid, -1 to leave ownership unchanged.
+    :param gid: group gid, -1 to leave unchanged.
+    :param mode: permission bits ie 0o755, None to leave unchanged.
+    :param owner_recursive: also chown below path.
+    :param perms_recursive: also chmod below path.
+    :param workers: max concurrent top level directory walks.
+    :param progress: callable(TreeStats) invoked every interval seconds while
+    walking, and once on completion.
+    :param interval: seconds between progress calls.
+    :return: TreeStats
+    """
+    stats = TreeStats()
+    stats.add(1, _TreeWalker(uid, gid, mode, stats).apply(path, os.lstat(path)), 0)
+    if owner_recursive or perms_recursive:
+        walker = _TreeWalker(
+            uid if owner_recursive else -1,
+            gid if owner_recursive else -1,
+            mode if perms_recursive else None,
+            stats,
+        )
+        # Work items: each top level directory, and all other top level
+        # entries as one.
+        batches = [[]]
+        for name in os.listdir(path):
+            child = os.path.join(path, name)
+            try:
+                st = os.lstat(child)
+            except OSError as e:
+                stats.add(0, 0, 1)
+                logger.error("Failed to stat ({}): {}".format(child, e))
+                continue
+            if stat.S_ISDIR(st.st_mode):
+                batches.append([(child, st)])
+            else:
+                batches[0].append((child, st))
+
+        def walk_batch(batch):
+            for child, st in batch:
+                walker.walk(child, st)
+
+        pool = ThreadPool(max(1, min(workers, len(batches))))
+        try:
+            result = pool.map_async(walk_batch, batches, chunksize=1)
+            while not result.ready():
+                result.wait(interval)
+                if progress is not None and not result.ready():
+                    progress(stats)
+            # Re-raises any unexpected walker exception.
+            result.get()
+        finally:
+            pool.close()
+            pool.join()
+    if progress is not None:
+        progress(stats)
+    return stats
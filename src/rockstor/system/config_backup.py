@@ -16,21 +16,25 @@ You should have received a copy of the GNU General Public License
 along with this program. If not, see <http://www.gnu.org/licenses/>.
 """
 
+import gzip
 import logging
 import os
 from datetime import datetime
 
-from django.core.management import call_command
+from django.apps import apps
+from django.core import serializers
 
 from storageadmin.models import ConfigBackup
-from system.osi import run_command, md5sum
+from system.osi import md5sum
 
 logger = logging.getLogger(__name__)
 
-
-def backup_config():
-    models = {
-        "storageadmin": [
+# Models saved in a config backup, by database: one line (json list) each.
+BACKUP_MODELS = (
+    (
+        "default",
+        "storageadmin",
+        [
             "user",
             "group",
             "sambashare",
@@ -52,27 +56,41 @@ def backup_config():
             "dcontainerdevice",
             "share",
         ],
-        "smart_manager": ["service", "servicestatus", "taskdefinition"],
-    }
-    model_list = []
-    for a in models:
-        for m in models[a]:
-            model_list.append("{}.{}".format(a, m))
+    ),
+    ("smart_manager", "smart_manager", ["service", "servicestatus", "taskdefinition"]),
+)
+
 
-    filename = "backup-{}.json".format(datetime.now().strftime("%Y-%m-%d-%H%M%S"))
+def backup_objects(using, app_label, model_names):
+    """
+    Generator of all instances of the given models, in model then pk order,
+    as per "dumpdata". Instances are fetched via queryset.iterator() to avoid
+    caching whole tables in memory.
+    """
+    for name in model_names:
+        model = apps.get_model(app_label, name)
+        qs = model._default_manager.using(using).order_by(model._meta.pk.name)
+        for obj in qs.iterator():
+            yield obj
+
+
+def backup_config():
+    filename = "backup-{}.json.gz".format(datetime.now().strftime("%Y-%m-%d-%H%M%S"))
     cb_dir = ConfigBackup.cb_dir()
 
     if not os.path.isdir(cb_dir):
         os.mkdir(cb_dir)
     fp = os.path.join(cb_dir, filename)
-    with open(fp, "w") as dfo:
-        call_command("dumpdata", *model_list, stdout=dfo)
-        dfo.write("\n")
-        call_command("dumpdata", database="smart_manager", *model_list, stdout=dfo)
-    run_command(["/usr/bin/gzip", fp])
-    gz_name = "{}.gz".format(filename)
-    fp = os.path.join(cb_dir, gz_name)
+    # Serialize straight into the compressed file, rather than via "dumpdata"
+    # into an intermediary file that is then compressed by a gzip process.
+    with gzip.GzipFile(fp, "wb") as gfo:
+        for index, (using, app_label, model_names) in enumerate(BACKUP_MODELS):
+            if index > 0:
+                gfo.write("\n")
+            serializers.serialize(
+                "json", backup_objects(using, app_label, model_names), stream=gfo
+            )
     size = os.stat(fp).st_size
-    cbo = ConfigBackup(filename=gz_name, md5sum=md5sum(fp), size=size)
+    cbo = ConfigBackup(filename=filename, md5sum=md5sum(fp), size=size)
     cbo.save()
     return cbo
@@ -15,6 +15,7 @@ General Public License for more details.
 You should have received a copy of the GNU General Public License
 along with this program. If not, see <http://www.gnu.org/licenses/>.
 """
+import collections
 import os
 import re
 from tempfile import mkstemp
@@ -29,6 +30,10 @@ CRYPTSETUP = "/usr/sbin/cryptsetup"
 DMSETUP = "/usr/sbin/dmsetup"
 CRYPTTABFILE = "/etc/crypttab"
 DD = "/usr/bin/dd"
+SYS_BLOCK = "/sys/block"
+
+# Named Tuple for luks_inventory(): volumes (dict) unlocked (set) crypttab (dict)
+LuksInventory = collections.namedtuple("LuksInventory", "volumes unlocked crypttab")
 
 
 def get_open_luks_volume_status(mapped_device_name, byid_name_map):
@@ -253,6 +258,120 @@ def get_unlocked_luks_containers_uuids():
     return open_luks_container_uuids
 
 
+def _read_sysfs(path):
+    try:
+        with open(path) as fo:
+            return fo.read().strip()
+    except IOError:
+        return ""
+
+
+def _listdir(path):
+    try:
+        return os.listdir(path)
+    except OSError:
+        return []
+
+
+def get_crypt_tables():
+    """
+    Parses a single 'dmsetup table --target crypt' for the first crypt
+    segment of each mapped device, ie for the line:
+    luks-a47f4950-...: 0 4190192 crypt aes-xts-plain64 000..000 0 252:0 4096
+    :return: dictionary indexed by mapped device name of
+    {"cipher", "keysize", "offset", "size"} dicts, as per the equivalent
+    'cryptsetup status' fields, or {} on error.
+    """
+    tables = {}
+    out, err, rc = run_command([DMSETUP, "table", "--target", "crypt"], throw=False)
+    if rc != 0:
+        return tables
+    for line in out:
+        if ": " not in line:
+            continue
+        name, table = line.split(": ", 1)
+        fields = table.split()
+        if name in tables or len(fields) < 8 or fields[2] != "crypt":
+            continue
+        key = fields[4]
+        if key.startswith(":"):
+            # Kernel keyring reference, ie ":64:logon:cryptsetup:<id>".
+            keysize = int(key.split(":")[1]) * 8
+        else:
+            # Hex key (zeroed without --showkeys): 4 bits per character.
+            keysize = len(key) * 4
+        tables[name] = {
+            "cipher": fields[3],
+            "keysize": "{} bits".format(keysize),
+            "offset": "{} sectors".format(fields[7]),
+            "size": "{} sectors".format(fields[1]),
+        }
+    return tables
+
+
+def luks_inventory(byid_name_map):
+    """
+    Single pass inventory of open LUKS volumes and crypttab, for bulk callers
+    such as the disk refresh, in place of per device cryptsetup calls. Each
+    /sys/block/dm-* device is identified as a LUKS volume by its dm/uuid, ie:
+    CRYPT-LUKS1-a47f495032964504b9a42dc75681a6ad-luks-a47f4950-3296-...
+    which also gives its backing container's uuid; its slaves/ entry gives
+    the backing device. Cipher details come from one get_crypt_tables().
+    :param byid_name_map: as per get_byid_name_map(), for by-id device names.
+    :return: LuksInventory where volumes is a dictionary indexed by mapped
+    device name (ie luks-<uuid>) of get_open_luks_volume_status() type dicts,
+    with the addition of a "container_uuid" key; unlocked is the set of
+    volumes' container uuids as per get_unlocked_luks_containers_uuids(); and
+    crypttab is as per get_crypttab_entries().
+    """
+    volumes = {}
+    tables = None
+    dm_devs = [d for d in _listdir(SYS_BLOCK) if d.startswith("dm-")]
+    for dm_dev in sorted(dm_devs):
+        dm_path = os.path.join(SYS_BLOCK, dm_dev)
+        dm_uuid = _read_sysfs(os.path.join(dm_path, "dm", "uuid"))
+        uuid_fields = dm_uuid.split("-", 3)
+        if (
+            len(uuid_fields) < 3
+            or uuid_fields[0] != "CRYPT"
+            or not uuid_fields[1].startswith("LUKS")
+            or len(uuid_fields[2]) != 32
+        ):
+            continue
+        if tables is None:
+            tables = get_crypt_tables()
+        name = _read_sysfs(os.path.join(dm_path, "dm", "name"))
+        hex_uuid = uuid_fields[2]
+        status = {
+            "container_uuid": "-".join(
+                [
+                    hex_uuid[:8],
+                    hex_uuid[8:12],
+                    hex_uuid[12:16],
+                    hex_uuid[16:20],
+                    hex_uuid[20:],
+                ]
+            ),
+            "type": uuid_fields[1],
+        }
+        if len(_listdir(os.path.join(dm_path, "holders"))) > 0:
+            status["status"] = "active and is in use."
+        else:
+            status["status"] = "active."
+        slaves = _listdir(os.path.join(dm_path, "slaves"))
+        if len(slaves) > 0:
+            # use by-id device name from provided map as value for device key.
+            status["device"] = byid_name_map.get(slaves[0], slaves[0])
+        if _read_sysfs(os.path.join(dm_path, "ro")) == "1":
+            status["mode"] = "readonly"
+        else:
+            status["mode"] = "read/write"
+        status.update(tables.get(name, {}))
+        volumes[name] = status
+    unlocked = set(v["container_uuid"] for v in volumes.values())
+    return LuksInventory(volumes, unlocked, get_crypttab_entries())
+
+
 def get_crypttab_entries():
     """
     Scans /etc/crypttab and parses into mapper name (/dev/mapper/) and uuid
@@ -0,0 +1,117 @@
+"""
+Copyright (c) 2012-2023 RockStor, Inc. <http://rockstor.com>
+This file is part of RockStor.
+
+RockStor is free software; you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published
+by the Free Software Foundation; either version 2 of the License,
+or (at your option) any later version.
+
+RockStor is distributed in the hope that it will be useful, but
+WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program. If not, see <http://www.gnu.org/licenses/>.
+"""
+
+import threading
+import time
+from functools import wraps
+
+from django.conf import settings
+
+# Registry of memoized functions indexed by name, see invalidate().
+_memos = {}
+
+
+class Flight(object):
+    """
+    A single in progress execution of a memoized function for a given key,
+    shared by all callers arriving while it runs.
+    """
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.value = None
+        self.error = None
+
+
+class Memo(object):
+    def __init__(self, name, func):
+        self.name = name
+        self.func = func
+        self.lock = threading.Lock()
+        self.entries = {}  # key: (value, expiry time)
+        self.flights = {}  # key: Flight
+
+    def __call__(self, *args, **kwargs):
+        key = (args, tuple(sorted(kwargs.items())))
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is not None and time.time() < entry[1]:
+                return entry[0]
+            flight = self.flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = self.flights[key] = Flight()
+        if not leader:
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.value
+        try:
+            flight.value = self.func(*args, **kwargs)
+        except Exception as e:
+            flight.error = e
+            raise
+        finally:
+            with self.lock:
+                # An invalidate() while we ran drops our flight: our result may
+                # predate it, so let only the callers that joined us have it.
+                if self.flights.get(key) is flight:
+                    del self.flights[key]
+                    if flight.error is None:
+                        ttl = settings.MEMOIZE.get(self.name, 0)
+                        self.entries[key] = (flight.value, time.time() + ttl)
+            flight.done.set()
+        return flight.value
+
+    def invalidate(self):
+        with self.lock:
+            self.entries.clear()
+            self.flights.clear()
+
+
+def memoize(name):
+    """
+    Decorator for read only system queries asked by many code paths within
+    moments of each other. Results are reused for settings.MEMOIZE[name]
+    seconds (per distinct arguments), and concurrent callers share a single
+    execution (single-flight). Operations changing what a query reports call
+    invalidate(name). N.B. results are shared: callers must not modify them.
+    :param name: cache name, as used by settings.MEMOIZE and invalidate().
+    """
+
+    def decorator(func):
+        memo = _memos[name] = Memo(name, func)
+
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            return memo(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
+
+
+def invalidate(*names):
+    """
+    Drop the cached results of the given memoized functions, or of all of
+    them if no names are given, so that their next call executes afresh.
+    """
+    for name in names or _memos.keys():
+        memo = _memos.get(name)
+        if memo is not None:
+            memo.invalidate()
@@ -19,6 +19,11 @@ along with this program. If not, see <http://www.gnu.org/licenses/>.
 import json
 import logging
 import re
+import socket
+import struct
+
+import dbus
+from dbus import DBusException
 
 from .exceptions import CommandException
 from .osi import run_command, to_boolean
@@ -26,6 +31,69 @@ from .docker import dnets, docker_status, dnet_inspect
 
 NMCLI = "/usr/bin/nmcli"
 DEFAULT_MTU = 1500
+NM_BUS_NAME = "org.freedesktop.NetworkManager"
+NM_DEVICE_IFACE = "org.freedesktop.NetworkManager.Device"
+NM_GENERIC_IFACE = "org.freedesktop.NetworkManager.Device.Generic"
+NM_ACTIVE_IFACE = "org.freedesktop.NetworkManager.Connection.Active"
+NM_IP4CONFIG_IFACE = "org.freedesktop.NetworkManager.IP4Config"
+NM_SETTINGS_CON_IFACE = "org.freedesktop.NetworkManager.Settings.Connection"
+# nmcli names for NMDeviceType values, see NetworkManager's D-Bus API docs.
+NM_DEVICE_TYPES = {
+    0: "unknown",
+    1: "ethernet",
+    2: "wifi",
+    5: "bt",
+    6: "olpc-mesh",
+    7: "wimax",
+    8: "gsm",
+    9: "infiniband",
+    10: "bond",
+    11: "vlan",
+    12: "adsl",
+    13: "bridge",
+    14: "generic",
+    15: "team",
+    16: "tun",
+    17: "ip-tunnel",
+    18: "macvlan",
+    19: "vxlan",
+    20: "veth",
+    21: "macsec",
+    22: "dummy",
+    23: "ppp",
+    24: "ovs-interface",
+    25: "ovs-port",
+    26: "ovs-bridge",
+    27: "wpan",
+    28: "6lowpan",
+    29: "wireguard",
+    30: "wifi-p2p",
+    31: "vrf",
+    32: "loopback",
+}
+# nmcli descriptions of NMDeviceState values, as in "100 (connected)".
+NM_DEVICE_STATES = {
+    0: "unknown",
+    10: "unmanaged",
+    20: "unavailable",
+    30: "disconnected",
+    40: "connecting (prepare)",
+    50: "connecting (configuring)",
+    60: "connecting (need authentication)",
+    70: "connecting (getting IP configuration)",
+    80: "connecting (checking IP connectivity)",
+    90: "connecting (starting secondary connections)",
+    100: "connected",
+    110: "deactivating",
+    120: "connection failed",
+}
+# nmcli names of NMActiveConnectionState values.
+NM_ACTIVE_STATES = {
+    1: "activating",
+    2: "activated",
+    3: "deactivating",
+    4: "deactivated",
+}
 logger = logging.getLogger(__name__)
 
 
@@ -101,6 +169,107 @@ def get_con_list():
     return o
 
 
+def flatten(l):
+    s = ",".join(l)
+    if len(s) == 0:
+        return None
+    return s
+
+
+def parse_aux_addresses(dtmap):
+    """
+    Parses auxilliary addresses of a docker network and
+    returns a flat list.
+    :param dtmap:
+    :return:
+    """
+    aux = dtmap["IPAM"]["Config"][0]["AuxiliaryAddresses"]
+    aux_list = []
+    for k, v in aux.items():
+        aux_list.append("{}={}".format(k, v))
+    return flatten(aux_list)
+
+
+def docker_bridge_config(cid):
+    """
+    Docker network details of a bridge connection, for when docker is running.
+    :param cid: connection name (id), ie docker0 or br-<docker network id>.
+    :return: dict of the docker specific bridge connection fields.
+    """
+    bmap = {}
+    # Get docker_name
+    # if (cid[0].startswith('br-')):  # custom-type docker network
+    if cid.startswith("br-"):  # custom-type docker network
+        docker_name = dname = dnets(cid[3:])[0]
+    else:  # default docker0 bridge network
+        docker_name = cid
+        dname = "bridge"
+    # Fill custom information, if any.
+    dtmap = dnet_inspect(dname)
+    bmap["docker_name"] = docker_name
+    if dtmap["IPAM"]["Config"][0].get("AuxiliaryAddresses"):
+        bmap["aux_address"] = parse_aux_addresses(dtmap)
+    # In some case, DNET inspect does NOT return Gateway in Docker version 18.09.5, build e8ff056
+    # This is likely related to the following bug in which the 'Gateway' is not reported the first
+    # time the docker daemon is started. Upon reload of docker daemon, it IS correctly reported.
+    # https://github.com/moby/moby/issues/26799
+    if dtmap["IPAM"]["Config"][0].get("Gateway"):
+        bmap["dgateway"] = dtmap["IPAM"]["Config"][0]["Gateway"]
+    if dtmap["Options"].get("com.docker.network.bridge.host_binding_ipv4"):
+        bmap["host_binding"] = dtmap["Options"][
+            "com.docker.network.bridge.host_binding_ipv4"
+        ]
+    if dtmap["Options"].get("com.docker.network.bridge.enable_icc"):
+        bmap["icc"] = to_boolean(
+            dtmap["Options"]["com.docker.network.bridge.enable_icc"]
+        )
+    bmap["internal"] = dtmap["Internal"]
+    if dtmap["Options"].get("com.docker.network.bridge.ip_masquerade"):
+        bmap["ip_masquerade"] = to_boolean(
+            dtmap["Options"]["com.docker.network.bridge.ip_masquerade"]
+        )
+        # if used com.docker.network.bridge.default_bridge may also
+        # requires to_boolean()
+    if dtmap["IPAM"]["Config"][0].get("IPRange"):
+        bmap["ip_range"] = dtmap["IPAM"]["Config"][0]["IPRange"]
+    bmap["subnet"] = dtmap["IPAM"]["Config"][0]["Subnet"]
+    return bmap
+
+
+def ctype_config(ctype, cid):
+    """
+    Initial (defaults) type specific config of a connection, as filled in by
+    get_con_config() and nm_con_config().
+    :param ctype: connection type, ie 802-3-ethernet, team, bond, bridge.
+    :param cid: connection name (id).
+    :return: dict
+    """
+    if ctype == "802-3-ethernet":
+        return {
+            "mac": None,
+            "cloned_mac": None,
+            "mtu": None,
+        }
+    if ctype in ("team", "bond"):
+        return {"config": None}
+    if ctype == "bridge":
+        bmap = {
+            "docker_name": None,
+            "aux_address": None,
+            "dgateway": None,
+            "host_binding": None,
+            "icc": False,
+            "internal": False,
+            "ip_masquerade": False,
+            "ip_range": None,
+            "subnet": None,
+        }
+        if docker_status():
+            bmap.update(docker_bridge_config(cid))
+        return bmap
+    return {}
+
+
 def get_con_config(con_list):
     """
     Takes a list of connections and returns a dictionary with
@@ -109,26 +278,6 @@ def get_con_config(con_list):
     :return: dictionary
     """
     cmap = {}
-
-    def flatten(l):
-        s = ",".join(l)
-        if len(s) == 0:
-            return None
-        return s
-
-    def parse_aux_addresses(dtmap):
-        """
-        Parses auxilliary addresses of a docker network and
-        returns a flat list.
-        :param dtmap:
-        :return:
-        """
-        aux = dtmap["IPAM"]["Config"][0]["AuxiliaryAddresses"]
-        aux_list = []
-        for k, v in aux.items():
-            aux_list.append("{}={}".format(k, v))
-        return flatten(aux_list)
-
     for uuid in con_list:
         if len(uuid.strip()) == 0:
             continue
@@ -181,81 +330,7 @@ def get_con_config(con_list):
                 tmap["ipv4_dns_search"] = val(l)
             elif re.match("connection.type:", l) is not None:
                 tmap["ctype"] = val(l)
-                if tmap["ctype"] == "802-3-ethernet":
-                    tmap[tmap["ctype"]] = {
-                        "mac": None,
-                        "cloned_mac": None,
-                        "mtu": None,
-                    }
-                elif tmap["ctype"] in ("team", "bond"):
-                    tmap[tmap["ctype"]] = {"config": None}
-                elif tmap["ctype"] == "bridge":
-                    cid = tmap["name"]
-                    tmap[tmap["ctype"]] = {
-                        "docker_name": None,
-                        "aux_address": None,
-                        "dgateway": None,
-                        "host_binding": None,
-                        "icc": False,
-                        "internal": False,
-                        "ip_masquerade": False,
-                        "ip_range": None,
-                        "subnet": None,
-                    }
-                    # Get docker_name
-                    if docker_status():
-                        # if (cid[0].startswith('br-')):  # custom-type docker network
-                        if cid.startswith("br-"):  # custom-type docker network
-                            docker_name = dname = dnets(cid[3:])[0]
-                        else:  # default docker0 bridge network
-                            docker_name = cid
-                            dname = "bridge"
-                        # Fill custom information, if any.
-                        dtmap = dnet_inspect(dname)
-                        tmap[tmap["ctype"]]["docker_name"] = docker_name
-                        if dtmap["IPAM"]["Config"][0].get("AuxiliaryAddresses"):
-                            tmap[tmap["ctype"]]["aux_address"] = parse_aux_addresses(
-                                dtmap
-                            )
-                        # In some case, DNET inspect does NOT return Gateway in Docker version 18.09.5, build e8ff056
-                        # This is likely related to the following bug in which the 'Gateway' is not reported the first
-                        # time the docker daemon is started. Upon reload of docker daemon, it IS correctly reported.
-                        # https://github.com/moby/moby/issues/26799
-                        if dtmap["IPAM"]["Config"][0].get("Gateway"):
-                            tmap[tmap["ctype"]]["dgateway"] = dtmap["IPAM"]["Config"][
-                                0
-                            ]["Gateway"]
-                        if dtmap["Options"].get(
-                            "com.docker.network.bridge.host_binding_ipv4"
-                        ):
-                            tmap[tmap["ctype"]]["host_binding"] = dtmap["Options"][
-                                "com.docker.network.bridge.host_binding_ipv4"
-                            ]
-                        if dtmap["Options"].get("com.docker.network.bridge.enable_icc"):
-                            tmap[tmap["ctype"]]["icc"] = to_boolean(
-                                dtmap["Options"]["com.docker.network.bridge.enable_icc"]
-                            )
-                        tmap[tmap["ctype"]]["internal"] = dtmap["Internal"]
-                        if dtmap["Options"].get(
-                            "com.docker.network.bridge.ip_masquerade"
-                        ):
-                            tmap[tmap["ctype"]]["ip_masquerade"] = to_boolean(
-                                dtmap["Options"][
-                                    "com.docker.network.bridge.ip_masquerade"
-                                ]
-                            )
-                            # if used com.docker.network.bridge.default_bridge may also
-                            # requires to_boolean()
-                        if dtmap["IPAM"]["Config"][0].get("IPRange"):
-                            tmap[tmap["ctype"]]["ip_range"] = dtmap["IPAM"]["Config"][
-                                0
-                            ]["IPRange"]
-                        tmap[tmap["ctype"]]["subnet"] = dtmap["IPAM"]["Config"][0][
-                            "Subnet"
-                        ]
-                else:
-                    tmap[tmap["ctype"]] = {}
-
+                tmap[tmap["ctype"]] = ctype_config(tmap["ctype"], tmap["name"])
             elif re.match("connection.master:", l) is not None:
                 # for team, bond and bridge type connections.
                 master = val(l)
@@ -291,6 +366,187 @@ def get_con_config(con_list):
     return cmap
 
 
+def nm_managed_objects():
+    """
+    Fetch all NetworkManager D-Bus objects, ie devices, active connections
+    and their ip configs, with all of their properties in a single
+    ObjectManager.GetManagedObjects call.
+    :return: (bus, dict of {interface: {property: value}} indexed by path).
+    """
+    bus = dbus.SystemBus()
+    nm_obj = bus.get_object(NM_BUS_NAME, "/org/freedesktop")
+    om = dbus.Interface(nm_obj, "org.freedesktop.DBus.ObjectManager")
+    return bus, om.GetManagedObjects()
+
+
+def nm_mac(v):
+    """
+    Format a D-Bus mac address, either a string (device properties) or byte
+    array (connection settings), as per nmcli. Empty becomes None.
+    """
+    if v is None or len(v) == 0:
+        return None
+    if isinstance(v, (str, dbus.String)):
+        return str(v)
+    return ":".join("{:02X}".format(int(b)) for b in v)
+
+
+def nm_ip4(n):
+    """
+    Format an ipv4 address given as a uint32 in network byte order.
+    """
+    return socket.inet_ntoa(struct.pack("=I", int(n)))
+
+
+def nm_dev_config(objects):
+    """
+    D-Bus equivalent of get_dev_config(get_dev_list()).
+    :param objects: as returned by nm_managed_objects()
+    :return: dictionary
+    """
+    dmap = {}
+    for path, ifaces in objects.items():
+        dev = ifaces.get(NM_DEVICE_IFACE)
+        if dev is None:
+            continue
+        dtype = NM_DEVICE_TYPES.get(int(dev["DeviceType"]), "unknown")
+        if dtype == "generic" and NM_GENERIC_IFACE in ifaces:
+            dtype = str(ifaces[NM_GENERIC_IFACE]["TypeDescription"])
+        # Older NetworkManager only has HwAddress on the type specific
+        # interface, ie Device.Wired.
+        mac = dev.get("HwAddress")
+        if mac is None:
+            for props in ifaces.values():
+                if "HwAddress" in props:
+                    mac = props["HwAddress"]
+                    break
+        state = int(dev["State"])
+        tmap = {
+            "dtype": dtype,
+            "mac": nm_mac(mac),
+            "mtu": str(int(dev["Mtu"])),
+            "state": "{} ({})".format(state, NM_DEVICE_STATES.get(state, "unknown")),
+        }
+        active = objects.get(dev["ActiveConnection"], {}).get(NM_ACTIVE_IFACE)
+        if active is not None:
+            tmap["connection"] = str(active["Id"])
+        dmap[str(dev["Interface"])] = tmap
+    return dmap
+
+
+def nm_con_config(bus, objects):
+    """
+    D-Bus equivalent of get_con_config(get_con_list()). Runtime state comes
+    from the active connection and ip4 config objects already fetched, leaving
+    one GetSettings call per connection.
+    :param bus: dbus.SystemBus as returned by nm_managed_objects()
+    :param objects: as returned by nm_managed_objects()
+    :return: dictionary
+    """
+    actives = {}
+    for ifaces in objects.values():
+        if NM_ACTIVE_IFACE in ifaces:
+            active = ifaces[NM_ACTIVE_IFACE]
+            actives[str(active["Uuid"])] = active
+    cmap = {}
+    for path, ifaces in objects.items():
+        if NM_SETTINGS_CON_IFACE not in ifaces:
+            continue
+        con_obj = bus.get_object(NM_BUS_NAME, path)
+        settings = dbus.Interface(con_obj, NM_SETTINGS_CON_IFACE).GetSettings()
+        connection = settings["connection"]
+        ipv4 = settings.get("ipv4", {})
+        uuid = str(connection["uuid"])
+        tmap = {
+            "name": str(connection["id"]),
+            "state": None,
+            "ipv4_method": None,
+            "ipv4_addresses": [],
+            "ipv4_gw": None,
+            "ipv4_dns": [nm_ip4(n) for n in ipv4.get("dns", [])],
+            "ipv4_dns_search": flatten([str(d) for d in ipv4.get("dns-search", [])]),
+            "ipv6_method": None,
+            "ipv6_addresses": None,
+            "ipv6_gw": None,
+            "ipv6_dns": None,
+            "ipv6_dns_search": None,
+        }
+        if "method" in ipv4:
+            tmap["ipv4_method"] = str(ipv4["method"])
+        active = actives.get(uuid)
+        if active is not None:
+            tmap["state"] = NM_ACTIVE_STATES.get(int(active["State"]))
+            ip4 = objects.get(active["Ip4Config"], {}).get(NM_IP4CONFIG_IFACE)
+            if ip4 is not None:
+                for a in ip4.get("AddressData", []):
+                    tmap["ipv4_addresses"].append(
+                        "{}/{}".format(a["address"], int(a["prefix"]))
+                    )
+                if len(ip4.get("Gateway", "")) > 0:
+                    tmap["ipv4_gw"] = str(ip4["Gateway"])
+                if "NameserverData" in ip4:
+                    nameservers = [str(d["address"]) for d in ip4["NameserverData"]]
+                else:
+                    nameservers = [nm_ip4(n) for n in ip4.get("Nameservers", [])]
+                for ip in nameservers:
+                    if ip not in tmap["ipv4_dns"]:
+                        tmap["ipv4_dns"].append(ip)
+        ctype = str(connection["type"])
+        tmap["ctype"] = ctype
+        tmap[ctype] = ctype_config(ctype, tmap["name"])
+        if len(connection.get("master", "")) > 0:
+            tmap["master"] = str(connection["master"])
+        if ctype == "802-3-ethernet":
+            eth = settings.get(ctype, {})
+            tmap[ctype]["mac"] = nm_mac(eth.get("mac-address"))
+            tmap[ctype]["cloned_mac"] = nm_mac(
+                eth.get("assigned-mac-address", eth.get("cloned-mac-address"))
+            )
+            mtu = int(eth.get("mtu", 0))
+            tmap[ctype]["mtu"] = "auto" if mtu == 0 else str(mtu)
+        elif ctype == "team" and len(settings["team"].get("config", "")) > 0:
+            tmap[ctype]["config"] = str(settings["team"]["config"])
+        elif ctype == "bond":
+            options = settings["bond"].get("options", {})
+            # As per get_con_config(), we only care about mode for now.
+            if "mode" in options:
+                tmap[ctype]["config"] = json.dumps({"mode": str(options["mode"])})
+        tmap["ipv4_addresses"] = flatten(tmap["ipv4_addresses"])
+        tmap["ipv4_dns"] = flatten(tmap["ipv4_dns"])
+        cmap[uuid] = tmap
+    return cmap
+
+
+def get_dev_map():
+    """
+    Config of all devices as seen by Network Manager, see get_dev_config().
+    Fetched in a single D-Bus call, falling back to nmcli (a process per
+    device) if NetworkManager's D-Bus interface is unavailable.
+    :return: dictionary
+    """
+    try:
+        bus, objects = nm_managed_objects()
+        return nm_dev_config(objects)
+    except (DBusException, KeyError) as e:
+        logger.debug("Falling back to nmcli for device config: {}".format(e))
+    return get_dev_config(get_dev_list())
+
+
+def get_con_map():
+    """
+    Config of all connections as seen by Network Manager, see
+    get_con_config(). Fetched via D-Bus, falling back to nmcli (a process
+    per connection) if NetworkManager's D-Bus interface is unavailable.
+    :return: dictionary
+    """
+    try:
+        bus, objects = nm_managed_objects()
+        return nm_con_config(bus, objects)
+    except (DBusException, KeyError) as e:
+        logger.debug("Falling back to nmcli for connection config: {}".format(e))
+    return get_con_config(get_con_list())
+
+
 def valid_connection(uuid):
     o, e, rc = run_command([NMCLI, "c", "show", uuid], throw=False)
     if rc != 0:
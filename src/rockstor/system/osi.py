@@ -17,25 +17,32 @@ along with this program. If not, see <http://www.gnu.org/licenses/>.
 """
 
 import collections
+import errno
 import hashlib
 import logging
+import math
 import os
 import re
+import select
 import shutil
 import signal
 import stat
 import subprocess  # TODO: consider drop in replacement of subprocess32 module
+import sys
+import threading
 import time
 import uuid
 from socket import inet_ntoa
 from struct import pack
 from tempfile import mkstemp
 from distutils.util import strtobool
+from multiprocessing.pool import ThreadPool
 
 from django.conf import settings
 
 from exceptions import CommandException, NonBTRFSRootException
 from system.constants import SYSTEMCTL, MKDIR, RMDIR, MOUNT, UMOUNT, DEFAULT_MNT_DIR
+from system.memoize import memoize, invalidate
 
 logger = logging.getLogger(__name__)
 
@@ -44,6 +51,9 @@ CHATTR = "/usr/bin/chattr"
 DD = "/usr/bin/dd"
 DNSDOMAIN = "/usr/bin/dnsdomainname"
 EXPORTFS = "/usr/sbin/exportfs"
+NFS_ETAB = "/var/lib/nfs/etab"
+NFS_EXPORTS = "/etc/exports"
+MOUNTINFO = "/proc/self/mountinfo"
 GRUBBY = "/usr/sbin/grubby"
 HDPARM = "/usr/sbin/hdparm"
 HDPARM_SERVICE_NAME = "rockstor-hdparm.service"
@@ -206,6 +216,183 @@ def replace_pattern_inline(source_file, target_file, pattern, replacement):
     return altered
 
 
+# Environment of all commands run, see command_env().
+_command_env = None
+
+# Per process run_command() statistics indexed by binary name, see
+# command_stats().
+_command_stats = {}
+_command_stats_lock = threading.Lock()
+
+
+class CommandStat(object):
+    def __init__(self):
+        self.calls = 0
+        self.errors = 0
+        self.timeouts = 0
+        self.total_time = 0.0
+        # most recent durations, for percentiles.
+        self.durations = collections.deque(maxlen=settings.RUN_COMMAND["samples"])
+
+    def record(self, duration, rc, timed_out):
+        self.calls += 1
+        self.total_time += duration
+        self.durations.append(duration)
+        if rc != 0:
+            self.errors += 1
+        if timed_out:
+            self.timeouts += 1
+
+    def percentile(self, pct):
+        durations = sorted(self.durations)
+        if len(durations) == 0:
+            return None
+        # nearest rank
+        return durations[max(0, int(math.ceil(len(durations) * pct / 100.0)) - 1)]
+
+
+def command_env():
+    """
+    Environment for all commands, built once per process rather than copied
+    per call. We force en_US to avoid issues on date and number formats on
+    not Anglo-Saxon systems (ex. it, es, fr, de, etc).
+    """
+    global _command_env
+    if _command_env is None:
+        env = dict(os.environ)
+        env["LANG"] = "en_US.UTF-8"
+        _command_env = env
+    return _command_env
+
+
+def _command_binary(cmd):
+    return os.path.basename(str(cmd[0]).split()[0]) if len(cmd) > 0 else ""
+
+
+def command_timeout(cmd, timeout=None):
+    """
+    Seconds after which cmd is to be killed: the given timeout if not None,
+    otherwise the default for its binary in settings.RUN_COMMAND['timeouts'].
+    :return: seconds, or None for no limit (ie timeout=0 or no default).
+    """
+    if timeout is None:
+        timeout = settings.RUN_COMMAND["timeouts"].get(_command_binary(cmd))
+    return timeout or None
+
+
+def record_command(cmd, duration, rc, timed_out=False):
+    binary = _command_binary(cmd)
+    with _command_stats_lock:
+        stat = _command_stats.get(binary)
+        if stat is None:
+            stat = _command_stats[binary] = CommandStat()
+        stat.record(duration, rc, timed_out)
+
+
+def command_stats(reset=False):
+    """
+    Per binary statistics of the commands run by this process.
+    :param reset: clear the statistics once read.
+    :return: dict indexed by binary name of dicts with calls, errors,
+    timeouts, total_time, mean_time and p95_time, times in seconds.
+    """
+    stats = {}
+    with _command_stats_lock:
+        for binary, stat in _command_stats.items():
+            stats[binary] = {
+                "calls": stat.calls,
+                "errors": stat.errors,
+                "timeouts": stat.timeouts,
+                "total_time": round(stat.total_time, 3),
+                "mean_time": round(stat.total_time / stat.calls, 3),
+                "p95_time": round(stat.percentile(95), 3),
+            }
+        if reset:
+            _command_stats.clear()
+    return stats
+
+
+def _kill_group(p):
+    # p is its own process group leader, see run_command().
+    try:
+        os.killpg(p.pid, signal.SIGKILL)
+    except OSError:
+        pass  # already exited.
+
+
+def _communicate(p, input, timeout, timed_out):
+    """
+    As per p.communicate(input) but, once timeout seconds have passed, kill
+    p's process group, flagging it by appending to the timed_out list, and
+    stop reading after settings.RUN_COMMAND['grace'] further seconds. A killed
+    process may linger, ie in uninterruptible sleep (D state), as may another
+    holding our pipes open: so neither their EOF nor p's exit is waited on
+    beyond that.
+    :return: (out, err, rc) with out and err strings, rc None if p lingers.
+    """
+    deadline = time.time() + timeout
+    give_up = None
+    data = {p.stdout: [], p.stderr: []}
+    readers = dict((f.fileno(), f) for f in (p.stdout, p.stderr) if f is not None)
+    writer = None
+    if p.stdin is not None:
+        if input:
+            writer = p.stdin.fileno()
+        else:
+            p.stdin.close()
+    # POLLIN and POLLOUT only, as per gevent's poll().
+    poller = select.poll()
+    for fd in readers:
+        poller.register(fd, select.POLLIN)
+    if writer is not None:
+        poller.register(writer, select.POLLOUT)
+    offset = 0
+    while len(readers) > 0 or writer is not None:
+        now = time.time()
+        if give_up is None and now >= deadline:
+            timed_out.append(True)
+            _kill_group(p)
+            give_up = now + settings.RUN_COMMAND["grace"]
+        if give_up is not None and now >= give_up:
+            break
+        wait = (deadline if give_up is None else give_up) - now
+        for fd, event in poller.poll(max(0, wait) * 1000):
+            if fd == writer:
+                try:
+                    offset += os.write(fd, input[offset : offset + select.PIPE_BUF])
+                except OSError as e:
+                    if e.errno != errno.EPIPE:
+                        raise
+                    offset = len(input)
+                if offset >= len(input):
+                    poller.unregister(fd)
+                    p.stdin.close()
+                    writer = None
+                continue
+            chunk = os.read(fd, 65536)
+            if chunk:
+                data[readers[fd]].append(chunk)
+            else:
+                poller.unregister(fd)
+                readers.pop(fd).close()
+    for f in (p.stdin, p.stdout, p.stderr):
+        if f is not None:
+            f.close()
+    # Wait for p's exit: with the remaining time, and grace if killed here.
+    delay = 0.0005
+    while p.poll() is None:
+        now = time.time()
+        if give_up is None and now >= deadline:
+            timed_out.append(True)
+            _kill_group(p)
+            give_up = now + settings.RUN_COMMAND["grace"]
+        if give_up is not None and now >= give_up:
+            break
+        delay = min(delay * 2, 0.05)
+        time.sleep(delay)
+    return "".join(data[p.stdout]), "".join(data[p.stderr]), p.returncode
+
+
 def run_command(
     cmd,
     shell=False,
@@ -215,26 +402,55 @@ def run_command(
     throw=True,
     log=False,
     input=None,
+    timeout=None,
 ):
+    """
+    Run cmd and return its (out, err, rc), out and err as lists of lines.
+    :param timeout: seconds after which cmd is killed, see command_timeout().
+    A killed command, along with any process it started, returns rc -9 with a
+    note to that effect appended to err.
+    """
+    timeout = command_timeout(cmd, timeout)
+    timed_out = []
+    start = time.time()
     try:
-        # We force run_command to always use en_US
-        # to avoid issues on date and number formats
-        # on not Anglo-Saxon systems (ex. it, es, fr, de, etc)
-        fake_env = dict(os.environ)
-        fake_env["LANG"] = "en_US.UTF-8"
         cmd = map(str, cmd)
         if log:
             logger.debug("Running command: {}".format(" ".join(cmd)))
+        # close_fds=False, as per the Python 2 default: otherwise the child
+        # makes a close() call for every possible fd number before exec.
+        # A command we may kill gets its own process group, so that those it
+        # starts, ie via shell=True, are killed along with it.
         p = subprocess.Popen(
-            cmd, shell=shell, stdout=stdout, stderr=stderr, stdin=stdin, env=fake_env
+            cmd,
+            shell=shell,
+            stdout=stdout,
+            stderr=stderr,
+            stdin=stdin,
+            env=command_env(),
+            close_fds=False,
+            preexec_fn=os.setsid if timeout is not None else None,
         )
-        out, err = p.communicate(input=input)
+        if timeout is None:
+            out, err = p.communicate(input=input)
+            rc = p.returncode
+        else:
+            out, err, rc = _communicate(p, input, timeout, timed_out)
+            if rc is None:
+                logger.error(
+                    "Command ({}) still running after being killed.".format(cmd)
+                )
+                rc = -signal.SIGKILL
         out = out.split("\n")
         err = err.split("\n")
-        rc = p.returncode
     except Exception as e:
+        record_command(cmd, time.time() - start, -1)
         raise Exception("Exception while running command({}): {}".format(cmd, e))
+    record_command(cmd, time.time() - start, rc, len(timed_out) > 0)
 
+    if len(timed_out) > 0:
+        err.append("Command timed out after {} seconds.".format(timeout))
+        logger.error("Command ({}) timed out after {} seconds.".format(cmd, timeout))
     if rc != 0:
         if log:
             e_msg = (
@@ -702,6 +918,153 @@ def bind_mount(mnt_pt, export_pt):
     return True
 
 
+def nfs_export_table(exports):
+    """
+    Flattens refresh_nfs_exports() input into the export table it describes.
+    :param exports: dict as per refresh_nfs_exports().
+    :return: dict of option_list strings indexed by (export_point, client).
+    """
+    table = {}
+    for e, clients in exports.items():
+        for c in clients:
+            table[(e, c["client_str"])] = c["option_list"]
+            if "admin_host" in c:
+                table[(e, c["admin_host"])] = "rw,no_root_squash"
+    return table
+
+
+def nfs_etab(etab=NFS_ETAB):
+    """
+    Parses the kernel export table as maintained by exportfs, ie lines of:
+    "/export/share1\t*(ro,async,wdelay,hide,...,insecure,root_squash,...)"
+    N.B. etab options are fully expanded, defaults included.
+    :param etab: path of the etab file.
+    :return: dict of option sets indexed by (export_point, client), empty if
+    etab does not exist ie nfs-server has yet to run.
+    """
+    table = {}
+    if not os.path.isfile(etab):
+        return table
+    with open(etab) as efo:
+        for line in efo.readlines():
+            fields = line.strip().split()
+            if len(fields) != 2 or "(" not in fields[1]:
+                continue
+            client, options = fields[1].split("(", 1)
+            table[(fields[0], client)] = set(options.rstrip(")").split(","))
+    return table
+
+
+# Mutually exclusive NFS export options as (kernel default, alternative): etab
+# lists one of each, the default if it was not requested.
+NFS_OPTION_FAMILIES = (
+    ("ro", "rw"),
+    ("sync", "async"),
+    ("root_squash", "no_root_squash"),
+    ("no_all_squash", "all_squash"),
+    ("secure", "insecure"),
+    ("hide", "nohide"),
+    ("wdelay", "no_wdelay"),
+    ("no_subtree_check", "subtree_check"),
+    ("nocrossmnt", "crossmnt"),
+    ("secure_locks", "insecure_locks"),
+)
+# Kernel defaults of "key=value" NFS export options, as listed in etab.
+NFS_OPTION_VALUES = {"anonuid": "65534", "anongid": "65534", "sec": "sys"}
+
+
+def nfs_options(options):
+    """
+    Normalises NFS export options: each family of NFS_OPTION_FAMILIES is
+    indexed by its default and set to the requested member, or the default,
+    and "key=value" options are indexed by key, with NFS_OPTION_VALUES as
+    defaults. Any other option is indexed by itself with a value of True.
+    :param options: list of options, the last of a family prevails.
+    :return: dict of option values.
+    """
+    normal = dict((default, default) for default, alt in NFS_OPTION_FAMILIES)
+    normal.update(NFS_OPTION_VALUES)
+    family = {}
+    for default, alt in NFS_OPTION_FAMILIES:
+        family[default] = family[alt] = default
+    for o in options:
+        if o in family:
+            normal[family[o]] = o
+        elif "=" in o:
+            key, value = o.split("=", 1)
+            normal[key] = value
+        elif o != "":
+            normal[o] = True
+    return normal
+
+
+def nfs_exports_diff(desired, live):
+    """
+    Compares a desired export table (see nfs_export_table()) with the live one
+    (see nfs_etab()). An entry is unchanged if its normalised options, see
+    nfs_options(), all match those live, and no "key=value" option is live
+    that was not requested. Other live options are not compared as etab may
+    list some not requested, ie "acl" or "no_pnfs".
+    :return: (add, remove) where add is a dict of lists of "client:path"
+    strings indexed by option_list, and remove a list of "client:path" strings.
+    """
+    add = {}
+    for (e, client), option_list in sorted(desired.items()):
+        live_options = live.get((e, client))
+        if live_options is not None:
+            want = nfs_options(option_list.split(","))
+            have = nfs_options(live_options)
+            if all(have.get(k) == v for k, v in want.items()) and all(
+                k in want for k, v in have.items() if v is not True
+            ):
+                continue
+        add.setdefault(option_list, []).append("{}:{}".format(client, e))
+    remove = [
+        "{}:{}".format(client, e)
+        for e, client in sorted(live)
+        if (e, client) not in desired
+    ]
+    return add, remove
+
+
+def nfs_export_line(e, clients):
+    """
+    Formats one /etc/exports line for export point e.
+    :param clients: list of client dicts as per refresh_nfs_exports().
+    """
+    client_str = ""
+    admin_host = None
+    for c in clients:
+        client_str = "{}{}({}) ".format(client_str, c["client_str"], c["option_list"])
+        if "admin_host" in c:
+            admin_host = c["admin_host"]
+    if admin_host is not None:
+        client_str = "{} {}(rw,no_root_squash)".format(client_str, admin_host)
+    return "{} {}\n".format(e, client_str)
+
+
+def apply_nfs_exports(exports, live):
+    """
+    Brings the live export table in line with exports: one "exportfs -u" for
+    all removed entries, tear down of export points with no clients left, and
+    one "exportfs -i -o" per distinct option list for added/changed entries.
+    :param exports: dict as per refresh_nfs_exports().
+    :param live: etab table (see nfs_etab()) restricted to the export points
+    under consideration.
+    """
+    add, remove = nfs_exports_diff(nfs_export_table(exports), live)
+    if len(remove) > 0:
+        run_command([EXPORTFS, "-u"] + remove)
+    # do share tear down last, only snaps (export_pt/snap) first.
+    teardown = [e for e in exports if len(exports[e]) == 0]
+    teardown.sort(key=lambda e: len(e.split("/")) != 4)
+    for e in teardown:
+        nfs4_mount_teardown(e)
+    for option_list in sorted(add.keys()):
+        run_command([EXPORTFS, "-i", "-o", option_list] + add[option_list])
+    return True
+
+
 def refresh_nfs_exports(exports):
     """
     input format:
@@ -712,55 +1075,56 @@ def refresh_nfs_exports(exports):
                        ...}
 
     if 'clients' is an empty list, then unmount and cleanup.
+
+    /etc/exports is rewritten in full, for persistence, but the live export
+    table is reconciled incrementally against /var/lib/nfs/etab: only removed
+    and added/changed entries are passed to exportfs, batched as one
+    "exportfs -u" and one "exportfs -i -o" per distinct option list. This
+    avoids a fork per client and the client disruption of "exportfs -ra".
     """
     fo, npath = mkstemp()
     with open(npath, "w") as efo:
-        shares = []
         for e in exports.keys():
             if len(exports[e]) == 0:
-                #  do share tear down at the end, only snaps here
-                if len(e.split("/")) == 4:
-                    nfs4_mount_teardown(e)
-                else:
-                    shares.append(e)
                 continue
 
             if not is_mounted(e):
                 bind_mount(exports[e][0]["mnt_pt"], e)
-            client_str = ""
-            admin_host = None
-            for c in exports[e]:
-                run_command(
-                    [
-                        EXPORTFS,
-                        "-i",
-                        "-o",
-                        c["option_list"],
-                        "{}:{}".format(c["client_str"], e),
-                    ]
-                )
-                client_str = "{}{}({}) ".format(
-                    client_str, c["client_str"], c["option_list"]
-                )
-                if "admin_host" in c:
-                    admin_host = c["admin_host"]
-            if admin_host is not None:
-                run_command(
-                    [
-                        EXPORTFS,
-                        "-i",
-                        "-o",
-                        "rw,no_root_squash",
-                        "{}:{}".format(admin_host, e),
-                    ]
-                )
-                client_str = "{} {}(rw,no_root_squash)".format(client_str, admin_host)
-            export_str = "{} {}\n".format(e, client_str)
-            efo.write(export_str)
-        for s in shares:
-            nfs4_mount_teardown(s)
-    shutil.move(npath, "/etc/exports")
-    return run_command([EXPORTFS, "-ra"])
+            efo.write(nfs_export_line(e, exports[e]))
+    shutil.move(npath, NFS_EXPORTS)
+    return apply_nfs_exports(exports, nfs_etab())
+
+
+def update_nfs_exports(exports):
+    """
+    Targeted variant of refresh_nfs_exports() for when only a few export
+    points change, ie snapshot visibility toggles. Input is as per
+    refresh_nfs_exports() but holds only the export points to add, change or
+    (with an empty client list) remove. All other /etc/exports lines are kept
+    verbatim, and neither their mounts nor their live etab entries are looked
+    at, so cost scales with the size of the change, not with the number of
+    exports.
+    """
+    lines = []
+    if os.path.isfile(NFS_EXPORTS):
+        with open(NFS_EXPORTS) as efo:
+            for line in efo.readlines():
+                fields = line.split()
+                if len(fields) > 0 and fields[0] in exports:
+                    continue
+                lines.append(line)
+    for e in sorted(exports.keys()):
+        if len(exports[e]) == 0:
+            continue
+        if not is_mounted(e):
+            bind_mount(exports[e][0]["mnt_pt"], e)
+        lines.append(nfs_export_line(e, exports[e]))
+    fo, npath = mkstemp()
+    with open(npath, "w") as efo:
+        efo.writelines(lines)
+    shutil.move(npath, NFS_EXPORTS)
+    live = dict((k, v) for k, v in nfs_etab().items() if k[0] in exports)
+    return apply_nfs_exports(exports, live)
 
 
 def config_network_device(
@@ -946,65 +1310,168 @@ def is_mounted(mnt_pt):
     return mount_status(mnt_pt, RETURN_BOOLEAN)
 
 
+def native_poll():
+    """
+    select.poll(), or the original if gevent monkey patched select: with only
+    gevent's poll() we can't watch for POLLPRI. Polls are with no timeout, so
+    do not block the gevent hub.
+    """
+    monkey = sys.modules.get("gevent.monkey")
+    if monkey is not None and monkey.is_module_patched("select"):
+        return monkey.get_original("select", "poll")()
+    return select.poll()
+
+
+class MountTable(object):
+    """
+    Index of the mount table, as parsed from /proc/self/mountinfo, by mount
+    point and by source device. It is only re-parsed once the kernel flags a
+    change: an open mountinfo file polls POLLPRI (and POLLERR) after any mount
+    or umount in our mount namespace, whoever made it. Lookups are otherwise
+    dict accesses, irrespective of the number of (bind) mounts.
+    Special mount devices (sysfs, proc, etc) are not indexed.
+    N.B. under gevent (data_collector) the native poll is used: gevent's
+    only watches for POLLIN/POLLOUT, so would never flag a change.
+    """
+
+    def __init__(self, path=MOUNTINFO):
+        self.path = path
+        self.lock = threading.Lock()
+        self.pid = None
+        self.fo = None
+        self.poller = None
+        self.by_mnt_pt = None
+        self.by_source = None
+
+    def _watch(self):
+        # A forked child shares our file description and so its poll state:
+        # each process watches via its own.
+        if self.fo is not None:
+            self.fo.close()
+        self.fo = open(self.path)
+        self.poller = native_poll()
+        self.poller.register(self.fo, select.POLLPRI | select.POLLERR)
+        self.pid = os.getpid()
+
+    def _changed(self):
+        if self.pid != os.getpid():
+            self._watch()
+            return True
+        return len(self.poller.poll(0)) > 0
+
+    def _parse(self):
+        """
+        mountinfo lines are of the form:
+        36 35 98:0 /mnt1 /mnt2 rw,noatime master:1 - ext3 /dev/root rw,errors=continue
+        ie: id, parent id, major:minor, root, mount point, mount options,
+        optional fields, "-", fs type, source, super options.
+        Mount options are combined as per /proc/mounts: mount point options
+        followed by super options bar their leading "rw" or "ro". A read only
+        super block, ie a btrfs pool forced read only on error, makes for a
+        read only mount whatever its own "rw" option.
+        """
+        by_mnt_pt = {}
+        by_source = {}
+        with open(self.path) as mfo:
+            for each_line in mfo.read().splitlines():
+                line_fields = each_line.split()
+                if "-" not in line_fields[6:]:
+                    continue
+                sep = line_fields.index("-", 6)
+                if len(line_fields) < sep + 3:
+                    continue
+                mnt_pt = line_fields[4]
+                source = line_fields[sep + 2]
+                if source in EXCLUDED_MOUNT_DEVS:
+                    continue
+                mnt_options = line_fields[5]
+                if len(line_fields) > sep + 3:
+                    super_options = line_fields[sep + 3].split(",")
+                    if super_options[0] == "ro" and mnt_options.startswith("rw"):
+                        mnt_options = "ro{}".format(mnt_options[2:])
+                    if super_options[0] in ("rw", "ro"):
+                        super_options = super_options[1:]
+                    if len(super_options) > 0:
+                        mnt_options = "{},{}".format(
+                            mnt_options, ",".join(super_options)
+                        )
+                by_mnt_pt.setdefault(mnt_pt, mnt_options)
+                by_source.setdefault(source, mnt_pt)
+        self.by_mnt_pt = by_mnt_pt
+        self.by_source = by_source
+
+    def refresh(self, force=False):
+        """
+        Re-parse mountinfo if it has changed since last parsed, or if forced.
+        """
+        with self.lock:
+            # Consume any change event before parsing: a change made while we
+            # parse is then flagged for our next call.
+            if self._changed() or force or self.by_mnt_pt is None:
+                self._parse()
+        return self
+
+    def options(self, mnt_pt):
+        """
+        :return: mount options of mnt_pt, or None if not a mount point.
+        """
+        return self.refresh().by_mnt_pt.get(mnt_pt)
+
+    def mount_point(self, source):
+        """
+        :return: first mount point of source device, or None if not mounted.
+        """
+        return self.refresh().by_source.get(source)
+
+    def mount_points(self):
+        return set(self.refresh().by_mnt_pt)
+
+
+_mount_table = MountTable()
+
+
 def mount_status(mnt_pt, return_boolean=False):
     """
-    Parses /proc/mounts to extract the status of a given mount point.
-    Line fields are as follows:
-    dev_name mount_point fstype mount_options dummy_value dummy_value
-    In either mode this function typically takes around 0.05ms without GC.
+    Establishes the status of a given mount point from the mount table.
     It should be kept light as it is called frequently by Pool and Share
-    models via their mount_status and is_mounted properties.
+    models via their mount_status and is_mounted properties: hence our
+    MountTable index.
     :param mnt_pt: pool (volume) or subvolume mount point (with full path).
     :param return_boolean: If set to 'True' only a boolean is returned,
     otherwise a string of current mount options, or 'unmounted', is returned.
     :return: if return_boolean then True or False depending on mount state.
     If return_boolean=False (default) then a string is returned of the current
-    mount options, or 'unmounted' if no relevant /proc/mounts entry was found.
-    """
-    with open("/proc/mounts") as pfo:
-        # See in-developemnt test_mount_status() re the following line:
-        # for each_line in pfo.read().splitlines():
-        for each_line in pfo.readlines():
-            line_fields = each_line.split()
-            if len(line_fields) < 4:
-                # Avoid index issues as we expect >= 4 columns.
-                continue
-            if line_fields[0] in EXCLUDED_MOUNT_DEVS:
-                # Skip excluded/special mount devices ie sysfs, proc, etc.
-                continue
-            if line_fields[1] == mnt_pt:
-                # We have an active mount, return according to personality.
-                if return_boolean:
-                    return True
-                return line_fields[3]
+    mount options, or 'unmounted' if no relevant mount table entry was found.
+    """
+    mnt_options = _mount_table.options(mnt_pt)
     if return_boolean:
-        return False
-    return "unmounted"
+        return mnt_options is not None
+    if mnt_options is None:
+        return "unmounted"
+    return mnt_options
+
+
+def mount_points():
+    """
+    Returns the set of all current mount points, excluding special mount
+    devices as per mount_status(). Intended for bulk callers, ie bootstrap.
+    :return: set of mount points (with full path).
+    """
+    return _mount_table.mount_points()
 
 
 def dev_mount_point(dev_temp_name):
     """
-    Parses /proc/mounts to return the first associated mount point for a given
-    device temp name (ie /dev/sda).
+    Returns the first associated mount point for a given device temp name
+    (ie /dev/sda), as per the mount table.
     Note this is trivially different from mount_status() but intended initially
     for use by set_pool_label.
     :param dev_temp_name: /dev/sda3 or /dev/bcache0, or /dev/mapper/luks-...
     :return: None if note device match found or first associated mount point.
     """
-    with open("/proc/mounts") as pfo:
-        for each_line in pfo.readlines():
-            line_fields = each_line.split()
-            if len(line_fields) < 4:
-                # Avoid index issues as we expect >= 4 columns.
-                continue
-            if line_fields[0] in EXCLUDED_MOUNT_DEVS:
-                # Skip excluded/special mount devices ie sysfs, proc, etc.
-                continue
-            if line_fields[0] == dev_temp_name:
-                logger.debug("dev_mount_point returning {}".format(line_fields[1]))
-                return line_fields[1]
-    logger.debug("dev_mount_point() returning None")
-    return None
+    mount_point = _mount_table.mount_point(dev_temp_name)
+    logger.debug("dev_mount_point returning {}".format(mount_point))
+    return mount_point
 
 
 def remount(mnt_pt, mnt_options):
@@ -1021,7 +1488,10 @@ def wipe_disk(disk_byid):
     locally generated wipefs command.
     """
     disk_byid_withpath = get_device_path(disk_byid)
-    return run_command([WIPEFS, "-a", disk_byid_withpath])
+    out = run_command([WIPEFS, "-a", disk_byid_withpath])
+    # Partition by-id links go with the partition table.
+    invalidate("byid_name_map")
+    return out
 
 
 def blink_disk(disk_byid, total_exec, read, sleep):
@@ -1615,6 +2085,24 @@ def is_rotational(device_name, test=None):
     return rotational
 
 
+def disk_runtime_suspended(dev_byid):
+    """
+    Reports whether the kernel's runtime power management has suspended the
+    given disk, ie /sys/block/<sda>/device/power/runtime_status = suspended.
+    Reading sysfs never touches the drive itself.
+    :param dev_byid: disk name as stored in db / Disk model ie without path
+    :return: True if runtime suspended, False otherwise or if not reported.
+    """
+    status_file = "/sys/block/{}/device/power/runtime_status".format(
+        get_dev_temp_name(dev_byid)
+    )
+    try:
+        with open(status_file) as sfo:
+            return sfo.read().strip() == "suspended"
+    except IOError:
+        return False
+
+
 def get_disk_power_status(dev_byid):
     """
     When given a disk name such as that stored in the db ie /dev/disk/by-id
@@ -1634,6 +2122,9 @@ def get_disk_power_status(dev_byid):
     and if we encounter an error line in the output we return unknown.
     """
     # TODO: candidate for move to system/hdparm
+    if disk_runtime_suspended(dev_byid):
+        # Any ioctl, hdparm -C included, would first resume (spin up) the drive.
+        return "standby"
     # if we use the -C -q switches then we have only one line of output:
     # hdparm -C -q /dev/sda
     # drive state is:  active/idle
@@ -1873,6 +2364,32 @@ def get_dev_byid_name(device_name, remove_path=False):
     return return_name, is_byid
 
 
+def get_dev_byid_names(device_names, remove_path=False):
+    """
+    get_dev_byid_name() for several devices at once. As each is a udevadm
+    query, these are run concurrently by up to settings.DISK_PROBE['workers']
+    threads.
+    :param device_names: iterable of device names as per get_dev_byid_name().
+    :param remove_path: as per get_dev_byid_name().
+    :return: dict of get_dev_byid_name() (return_name, is_byid) tuples indexed
+    by device name.
+    """
+    device_names = list(set(device_names))
+    if len(device_names) < 2:
+        results = [get_dev_byid_name(dev, remove_path) for dev in device_names]
+    else:
+        pool = ThreadPool(min(settings.DISK_PROBE["workers"], len(device_names)))
+        try:
+            results = pool.map(
+                lambda dev: get_dev_byid_name(dev, remove_path), device_names
+            )
+        finally:
+            pool.close()
+            pool.join()
+    return dict(zip(device_names, results))
+
+
+@memoize("byid_name_map")
 def get_byid_name_map():
     """Simple wrapper around 'ls -lr /dev/disk/by-id' which returns a current
     mapping of all attached by-id device names to their sdX counterparts. When
@@ -1927,6 +2444,7 @@ def get_byid_name_map():
     return byid_name_map
 
 
+@memoize("device_mapper_map")
 def get_device_mapper_map():
     """
     Simple wrapper around 'ls -lr /dev/mapper' akin to get_byid_name_map() but
@@ -22,6 +22,7 @@ import shutil
 from tempfile import mkstemp
 
 from django.conf import settings
+from django.db.models import prefetch_related_objects
 
 from osi import run_command
 from services import service_status, define_avahi_service
@@ -31,6 +32,7 @@ TESTPARM = "/usr/bin/testparm"
 SMB_CONFIG = "/etc/samba/smb.conf"
 TM_CONFIG = "/etc/avahi/services/timemachine.service"
 SYSTEMCTL = "/usr/bin/systemctl"
+SMBCONTROL = "/usr/bin/smbcontrol"
 CHMOD = "/usr/bin/chmod"
 RS_SHARES_HEADER = "####BEGIN: Rockstor SAMBA CONFIG####"
 RS_SHARES_FOOTER = "####END: Rockstor SAMBA CONFIG####"
@@ -48,65 +50,90 @@ def test_parm(config="/etc/samba/smb.conf"):
     return True
 
 
-def rockstor_smb_config(fo, exports):
+def rockstor_smb_section(exports):
+    """
+    Renders the Rockstor shares section for the given SambaShare objects.
+    Related objects are prefetched so the number of queries is independent of
+    the number of exports.
+    :return: section text, header and footer lines included.
+    """
+    exports = list(exports)
+    prefetch_related_objects(
+        exports, "share", "admin_users", "sambacustomconfig_set"
+    )
     mnt_helper = os.path.join(settings.ROOT_DIR, ".venv/bin/mnt-share")
-    fo.write("{}\n".format(RS_SHARES_HEADER))
+    lines = ["{}\n".format(RS_SHARES_HEADER)]
     for e in exports:
         admin_users = ""
         for au in e.admin_users.all():
             admin_users = "{}{} ".format(admin_users, au.username)
-        fo.write("[{}]\n".format(e.share.name))
-        fo.write('    root preexec = "{} {}"\n'.format(mnt_helper, e.share.name))
-        fo.write("    root preexec close = yes\n")
-        fo.write("    comment = {}\n".format(e.comment.encode("utf-8")))
-        fo.write("    path = {}\n".format(e.path))
-        fo.write("    browseable = {}\n".format(e.browsable))
-        fo.write("    read only = {}\n".format(e.read_only))
-        fo.write("    guest ok = {}\n".format(e.guest_ok))
+        lines.append("[{}]\n".format(e.share.name))
+        lines.append('    root preexec = "{} {}"\n'.format(mnt_helper, e.share.name))
+        lines.append("    root preexec close = yes\n")
+        lines.append("    comment = {}\n".format(e.comment.encode("utf-8")))
+        lines.append("    path = {}\n".format(e.path))
+        lines.append("    browseable = {}\n".format(e.browsable))
+        lines.append("    read only = {}\n".format(e.read_only))
+        lines.append("    guest ok = {}\n".format(e.guest_ok))
         if len(admin_users) > 0:
-            fo.write("    admin users = {}\n".format(admin_users))
+            lines.append("    admin users = {}\n".format(admin_users))
         if e.shadow_copy:
-            fo.write(
+            lines.append(
                 "    shadow:format = ." + e.snapshot_prefix + "_%Y%m%d%H%M\n"
             )  # noqa E501
-            fo.write("    shadow:basedir = {}\n".format(e.path))
-            fo.write("    shadow:snapdir = ./\n")
-            fo.write("    shadow:sort = desc\n")
-            fo.write("    shadow:localtime = yes\n")
-            fo.write("    vfs objects = shadow_copy2\n")
-            fo.write("    veto files = /.{}*/\n".format(e.snapshot_prefix))
+            lines.append("    shadow:basedir = {}\n".format(e.path))
+            lines.append("    shadow:snapdir = ./\n")
+            lines.append("    shadow:sort = desc\n")
+            lines.append("    shadow:localtime = yes\n")
+            lines.append("    vfs objects = shadow_copy2\n")
+            lines.append("    veto files = /.{}*/\n".format(e.snapshot_prefix))
         elif e.time_machine:
-            fo.write("    vfs objects = catia fruit streams_xattr\n")
-            fo.write("    fruit:timemachine = yes\n")
-            fo.write("    fruit:metadata = stream\n")
-            fo.write("    fruit:veto_appledouble = no\n")
-            fo.write("    fruit:posix_rename = no\n")
-            fo.write("    fruit:wipe_intentionally_left_blank_rfork = yes\n")
-            fo.write("    fruit:delete_empty_adfiles = yes\n")
-            fo.write("    fruit:encoding = private\n")
-            fo.write("    fruit:locking = none\n")
-            fo.write("    fruit:resource = file\n")
-        for cco in SambaCustomConfig.objects.filter(smb_share=e):
+            lines.append("    vfs objects = catia fruit streams_xattr\n")
+            lines.append("    fruit:timemachine = yes\n")
+            lines.append("    fruit:metadata = stream\n")
+            lines.append("    fruit:veto_appledouble = no\n")
+            lines.append("    fruit:posix_rename = no\n")
+            lines.append("    fruit:wipe_intentionally_left_blank_rfork = yes\n")
+            lines.append("    fruit:delete_empty_adfiles = yes\n")
+            lines.append("    fruit:encoding = private\n")
+            lines.append("    fruit:locking = none\n")
+            lines.append("    fruit:resource = file\n")
+        for cco in e.sambacustomconfig_set.all():
             if cco.custom_config.strip():
-                fo.write("    {}\n".format(cco.custom_config))
-    fo.write("{}\n".format(RS_SHARES_FOOTER))
+                lines.append("    {}\n".format(cco.custom_config))
+    lines.append("{}\n".format(RS_SHARES_FOOTER))
+    return "".join(lines)
 
 
 def refresh_smb_config(exports):
+    """
+    Regenerate the Rockstor shares section of smb.conf. The file is left
+    untouched when the rendered section matches the existing one.
+    :param exports: list of SambaShare objects.
+    :return: True if smb.conf was rewritten, False if already up to date.
+    """
+    section = rockstor_smb_section(exports)
+    with open(SMB_CONFIG) as sfo:
+        lines = sfo.readlines()
+    head = []
+    cur_section = None
+    for line in lines:
+        if cur_section is None and re.match(RS_SHARES_HEADER, line) is not None:
+            cur_section = []
+        if cur_section is None:
+            head.append(line)
+            continue
+        cur_section.append(line)
+        if re.match(RS_SHARES_FOOTER, line) is not None:
+            break
+    if cur_section is not None and "".join(cur_section) == section:
+        return False
     fh, npath = mkstemp()
-    with open(SMB_CONFIG) as sfo, open(npath, "w") as tfo:
-        rockstor_section = False
-        for line in sfo.readlines():
-            if re.match(RS_SHARES_HEADER, line) is not None:
-                rockstor_section = True
-                rockstor_smb_config(tfo, exports)
-                break
-            else:
-                tfo.write(line)
-        if rockstor_section is False:
-            rockstor_smb_config(tfo, exports)
+    with open(npath, "w") as tfo:
+        tfo.write("".join(head) + section)
     test_parm(npath)
     shutil.move(npath, SMB_CONFIG)
+    return True
 
 
 # write out new [global] section and re-write the existing rockstor section.
@@ -216,6 +243,15 @@ def get_global_config():
     return config
 
 
+def reload_samba_config():
+    """
+    Have running smbd/nmbd re-read smb.conf. Unlike restart_samba(hard=True)
+    this preserves established client sessions, so is preferred after share
+    changes.
+    """
+    return run_command([SMBCONTROL, "all", "reload-config"], log=True)
+
+
 def restart_samba(hard=False):
     """
     call whenever config is updated
@@ -0,0 +1,92 @@
+"""
+Copyright (c) 2012-2023 RockStor, Inc. <http://rockstor.com>
+This file is part of RockStor.
+
+RockStor is free software; you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published
+by the Free Software Foundation; either version 2 of the License,
+or (at your option) any later version.
+
+RockStor is distributed in the hope that it will be useful, but
+WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program. If not, see <http://www.gnu.org/licenses/>.
+"""
+
+import os
+import shutil
+import stat
+import tempfile
+import unittest
+
+from system.acl import set_tree_acl
+
+
+class ACLTests(unittest.TestCase):
+    """
+    The tests in this suite can be run via the following command:
+    cd <root dir of rockstor ie /opt/rockstor>
+    ./bin/test --settings=test-settings -v 3 -p test_acl*
+    """
+
+    def setUp(self):
+        self.top = tempfile.mkdtemp()
+        self.uid = os.getuid()
+        self.gid = os.getgid()
+        for d in ("a/b", "c"):
+            os.makedirs(os.path.join(self.top, d))
+        for f in ("file", "a/file", "a/b/file", "c/file"):
+            open(os.path.join(self.top, f), "w").close()
+        os.symlink("file", os.path.join(self.top, "c/link"))
+        os.chmod(os.path.join(self.top, "c"), 0o2700)
+
+    def tearDown(self):
+        shutil.rmtree(self.top)
+
+    def mode(self, path):
+        return stat.S_IMODE(os.lstat(os.path.join(self.top, path)).st_mode)
+
+    def test_set_tree_acl(self):
+        progress = []
+        stats = set_tree_acl(
+            self.top,
+            uid=self.uid,
+            gid=self.gid,
+            mode=0o750,
+            owner_recursive=True,
+            perms_recursive=True,
+            workers=2,
+            progress=progress.append,
+        )
+        # top, a, a/b, c, 4 files and the symlink: each visited once.
+        self.assertEqual(stats.visited, 9)
+        self.assertEqual(stats.errors, 0)
+        self.assertEqual(progress[-1].visited, 9)
+        self.assertEqual(self.mode("a/b/file"), 0o750)
+        self.assertEqual(self.mode("a/b"), 0o750)
+        # setgid is kept on directories, symlinks are not chmod-ed.
+        self.assertEqual(self.mode("c"), 0o2750)
+        self.assertEqual(self.mode("c/file"), 0o750)
+        self.assertEqual(os.lstat(os.path.join(self.top, "c/link")).st_uid, self.uid)
+
+        # Inodes that already match are not changed again.
+        stats = set_tree_acl(
+            self.top,
+            uid=self.uid,
+            gid=self.gid,
+            mode=0o750,
+            owner_recursive=True,
+            perms_recursive=True,
+        )
+        self.assertEqual(stats.visited, 9)
+        self.assertEqual(stats.changed, 0)
+
+    def test_set_tree_acl_not_recursive(self):
+        mode_a = self.mode("a")
+        stats = set_tree_acl(self.top, mode=0o700)
+        self.assertEqual(stats.visited, 1)
+        self.assertEqual(self.mode(""), 0o700)
+        self.assertEqual(self.mode("a"), mode_a)
@@ -0,0 +1,134 @@
+"""
+Copyright (c) 2012-2023 RockStor, Inc. <http://rockstor.com>
+This file is part of RockStor.
+
+RockStor is free software; you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published
+by the Free Software Foundation; either version 2 of the License,
+or (at your option) any later version.
+
+RockStor is distributed in the hope that it will be useful, but
+WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program. If not, see <http://www.gnu.org/licenses/>.
+"""
+
+import os
+import shutil
+import tempfile
+import unittest
+from mock import patch
+
+from system.luks import luks_inventory
+
+
+class LUKSTests(unittest.TestCase):
+    """
+    The tests in this suite can be run via the following command:
+    cd <root dir of rockstor ie /opt/rockstor>
+    ./bin/test --settings=test-settings -v 3 -p test_luks*
+    """
+
+    def setUp(self):
+        self.sys_block = tempfile.mkdtemp()
+        self.patch_sys_block = patch("system.luks.SYS_BLOCK", self.sys_block)
+        self.patch_sys_block.start()
+        self.patch_run_command = patch("system.luks.run_command")
+        self.mock_run_command = self.patch_run_command.start()
+        self.patch_crypttab = patch("system.luks.get_crypttab_entries")
+        self.mock_crypttab = self.patch_crypttab.start()
+
+    def tearDown(self):
+        patch.stopall()
+        shutil.rmtree(self.sys_block)
+
+    def make_dm(self, dev, uuid, name, slaves=(), holders=(), ro="0"):
+        dm_path = os.path.join(self.sys_block, dev)
+        for subdir in ("dm", "slaves", "holders"):
+            os.makedirs(os.path.join(dm_path, subdir))
+        for path, content in (("dm/uuid", uuid), ("dm/name", name), ("ro", ro)):
+            with open(os.path.join(dm_path, path), "w") as fo:
+                fo.write("{}\n".format(content))
+        for slave in slaves:
+            os.mkdir(os.path.join(dm_path, "slaves", slave))
+        for holder in holders:
+            os.mkdir(os.path.join(dm_path, "holders", holder))
+
+    def test_luks_inventory(self):
+        """
+        Test luks_inventory() identifies open LUKS volumes, their container
+        uuids and backing devices from sysfs, with cipher details from a single
+        dmsetup table call, ignoring non LUKS device mapper devices.
+        """
+        self.make_dm(
+            "dm-0",
+            "CRYPT-LUKS1-a47f495032964504b9a42dc75681a6ad-"
+            "luks-a47f4950-3296-4504-b9a4-2dc75681a6ad",
+            "luks-a47f4950-3296-4504-b9a4-2dc75681a6ad",
+            slaves=("bcache0",),
+            holders=("bcache16",),
+        )
+        self.make_dm(
+            "dm-1",
+            "CRYPT-LUKS2-3efb3830fee14a9ea5c6ea456bfc269e-"
+            "luks-3efb3830-fee1-4a9e-a5c6-ea456bfc269e",
+            "luks-3efb3830-fee1-4a9e-a5c6-ea456bfc269e",
+            slaves=("sdd",),
+            ro="1",
+        )
+        self.make_dm("dm-2", "LVM-abcdef", "vg-root", slaves=("sde",))
+        self.mock_run_command.return_value = (
+            [
+                "luks-a47f4950-3296-4504-b9a4-2dc75681a6ad: 0 4190192 crypt "
+                "aes-xts-plain64 " + "0" * 64 + " 0 252:0 4096",
+                "luks-3efb3830-fee1-4a9e-a5c6-ea456bfc269e: 0 4161536 crypt "
+                "aes-xts-plain64 :64:logon:cryptsetup:3efb3830-d0 0 8:48 32768",
+                "",
+            ],
+            [""],
+            0,
+        )
+        self.mock_crypttab.return_value = {
+            "a47f4950-3296-4504-b9a4-2dc75681a6ad": "none"
+        }
+        byid_name_map = {"sdd": "ata-QEMU_HARDDISK_QM00004"}
+        returned = luks_inventory(byid_name_map)
+        self.assertEqual(self.mock_run_command.call_count, 1)
+        self.assertEqual(
+            returned.volumes,
+            {
+                "luks-a47f4950-3296-4504-b9a4-2dc75681a6ad": {
+                    "container_uuid": "a47f4950-3296-4504-b9a4-2dc75681a6ad",
+                    "type": "LUKS1",
+                    "status": "active and is in use.",
+                    "device": "bcache0",
+                    "mode": "read/write",
+                    "cipher": "aes-xts-plain64",
+                    "keysize": "256 bits",
+                    "offset": "4096 sectors",
+                    "size": "4190192 sectors",
+                },
+                "luks-3efb3830-fee1-4a9e-a5c6-ea456bfc269e": {
+                    "container_uuid": "3efb3830-fee1-4a9e-a5c6-ea456bfc269e",
+                    "type": "LUKS2",
+                    "status": "active.",
+                    "device": "ata-QEMU_HARDDISK_QM00004",
+                    "mode": "readonly",
+                    "cipher": "aes-xts-plain64",
+                    "keysize": "512 bits",
+                    "offset": "32768 sectors",
+                    "size": "4161536 sectors",
+                },
+            },
+        )
+        self.assertEqual(
+            returned.unlocked,
+            {
+                "a47f4950-3296-4504-b9a4-2dc75681a6ad",
+                "3efb3830-fee1-4a9e-a5c6-ea456bfc269e",
+            },
+        )
+        self.assertEqual(returned.crypttab, self.mock_crypttab.return_value)
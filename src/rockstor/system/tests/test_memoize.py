@@ -0,0 +1,99 @@
+"""
+Copyright (c) 2012-2023 RockStor, Inc. <http://rockstor.com>
+This file is part of RockStor.
+
+RockStor is free software; you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published
+by the Free Software Foundation; either version 2 of the License,
+or (at your option) any later version.
+
+RockStor is distributed in the hope that it will be useful, but
+WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program. If not, see <http://www.gnu.org/licenses/>.
+"""
+
+import threading
+import time
+import unittest
+
+from django.conf import settings
+from mock import patch
+
+from system.memoize import memoize, invalidate
+
+
+class MemoizeTests(unittest.TestCase):
+    def setUp(self):
+        self.calls = []
+        self.release = threading.Event()
+        self.release.set()
+        patch.dict(settings.MEMOIZE, {"test_query": 60}).start()
+
+        @memoize("test_query")
+        def query(arg):
+            self.calls.append(arg)
+            self.release.wait()
+            if arg == "bad":
+                raise Exception("query failed")
+            return [arg]
+
+        self.query = query
+
+    def tearDown(self):
+        patch.stopall()
+
+    def test_ttl_and_invalidate(self):
+        self.assertEqual(self.query("a"), ["a"])
+        self.assertEqual(self.query("a"), ["a"])
+        self.assertEqual(self.query("b"), ["b"])
+        self.assertEqual(self.calls, ["a", "b"])
+        invalidate("test_query")
+        self.query("a")
+        self.assertEqual(self.calls, ["a", "b", "a"])
+        settings.MEMOIZE["test_query"] = 0
+        invalidate()
+        self.query("a")
+        self.query("a")
+        self.assertEqual(self.calls.count("a"), 4)
+
+    def test_errors_not_cached(self):
+        for i in range(2):
+            with self.assertRaises(Exception):
+                self.query("bad")
+        self.assertEqual(self.calls, ["bad", "bad"])
+
+    def run_concurrently(self, arg, count):
+        results = []
+        threads = [
+            threading.Thread(target=lambda: results.append(self.query(arg)))
+            for i in range(count)
+        ]
+        for t in threads:
+            t.start()
+        return threads, results
+
+    def test_single_flight(self):
+        self.release.clear()
+        threads, results = self.run_concurrently("a", 5)
+        # Let all callers arrive while the first is still executing.
+        time.sleep(0.2)
+        self.release.set()
+        for t in threads:
+            t.join()
+        self.assertEqual(self.calls, ["a"])
+        self.assertEqual(results, [["a"]] * 5)
+
+    def test_invalidate_during_flight(self):
+        self.release.clear()
+        threads, results = self.run_concurrently("a", 1)
+        time.sleep(0.1)
+        # A mutation during the query: its result is not to be cached.
+        invalidate("test_query")
+        self.release.set()
+        threads[0].join()
+        self.query("a")
+        self.assertEqual(self.calls, ["a", "a"])
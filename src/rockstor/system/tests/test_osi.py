@@ -13,10 +13,27 @@ You should have received a copy of the GNU General Public License
 along with this program. If not, see <http://www.gnu.org/licenses/>.
 """
 import operator
+import os
+import select
 import unittest
-from mock import patch
+from mock import Mock, patch, mock_open
+from tempfile import mkstemp
 
-from system.osi import get_dev_byid_name, Disk, scan_disks, get_byid_name_map
+from system.memoize import invalidate
+from system.osi import (
+    get_dev_byid_name,
+    get_dev_byid_names,
+    Disk,
+    scan_disks,
+    get_byid_name_map,
+    refresh_nfs_exports,
+    update_nfs_exports,
+    mount_points,
+    mount_status,
+    dev_mount_point,
+    MountTable,
+    get_disk_power_status,
+)
 
 
 class Pool(object):
@@ -32,6 +49,8 @@ class OSITests(unittest.TestCase):
     ./bin/test --settings=test-settings -v 3 -p test_osi*
     """
     def setUp(self):
+        # No memoized results from prior tests, or the system running us.
+        invalidate()
         self.patch_run_command = patch('system.osi.run_command')
         self.mock_run_command = self.patch_run_command.start()
 
@@ -442,6 +461,24 @@ class OSITests(unittest.TestCase):
                              'returned = ({}).\n '
                              'expected = ({}).'.format(returned, expected))
 
+    def test_get_dev_byid_names(self):
+        """
+        Test get_dev_byid_names() returns get_dev_byid_name() results indexed
+        by device name: with one udevadm query per distinct device.
+        """
+        def udevadm(cmd, throw=False):
+            dev = cmd[-1].split('/')[-1]
+            return ['DEVLINKS=/dev/disk/by-id/ata-QEMU_HARDDISK_{} '
+                    '/dev/disk/by-path/pci-0000:00:05.0-ata-1.0'.format(dev),
+                    ''], [''], 0
+        self.mock_run_command.side_effect = udevadm
+        dev_names = ['/dev/sd{}'.format(c) for c in 'abcdefgh'] + ['/dev/sda']
+        returned = get_dev_byid_names(dev_names, remove_path=True)
+        expected = {dev: ('ata-QEMU_HARDDISK_{}'.format(dev[5:]), True)
+                    for dev in dev_names}
+        self.assertEqual(returned, expected)
+        self.assertEqual(self.mock_run_command.call_count, 8)
+
     def test_scan_disks_luks_on_bcache(self):
         """
         Test scan_disks() across a variety of mocked lsblk output.
@@ -1791,6 +1828,7 @@ class OSITests(unittest.TestCase):
         })
         for o, e, r, expected in zip(out, err, rc, expected_result):
             self.mock_run_command.return_value = (o, e, r)
+            invalidate()
             returned = get_byid_name_map()
             self.maxDiff = None
             self.assertDictEqual(returned, expected)
@@ -1802,6 +1840,299 @@ class OSITests(unittest.TestCase):
         self.mock_os_path_isdir.return_value = False
         self.assertEqual(get_byid_name_map(), {}, msg="no by-id dir should return {}")
 
+    def test_refresh_nfs_exports(self):
+        """
+        Test refresh_nfs_exports() only passes changed entries to exportfs:
+        one unexport call for all removed entries and one export call per
+        distinct option list, against a mocked etab. Kernel defaults listed
+        in etab are not changes, but a removed or relaxed option is.
+        """
+        self.patch_nfs_etab = patch("system.osi.nfs_etab")
+        self.mock_nfs_etab = self.patch_nfs_etab.start()
+        self.patch_is_mounted = patch("system.osi.is_mounted")
+        self.mock_is_mounted = self.patch_is_mounted.start()
+        self.mock_is_mounted.return_value = True
+        self.patch_move = patch("system.osi.shutil.move")
+        self.mock_move = self.patch_move.start()
+        self.patch_teardown = patch("system.osi.nfs4_mount_teardown")
+        self.mock_teardown = self.patch_teardown.start()
+        # etab as after: /export/share1 *(ro,async,insecure), with admin host
+        # 10.0.0.2, /export/share3 *(rw,async,insecure),
+        # /export/share4 *(rw,no_root_squash) and
+        # /export/share5 *(ro,async,insecure,nohide).
+        self.mock_nfs_etab.return_value = {
+            ("/export/share1", "*"): {
+                "ro", "async", "wdelay", "hide", "insecure", "root_squash",
+                "no_subtree_check", "sec=sys", "anonuid=65534", "acl",
+            },
+            ("/export/share1", "10.0.0.2"): {
+                "rw", "sync", "wdelay", "hide", "secure", "no_root_squash"
+            },
+            ("/export/share3", "*"): {
+                "rw", "async", "wdelay", "hide", "insecure", "root_squash"
+            },
+            ("/export/share4", "*"): {
+                "rw", "sync", "wdelay", "hide", "secure", "no_root_squash"
+            },
+            ("/export/share5", "*"): {
+                "ro", "async", "wdelay", "nohide", "insecure", "root_squash"
+            },
+        }
+        exports = {
+            # unchanged
+            "/export/share1": [
+                {
+                    "client_str": "*",
+                    "option_list": "ro,async,insecure",
+                    "mnt_pt": "/mnt2/share1",
+                    "admin_host": "10.0.0.2",
+                },
+            ],
+            # new, with two clients sharing an option list
+            "/export/share2": [
+                {
+                    "client_str": "host1",
+                    "option_list": "ro,async,insecure",
+                    "mnt_pt": "/mnt2/share2",
+                },
+                {
+                    "client_str": "host2",
+                    "option_list": "ro,async,insecure",
+                    "mnt_pt": "/mnt2/share2",
+                },
+            ],
+            # removed
+            "/export/share3": [],
+            # option removed: no_root_squash
+            "/export/share4": [
+                {
+                    "client_str": "*",
+                    "option_list": "rw",
+                    "mnt_pt": "/mnt2/share4",
+                },
+            ],
+            # options relaxed: insecure and nohide dropped
+            "/export/share5": [
+                {
+                    "client_str": "*",
+                    "option_list": "ro,async",
+                    "mnt_pt": "/mnt2/share5",
+                },
+            ],
+        }
+        self.assertTrue(refresh_nfs_exports(exports))
+        self.mock_teardown.assert_called_once_with("/export/share3")
+        self.assertEqual(
+            [c[0][0] for c in self.mock_run_command.call_args_list],
+            [
+                ["/usr/sbin/exportfs", "-u", "*:/export/share3"],
+                ["/usr/sbin/exportfs", "-i", "-o", "ro,async", "*:/export/share5"],
+                [
+                    "/usr/sbin/exportfs",
+                    "-i",
+                    "-o",
+                    "ro,async,insecure",
+                    "host1:/export/share2",
+                    "host2:/export/share2",
+                ],
+                ["/usr/sbin/exportfs", "-i", "-o", "rw", "*:/export/share4"],
+            ],
+        )
+
+    def test_update_nfs_exports(self):
+        """
+        Test update_nfs_exports() rewrites only the given export points'
+        /etc/exports lines and leaves live entries of all others untouched.
+        """
+        self.patch_nfs_etab = patch("system.osi.nfs_etab")
+        self.mock_nfs_etab = self.patch_nfs_etab.start()
+        self.patch_is_mounted = patch("system.osi.is_mounted")
+        self.mock_is_mounted = self.patch_is_mounted.start()
+        self.mock_is_mounted.return_value = False
+        self.patch_bind_mount = patch("system.osi.bind_mount")
+        self.mock_bind_mount = self.patch_bind_mount.start()
+        self.patch_teardown = patch("system.osi.nfs4_mount_teardown")
+        self.mock_teardown = self.patch_teardown.start()
+        # shutil.move() checks whether its destination is a directory.
+        self.mock_os_path_isdir.return_value = False
+        fd, exports_file = mkstemp()
+        self.addCleanup(os.remove, exports_file)
+        with os.fdopen(fd, "w") as efo:
+            efo.write(
+                "/export/share1 *(rw,async,insecure) \n"
+                "/export/share1/.snap1 *(rw,async,insecure,nohide) \n"
+            )
+        self.patch_exports = patch("system.osi.NFS_EXPORTS", exports_file)
+        self.patch_exports.start()
+        # share1 is live with options we would otherwise consider changed.
+        self.mock_nfs_etab.return_value = {
+            ("/export/share1", "*"): {"ro"},
+            ("/export/share1/.snap1", "*"): {
+                "rw", "async", "insecure", "nohide"
+            },
+        }
+        exports = {
+            "/export/share1/.snap1": [],
+            "/export/share1/.snap2": [
+                {
+                    "client_str": "*",
+                    "option_list": "rw,async,insecure,nohide",
+                    "mnt_pt": "/mnt2/share1/.snap2",
+                },
+            ],
+        }
+        self.assertTrue(update_nfs_exports(exports))
+        with open(exports_file) as efo:
+            self.assertEqual(
+                efo.read(),
+                "/export/share1 *(rw,async,insecure) \n"
+                "/export/share1/.snap2 *(rw,async,insecure,nohide) \n",
+            )
+        self.mock_bind_mount.assert_called_once_with(
+            "/mnt2/share1/.snap2", "/export/share1/.snap2"
+        )
+        self.mock_teardown.assert_called_once_with("/export/share1/.snap1")
+        self.assertEqual(self.mock_run_command.call_count, 2)
+        self.assertEqual(
+            self.mock_run_command.call_args_list[0][0][0],
+            ["/usr/sbin/exportfs", "-u", "*:/export/share1/.snap1"],
+        )
+        self.assertEqual(
+            self.mock_run_command.call_args_list[1][0][0],
+            [
+                "/usr/sbin/exportfs",
+                "-i",
+                "-o",
+                "rw,async,insecure,nohide",
+                "*:/export/share1/.snap2",
+            ],
+        )
+
+    def test_get_disk_power_status_runtime_suspended(self):
+        """
+        Test get_disk_power_status() reports a runtime PM suspended disk as in
+        standby without running hdparm, which would resume it.
+        """
+        self.patch_temp_name = patch("system.osi.get_dev_temp_name")
+        self.mock_temp_name = self.patch_temp_name.start()
+        self.mock_temp_name.return_value = "sda"
+        mocked_open = mock_open(read_data="suspended\n")
+        with patch("system.osi.open", mocked_open, create=True):
+            self.assertEqual(get_disk_power_status("virtio-1"), "standby")
+        mocked_open.assert_called_once_with(
+            "/sys/block/sda/device/power/runtime_status"
+        )
+        self.mock_run_command.assert_not_called()
+        self.mock_run_command.return_value = (
+            [" drive state is:  active/idle"],
+            [""],
+            0,
+        )
+        mocked_open = mock_open(read_data="active\n")
+        with patch("system.osi.open", mocked_open, create=True):
+            self.assertEqual(get_disk_power_status("virtio-1"), "active/idle")
+        self.mock_run_command.assert_called_once_with(
+            ["/usr/sbin/hdparm", "-C", "-q", "/dev/disk/by-id/virtio-1"], throw=False
+        )
+
+    def test_mount_table(self):
+        """
+        Test MountTable's /proc/self/mountinfo index, and its use by
+        mount_points(), mount_status() and dev_mount_point(): special mount
+        devices and short lines are skipped, options combined as per
+        /proc/mounts, and the file only re-read on a change event.
+        """
+        mountinfo = (
+            "22 1 0:21 / /sys rw,nosuid,nodev,noexec,relatime - sysfs sysfs rw\n"
+            "23 1 0:4 / /proc rw,nosuid,nodev,noexec,relatime - proc proc rw\n"
+            "59 1 0:32 /@ / rw,relatime shared:1 - btrfs /dev/sda3 "
+            "rw,space_cache,subvolid=259,subvol=/@\n"
+            "90 59 0:45 / /mnt2/rock-pool rw,relatime shared:40 - btrfs /dev/sdb "
+            "rw,space_cache,subvolid=5,subvol=/\n"
+            "91 59 0:45 /share1 /mnt2/share1 ro,relatime shared:41 - btrfs "
+            "/dev/sdb rw,space_cache,subvolid=258,subvol=/share1\n"
+            "92 59 0:24 / /run rw,nosuid,nodev shared:5 - tmpfs tmpfs rw,mode=755\n"
+            "truncated line\n"
+        )
+        fd, mountinfo_file = mkstemp()
+        self.addCleanup(os.remove, mountinfo_file)
+        with os.fdopen(fd, "w") as mfo:
+            mfo.write(mountinfo)
+        table = MountTable(mountinfo_file)
+        with patch("system.osi._mount_table", table):
+            self.assertEqual(mount_points(), {"/", "/mnt2/rock-pool", "/mnt2/share1"})
+            self.assertEqual(
+                mount_status("/mnt2/share1"),
+                "ro,relatime,space_cache,subvolid=258,subvol=/share1",
+            )
+            self.assertTrue(mount_status("/", return_boolean=True))
+            self.assertEqual(mount_status("/mnt2/share2"), "unmounted")
+            self.assertFalse(mount_status("/run", return_boolean=True))
+            self.assertEqual(dev_mount_point("/dev/sdb"), "/mnt2/rock-pool")
+            self.assertIsNone(dev_mount_point("/dev/sdc"))
+            with open(mountinfo_file, "a") as mfo:
+                mfo.write(
+                    "93 59 0:46 / /mnt2/share2 rw,relatime - btrfs /dev/sdc "
+                    "rw,subvolid=259\n"
+                )
+            # No change event (regular files never poll POLLPRI): index reused.
+            self.assertEqual(mount_status("/mnt2/share2"), "unmounted")
+            table.refresh(force=True)
+            self.assertEqual(mount_status("/mnt2/share2"), "rw,relatime,subvolid=259")
+            self.assertEqual(dev_mount_point("/dev/sdc"), "/mnt2/share2")
+
+    def test_mount_table_super_ro(self):
+        """
+        A mount whose super block is read only, ie a btrfs pool forced read
+        only on error, is reported read only despite its own "rw" option.
+        """
+        mountinfo = (
+            "90 59 0:45 / /mnt2/rock-pool rw,relatime shared:40 - btrfs /dev/sdb "
+            "ro,space_cache,subvolid=5,subvol=/\n"
+            "91 59 0:45 /share1 /mnt2/share1 ro,relatime shared:41 - btrfs "
+            "/dev/sdb ro,space_cache,subvolid=258,subvol=/share1\n"
+            "92 59 0:46 / /mnt2/pool2 rw,relatime shared:42 - btrfs /dev/sdc "
+            "rw,space_cache,subvolid=5,subvol=/\n"
+        )
+        fd, mountinfo_file = mkstemp()
+        self.addCleanup(os.remove, mountinfo_file)
+        with os.fdopen(fd, "w") as mfo:
+            mfo.write(mountinfo)
+        table = MountTable(mountinfo_file)
+        self.assertEqual(
+            table.options("/mnt2/rock-pool"),
+            "ro,relatime,space_cache,subvolid=5,subvol=/",
+        )
+        self.assertEqual(
+            table.options("/mnt2/share1"),
+            "ro,relatime,space_cache,subvolid=258,subvol=/share1",
+        )
+        self.assertEqual(
+            table.options("/mnt2/pool2"), "rw,relatime,space_cache,subvolid=5,subvol=/"
+        )
+
+    def test_mount_table_gevent(self):
+        """
+        Under gevent monkey patching MountTable watches via the original
+        select.poll(), as gevent's can't watch for POLLPRI.
+        """
+        native = Mock()
+        mock_monkey = Mock()
+        mock_monkey.is_module_patched.return_value = True
+        mock_monkey.get_original.return_value = native
+        fd, mountinfo_file = mkstemp()
+        self.addCleanup(os.remove, mountinfo_file)
+        os.close(fd)
+        table = MountTable(mountinfo_file)
+        with patch.dict("sys.modules", {"gevent.monkey": mock_monkey}):
+            table.refresh()
+        mock_monkey.get_original.assert_called_once_with("select", "poll")
+        self.assertIs(table.poller, native.return_value)
+        table.poller.register.assert_called_once_with(
+            table.fo, select.POLLPRI | select.POLLERR
+        )
+        table.fo.close()
+
 #     def test_mount_status(self):
 #         """
 #         Test mount_status with some real system data to assure expected output
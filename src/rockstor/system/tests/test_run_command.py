@@ -0,0 +1,91 @@
+"""
+Copyright (c) 2012-2023 RockStor, Inc. <http://rockstor.com>
+This file is part of RockStor.
+
+RockStor is free software; you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published
+by the Free Software Foundation; either version 2 of the License,
+or (at your option) any later version.
+
+RockStor is distributed in the hope that it will be useful, but
+WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program. If not, see <http://www.gnu.org/licenses/>.
+"""
+
+import time
+import unittest
+
+from django.conf import settings
+from mock import patch
+
+from system.exceptions import CommandException
+from system.osi import run_command, command_stats
+
+
+class RunCommandTests(unittest.TestCase):
+    """
+    Runs real, short lived, commands: echo, sh and sleep.
+    """
+
+    def setUp(self):
+        command_stats(reset=True)
+
+    def test_run_command_stats(self):
+        out, err, rc = run_command(["echo", "a\nb"])
+        self.assertEqual(out, ["a", "b", ""])
+        self.assertEqual(rc, 0)
+        run_command(["sh", "-c", "exit 3"], throw=False)
+        with self.assertRaises(CommandException):
+            run_command(["sh", "-c", "exit 3"])
+        stats = command_stats()
+        self.assertEqual(stats["echo"]["calls"], 1)
+        self.assertEqual(stats["sh"]["calls"], 2)
+        self.assertEqual(stats["sh"]["errors"], 2)
+        self.assertEqual(stats["sh"]["timeouts"], 0)
+        self.assertGreaterEqual(stats["sh"]["p95_time"], stats["sh"]["mean_time"])
+        command_stats(reset=True)
+        self.assertEqual(command_stats(), {})
+
+    def test_run_command_timeout(self):
+        out, err, rc = run_command(["sleep", "5"], throw=False, timeout=0.2)
+        self.assertEqual(rc, -9)
+        self.assertEqual(err[-1], "Command timed out after 0.2 seconds.")
+        self.assertEqual(command_stats()["sleep"]["timeouts"], 1)
+        # Per binary default, and timeout=0 overriding it.
+        timeouts = dict(settings.RUN_COMMAND["timeouts"], sleep=0.2)
+        with patch.dict(settings.RUN_COMMAND, {"timeouts": timeouts}):
+            with self.assertRaises(CommandException):
+                run_command(["sleep", "5"])
+            out, err, rc = run_command(["sleep", "0.3"], timeout=0)
+            self.assertEqual(rc, 0)
+
+    def test_run_command_timeout_children(self):
+        # A grandchild holding our pipes open is killed with the shell: we
+        # need not wait out the grace period for its EOF.
+        start = time.time()
+        with patch.dict(settings.RUN_COMMAND, {"grace": 5}):
+            out, err, rc = run_command(
+                ["sh", "-c", "echo a; sleep 5 & wait"], throw=False, timeout=0.2
+            )
+        self.assertLess(time.time() - start, 2)
+        self.assertEqual(rc, -9)
+        self.assertEqual(out, ["a", ""])
+        self.assertEqual(err[-1], "Command timed out after 0.2 seconds.")
+        # As is one that escaped the process group, by way of grace period.
+        start = time.time()
+        with patch.dict(settings.RUN_COMMAND, {"grace": 0.2}):
+            out, err, rc = run_command(
+                ["sh", "-c", "setsid sleep 2 & wait"], throw=False, timeout=0.2
+            )
+        self.assertLess(time.time() - start, 1.5)
+        self.assertEqual(rc, -9)
+
+    def test_run_command_input(self):
+        data = "x" * 200000 + "\n"
+        out, err, rc = run_command(["cat"], input=data, timeout=5)
+        self.assertEqual(out, ["x" * 200000, ""])
+        self.assertEqual(rc, 0)
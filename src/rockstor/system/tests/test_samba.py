@@ -0,0 +1,82 @@
+"""
+Copyright (c) 2012-2023 RockStor, Inc. <http://rockstor.com>
+This file is part of RockStor.
+
+RockStor is free software; you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published
+by the Free Software Foundation; either version 2 of the License,
+or (at your option) any later version.
+
+RockStor is distributed in the hope that it will be useful, but
+WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program. If not, see <http://www.gnu.org/licenses/>.
+"""
+import os
+import shutil
+import tempfile
+import unittest
+
+from mock import patch
+
+from system.samba import RS_SHARES_FOOTER, RS_SHARES_HEADER, refresh_smb_config
+
+GLOBAL_SECTION = "[global]\n    log level = 3\n\n"
+
+
+def shares_section(*names):
+    lines = ["{}\n".format(RS_SHARES_HEADER)]
+    for name in names:
+        lines.append("[{}]\n    path = /mnt2/{}\n".format(name, name))
+    lines.append("{}\n".format(RS_SHARES_FOOTER))
+    return "".join(lines)
+
+
+class SambaTests(unittest.TestCase):
+    """
+    The tests in this suite can be run via the following command:
+    cd <root dir of rockstor ie /opt/rockstor>
+    ./bin/test --settings=test-settings -v 3 -p test_samba*
+    """
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.smb_config = os.path.join(self.tmp_dir, "smb.conf")
+        with open(self.smb_config, "w") as sfo:
+            sfo.write(GLOBAL_SECTION + shares_section("share1"))
+        self.patch_smb_config = patch("system.samba.SMB_CONFIG", self.smb_config)
+        self.patch_smb_config.start()
+        self.patch_section = patch("system.samba.rockstor_smb_section")
+        self.mock_section = self.patch_section.start()
+        self.patch_test_parm = patch("system.samba.test_parm")
+        self.mock_test_parm = self.patch_test_parm.start()
+
+    def tearDown(self):
+        patch.stopall()
+        shutil.rmtree(self.tmp_dir)
+
+    def test_refresh_smb_config_unchanged(self):
+        """
+        An unchanged shares section leaves smb.conf untouched.
+        """
+        self.mock_section.return_value = shares_section("share1")
+        os.utime(self.smb_config, (0, 0))
+        self.assertFalse(refresh_smb_config([]))
+        self.mock_test_parm.assert_not_called()
+        self.assertEqual(os.stat(self.smb_config).st_mtime, 0)
+
+    def test_refresh_smb_config_changed(self):
+        """
+        A changed shares section is validated and replaces the existing one,
+        preserving the rest of smb.conf.
+        """
+        self.mock_section.return_value = shares_section("share1", "share2")
+        self.assertTrue(refresh_smb_config([]))
+        self.assertEqual(self.mock_test_parm.call_count, 1)
+        with open(self.smb_config) as sfo:
+            self.assertEqual(
+                sfo.read(), GLOBAL_SECTION + shares_section("share1", "share2")
+            )
@@ -13,10 +13,15 @@ You should have received a copy of the GNU General Public License
 along with this program. If not, see <http://www.gnu.org/licenses/>.
 """
 import unittest
-from mock import patch
+from mock import patch, MagicMock
 
 from system.exceptions import CommandException
-from system.network import get_dev_config, get_con_config
+from system.network import (
+    get_dev_config,
+    get_con_config,
+    nm_dev_config,
+    nm_con_config,
+)
 
 
 class SystemNetworkTests(unittest.TestCase):
@@ -732,3 +737,129 @@ class SystemNetworkTests(unittest.TestCase):
         )
         with self.assertRaises(CommandException):
             get_con_config(con_name)
+
+    def test_nm_dev_config(self):
+        """
+        Test nm_dev_config() returns the same config as get_dev_config() (see
+        test_get_dev_config), but from NetworkManager D-Bus objects.
+        """
+        objects = {
+            "/org/freedesktop/NetworkManager/Devices/2": {
+                "org.freedesktop.NetworkManager.Device": {
+                    "Interface": "enp0s3",
+                    "DeviceType": 1,
+                    "HwAddress": "08:00:27:AB:1C:C3",
+                    "Mtu": 1500,
+                    "State": 100,
+                    "ActiveConnection": "/org/freedesktop/NetworkManager/ActiveConnection/1",
+                },
+            },
+            "/org/freedesktop/NetworkManager/Devices/1": {
+                "org.freedesktop.NetworkManager.Device": {
+                    "Interface": "lo",
+                    "DeviceType": 14,
+                    "HwAddress": "00:00:00:00:00:00",
+                    "Mtu": 65536,
+                    "State": 10,
+                    "ActiveConnection": "/",
+                },
+                "org.freedesktop.NetworkManager.Device.Generic": {
+                    "TypeDescription": "loopback",
+                },
+            },
+            "/org/freedesktop/NetworkManager/ActiveConnection/1": {
+                "org.freedesktop.NetworkManager.Connection.Active": {
+                    "Id": "enp0s3",
+                    "Uuid": "c54ea011-0e23-43fa-8f06-23429b9ce714",
+                    "State": 2,
+                    "Ip4Config": "/org/freedesktop/NetworkManager/IP4Config/1",
+                },
+            },
+        }
+        expected_result = {
+            "enp0s3": {
+                "dtype": "ethernet",
+                "mac": "08:00:27:AB:1C:C3",
+                "mtu": "1500",
+                "state": "100 (connected)",
+                "connection": "enp0s3",
+            },
+            "lo": {
+                "dtype": "loopback",
+                "mac": "00:00:00:00:00:00",
+                "mtu": "65536",
+                "state": "10 (unmanaged)",
+            },
+        }
+        self.assertEqual(nm_dev_config(objects), expected_result)
+        self.mock_run_command.assert_not_called()
+
+    def test_nm_con_config(self):
+        """
+        Test nm_con_config() returns the same config as get_con_config(), for
+        an active ethernet connection, from NetworkManager D-Bus objects and
+        connection settings.
+        """
+        con_path = "/org/freedesktop/NetworkManager/Settings/1"
+        objects = {
+            con_path: {
+                "org.freedesktop.NetworkManager.Settings.Connection": {},
+            },
+            "/org/freedesktop/NetworkManager/ActiveConnection/1": {
+                "org.freedesktop.NetworkManager.Connection.Active": {
+                    "Id": "enp0s3",
+                    "Uuid": "c54ea011-0e23-43fa-8f06-23429b9ce714",
+                    "State": 2,
+                    "Ip4Config": "/org/freedesktop/NetworkManager/IP4Config/1",
+                },
+            },
+            "/org/freedesktop/NetworkManager/IP4Config/1": {
+                "org.freedesktop.NetworkManager.IP4Config": {
+                    "AddressData": [{"address": "192.168.1.14", "prefix": 24}],
+                    "Gateway": "192.168.1.1",
+                    "NameserverData": [{"address": "192.168.1.1"}],
+                },
+            },
+        }
+        settings = {
+            "connection": {
+                "id": "enp0s3",
+                "uuid": "c54ea011-0e23-43fa-8f06-23429b9ce714",
+                "type": "802-3-ethernet",
+            },
+            "802-3-ethernet": {
+                "mac-address": [8, 0, 39, 171, 28, 195],
+            },
+            "ipv4": {"method": "auto", "dns": [], "dns-search": []},
+        }
+        bus = MagicMock()
+        self.patch_interface = patch("system.network.dbus.Interface")
+        self.mock_interface = self.patch_interface.start()
+        self.mock_interface.return_value.GetSettings.return_value = settings
+        expected_result = {
+            "c54ea011-0e23-43fa-8f06-23429b9ce714": {
+                "name": "enp0s3",
+                "state": "activated",
+                "ipv4_method": "auto",
+                "ipv4_addresses": "192.168.1.14/24",
+                "ipv4_gw": "192.168.1.1",
+                "ipv4_dns": "192.168.1.1",
+                "ipv4_dns_search": None,
+                "ipv6_method": None,
+                "ipv6_addresses": None,
+                "ipv6_gw": None,
+                "ipv6_dns": None,
+                "ipv6_dns_search": None,
+                "ctype": "802-3-ethernet",
+                "802-3-ethernet": {
+                    "mac": "08:00:27:AB:1C:C3",
+                    "cloned_mac": None,
+                    "mtu": "auto",
+                },
+            },
+        }
+        self.assertEqual(nm_con_config(bus, objects), expected_result)
+        bus.get_object.assert_called_once_with(
+            "org.freedesktop.NetworkManager", con_path
+        )
+        self.mock_run_command.assert_not_called()
@@ -62,6 +62,19 @@ IFP_CONSTANTS = {
 }
 
 
+def decode_name(name):
+    """
+    Decode a user or group name as returned by pwd/grp or getent. Names are
+    near universally utf-8 (or ascii) so chardet, which is comparatively
+    slow, is only consulted when utf-8 decoding fails.
+    """
+    try:
+        return name.decode("utf-8")
+    except UnicodeDecodeError:
+        charset = chardet.detect(name)
+        return name.decode(charset["encoding"])
+
+
 # this is a hack for AD to get as many users as possible within 90 seconds.  If
 # there are several thousands of domain users and AD isn't that fast, winbind
 # takes a long time to enumerate the users for getent. Subsequent queries
@@ -96,8 +109,7 @@ def get_users(max_wait=90):
         for u in uf[:-1]:
             ufields = u.split(":")
             if len(ufields) > 3:
-                charset = chardet.detect(ufields[0])
-                uname = ufields[0].decode(charset["encoding"])
+                uname = decode_name(ufields[0])
                 users[uname] = (int(ufields[2]), int(ufields[3]), str(ufields[6]))
             if time.time() - t0 > max_wait:
                 p.terminate()
@@ -111,8 +123,7 @@ def get_groups(*gids):
         for g in gids:
             try:
                 entry = grp.getgrgid(g)
-                charset = chardet.detect(entry.gr_name)
-                gr_name = entry.gr_name.decode(charset["encoding"])
+                gr_name = decode_name(entry.gr_name)
                 groups[gr_name] = entry.gr_gid
             except KeyError:
                 # The block above can sometimes fail for domain users (AD/LDAP)
@@ -130,8 +141,7 @@ def get_groups(*gids):
                 )
     else:
         for g in grp.getgrall():
-            charset = chardet.detect(g.gr_name)
-            gr_name = g.gr_name.decode(charset["encoding"])
+            gr_name = decode_name(g.gr_name)
             groups[gr_name] = g.gr_gid
 
         # If sssd.service is running:
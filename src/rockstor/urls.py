@@ -61,6 +61,7 @@ from storageadmin.views import (
     PincardView,
     UpdateSubscriptionListView,
     RockOnView,
+    BatchView,
 )
 import os.path
 
@@ -152,4 +153,6 @@ urlpatterns = [
     url(
         r"^api/update-subscriptions/", include("storageadmin.urls.update_subscription")
     ),
+    # Several api calls in one round trip, see cli.api_wrapper.APIWrapper.batch()
+    url(r"^api/batch$", BatchView.as_view()),
 ]